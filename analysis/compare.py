@@ -1,1097 +1,1772 @@
-from dataclasses import dataclass
-from typing import List, Literal
-from pprint import pprint
-import json
-import os
-import re
-import numpy as np
-import yaml
-import xml.etree.ElementTree as ET
-import matplotlib.pyplot as plt
-
-
-script_dir = os.path.dirname(os.path.abspath(__file__))
-
-with open(os.path.join(script_dir, "reference-files", "X86.json"), "r", encoding="utf-8") as f:
-    data = json.load(f)
-data = {
-    key: value for key, value in data.items() if key != "!instanceof" and isinstance(value, dict)
-}  # remove large first key
-llvm_instructions = {key: value for key, value in data.items() if "Instruction" in value["!superclasses"]}
-llvm_DAGOperands = {key: value for key, value in data.items() if "DAGOperand" in value["!superclasses"]}
-
-# some reasons for missing matches with uops data:
-# IMUL8r cannot be matched as LLVM thinks AL is set by the instruction?
-# VPDPBSSDSZr / vpdpbssds uops doesnt know this with zmm?
-# VDIVPDZ128rrk uops doesnt have all operand combinations
-
-debug = False
-
-
-def _debug(msg, level=0):
-    for _ in range(level):
-        msg = "  " + msg
-    if debug:
-        print(msg)
-
-
-# expand one or more reg classes recursively to a list of registes
-def expand_regs(regs: list | str):
-    global llvm_DAGOperands
-    _debug(f"expanding {regs}")
-
-    result_regs = []
-    if isinstance(regs, str):
-        regs = [regs]
-    for reg in regs:
-        # weird llvm class
-        if reg == "GR16orGR32orGR64":
-            result_regs += expand_regs(["GR16"])
-        if reg == "GR32orGR64":
-            result_regs += expand_regs(["GR32"])
-        if not reg in llvm_DAGOperands.keys():
-            result_regs.append(reg)
-            continue
-        llvm_reg_class = llvm_DAGOperands[reg]
-        if not "MemberList" in llvm_reg_class.keys():
-            result_regs.append(reg)  # this not a register class
-            continue
-        if "%u" in str(llvm_reg_class["MemberList"]["args"]):
-            # pattern for registers
-            members = llvm_reg_class["MemberList"]["args"]
-            base: str = members[0][0]
-            # members has pattern and range of numbers to put in pattern
-            result_regs += [base.replace("%u", str(i)) for i in range(members[1][0], members[2][0])]
-        else:
-            # normal list of registers/registerclasses
-            result_regs += expand_regs([arg[0]["def"] for arg in llvm_reg_class["MemberList"]["args"]])
-    # _debug(str(list(set(result_regs))[:5]) + "...")
-    return list(set(result_regs))
-
-
-def is_same_asm_name(llvm_asm: str, uops_asm: str):
-    _debug(f"{llvm_asm}, {uops_asm}")
-    # llvm names have those "AsmString": "{cbtw|cbw}", select second variant
-    try:
-        if llvm_asm[0] == "{":
-            llvm_asm = llvm_asm[max(llvm_asm.find("|"), llvm_asm.find("{")) : llvm_asm.find("}")]
-        else:
-            indices = (
-                llvm_asm.find(" "),
-                llvm_asm.find("|"),
-                llvm_asm.find("{"),
-                llvm_asm.find("}"),
-                llvm_asm.find("\t"),
-            )
-
-            positiveIndices = [i for i in indices if i != -1]
-            if positiveIndices and min(positiveIndices) != -1:
-                llvm_asm = llvm_asm[0 : min(positiveIndices)]
-
-        llvm_asm = llvm_asm.upper()
-    except RuntimeError as e:
-        print("isSameAsmName: Error encountered")
-        return False
-
-    # there are things like {load} CMP in uops
-    start = uops_asm.find("{")
-    end = uops_asm.find("}")
-    uops_asm = uops_asm.removeprefix(uops_asm[start : end + 1]).strip()
-    _debug(f"after process {llvm_asm}, {uops_asm}")
-    if llvm_asm != uops_asm:
-        return False
-    return True
-
-
-@dataclass
-class Operand:
-    index: int
-    type: Literal["reg", "imm", "flags"]
-    width: int
-    read: bool
-    write: bool
-    suppressed: bool
-    regList: list
-
-    # note that the index is not relevant when comparing operands as it cannot be guaranteed
-    # to be the same for an instruction parsed from uops and one parsed from LLVM
-    def __eq__(self, value):
-        if not isinstance(value, Operand):
-            return NotImplemented
-        return (
-            self.type == value.type
-            and self.read == value.read
-            and self.write == value.write
-            and self.width == value.width
-            and self.suppressed == value.suppressed
-            # reg lists dont have to match exactly, but make sure if one has exactly one register the other has, too
-            # as those are instructions as XOR AL, I8
-            and not ((len(self.regList) != len(value.regList)) and (len(self.regList) == 1 or len(value.regList) == 1))
-        )
-
-
-@dataclass
-class Latency:
-    startOpIndex: int
-    targetOpIndex: int
-    cyclesMin: int
-    cyclesMax: int
-
-
-@dataclass
-class Instruction:
-    asmName: str
-    operands: List[Operand]
-    throughput_lower: float
-    throughput_upper: float
-    latencies: List[Latency]
-    uopsName: str
-    roundc: bool  # AVX512 roundc
-
-
-def parse_uops_operand(op: ET.Element) -> Operand:
-    index = int(op.attrib["idx"]) if "idx" in op.attrib else None
-    type = op.attrib["type"] if "type" in op.attrib else None
-    if index is None:
-        return None
-    if type not in ["reg", "imm", "flags"]:
-        return None
-
-    read = bool(int(op.attrib.get("r", "0")))
-    write = bool(int(op.attrib.get("w", "0")))
-    suppressed = bool(int(op.attrib.get("suppressed", "0")))
-
-    if op.text == "0" or op.text == 1:
-        return None  # ignore fixed immediates
-    if op.text is not None:
-        regList = op.text.split(",")
-    elif type == "flags":
-        regList = ["EFLAGS"]
-    else:
-        regList = []
-
-    if len(regList) == 1:
-        # for some reason fixed registers dont have a width in uops database :(
-        width = get_register_width(regList[0])
-    else:
-        width = int(op.attrib["width"]) if "width" in op.attrib else None
-    return Operand(index, type, width, read, write, suppressed, regList)
-
-
-def parse_uops_latency(lat: ET.Element) -> Latency:
-    try:
-        startOp = int(lat.attrib["start_op"])
-        targetOp = int(lat.attrib["target_op"])
-        cycles = int(lat.attrib["cycles"])
-    except KeyError:
-        # happens e.g. on latency values regarding memory
-        return None
-    return Latency(startOp, targetOp, cycles, cycles)
-
-
-def parse_uops_instruction(entry: ET.Element, arch: str):
-    if (
-        (u_arch := entry.find(f"architecture[@name='{arch}']")) is None
-        or (u_operands := entry.findall("operand")) is None
-        or (u_m := u_arch.find("measurement")) is None
-        or (u_lat := u_m.findall("latency")) is None
-    ):
-        return None
-    operands = [parse_uops_operand(op) for op in u_operands]
-    if None in operands:
-        return None  # cannot parse all operands
-    latencies = [parse_uops_latency(lat) for lat in u_lat]
-    try:
-        throughput = float(u_m.attrib["TP_loop"])
-        uopsAsm = entry.attrib["asm"]
-    except KeyError:
-        return None
-    uopsName = entry.attrib["string"] if "string" in entry.attrib else ""
-    roundc = bool(int(entry.attrib["roundc"])) if "roundc" in entry.attrib else False
-
-    return Instruction(uopsAsm, operands, throughput, throughput, latencies, uopsName, roundc)
-
-
-def parse_uops_database(arch: str) -> List[Instruction]:
-    root = ET.parse(os.path.join(script_dir, "reference-files", "uops.xml"))
-    u_instrNodes = root.findall(f".//instruction")
-    instructions = []
-    for entry in u_instrNodes:
-        inst = parse_uops_instruction(entry, arch)
-        if inst is not None:
-            instructions.append(inst)
-    return instructions
-
-
-# AI
-def get_other_constraint_side(constraint: str, op: str) -> str | None:
-    parts = [part.strip().strip("$") for part in constraint.split("=")]
-    if len(parts) != 2:
-        return None  # malformed constraint
-    if op == parts[0]:
-        return parts[1]
-    if op == parts[1]:
-        return parts[0]
-    return None  # op not found
-
-
-# return all identifiers in constraints without $ e.g. $dst = $src0 -> ["dst", "src0"]
-def get_constraints_items(constraint: str):
-    parts = [part.strip().strip("$") for part in constraint.split("=")]
-    return parts
-
-
-def get_immidiate_width(imm: str):
-    matches = re.findall(r"\d+", imm)
-    return int(matches[-1]) if matches else None
-
-
-def get_register_width(reg_name: str) -> int | None:
-    """Return the bit-width of the given LLVM register name for x86.
-
-    Returns:
-        int: Width in bits, or None if unknown.
-    """
-    # AI generated
-    # Normalize name (in case someone passes lowercase)
-    reg = reg_name.upper()
-
-    # Specific register widths
-    known_widths = {
-        # FLAGS
-        "EFLAGS": None,  # 32,
-        "RFLAGS": 64,
-        "MXCSR": 32,
-        # IP registers
-        "IP": 16,
-        "EIP": 32,
-        "RIP": 64,
-        # Segment registers
-        "CS": 16,
-        "DS": 16,
-        "ES": 16,
-        "FS": 16,
-        "GS": 16,
-        "SS": 16,
-        # Base addresses
-        "FS_BASE": 64,
-        "GS_BASE": 64,
-        "SSP": 64,
-        # MMX
-        **{f"MM{i}": 64 for i in range(8)},
-        # "MM0": 64, "MM1": 64, "MM2": 64, "MM3": 64, "MM4": 64, "MM5": 64, "MM6": 64, "MM7": 64,
-        # FPU registers
-        "ST0": 80,
-        "ST1": 80,
-        "ST2": 80,
-        "ST3": 80,
-        "ST4": 80,
-        "ST5": 80,
-        "ST6": 80,
-        "ST7": 80,
-        "FP0": 80,
-        "FP1": 80,
-        "FP2": 80,
-        "FP3": 80,
-        "FP4": 80,
-        "FP5": 80,
-        "FP6": 80,
-        "FP7": 80,
-        "FPCW": 16,
-        "FPSW": 16,
-        # AVX mask registers
-        **{f"K{i}": 64 for i in range(8)},
-        # Debug & control registers (assume full machine word)
-        # **{f"DR{i}": 64 for i in range(16)},
-        **{f"CR{i}": 64 for i in range(16)},
-        # # Tile registers (AMX)
-        # **{f"TMM{i}": 8192 for i in range(8)},
-        # "TMMCFG": 64,
-    }
-
-    # If it's directly known
-    if reg in known_widths:
-        return known_widths[reg]
-    k_regs = {f"K{i}": 64 for i in range(8)}
-    if reg in k_regs:
-        return 64
-
-    # Register suffix patterns
-    if reg.endswith("B"):  # 8-bit (low)
-        return 8
-    if reg.endswith("BH"):  # 8-bit (high byte)
-        return 8
-    if reg.endswith("L"):  # 8-bit (low byte)
-        return 8
-    if reg.endswith("H"):  # High byte (usually 8-bit)
-        if len(reg) <= 3:  # AH, BH, etc.
-            return 8
-        if reg.endswith("WH"):  # e.g. R10WH
-            return 16
-        return 8
-    if reg.endswith("W"):  # 16-bit
-        return 16
-    if reg in {"AX", "BX", "CX", "DX", "SI", "DI", "SP", "BP", "IP"}:
-        return 16
-    if reg.endswith("D"):  # 32-bit
-        return 32
-    if reg.startswith("E") and len(reg) == 3:  # EAX, EBX, etc.
-        return 32
-    if reg.startswith("R") and reg[1:].isdigit():  # R8, R10, etc.
-        return 64
-    if reg.startswith("R") and len(reg) >= 3 and reg[2] not in "BDWH":  # RAX, RBP, etc.
-        return 64
-    if reg in {"RAX", "RBX", "RCX", "RDX", "RSI", "RDI", "RSP", "RBP"}:
-        return 64
-
-    # SIMD vector registers
-    if reg.startswith("XMM"):
-        return 128
-    if reg.startswith("YMM"):
-        return 256
-    if reg.startswith("ZMM"):
-        return 512
-
-    # print(f"unhandled register: {reg_name}")
-    return None  # Unknown
-
-
-def identify_LLVM_operand(opName):
-    if opName == "EFLAGS":
-        return ("flags", None)
-    if opName in llvm_DAGOperands:
-        operand = llvm_DAGOperands[opName]
-        if "OperandType" in operand and operand["OperandType"] == "OPERAND_IMMEDIATE":
-            return ("imm", get_immidiate_width(opName))
-        registers = expand_regs(opName)
-    else:
-        registers = [opName]
-
-    return ("reg", get_register_width(registers[0]))
-
-
-def parse_LLVM_instruction(LLVMName) -> Instruction:
-    global llvm_DAGOperands
-    global llvm_instructions
-    # idk why some are missing
-    if LLVMName not in llvm_instructions:
-        return None
-
-    inst = llvm_instructions[LLVMName]
-    inOperandList = inst["InOperandList"]["args"]
-    outOperandList = inst["OutOperandList"]["args"]
-    constraints: str = inst["Constraints"]
-    defs = inst["Defs"]
-    uses = inst["Uses"]
-    # convert operands
-    operandList: List[Operand] = []
-    index = 1
-    roundc = False
-
-    for op in outOperandList:
-        if op[1] == "MXCSR":  # uops handles this as a flag, so we dont need it
-            continue
-        if op[0]["def"] == "AVX512RC":  # llvm has this as operand, uops as flag
-            roundc = True
-            continue
-        type, width = identify_LLVM_operand(op[0]["def"])
-        if type is None:
-            return None
-        elif type == "imm":
-            operand = Operand(index, type, width, False, True, False, [])
-        else:
-            operand = Operand(index, type, width, False, True, False, expand_regs(op[0]["def"]))
-        operandList.append(operand)
-        index += 1
-    for op in inOperandList:
-        if op[1] == "MXCSR":  # uops handles this as a flag, so we dont need it
-            continue
-        if op[0]["def"] == "AVX512RC":  # llvm has this as operand, uops as flag
-            roundc = True
-            continue
-        # process constraints
-        wasConstrained = False
-        for constraint in constraints.split(","):
-            if op[1] is None:
-                print("op[1] None")
-                return None
-            if op[1] not in get_constraints_items(constraint):
-                continue
-            wasConstrained = True
-            # we have to set "read" to True in corresponding def
-            dstOp = get_other_constraint_side(constraint, op[1])
-            if dstOp is None:
-                continue
-            defIndex = next((i + 1 for i, defOp in enumerate(outOperandList) if defOp[1] == dstOp), None)
-            if defIndex is None:
-                return None
-            for operand in operandList:
-                if operand.index == defIndex:
-                    operand.read = True
-                    break
-        if wasConstrained:
-            continue  # do not have to add operand an additional time
-        type, width = identify_LLVM_operand(op[0]["def"])
-        if type is None:
-            return None
-        elif type == "imm":
-            operand = Operand(index, type, width, True, False, False, [])
-        else:
-            operand = Operand(index, type, width, True, False, False, expand_regs(op[0]["def"]))
-        operandList.append(operand)
-        index += 1
-
-    # process defs and uses
-    for d in defs:
-        opName = d["def"]
-        if opName == "MXCSR":  # uops handles this as a flag, so we dont need it
-            continue
-        type, width = identify_LLVM_operand(opName)
-        if type is None:
-            return None
-        write = True
-        read = True if d in uses else False
-        regList = [opName] if type == "reg" else []
-        if len(regList) == 0:
-            regList = ["EFLAGS"] if type == "flags" else []
-        # TODO this is not very good yet, there are other registers that are supressed but in here
-        suppressed = opName in ["EFLAGS"]
-        operand = Operand(index, type, width, read, write, suppressed, regList)
-        operandList.append(operand)
-        index += 1
-    for d in uses:
-        if d in defs:
-            continue  # already added
-        opName = d["def"]
-        if opName == "MXCSR":  # uops handles this as a flag, so we dont need it
-            continue
-        type, width = identify_LLVM_operand(opName)
-        if type is None:
-            return None
-        write = False
-        read = True
-        regList = [opName] if type == "reg" else []
-        if len(regList) == 0:
-            regList = ["EFLAGS"] if type == "flags" else []
-        suppressed = opName in ["EFLAGS"]  # TODO this is not very good yet
-        operand = Operand(index, type, width, read, write, suppressed, regList)
-        operandList.append(operand)
-        index += 1
-    return Instruction(inst["AsmString"], operandList, None, None, [], "", roundc)
-
-
-def parse_WINIC_instruction(dbEntry) -> Instruction:
-    instruction = parse_LLVM_instruction(dbEntry["llvmName"])
-    if instruction is None:
-        return None
-    instruction.throughput_lower = dbEntry.get("throughputMin", None)
-    instruction.throughput_upper = dbEntry.get("throughputMax", None)
-    operand_latencies = dbEntry.get("operandLatencies", {})
-    for lat in operand_latencies:
-        sourceOp: str = lat["sourceOperand"]
-        # if "ADC16ri" in dbEntry["llvmName"]:
-        #     print(lat)
-        #     print(lat["sourceOperand"])
-        #     exit(1)
-        targetOp = lat["targetOperand"]
-        if sourceOp.isnumeric():
-            sourceIndex = int(sourceOp) + 1  # uops counts from 1, winic from 0
-        else:
-            # need to find index generated for that operand by parse_LLVM_instruction
-            sourceIndex = next(
-                (op.index for op in instruction.operands if len(op.regList) == 1 and op.regList[0] == sourceOp), None
-            )
-        if targetOp.isnumeric():
-            targetIndex = int(targetOp) + 1  # uops counts from 1, winic from 0
-        else:
-            # need to find index generated for that operand by parse_LLVM_instruction
-            targetIndex = next(
-                (op.index for op in instruction.operands if len(op.regList) == 1 and op.regList[0] == targetOp), None
-            )
-        if "latencyMin" in lat and "latencyMax" in lat:
-            instruction.latencies.append(Latency(sourceIndex, targetIndex, lat["latencyMin"], lat["latencyMax"]))
-        else:
-            pprint(lat)  # database malformed
-            pprint(instruction, compact=True)
-            pprint(dbEntry, compact=True)
-            exit(1)
-    return instruction
-
-# set debug true, dbg instr. to LLVM Name and set uops name to check why two instrucions were not matched
-# debug = True
-dbgInstruction = ""
-dbgUopsInstructionString = ""
-# things that should match
-# VFMADD132PDZrb VFMADD132PD_ER (ZMM, ZMM, ZMM)
-# ADC16ri ADC (R16, I16)
-# VSCALEFSSZrr: VSCALEFSS (XMM, XMM, XMM)
-
-
-def is_same(uopsInst: Instruction, LLVMInst: Instruction):
-    global dbgInstruction
-    if dbgInstruction != "" and dbgUopsInstructionString not in uopsInst.uopsName:
-        return False
-    if not is_same_asm_name(LLVMInst.asmName, uopsInst.asmName):
-        if dbgInstruction != "":
-            print("name")
-            pprint(uopsInst, compact=True)
-            pprint(LLVMInst, compact=True)
-        return False
-    if len(uopsInst.operands) != len(LLVMInst.operands):
-        if dbgInstruction != "":
-            print("numOps")
-            pprint(uopsInst, compact=True)
-            pprint(LLVMInst, compact=True)
-        return False
-    if uopsInst.roundc != LLVMInst.roundc:
-        if dbgInstruction != "":
-            print("roundc")
-            pprint(uopsInst, compact=True)
-            pprint(LLVMInst, compact=True)
-        return False
-    # match operands
-    llvmOps = LLVMInst.operands.copy()
-    for op in uopsInst.operands:
-        for lOp in llvmOps:
-            if op == lOp:
-                llvmOps.remove(lOp)
-                break
-    if len(llvmOps) != 0:
-        if dbgInstruction != "":
-            print("not all operands covered")
-            pprint(uopsInst, compact=True)
-            pprint(LLVMInst, compact=True)
-        return False
-    return True
-
-
-@dataclass
-class Counters:
-    dbProgressC: int
-    dbEmptyValueC: int
-    internalErrorC: int
-    noMatchC: int
-    uniqueMatchSameValueC: int
-    multiMatchSameValueC: int
-    uniqueMatchDiffValueC: int
-    multiMatchDiffValueC: int
-    noUopsDataC: int
-
-
-# compare the results with uops data.
-def compare(database, type: Literal["lat", "tp"], arch: str) -> Counters:
-    # parse measured instructions
-    with open(database, "r") as file:
-        raw_content = file.read().replace("\t", "    ")  # Replace tabs with 4 spaces
-    db = yaml.safe_load(raw_content)
-    uops_instructions = parse_uops_database(arch)
-
-    c = Counters(0, 0, 0, 0, 0, 0, 0, 0, 0)
-    outputLines = []
-    if type == "tp":
-        for db_entry in db:
-            c.dbProgressC += 1
-            if c.dbProgressC % 1000 == 0:
-                print(c.dbProgressC)
-            if dbgInstruction != "" and db_entry["llvmName"] != dbgInstruction:
-                continue
-
-            m_cycles = db_entry["throughputMin"]
-            if m_cycles == None:
-                c.dbEmptyValueC += 1
-                continue
-            m_instr = parse_WINIC_instruction(db_entry)
-            if m_instr is None:
-                c.internalErrorC += 1
-                continue
-            llvm_name = db_entry["llvmName"]
-
-            m_cycles = m_instr.throughput_lower
-            # find uops instsruction
-            u_matches: List[Instruction] = []
-            for u_instr in uops_instructions:
-                if is_same(u_instr, m_instr):
-                    u_matches.append(u_instr)
-
-            if len(u_matches) == 0:
-                outputLines.append(f"{llvm_name}: no match, classify: noMatch\n")
-                c.noMatchC += 1
-            else:
-                # one or multiple matches
-                data_match = [
-                    0.92 * m_instr.throughput_lower <= u_instr.throughput_lower <= 1.09 * m_instr.throughput_upper
-                    for u_instr in u_matches
-                ]
-                _debug([(u_inst.throughput_lower, m_cycles) for u_inst in u_matches])
-                _debug(data_match)
-
-                if False in data_match:
-                    outputLines.append(
-                        f"{llvm_name}: {u_matches[0].uopsName} uops: {u_matches[0].throughput_lower}, WINIC: {m_cycles}, classify: differentVal(s)\n"
-                    )
-                    if len(data_match) == 1:
-                        c.uniqueMatchDiffValueC += 1
-                    else:
-                        c.multiMatchDiffValueC += 1
-
-                else:
-                    outputLines.append(
-                        f"{llvm_name}: {u_matches[0].uopsName} uops: {u_matches[0].throughput_lower}, WINIC: {m_cycles}, classify: matchingVal(s)\n"
-                    )
-                    if len(data_match) == 1:
-                        c.uniqueMatchSameValueC += 1
-                    else:
-                        c.multiMatchSameValueC += 1
-
-        with open(os.path.join(script_dir, "compareTP.log"), "w") as out_file:
-            out_file.writelines(outputLines)
-
-    if type == "lat":
-        for db_entry in db:
-            llvm_name = db_entry["llvmName"]
-            m_instr = parse_WINIC_instruction(db_entry)
-            if m_instr is None:
-                c.internalErrorC += 1
-                continue
-
-            c.dbProgressC += len(m_instr.latencies)
-            if c.dbProgressC % 1000 == 0:
-                print(c.dbProgressC)
-            # find uops inststruction
-            u_matches: List[Instruction] = []
-            for u_instr in uops_instructions:
-                if is_same(u_instr, m_instr):
-                    u_matches.append(u_instr)
-
-            if len(u_matches) == 0:
-                outputLines.append(f"{llvm_name}: no match, classify: noMatch\n")
-                for lat in m_instr.latencies:
-                    if lat.cyclesMin != None:
-                        c.noMatchC += 1
-                    else:
-                        c.dbEmptyValueC += 1
-
-                continue
-
-            # if u_instr.uopsName != "VDIVPD (XMM, K, XMM, XMM)":
-            #     continue
-            # one or multiple matches
-            for m_lat in m_instr.latencies:
-                if m_lat.cyclesMin == None:
-                    c.dbEmptyValueC += 1
-                    continue
-                data_match = []
-                for u_instr in u_matches:
-                    # find the corresponding latency value in the uops instruction
-                    # first get the actual operands
-                    try:
-                        m_src_op = next(op for op in m_instr.operands if op.index == m_lat.startOpIndex)
-                        m_dst_op = next(op for op in m_instr.operands if op.index == m_lat.targetOpIndex)
-                    except StopIteration:
-                        print("fatal error, latency result references an non-existing operand (unreachable)")
-                        pprint(m_instr)
-                        exit(1)
-
-                    # get all uops operands that could correspond to the current winic ones
-                    u_src_candidates = [op for op in u_instr.operands if op == m_src_op]
-                    u_dst_candidates = [op for op in u_instr.operands if op == m_dst_op]
-                    # select the correct candidate
-                    # if there are multiple operands that fulfill the == constraint TODO currently just fail
-                    if len(u_src_candidates) == 0 or len(u_dst_candidates) == 0:
-                        # this should never happen, unless the instructions were matched incorrectly
-                        print("alarm")
-                        exit(1)
-                    if len(u_src_candidates) > 1:
-                        # if there are multiple operands with same read/write/register combination,
-                        # we assume they are in the same order for both uops and winic database
-                        # therefore this is written in a way so it doesn't matter which indices the operands have, only that the order is right
-                        # all the operands with same properties from winic
-                        m_src_candidates = [op for op in m_instr.operands if op == m_src_op]
-                        # the index of the current operand in m_src_candidates
-                        m_index_in_list = next(i for i, op in enumerate(m_src_candidates) if op.index == m_src_op.index)
-                        # take the element at the same index from u_src_candidates
-                        u_src_op = u_src_candidates[m_index_in_list]
-                    else:
-                        u_src_op = u_src_candidates[0]
-                    if len(u_dst_candidates) > 1:
-                        m_dst_candidates = [op for op in m_instr.operands if op == m_dst_op]
-                        m_index_in_list = next(i for i, op in enumerate(m_dst_candidates) if op.index == m_dst_op.index)
-                        u_dst_op = u_dst_candidates[m_index_in_list]
-                    else:
-                        u_dst_op = u_dst_candidates[0]
-
-                    # extract the uops latency result
-                    try:
-                        u_lat = next(
-                            lat
-                            for lat in u_instr.latencies
-                            if lat.startOpIndex == u_src_op.index and lat.targetOpIndex == u_dst_op.index
-                        )
-                    except StopIteration:
-                        continue
-                    if m_lat.cyclesMin <= u_lat.cyclesMin and u_lat.cyclesMin <= m_lat.cyclesMax:
-                        data_match.append(True)
-                        outputLines.append(
-                            f"{llvm_name}: {u_instr.uopsName} {u_lat.startOpIndex} -> {u_lat.targetOpIndex} uops: {u_lat.cyclesMin}, WINIC: {m_lat.cyclesMin}-{m_lat.cyclesMax}, classify: sameVal\n"
-                        )
-                    else:
-                        data_match.append(False)
-                        outputLines.append(
-                            f"{llvm_name}: {u_instr.uopsName} {u_lat.startOpIndex} -> {u_lat.targetOpIndex} uops: {u_lat.cyclesMin}, WINIC: {m_lat.cyclesMin}-{m_lat.cyclesMax}, classify: differentVal\n"
-                        )
-                if len(data_match) == 0:
-                    c.noUopsDataC += 1
-                elif False in data_match:
-                    if len(data_match) == 1:
-                        c.uniqueMatchDiffValueC += 1
-                    else:
-                        c.multiMatchDiffValueC += 1
-
-                elif all(data_match):
-                    if len(data_match) == 1:
-                        c.uniqueMatchSameValueC += 1
-                    else:
-                        c.multiMatchSameValueC += 1
-
-        with open(os.path.join(script_dir, "compareLAT.log"), "w") as out_file:
-            out_file.writelines(outputLines)
-
-    print(f"{c.dbProgressC} total database entries")
-    print(f"{c.dbProgressC-c.dbEmptyValueC} entries have values")
-    print(f"{c.uniqueMatchSameValueC} values match with exactly one uops instruction")
-    print(f"{c.multiMatchSameValueC} values match with multiple uops instructions which all have the same value")
-    print(f"{c.multiMatchDiffValueC} values were matched with multiple uops instructions with different values")
-    print(f"{c.uniqueMatchDiffValueC} values don't match with uops data")
-    print(f"{c.noMatchC} values could not be matched with an instruction from uops")
-    print(f"{c.internalErrorC} internal errors occurred")
-    print(f"{c.noUopsDataC} values were matched but uops has no data")
-    total_matching = c.uniqueMatchSameValueC + c.multiMatchSameValueC
-    total_non_matching = c.uniqueMatchDiffValueC + c.multiMatchDiffValueC
-    print(
-        f"{(total_matching)*100/(total_matching+total_non_matching):.2f}% of values are the same (excluding missing matches)"
-    )
-    return c
-
-
-def count_ranges(database) -> int:
-    # parse measured instructions
-    with open(database, "r") as file:
-        raw_content = file.read().replace("\t", "    ")  # Replace tabs with 4 spaces
-    db = yaml.safe_load(raw_content)
-    tp_range_counter = 0
-    tp_exact_counter = 0
-    lat_range_counter = 0
-    lat_exact_counter = 0
-    for db_entry in db:
-        m_instr = parse_WINIC_instruction(db_entry)
-        if m_instr.throughput_lower != None:
-            if m_instr.throughput_lower != m_instr.throughput_upper:
-                tp_range_counter += 1
-            else:
-                tp_exact_counter += 1
-
-        for lat_entry in m_instr.latencies:
-            if lat_entry.cyclesMin != None:
-                if lat_entry.cyclesMin != lat_entry.cyclesMax:
-                    lat_range_counter += 1
-                else:
-                    lat_exact_counter += 1
-    print(f"{tp_range_counter=}")
-    print(f"{tp_exact_counter=}")
-    print(f"{lat_range_counter=}")
-    print(f"{lat_exact_counter=}")
-    print(f"proportion TP ranges: {tp_range_counter/(tp_range_counter+tp_exact_counter):.2f}")
-    print(f"proportion LAT ranges: {lat_range_counter/(lat_range_counter+lat_exact_counter):.2f}")
-
-
-def plotTP(values):
-    categories = [
-        "one match\nsame value",
-        "multiple matches\nall same value",
-        "multiple matches\ndifferent values",
-        "one match\ndifferent value",
-        "no match",
-    ]
-
-    def no_zero_autopct(pct):
-        return f"{pct:.1f}%" if pct > 0 else ""
-
-    if len(values) == 0:
-        vals = np.array([[3179.0, 1949.0], [39.0, 314.0], [258, 0]])
-    else:
-        vals = np.array([[values[0], values[1]], [values[2], values[3]], [values[4], 0]])
-
-    tab20c = plt.color_sequences["tab20c"]
-    outer_colors = [tab20c[i] for i in [8, 4, 17]]
-    inner_colors = [tab20c[i] for i in [9, 11, 7, 5, 17, 1]]
-    fig, ax = plt.subplots()  # figsize=(8, 6)
-    ax.set_position([0.25, 0.1, 0.6, 0.8])
-    size = 0.3
-    acc_wedges, _, _ = ax.pie(
-        vals.sum(axis=1),
-        radius=1 - size,
-        colors=outer_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.77,
-    )
-    wedges, _, _ = ax.pie(
-        vals.flatten(),
-        radius=1,
-        colors=inner_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.85,
-    )
-    ax.set(aspect="equal")  # keep the pie circular
-    ax.set(title="Comparison between WINIC and uops.info (Throughput)")
-    outer_legend = ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.5))
-    inner_legend = ax.legend(acc_wedges, ["total same value", "total different value"], bbox_to_anchor=(0.9, 0.4))
-    ax.add_artist(outer_legend)
-    ax.add_artist(inner_legend)
-    plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, "TP_chart.png"))
-
-
-def plotLAT(values):
-    categories = [
-        "same value",
-        "different values",
-        "no match",
-    ]
-
-    def no_zero_autopct(pct):
-        return f"{pct:.1f}%" if pct > 0 else ""
-
-    if len(values) == 0:
-        values = [9331, 1526, 413]
-
-    tab20c = plt.color_sequences["tab20c"]
-    outer_colors = [tab20c[i] for i in [8, 4, 17]]
-    fig, ax = plt.subplots()
-    ax.set_position([0.25, 0.1, 0.6, 0.8])
-    wedges, _, _ = ax.pie(
-        values,
-        colors=outer_colors,
-        wedgeprops=dict(edgecolor="w"),
-        autopct=no_zero_autopct,
-    )
-    ax.set(aspect="equal")  # keep the pie circular
-    ax.set(title="Comparison between WINIC and uops.info (Latency)")
-    ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.9))  #
-    plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, "LAT_chart.png"))
-
-
-def plotLAT2(values):
-    categories = [
-        "same value",
-        "different values",
-        "no match",
-    ]
-
-    def no_zero_autopct(pct):
-        return f"{pct:.1f}%" if pct > 0 else ""
-
-    if len(values) == 0:
-        values = [9331, 1526, 413]
-
-    tab20c = plt.color_sequences["tab20c"]
-    outer_colors = [tab20c[i] for i in [8, 4, 17]]
-    fig, ax = plt.subplots()
-    ax.set_position([0.25, 0.1, 0.6, 0.8])
-    wedges, _, _ = ax.pie(
-        values,
-        colors=outer_colors,
-        wedgeprops=dict(edgecolor="w"),
-        autopct=no_zero_autopct,
-    )
-    ax.set(aspect="equal")  # keep the pie circular
-    ax.set(title="Comparison between WINIC and uops.info (Latency)")
-    ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.9))  #
-    plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, "LAT_chart.png"))
-
-
-def plot_combined(lat: Counters, tp: Counters):
-    categoriesTP = [
-        "one match\nsame value",
-        "multiple matches\nall same value",
-        "multiple matches\ndifferent values",
-        "one match\ndifferent value",
-        # "no match",
-    ]
-
-    colors = [
-        "#91cf60",  # medium green
-        "#d9ef8b",  # light green
-        "#fee08b",  # yellow
-        "#fc8d59",  # orange
-        "grey",
-        "grey",
-    ]
-
-    def no_zero_autopct(pct):
-        return f"{pct:.1f}%" if pct > 0 else ""
-
-    tab20c = plt.color_sequences["tab20c"]
-
-    # inner_colors = [tab20c[i] for i in [8, 4, 17]]
-    # outer_colors = [tab20c[i] for i in [9, 11, 7, 5, 17, 1]]
-    inner_colors = ["#008000", "#ff0000", "grey"]
-    outer_colors = [
-        "#6fbe59",
-        "#bfffa7",
-        "#ffd8b3",
-        "#ff914d",
-        "grey",
-        "grey",
-    ]
-    # outer_colors = colors
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(11, 5))
-    ax1.set(aspect="equal")  # keep the pie circular
-    ax2.set(aspect="equal")  # keep the pie circular
-    ax1.set(title="Latency")
-    ax2.set(title="Throughput")
-    size = 0.3
-
-    # reference values are Zen4
-    if lat is None:
-        lat = np.array([[5871, 4275], [240, 494], [1345, 0]])
-    else:
-        lat = np.array(
-            [
-                [lat.uniqueMatchSameValueC, lat.multiMatchSameValueC],
-                [lat.multiMatchDiffValueC, lat.uniqueMatchDiffValueC],
-                [lat.noMatchC + lat.noUopsDataC, 0],
-            ]
-        )
-    if tp is None:
-        tp = np.array([[3173, 1950], [102, 256], [626, 0]])
-    else:
-        tp = np.array(
-            [
-                [tp.uniqueMatchSameValueC, tp.multiMatchSameValueC],
-                [tp.multiMatchDiffValueC, tp.uniqueMatchDiffValueC],
-                [tp.noMatchC + tp.noUopsDataC, 0],
-            ]
-        )
-    # plot LAT
-    acc_wedges, _, _ = ax1.pie(
-        lat.sum(axis=1),
-        radius=1 - size,
-        colors=inner_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.77,
-    )
-    wedges, _, _ = ax1.pie(
-        lat.flatten(),
-        radius=1,
-        colors=outer_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.85,
-    )
-
-    # plot TP
-    acc_wedges, _, _ = ax2.pie(
-        tp.sum(axis=1),
-        radius=1 - size,
-        colors=inner_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.77,
-    )
-    wedges, _, _ = ax2.pie(
-        tp.flatten(),
-        radius=1,
-        colors=outer_colors,
-        wedgeprops=dict(width=size, edgecolor="w"),
-        autopct=no_zero_autopct,
-        pctdistance=0.85,
-    )
-    outer_legend = ax1.legend(wedges, categoriesTP, bbox_to_anchor=(0.93, 0.7))
-    inner_legend = ax1.legend(acc_wedges, ["same value", "different value    ", "no match"], bbox_to_anchor=(0.93, 0.9))
-    ax1.add_artist(outer_legend)
-    ax1.add_artist(inner_legend)
-    plt.suptitle("Comparison between WINIC and uops.info")
-    plt.tight_layout()
-    plt.savefig(os.path.join(script_dir, "combined_chart.png"))
-
-
-def checkUnique():
-    root = ET.parse(os.path.join(script_dir, "reference-files", "uops.xml"))
-    instrNodes = root.findall(f".//instruction")
-    string_set = {}
-    for node in instrNodes:
-        string = node.attrib["string"]
-        if string in string_set.keys():
-            print(f"alarm {string}")
-        print(string)
-        string_set[string] = True
-
-
-# some available uops arches:
-# CNL, CLX, ICL TGL RKL ADL-P ZEN4
-def main(database, arch: str):
-    print("Processing Latency")
-    lat_res = compare(database, "lat", arch)
-    print("Processing Throughput")
-    tp_res = compare(database, "tp", arch)
-    plot_combined(lat_res, tp_res)
-
-
-def db_diff(database1, database2, tp, lat):
-    with open(database1, "r") as file:
-        raw_content = file.read().replace("\t", "    ")  # Replace tabs with 4 spaces
-    db1 = yaml.safe_load(raw_content)
-    with open(database2, "r") as file:
-        raw_content = file.read().replace("\t", "    ")  # Replace tabs with 4 spaces
-    db2 = yaml.safe_load(raw_content)
-    output = ""
-
-    for entry1 in db1:
-        instr1 = parse_WINIC_instruction(entry1)
-        instr2 = None
-        for entry2 in db2:
-            if entry2["llvmName"] == entry1["llvmName"]:
-                instr2 = parse_WINIC_instruction(entry2)
-                break
-        if instr2 == None:
-            output += entry1["llvmName"] + " missing in new data"
-            # entries1.insert(entry1)
-        else:
-            # compare
-            if tp:
-                if instr1.throughput_lower != instr2.throughput_lower:
-                    output += f"{entry1["llvmName"]} tpLower {instr1.throughput_lower} -> {instr2.throughput_lower}\n"
-                if instr1.throughput_upper != instr2.throughput_upper:
-                    output += f"{entry1["llvmName"]} tpUpper {instr1.throughput_upper} -> {instr2.throughput_upper}\n"
-            lat_map2 = {(l.startOpIndex, l.targetOpIndex): l for l in instr2.latencies}
-            if not lat:
-                continue
-            for lat1 in instr1.latencies:
-                key = (lat1.startOpIndex, lat1.targetOpIndex)
-                latString = f'{entry1["llvmName"]} ({lat1.startOpIndex} -> {lat1.targetOpIndex})'
-                if key not in lat_map2:
-                    output += latString + "missing\n"
-                else:
-                    if lat1.cyclesMin != lat_map2[key].cyclesMin:
-                        output += f"{latString} cyclesMin: {lat1.cyclesMin} -> {lat_map2[key].cyclesMin}\n"
-                    if lat1.cyclesMax != lat_map2[key].cyclesMax:
-                        output += f"{latString} cyclesMax: {lat1.cyclesMax} -> {lat_map2[key].cyclesMax}\n"
-    with open("analysis/diff.txt", "w") as f:
-        f.write(output)
-
-def count_uops_tp_vals(arch):
-    uops_instructions = parse_uops_database(arch)
-    print(f"parsed a total of {len(uops_instructions)} uops instructions")
-
-# main("data/zen4/genoa.yaml", "ZEN4")
-# main("build-genoa20/genoa.yaml", "ZEN4")
-# db_diff("data/zen4/genoa.yaml","build-genoa20/genoa.yaml", False, True)
-# db_diff("data/zen4/genoa.yaml", "build-genoa20/genoa.yaml", False, True)
-# plot_combined(None, None)
-# count_ranges("data/zen4/genoa.yaml")
-count_uops_tp_vals("ZEN4")
\ No newline at end of file
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Tuple
+from pprint import pprint
+import dataclasses
+import functools
+import csv
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import time
+import numpy as np
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader  # libyaml, much faster on large databases
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+import xml.etree.ElementTree as ET
+import matplotlib.pyplot as plt
+
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+uops_xml_path = os.path.join(script_dir, "reference-files", "uops.xml")
+
+x86_json_path = os.path.join(script_dir, "reference-files", "X86.json")
+
+# projections of the llvm-tblgen records, loaded on first use by load_tblgen()
+llvm_instructions: Dict[str, dict] | None = None
+llvm_DAGOperands: Dict[str, dict] | None = None
+
+# some reasons for missing matches with uops data:
+# IMUL8r cannot be matched as LLVM thinks AL is set by the instruction?
+# VPDPBSSDSZr / vpdpbssds uops doesnt know this with zmm?
+# VDIVPDZ128rrk uops doesnt have all operand combinations
+
+debug = False
+
+
+def _debug(msg, level=0):
+    for _ in range(level):
+        msg = "  " + msg
+    if debug:
+        print(msg)
+
+
+# bump this whenever the layout of cached objects changes
+CACHE_VERSION = 3
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_signature(path: str):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, file_digest(path))
+
+
+def _source_unchanged(path: str, signature) -> bool:
+    mtime, size, digest = signature
+    stat = os.stat(path)
+    if (stat.st_mtime_ns, stat.st_size) == (mtime, size):
+        return True
+    return stat.st_size == size and file_digest(path) == digest
+
+
+# caches consist of a header pickle describing the files they were derived from, followed by the payload.
+# mtime and size are checked first, the files are only hashed again if those changed (e.g. re-download)
+def load_cache(cache_path: str, sources: List[str]):
+    try:
+        with open(cache_path, "rb") as f:
+            header = pickle.load(f)
+            if header["version"] != CACHE_VERSION or len(header["sources"]) != len(sources):
+                return None
+            for source, signature in zip(sources, header["sources"]):
+                if not _source_unchanged(source, signature):
+                    _debug(f"{cache_path} is outdated")
+                    return None
+            return pickle.load(f)
+    except (OSError, EOFError, AttributeError, KeyError, TypeError, ValueError, pickle.UnpicklingError):
+        return None
+
+
+def store_cache(cache_path: str, sources: List[str], payload):
+    header = {"version": CACHE_VERSION, "sources": [_source_signature(source) for source in sources]}
+    # write to a temporary file first so an interrupted run never leaves a truncated cache behind
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def _project_def(arg):
+    return {"def": arg["def"]} if isinstance(arg, dict) and "def" in arg else arg
+
+
+# keep only the fields of an instruction record that parse_LLVM_instruction reads
+def _project_instruction(record: dict) -> dict:
+    return {
+        "InOperandList": {"args": [[_project_def(op[0]), op[1]] for op in record["InOperandList"]["args"]]},
+        "OutOperandList": {"args": [[_project_def(op[0]), op[1]] for op in record["OutOperandList"]["args"]]},
+        "Constraints": record["Constraints"],
+        "Defs": [_project_def(d) for d in record["Defs"]],
+        "Uses": [_project_def(u) for u in record["Uses"]],
+        "AsmString": record["AsmString"],
+    }
+
+
+# keep only the fields of a DAGOperand record that expand_regs and identify_LLVM_operand read
+def _project_DAGOperand(record: dict) -> dict:
+    return {key: record[key] for key in ("OperandType", "MemberList") if key in record}
+
+
+# the full X86.json dump is several hundred MB, so it is only parsed once and the projection is cached
+def load_tblgen():
+    global llvm_instructions, llvm_DAGOperands
+    if llvm_instructions is not None:
+        return llvm_instructions, llvm_DAGOperands
+    cache_path = os.path.join(script_dir, "reference-files", "X86.cache.pickle")
+    cached = load_cache(cache_path, [x86_json_path])
+    if cached is None:
+        print("parsing X86.json")
+        with open(x86_json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        instructions = {}
+        DAGOperands = {}
+        for key, value in data.items():
+            if key == "!instanceof" or not isinstance(value, dict):
+                continue
+            if "Instruction" in value["!superclasses"]:
+                instructions[key] = _project_instruction(value)
+            if "DAGOperand" in value["!superclasses"]:
+                DAGOperands[key] = _project_DAGOperand(value)
+        del data
+        cached = (instructions, DAGOperands)
+        store_cache(cache_path, [x86_json_path], cached)
+    llvm_instructions, llvm_DAGOperands = cached
+    return llvm_instructions, llvm_DAGOperands
+
+
+def _optional_array(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _optional_value(value: float):
+    if np.isnan(value):
+        return None
+    # the database writer prints whole numbers without a decimal point, so yaml loads them as int
+    return int(value) if value.is_integer() else value
+
+
+def _store_database_cache(cache_path: str, database: str, db: list):
+    mtime, size, digest = _source_signature(database)
+    latencies = [entry.get("operandLatencies", None) or [] for entry in db]
+    flat = [lat for entry_lats in latencies for lat in entry_lats]
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp_path,
+        version=CACHE_VERSION,
+        signature=np.array([mtime, size], dtype=np.int64),
+        digest=digest,
+        llvmName=np.array([entry["llvmName"] for entry in db], dtype=str),
+        name=np.array([entry.get("name", None) or "" for entry in db], dtype=str),
+        latency=_optional_array(entry.get("latency", None) for entry in db),
+        throughput=_optional_array(entry.get("throughput", None) for entry in db),
+        throughputMin=_optional_array(entry.get("throughputMin", None) for entry in db),
+        throughputMax=_optional_array(entry.get("throughputMax", None) for entry in db),
+        # latencies of entry i are latOffsets[i]:latOffsets[i + 1] in the flat arrays
+        latOffsets=np.cumsum([0] + [len(entry_lats) for entry_lats in latencies], dtype=np.int64),
+        latSource=np.array([lat["sourceOperand"] for lat in flat], dtype=str),
+        latTarget=np.array([lat["targetOperand"] for lat in flat], dtype=str),
+        latMin=_optional_array(lat["latencyMin"] for lat in flat),
+        latMax=_optional_array(lat["latencyMax"] for lat in flat),
+    )
+    os.replace(tmp_path, cache_path)
+
+
+# rebuilds the entries with the fields the analysis uses, the operand descriptions are not cached
+def _load_database_cache(cache_path: str, database: str) -> list | None:
+    try:
+        with np.load(cache_path) as cache:
+            if int(cache["version"]) != CACHE_VERSION:
+                return None
+            mtime, size = cache["signature"].tolist()
+            if not _source_unchanged(database, (mtime, size, str(cache["digest"]))):
+                _debug(f"{cache_path} is outdated")
+                return None
+            columns = {key: cache[key].tolist() for key in cache.files}
+    except (OSError, KeyError, ValueError):
+        return None
+    latencies = [
+        {"sourceOperand": src, "targetOperand": dst, "latencyMin": _optional_value(lo), "latencyMax": _optional_value(hi)}
+        for src, dst, lo, hi in zip(columns["latSource"], columns["latTarget"], columns["latMin"], columns["latMax"])
+    ]
+    offsets = columns["latOffsets"]
+    return [
+        {
+            "llvmName": llvmName,
+            "name": name,
+            "latency": _optional_value(columns["latency"][i]),
+            "operandLatencies": latencies[offsets[i] : offsets[i + 1]],
+            "throughput": _optional_value(columns["throughput"][i]),
+            "throughputMin": _optional_value(columns["throughputMin"][i]),
+            "throughputMax": _optional_value(columns["throughputMax"][i]),
+        }
+        for i, (llvmName, name) in enumerate(zip(columns["llvmName"], columns["name"]))
+    ]
+
+
+# load a WINIC result database. With cache a columnar .npz copy is kept next to the database so repeated
+# analyses skip YAML parsing
+def load_database(database: str, cache: bool = False) -> list:
+    cache_path = f"{database}.cache.npz"
+    if cache and (db := _load_database_cache(cache_path, database)) is not None:
+        return db
+    with open(database, "r") as file:
+        raw_content = file.read()
+    if "\t" in raw_content:
+        raw_content = raw_content.replace("\t", "    ")  # Replace tabs with 4 spaces
+    db = yaml.load(raw_content, Loader=YamlLoader)
+    if cache:
+        _store_database_cache(cache_path, database, db)
+    return db
+
+
+# expand one or more reg classes recursively to a tuple of registers
+def expand_regs(regs: list | tuple | str) -> Tuple[str, ...]:
+    if isinstance(regs, str):
+        return _expand_reg(regs)
+    result_regs = []
+    for reg in regs:
+        result_regs += _expand_reg(reg)
+    return tuple(dict.fromkeys(result_regs))
+
+
+# the same register classes show up in thousands of instructions, expand each of them only once
+@functools.lru_cache(maxsize=None)
+def _expand_reg(reg: str) -> Tuple[str, ...]:
+    load_tblgen()
+    _debug(f"expanding {reg}")
+
+    result_regs = []
+    # weird llvm class
+    if reg == "GR16orGR32orGR64":
+        result_regs += expand_regs("GR16")
+    if reg == "GR32orGR64":
+        result_regs += expand_regs("GR32")
+    if not reg in llvm_DAGOperands.keys():
+        result_regs.append(reg)
+        return tuple(dict.fromkeys(result_regs))
+    llvm_reg_class = llvm_DAGOperands[reg]
+    if not "MemberList" in llvm_reg_class.keys():
+        result_regs.append(reg)  # this not a register class
+        return tuple(dict.fromkeys(result_regs))
+    if "%u" in str(llvm_reg_class["MemberList"]["args"]):
+        # pattern for registers
+        members = llvm_reg_class["MemberList"]["args"]
+        base: str = members[0][0]
+        # members has pattern and range of numbers to put in pattern
+        result_regs += [base.replace("%u", str(i)) for i in range(members[1][0], members[2][0])]
+    else:
+        # normal list of registers/registerclasses
+        result_regs += expand_regs([arg[0]["def"] for arg in llvm_reg_class["MemberList"]["args"]])
+    # keep the order the registers were found in so the first one is the same on every run
+    return tuple(dict.fromkeys(result_regs))
+
+
+def normalize_llvm_asm_name(llvm_asm: str) -> str:
+    # llvm names have those "AsmString": "{cbtw|cbw}", select second variant
+    if llvm_asm[0] == "{":
+        llvm_asm = llvm_asm[max(llvm_asm.find("|"), llvm_asm.find("{")) : llvm_asm.find("}")]
+    else:
+        indices = (
+            llvm_asm.find(" "),
+            llvm_asm.find("|"),
+            llvm_asm.find("{"),
+            llvm_asm.find("}"),
+            llvm_asm.find("\t"),
+        )
+
+        positiveIndices = [i for i in indices if i != -1]
+        if positiveIndices and min(positiveIndices) != -1:
+            llvm_asm = llvm_asm[0 : min(positiveIndices)]
+
+    return llvm_asm.upper()
+
+
+def normalize_uops_asm_name(uops_asm: str) -> str:
+    # there are things like {load} CMP in uops
+    start = uops_asm.find("{")
+    end = uops_asm.find("}")
+    return uops_asm.removeprefix(uops_asm[start : end + 1]).strip()
+
+
+def is_same_asm_name(llvm_asm: str, uops_asm: str):
+    _debug(f"{llvm_asm}, {uops_asm}")
+    try:
+        llvm_asm = normalize_llvm_asm_name(llvm_asm)
+    except RuntimeError as e:
+        print("isSameAsmName: Error encountered")
+        return False
+
+    uops_asm = normalize_uops_asm_name(uops_asm)
+    _debug(f"after process {llvm_asm}, {uops_asm}")
+    if llvm_asm != uops_asm:
+        return False
+    return True
+
+
+@dataclass
+class Operand:
+    index: int
+    type: Literal["reg", "imm", "flags"]
+    width: int
+    read: bool
+    write: bool
+    suppressed: bool
+    regList: Tuple[str, ...]
+
+    # note that the index is not relevant when comparing operands as it cannot be guaranteed
+    # to be the same for an instruction parsed from uops and one parsed from LLVM
+    def __eq__(self, value):
+        if not isinstance(value, Operand):
+            return NotImplemented
+        return (
+            self.type == value.type
+            and self.read == value.read
+            and self.write == value.write
+            and self.width == value.width
+            and self.suppressed == value.suppressed
+            # reg lists dont have to match exactly, but make sure if one has exactly one register the other has, too
+            # as those are instructions as XOR AL, I8
+            and not ((len(self.regList) != len(value.regList)) and (len(self.regList) == 1 or len(value.regList) == 1))
+        )
+
+
+@dataclass
+class Latency:
+    startOpIndex: int
+    targetOpIndex: int
+    cyclesMin: int
+    cyclesMax: int
+
+
+@dataclass
+class Instruction:
+    asmName: str
+    operands: List[Operand]
+    throughput_lower: float
+    throughput_upper: float
+    latencies: List[Latency]
+    uopsName: str
+    roundc: bool  # AVX512 roundc
+
+
+def parse_uops_operand(op: ET.Element) -> Operand:
+    index = int(op.attrib["idx"]) if "idx" in op.attrib else None
+    type = op.attrib["type"] if "type" in op.attrib else None
+    if index is None:
+        return None
+    if type not in ["reg", "imm", "flags"]:
+        return None
+
+    read = bool(int(op.attrib.get("r", "0")))
+    write = bool(int(op.attrib.get("w", "0")))
+    suppressed = bool(int(op.attrib.get("suppressed", "0")))
+
+    if op.text == "0" or op.text == 1:
+        return None  # ignore fixed immediates
+    if op.text is not None:
+        regList = tuple(op.text.split(","))
+    elif type == "flags":
+        regList = ("EFLAGS",)
+    else:
+        regList = ()
+
+    if len(regList) == 1:
+        # for some reason fixed registers dont have a width in uops database :(
+        width = get_register_width(regList[0])
+    else:
+        width = int(op.attrib["width"]) if "width" in op.attrib else None
+    return Operand(index, type, width, read, write, suppressed, regList)
+
+
+def parse_uops_latency(lat: ET.Element) -> Latency:
+    try:
+        startOp = int(lat.attrib["start_op"])
+        targetOp = int(lat.attrib["target_op"])
+        cycles = int(lat.attrib["cycles"])
+    except KeyError:
+        # happens e.g. on latency values regarding memory
+        return None
+    return Latency(startOp, targetOp, cycles, cycles)
+
+
+def parse_uops_instruction(entry: ET.Element, arch: str):
+    if (
+        (u_arch := entry.find(f"architecture[@name='{arch}']")) is None
+        or (u_operands := entry.findall("operand")) is None
+        or (u_m := u_arch.find("measurement")) is None
+        or (u_lat := u_m.findall("latency")) is None
+    ):
+        return None
+    operands = [parse_uops_operand(op) for op in u_operands]
+    if None in operands:
+        return None  # cannot parse all operands
+    latencies = [parse_uops_latency(lat) for lat in u_lat]
+    try:
+        throughput = float(u_m.attrib["TP_loop"])
+        uopsAsm = entry.attrib["asm"]
+    except KeyError:
+        return None
+    uopsName = entry.attrib["string"] if "string" in entry.attrib else ""
+    roundc = bool(int(entry.attrib["roundc"])) if "roundc" in entry.attrib else False
+
+    return Instruction(uopsAsm, operands, throughput, throughput, latencies, uopsName, roundc)
+
+
+# yield every instruction node of uops.xml without building the whole tree. Nodes are cleared once the
+# caller is done with them so memory stays bounded by the size of a single instruction
+def iter_uops_xml():
+    for _, elem in ET.iterparse(uops_xml_path, events=("end",)):
+        if elem.tag == "instruction":
+            yield elem
+            elem.clear()
+        elif elem.tag == "extension":
+            elem.clear()  # drop the (already cleared) instruction nodes
+
+
+# parsed uops databases of this process, so the LAT and TP pass don't have to load them twice
+_uops_databases: Dict[str, List[Instruction]] = {}
+
+
+def _uops_cache_path(arch: str) -> str:
+    return os.path.join(script_dir, "reference-files", f"uops.{arch}.cache.pickle")
+
+
+# the caches hold plain tuples, pickled dataclasses would be bound to the module name they were defined under,
+# which is __main__ when compare.py runs as a script and compare when it is imported
+def _instruction_to_tuple(inst: Instruction) -> tuple:
+    return dataclasses.astuple(inst)
+
+
+def _instruction_from_tuple(fields: tuple) -> Instruction:
+    asmName, operands, throughput_lower, throughput_upper, latencies, uopsName, roundc = fields
+    return Instruction(
+        asmName,
+        [Operand(*op) for op in operands],
+        throughput_lower,
+        throughput_upper,
+        [Latency(*lat) for lat in latencies],
+        uopsName,
+        roundc,
+    )
+
+
+# every instruction node holds the measurements of all architectures, so the instructions of
+# all requested architectures that are not cached yet are extracted in a single pass over uops.xml
+def parse_uops_databases(arches: List[str]) -> Dict[str, List[Instruction]]:
+    missing = []
+    for arch in dict.fromkeys(arches):
+        if arch in _uops_databases:
+            continue
+        cached = load_cache(_uops_cache_path(arch), [uops_xml_path])
+        if cached is None:
+            missing.append(arch)
+        else:
+            _uops_databases[arch] = [_instruction_from_tuple(fields) for fields in cached]
+    if len(missing) > 0:
+        print(f"parsing uops.xml for {', '.join(missing)}")
+        parsed = {arch: [] for arch in missing}
+        for entry in iter_uops_xml():
+            for arch in missing:
+                inst = parse_uops_instruction(entry, arch)
+                if inst is not None:
+                    parsed[arch].append(inst)
+        for arch, instructions in parsed.items():
+            store_cache(_uops_cache_path(arch), [uops_xml_path], [_instruction_to_tuple(i) for i in instructions])
+            _uops_databases[arch] = instructions
+    return {arch: _uops_databases[arch] for arch in arches}
+
+
+def parse_uops_database(arch: str) -> List[Instruction]:
+    return parse_uops_databases([arch])[arch]
+
+
+# AI
+def get_other_constraint_side(constraint: str, op: str) -> str | None:
+    parts = [part.strip().strip("$") for part in constraint.split("=")]
+    if len(parts) != 2:
+        return None  # malformed constraint
+    if op == parts[0]:
+        return parts[1]
+    if op == parts[1]:
+        return parts[0]
+    return None  # op not found
+
+
+# return all identifiers in constraints without $ e.g. $dst = $src0 -> ["dst", "src0"]
+def get_constraints_items(constraint: str):
+    parts = [part.strip().strip("$") for part in constraint.split("=")]
+    return parts
+
+
+def get_immidiate_width(imm: str):
+    matches = re.findall(r"\d+", imm)
+    return int(matches[-1]) if matches else None
+
+
+@functools.lru_cache(maxsize=None)
+def get_register_width(reg_name: str) -> int | None:
+    """Return the bit-width of the given LLVM register name for x86.
+
+    Returns:
+        int: Width in bits, or None if unknown.
+    """
+    # AI generated
+    # Normalize name (in case someone passes lowercase)
+    reg = reg_name.upper()
+
+    # Specific register widths
+    known_widths = {
+        # FLAGS
+        "EFLAGS": None,  # 32,
+        "RFLAGS": 64,
+        "MXCSR": 32,
+        # IP registers
+        "IP": 16,
+        "EIP": 32,
+        "RIP": 64,
+        # Segment registers
+        "CS": 16,
+        "DS": 16,
+        "ES": 16,
+        "FS": 16,
+        "GS": 16,
+        "SS": 16,
+        # Base addresses
+        "FS_BASE": 64,
+        "GS_BASE": 64,
+        "SSP": 64,
+        # MMX
+        **{f"MM{i}": 64 for i in range(8)},
+        # "MM0": 64, "MM1": 64, "MM2": 64, "MM3": 64, "MM4": 64, "MM5": 64, "MM6": 64, "MM7": 64,
+        # FPU registers
+        "ST0": 80,
+        "ST1": 80,
+        "ST2": 80,
+        "ST3": 80,
+        "ST4": 80,
+        "ST5": 80,
+        "ST6": 80,
+        "ST7": 80,
+        "FP0": 80,
+        "FP1": 80,
+        "FP2": 80,
+        "FP3": 80,
+        "FP4": 80,
+        "FP5": 80,
+        "FP6": 80,
+        "FP7": 80,
+        "FPCW": 16,
+        "FPSW": 16,
+        # AVX mask registers
+        **{f"K{i}": 64 for i in range(8)},
+        # Debug & control registers (assume full machine word)
+        # **{f"DR{i}": 64 for i in range(16)},
+        **{f"CR{i}": 64 for i in range(16)},
+        # # Tile registers (AMX)
+        # **{f"TMM{i}": 8192 for i in range(8)},
+        # "TMMCFG": 64,
+    }
+
+    # If it's directly known
+    if reg in known_widths:
+        return known_widths[reg]
+    k_regs = {f"K{i}": 64 for i in range(8)}
+    if reg in k_regs:
+        return 64
+
+    # Register suffix patterns
+    if reg.endswith("B"):  # 8-bit (low)
+        return 8
+    if reg.endswith("BH"):  # 8-bit (high byte)
+        return 8
+    if reg.endswith("L"):  # 8-bit (low byte)
+        return 8
+    if reg.endswith("H"):  # High byte (usually 8-bit)
+        if len(reg) <= 3:  # AH, BH, etc.
+            return 8
+        if reg.endswith("WH"):  # e.g. R10WH
+            return 16
+        return 8
+    if reg.endswith("W"):  # 16-bit
+        return 16
+    if reg in {"AX", "BX", "CX", "DX", "SI", "DI", "SP", "BP", "IP"}:
+        return 16
+    if reg.endswith("D"):  # 32-bit
+        return 32
+    if reg.startswith("E") and len(reg) == 3:  # EAX, EBX, etc.
+        return 32
+    if reg.startswith("R") and reg[1:].isdigit():  # R8, R10, etc.
+        return 64
+    if reg.startswith("R") and len(reg) >= 3 and reg[2] not in "BDWH":  # RAX, RBP, etc.
+        return 64
+    if reg in {"RAX", "RBX", "RCX", "RDX", "RSI", "RDI", "RSP", "RBP"}:
+        return 64
+
+    # SIMD vector registers
+    if reg.startswith("XMM"):
+        return 128
+    if reg.startswith("YMM"):
+        return 256
+    if reg.startswith("ZMM"):
+        return 512
+
+    # print(f"unhandled register: {reg_name}")
+    return None  # Unknown
+
+
+@functools.lru_cache(maxsize=None)
+def identify_LLVM_operand(opName):
+    if opName == "EFLAGS":
+        return ("flags", None)
+    load_tblgen()
+    if opName in llvm_DAGOperands:
+        operand = llvm_DAGOperands[opName]
+        if "OperandType" in operand and operand["OperandType"] == "OPERAND_IMMEDIATE":
+            return ("imm", get_immidiate_width(opName))
+        registers = expand_regs(opName)
+    else:
+        registers = [opName]
+
+    return ("reg", get_register_width(registers[0]))
+
+
+# the parsed instruction is cached, callers get a copy they can fill with measured values
+def parse_LLVM_instruction(LLVMName) -> Instruction:
+    template = _parse_LLVM_instruction(LLVMName)
+    if template is None:
+        return None
+    # operands are never modified after parsing so they can be shared between copies
+    return dataclasses.replace(template, operands=list(template.operands), latencies=list(template.latencies))
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_LLVM_instruction(LLVMName) -> Instruction:
+    load_tblgen()
+    # idk why some are missing
+    if LLVMName not in llvm_instructions:
+        return None
+
+    inst = llvm_instructions[LLVMName]
+    inOperandList = inst["InOperandList"]["args"]
+    outOperandList = inst["OutOperandList"]["args"]
+    constraints: str = inst["Constraints"]
+    defs = inst["Defs"]
+    uses = inst["Uses"]
+    # convert operands
+    operandList: List[Operand] = []
+    index = 1
+    roundc = False
+
+    for op in outOperandList:
+        if op[1] == "MXCSR":  # uops handles this as a flag, so we dont need it
+            continue
+        if op[0]["def"] == "AVX512RC":  # llvm has this as operand, uops as flag
+            roundc = True
+            continue
+        type, width = identify_LLVM_operand(op[0]["def"])
+        if type is None:
+            return None
+        elif type == "imm":
+            operand = Operand(index, type, width, False, True, False, ())
+        else:
+            operand = Operand(index, type, width, False, True, False, expand_regs(op[0]["def"]))
+        operandList.append(operand)
+        index += 1
+    for op in inOperandList:
+        if op[1] == "MXCSR":  # uops handles this as a flag, so we dont need it
+            continue
+        if op[0]["def"] == "AVX512RC":  # llvm has this as operand, uops as flag
+            roundc = True
+            continue
+        # process constraints
+        wasConstrained = False
+        for constraint in constraints.split(","):
+            if op[1] is None:
+                print("op[1] None")
+                return None
+            if op[1] not in get_constraints_items(constraint):
+                continue
+            wasConstrained = True
+            # we have to set "read" to True in corresponding def
+            dstOp = get_other_constraint_side(constraint, op[1])
+            if dstOp is None:
+                continue
+            defIndex = next((i + 1 for i, defOp in enumerate(outOperandList) if defOp[1] == dstOp), None)
+            if defIndex is None:
+                return None
+            for operand in operandList:
+                if operand.index == defIndex:
+                    operand.read = True
+                    break
+        if wasConstrained:
+            continue  # do not have to add operand an additional time
+        type, width = identify_LLVM_operand(op[0]["def"])
+        if type is None:
+            return None
+        elif type == "imm":
+            operand = Operand(index, type, width, True, False, False, ())
+        else:
+            operand = Operand(index, type, width, True, False, False, expand_regs(op[0]["def"]))
+        operandList.append(operand)
+        index += 1
+
+    # process defs and uses
+    for d in defs:
+        opName = d["def"]
+        if opName == "MXCSR":  # uops handles this as a flag, so we dont need it
+            continue
+        type, width = identify_LLVM_operand(opName)
+        if type is None:
+            return None
+        write = True
+        read = True if d in uses else False
+        regList = (opName,) if type == "reg" else ()
+        if len(regList) == 0:
+            regList = ("EFLAGS",) if type == "flags" else ()
+        # TODO this is not very good yet, there are other registers that are supressed but in here
+        suppressed = opName in ["EFLAGS"]
+        operand = Operand(index, type, width, read, write, suppressed, regList)
+        operandList.append(operand)
+        index += 1
+    for d in uses:
+        if d in defs:
+            continue  # already added
+        opName = d["def"]
+        if opName == "MXCSR":  # uops handles this as a flag, so we dont need it
+            continue
+        type, width = identify_LLVM_operand(opName)
+        if type is None:
+            return None
+        write = False
+        read = True
+        regList = (opName,) if type == "reg" else ()
+        if len(regList) == 0:
+            regList = ("EFLAGS",) if type == "flags" else ()
+        suppressed = opName in ["EFLAGS"]  # TODO this is not very good yet
+        operand = Operand(index, type, width, read, write, suppressed, regList)
+        operandList.append(operand)
+        index += 1
+    return Instruction(inst["AsmString"], operandList, None, None, [], "", roundc)
+
+
+def parse_WINIC_instruction(dbEntry) -> Instruction:
+    instruction = parse_LLVM_instruction(dbEntry["llvmName"])
+    if instruction is None:
+        return None
+    instruction.throughput_lower = dbEntry.get("throughputMin", None)
+    instruction.throughput_upper = dbEntry.get("throughputMax", None)
+    operand_latencies = dbEntry.get("operandLatencies", {})
+    for lat in operand_latencies:
+        sourceOp: str = lat["sourceOperand"]
+        # if "ADC16ri" in dbEntry["llvmName"]:
+        #     print(lat)
+        #     print(lat["sourceOperand"])
+        #     exit(1)
+        targetOp = lat["targetOperand"]
+        if sourceOp.isnumeric():
+            sourceIndex = int(sourceOp) + 1  # uops counts from 1, winic from 0
+        else:
+            # need to find index generated for that operand by parse_LLVM_instruction
+            sourceIndex = next(
+                (op.index for op in instruction.operands if len(op.regList) == 1 and op.regList[0] == sourceOp), None
+            )
+        if targetOp.isnumeric():
+            targetIndex = int(targetOp) + 1  # uops counts from 1, winic from 0
+        else:
+            # need to find index generated for that operand by parse_LLVM_instruction
+            targetIndex = next(
+                (op.index for op in instruction.operands if len(op.regList) == 1 and op.regList[0] == targetOp), None
+            )
+        if "latencyMin" in lat and "latencyMax" in lat:
+            instruction.latencies.append(Latency(sourceIndex, targetIndex, lat["latencyMin"], lat["latencyMax"]))
+        else:
+            pprint(lat)  # database malformed
+            pprint(instruction, compact=True)
+            pprint(dbEntry, compact=True)
+            exit(1)
+    return instruction
+
+
+# the counts are kept per process, the worker processes of a parallel compare are not included
+def print_memo_stats(jobs: int = 1):
+    if jobs != 1:
+        print("memoization of the main process, the matching in the worker processes is not counted:")
+    for name, cached in (
+        ("parse_LLVM_instruction", _parse_LLVM_instruction),
+        ("identify_LLVM_operand", identify_LLVM_operand),
+        ("expand_regs", _expand_reg),
+        ("get_register_width", get_register_width),
+    ):
+        info = cached.cache_info()
+        total = info.hits + info.misses
+        hitRate = f"{info.hits / total * 100:.1f}%" if total > 0 else "-"
+        print(f"{name}: {info.hits} hits, {info.misses} misses, {info.currsize} cached ({hitRate} hit rate)")
+
+
+# set debug true, dbg instr. to LLVM Name and set uops name to check why two instrucions were not matched
+# debug = True
+dbgInstruction = ""
+dbgUopsInstructionString = ""
+# things that should match
+# VFMADD132PDZrb VFMADD132PD_ER (ZMM, ZMM, ZMM)
+# ADC16ri ADC (R16, I16)
+# VSCALEFSSZrr: VSCALEFSS (XMM, XMM, XMM)
+
+
+def is_same(uopsInst: Instruction, LLVMInst: Instruction):
+    global dbgInstruction
+    if dbgInstruction != "" and dbgUopsInstructionString not in uopsInst.uopsName:
+        return False
+    if not is_same_asm_name(LLVMInst.asmName, uopsInst.asmName):
+        if dbgInstruction != "":
+            print("name")
+            pprint(uopsInst, compact=True)
+            pprint(LLVMInst, compact=True)
+        return False
+    if len(uopsInst.operands) != len(LLVMInst.operands):
+        if dbgInstruction != "":
+            print("numOps")
+            pprint(uopsInst, compact=True)
+            pprint(LLVMInst, compact=True)
+        return False
+    if uopsInst.roundc != LLVMInst.roundc:
+        if dbgInstruction != "":
+            print("roundc")
+            pprint(uopsInst, compact=True)
+            pprint(LLVMInst, compact=True)
+        return False
+    # match operands
+    llvmOps = LLVMInst.operands.copy()
+    for op in uopsInst.operands:
+        for lOp in llvmOps:
+            if op == lOp:
+                llvmOps.remove(lOp)
+                break
+    if len(llvmOps) != 0:
+        if dbgInstruction != "":
+            print("not all operands covered")
+            pprint(uopsInst, compact=True)
+            pprint(LLVMInst, compact=True)
+        return False
+    return True
+
+
+@dataclass
+class UopsIndex:
+    instructions: List[Instruction]
+    # (normalized asm name, number of operands, roundc) -> uops instructions in database order
+    buckets: Dict[Tuple[str, int, bool], List[Instruction]]
+    # id of a uops instruction -> its index in instructions
+    positions: Dict[int, int]
+    # uops string -> indices in instructions, used to resolve cached matches
+    names: Dict[str, List[int]] = dataclasses.field(default_factory=dict)
+    # llvm name -> uops strings of its matches, see load_uops_index
+    matches: Dict[str, Tuple[str, ...]] = dataclasses.field(default_factory=dict)
+
+
+# is_same rejects every uops instruction whose asm name, operand count or roundc flag differs, so
+# bucketing the uops database by those leaves only a handful of candidates to check per instruction
+def build_uops_index(uops_instructions: List[Instruction]) -> UopsIndex:
+    buckets: Dict[Tuple[str, int, bool], List[Instruction]] = {}
+    for u_instr in uops_instructions:
+        key = (normalize_uops_asm_name(u_instr.asmName), len(u_instr.operands), u_instr.roundc)
+        buckets.setdefault(key, []).append(u_instr)
+    positions = {id(u_instr): i for i, u_instr in enumerate(uops_instructions)}
+    names: Dict[str, List[int]] = {}
+    for i, u_instr in enumerate(uops_instructions):
+        names.setdefault(u_instr.uopsName, []).append(i)
+    return UopsIndex(uops_instructions, buckets, positions, names)
+
+
+# returns the same matches in the same order as checking is_same against every uops instruction
+def find_uops_matches(index: UopsIndex, LLVMInst: Instruction) -> List[Instruction]:
+    if dbgInstruction != "":
+        # scan everything so is_same can print why candidates were rejected
+        return [u_instr for u_instr in index.instructions if is_same(u_instr, LLVMInst)]
+    key = (normalize_llvm_asm_name(LLVMInst.asmName), len(LLVMInst.operands), LLVMInst.roundc)
+    return [u_instr for u_instr in index.buckets.get(key, []) if is_same(u_instr, LLVMInst)]
+
+
+def _match_cache_path(arch: str) -> str:
+    return os.path.join(script_dir, "reference-files", f"matches.{arch}.cache.pickle")
+
+
+# which uops instructions an llvm instruction matches only depends on X86.json and uops.xml, so the
+# matches found by earlier runs are kept on disk and reused for every database of that architecture
+def load_uops_index(arch: str) -> UopsIndex:
+    index = build_uops_index(parse_uops_database(arch))
+    index.matches = load_cache(_match_cache_path(arch), [x86_json_path, uops_xml_path]) or {}
+    return index
+
+
+# add the matches found since the index was loaded and write the cache if there were any
+def save_match_cache(index: UopsIndex, arch: str, newMatches: Dict[str, Tuple[str, ...]]):
+    index.matches.update(newMatches)
+    if len(newMatches) > 0:
+        store_cache(_match_cache_path(arch), [x86_json_path, uops_xml_path], index.matches)
+
+
+# find_uops_matches for the instruction llvmName, answered from the match cache if it is known.
+# Newly matched instructions are added to the cache and to newMatches
+def find_cached_uops_matches(
+    index: UopsIndex, llvmName: str, LLVMInst: Instruction, newMatches: Dict[str, Tuple[str, ...]]
+) -> List[Instruction]:
+    if dbgInstruction != "":
+        return find_uops_matches(index, LLVMInst)
+    names = index.matches.get(llvmName, None)
+    if names is None:
+        u_matches = find_uops_matches(index, LLVMInst)
+        index.matches[llvmName] = newMatches[llvmName] = tuple(dict.fromkeys(u.uopsName for u in u_matches))
+        return u_matches
+    positions = sorted({i for name in names for i in index.names.get(name, [])})
+    # a string can belong to several uops instructions, only those need the full check
+    return [
+        index.instructions[i]
+        for i in positions
+        if len(index.names[index.instructions[i].uopsName]) == 1 or is_same(index.instructions[i], LLVMInst)
+    ]
+
+
+@dataclass
+class Counters:
+    dbProgressC: int = 0
+    dbEmptyValueC: int = 0
+    internalErrorC: int = 0
+    noMatchC: int = 0
+    uniqueMatchSameValueC: int = 0
+    multiMatchSameValueC: int = 0
+    uniqueMatchDiffValueC: int = 0
+    multiMatchDiffValueC: int = 0
+    noUopsDataC: int = 0
+
+    # add the counts of other, used to combine the results of several shards
+    def merge(self, other: "Counters"):
+        for field in dataclasses.fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+
+# accepted band around the WINIC value, a uops value u matches if lower * min <= u <= upper * max
+TOLERANCES = {"tp": (0.92, 1.09), "lat": (1.0, 1.0)}
+
+
+# result of the matching phase. Every value of the database that was matched with at least one uops
+# instruction is a group, every uops value found for a group is a row. Classifying the rows only needs
+# the arrays, so the same matches can be evaluated with different tolerances
+@dataclass
+class MatchTable:
+    type: Literal["lat", "tp"]
+    # outcomes that are already decided during matching: progress, empty values, errors and missing matches
+    counters: Counters
+    nGroups: int
+    winic_idx: np.ndarray  # database entry of the row
+    uops_idx: np.ndarray  # index of the uops instruction in UopsIndex.instructions
+    group: np.ndarray  # group of the row
+    lo: np.ndarray  # WINIC value range of the group
+    hi: np.ndarray
+    val: np.ndarray  # uops value
+    # log lines in database order without the classification, which is appended for the row (lat) or
+    # group (tp) given in logRow/logGroup. Lines with neither, like missing matches, are complete
+    logPrefix: List[str]
+    logRow: np.ndarray
+    logGroup: np.ndarray
+    # matches that were not in the match cache yet
+    newMatches: Dict[str, Tuple[str, ...]]
+
+
+def _match_entries(db: list, type: Literal["lat", "tp"], uops_index: UopsIndex) -> MatchTable:
+    c = Counters()
+    nGroups = 0
+    rows = []  # (winic_idx, uops_idx, group, lo, hi, val)
+    logPrefix = []
+    logRow = []
+    logGroup = []
+    newMatches = {}
+
+    def log(prefix: str, row: int = -1, group: int = -1):
+        logPrefix.append(prefix)
+        logRow.append(row)
+        logGroup.append(group)
+
+    if type == "tp":
+        for db_idx, db_entry in enumerate(db):
+            c.dbProgressC += 1
+            if c.dbProgressC % 1000 == 0:
+                print(c.dbProgressC)
+            if dbgInstruction != "" and db_entry["llvmName"] != dbgInstruction:
+                continue
+
+            m_cycles = db_entry["throughputMin"]
+            if m_cycles == None:
+                c.dbEmptyValueC += 1
+                continue
+            m_instr = parse_WINIC_instruction(db_entry)
+            if m_instr is None:
+                c.internalErrorC += 1
+                continue
+            llvm_name = db_entry["llvmName"]
+
+            m_cycles = m_instr.throughput_lower
+            # find uops instsruction
+            u_matches = find_cached_uops_matches(uops_index, llvm_name, m_instr, newMatches)
+
+            if len(u_matches) == 0:
+                log(f"{llvm_name}: no match, classify: noMatch\n")
+                c.noMatchC += 1
+                continue
+            # one or multiple matches
+            for u_instr in u_matches:
+                rows.append(
+                    (
+                        db_idx,
+                        uops_index.positions[id(u_instr)],
+                        nGroups,
+                        m_instr.throughput_lower,
+                        m_instr.throughput_upper,
+                        u_instr.throughput_lower,
+                    )
+                )
+            _debug([(u_inst.throughput_lower, m_cycles) for u_inst in u_matches])
+            log(
+                f"{llvm_name}: {u_matches[0].uopsName} uops: {u_matches[0].throughput_lower}, WINIC: {m_cycles}, classify: ",
+                group=nGroups,
+            )
+            nGroups += 1
+
+    if type == "lat":
+        for db_idx, db_entry in enumerate(db):
+            llvm_name = db_entry["llvmName"]
+            m_instr = parse_WINIC_instruction(db_entry)
+            if m_instr is None:
+                c.internalErrorC += 1
+                continue
+
+            c.dbProgressC += len(m_instr.latencies)
+            if c.dbProgressC % 1000 == 0:
+                print(c.dbProgressC)
+            # find uops inststruction
+            u_matches = find_cached_uops_matches(uops_index, llvm_name, m_instr, newMatches)
+
+            if len(u_matches) == 0:
+                log(f"{llvm_name}: no match, classify: noMatch\n")
+                for lat in m_instr.latencies:
+                    if lat.cyclesMin != None:
+                        c.noMatchC += 1
+                    else:
+                        c.dbEmptyValueC += 1
+
+                continue
+
+            # if u_instr.uopsName != "VDIVPD (XMM, K, XMM, XMM)":
+            #     continue
+            # one or multiple matches
+            for m_lat in m_instr.latencies:
+                if m_lat.cyclesMin == None:
+                    c.dbEmptyValueC += 1
+                    continue
+                for u_instr in u_matches:
+                    # find the corresponding latency value in the uops instruction
+                    # first get the actual operands
+                    try:
+                        m_src_op = next(op for op in m_instr.operands if op.index == m_lat.startOpIndex)
+                        m_dst_op = next(op for op in m_instr.operands if op.index == m_lat.targetOpIndex)
+                    except StopIteration:
+                        print("fatal error, latency result references an non-existing operand (unreachable)")
+                        pprint(m_instr)
+                        exit(1)
+
+                    # get all uops operands that could correspond to the current winic ones
+                    u_src_candidates = [op for op in u_instr.operands if op == m_src_op]
+                    u_dst_candidates = [op for op in u_instr.operands if op == m_dst_op]
+                    # select the correct candidate
+                    # if there are multiple operands that fulfill the == constraint TODO currently just fail
+                    if len(u_src_candidates) == 0 or len(u_dst_candidates) == 0:
+                        # this should never happen, unless the instructions were matched incorrectly
+                        print("alarm")
+                        exit(1)
+                    if len(u_src_candidates) > 1:
+                        # if there are multiple operands with same read/write/register combination,
+                        # we assume they are in the same order for both uops and winic database
+                        # therefore this is written in a way so it doesn't matter which indices the operands have, only that the order is right
+                        # all the operands with same properties from winic
+                        m_src_candidates = [op for op in m_instr.operands if op == m_src_op]
+                        # the index of the current operand in m_src_candidates
+                        m_index_in_list = next(i for i, op in enumerate(m_src_candidates) if op.index == m_src_op.index)
+                        # take the element at the same index from u_src_candidates
+                        u_src_op = u_src_candidates[m_index_in_list]
+                    else:
+                        u_src_op = u_src_candidates[0]
+                    if len(u_dst_candidates) > 1:
+                        m_dst_candidates = [op for op in m_instr.operands if op == m_dst_op]
+                        m_index_in_list = next(i for i, op in enumerate(m_dst_candidates) if op.index == m_dst_op.index)
+                        u_dst_op = u_dst_candidates[m_index_in_list]
+                    else:
+                        u_dst_op = u_dst_candidates[0]
+
+                    # extract the uops latency result
+                    try:
+                        u_lat = next(
+                            lat
+                            for lat in u_instr.latencies
+                            if lat.startOpIndex == u_src_op.index and lat.targetOpIndex == u_dst_op.index
+                        )
+                    except StopIteration:
+                        continue
+                    log(
+                        f"{llvm_name}: {u_instr.uopsName} {u_lat.startOpIndex} -> {u_lat.targetOpIndex} uops: {u_lat.cyclesMin}, WINIC: {m_lat.cyclesMin}-{m_lat.cyclesMax}, classify: ",
+                        row=len(rows),
+                    )
+                    rows.append(
+                        (
+                            db_idx,
+                            uops_index.positions[id(u_instr)],
+                            nGroups,
+                            m_lat.cyclesMin,
+                            m_lat.cyclesMax,
+                            u_lat.cyclesMin,
+                        )
+                    )
+                # values without a single uops latency are counted as noUopsData by classify_matches
+                nGroups += 1
+
+    columns = list(zip(*rows)) if len(rows) > 0 else [()] * 6
+    return MatchTable(
+        type,
+        c,
+        nGroups,
+        np.array(columns[0], dtype=np.int64),
+        np.array(columns[1], dtype=np.int64),
+        np.array(columns[2], dtype=np.int64),
+        # None (e.g. a missing upper bound) becomes NaN and never matches
+        np.array(columns[3], dtype=np.float64),
+        np.array(columns[4], dtype=np.float64),
+        np.array(columns[5], dtype=np.float64),
+        logPrefix,
+        np.array(logRow, dtype=np.int64),
+        np.array(logGroup, dtype=np.int64),
+        newMatches,
+    )
+
+
+# concatenate the tables of consecutive shards, offsets are the index of the first database entry of each shard
+def merge_match_tables(tables: List[MatchTable], offsets: List[int]) -> MatchTable:
+    c = Counters()
+    for table in tables:
+        c.merge(table.counters)
+    groupOffsets = np.cumsum([0] + [table.nGroups for table in tables])
+    rowOffsets = np.cumsum([0] + [len(table.group) for table in tables])
+
+    # shift indices that refer into a shard, -1 marks "no row/group" and stays as is
+    def shifted(values: np.ndarray, offset: int):
+        return np.where(values >= 0, values + offset, values)
+
+    return MatchTable(
+        tables[0].type,
+        c,
+        int(groupOffsets[-1]),
+        np.concatenate([table.winic_idx + offset for table, offset in zip(tables, offsets)]),
+        np.concatenate([table.uops_idx for table in tables]),
+        np.concatenate([table.group + offset for table, offset in zip(tables, groupOffsets)]),
+        np.concatenate([table.lo for table in tables]),
+        np.concatenate([table.hi for table in tables]),
+        np.concatenate([table.val for table in tables]),
+        [line for table in tables for line in table.logPrefix],
+        np.concatenate([shifted(table.logRow, offset) for table, offset in zip(tables, rowOffsets)]),
+        np.concatenate([shifted(table.logGroup, offset) for table, offset in zip(tables, groupOffsets)]),
+        {name: names for table in tables for name, names in table.newMatches.items()},
+    )
+
+
+# classify the matched values, returns the counters and the log lines. A value matches if all uops values
+# found for it are inside the tolerance band, it counts as unique if exactly one uops value was found
+def classify_matches(table: MatchTable, tolerance: Tuple[float, float] | None = None) -> Tuple[Counters, List[str]]:
+    lower, upper = tolerance if tolerance is not None else TOLERANCES[table.type]
+    rowOk = (lower * table.lo <= table.val) & (table.val <= upper * table.hi)
+    nRows = np.bincount(table.group, minlength=table.nGroups)
+    nBad = np.bincount(table.group, weights=(~rowOk).astype(np.float64), minlength=table.nGroups)
+    groupOk = nBad == 0
+
+    c = Counters()
+    c.merge(table.counters)
+    c.noUopsDataC += int(np.count_nonzero(nRows == 0))
+    unique = nRows == 1
+    multi = nRows > 1
+    c.uniqueMatchSameValueC += int(np.count_nonzero(unique & groupOk))
+    c.multiMatchSameValueC += int(np.count_nonzero(multi & groupOk))
+    c.uniqueMatchDiffValueC += int(np.count_nonzero(unique & ~groupOk))
+    c.multiMatchDiffValueC += int(np.count_nonzero(multi & ~groupOk))
+
+    # the appended entry is picked up by the -1 of complete lines
+    if table.type == "tp":
+        suffixes, lineOk = ("differentVal(s)\n", "matchingVal(s)\n"), np.append(groupOk, False)[table.logGroup]
+        complete = table.logGroup < 0
+    else:
+        suffixes, lineOk = ("differentVal\n", "sameVal\n"), np.append(rowOk, False)[table.logRow]
+        complete = table.logRow < 0
+    outputLines = [
+        prefix if done else prefix + suffixes[ok] for prefix, done, ok in zip(table.logPrefix, complete.tolist(), lineOk.tolist())
+    ]
+    return c, outputLines
+
+
+# set by compare() before forking the workers so they share the index copy-on-write
+_shared_uops_index: UopsIndex | None = None
+
+
+def _match_shard(shard: list, type: Literal["lat", "tp"]) -> MatchTable:
+    return _match_entries(shard, type, _shared_uops_index)
+
+
+# split db into contiguous shards for jobs workers. There are more shards than workers so a shard
+# full of instructions with many uops candidates does not leave the other workers idle
+def _shard_database(db: list, jobs: int) -> List[list]:
+    nShards = min(len(db), jobs * 4)
+    if nShards == 0:
+        return []
+    size, rest = divmod(len(db), nShards)
+    shards = []
+    begin = 0
+    for i in range(nShards):
+        end = begin + size + (1 if i < rest else 0)
+        shards.append(db[begin:end])
+        begin = end
+    return shards
+
+
+# match all entries of db with the uops instructions. With jobs > 1 the entries are matched by a pool of
+# forked processes, the merged table is the same as for a serial run
+def match_database(db: list, type: Literal["lat", "tp"], uops_index: UopsIndex, jobs: int = 1) -> MatchTable:
+    global _shared_uops_index
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("parallel compare needs fork, falling back to a single process")
+        jobs = 1
+    shards = _shard_database(db, jobs) if jobs > 1 else []
+    if len(shards) <= 1:
+        return _match_entries(db, type, uops_index)
+    load_tblgen()  # load before forking so the workers inherit it
+    _shared_uops_index = uops_index
+    try:
+        with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork")) as pool:
+            tables = list(pool.map(_match_shard, shards, [type] * len(shards)))
+    finally:
+        _shared_uops_index = None
+    offsets = np.cumsum([0] + [len(shard) for shard in shards[:-1]]).tolist()
+    return merge_match_tables(tables, offsets)
+
+
+# compare the results with uops data. tolerance overrides the accepted band from TOLERANCES
+def compare(
+    database,
+    type: Literal["lat", "tp"],
+    arch: str,
+    jobs: int = 1,
+    logSuffix: str = "",
+    tolerance: Tuple[float, float] | None = None,
+    cache: bool = False,
+) -> Counters:
+    # parse measured instructions
+    db = load_database(database, cache)
+    uops_index = load_uops_index(arch)
+
+    table = match_database(db, type, uops_index, jobs)
+    save_match_cache(uops_index, arch, table.newMatches)
+    c, outputLines = classify_matches(table, tolerance)
+
+    logName = f"compareTP{logSuffix}.log" if type == "tp" else f"compareLAT{logSuffix}.log"
+    with open(os.path.join(script_dir, logName), "w") as out_file:
+        out_file.writelines(outputLines)
+
+    print(f"{c.dbProgressC} total database entries")
+    print(f"{c.dbProgressC-c.dbEmptyValueC} entries have values")
+    print(f"{c.uniqueMatchSameValueC} values match with exactly one uops instruction")
+    print(f"{c.multiMatchSameValueC} values match with multiple uops instructions which all have the same value")
+    print(f"{c.multiMatchDiffValueC} values were matched with multiple uops instructions with different values")
+    print(f"{c.uniqueMatchDiffValueC} values don't match with uops data")
+    print(f"{c.noMatchC} values could not be matched with an instruction from uops")
+    print(f"{c.internalErrorC} internal errors occurred")
+    print(f"{c.noUopsDataC} values were matched but uops has no data")
+    total_matching = c.uniqueMatchSameValueC + c.multiMatchSameValueC
+    total_non_matching = c.uniqueMatchDiffValueC + c.multiMatchDiffValueC
+    print(
+        f"{(total_matching)*100/(total_matching+total_non_matching):.2f}% of values are the same (excluding missing matches)"
+    )
+    return c
+
+
+# with arch, only instructions that were matched with a uops instruction of that architecture are counted
+def count_ranges(database, arch: str | None = None, cache: bool = False) -> int:
+    # parse measured instructions
+    db = load_database(database, cache)
+    uops_index = load_uops_index(arch) if arch is not None else None
+    newMatches = {}
+    tp_range_counter = 0
+    tp_exact_counter = 0
+    lat_range_counter = 0
+    lat_exact_counter = 0
+    for db_entry in db:
+        m_instr = parse_WINIC_instruction(db_entry)
+        if uops_index is not None and (
+            m_instr is None or len(find_cached_uops_matches(uops_index, db_entry["llvmName"], m_instr, newMatches)) == 0
+        ):
+            continue
+        if m_instr.throughput_lower != None:
+            if m_instr.throughput_lower != m_instr.throughput_upper:
+                tp_range_counter += 1
+            else:
+                tp_exact_counter += 1
+
+        for lat_entry in m_instr.latencies:
+            if lat_entry.cyclesMin != None:
+                if lat_entry.cyclesMin != lat_entry.cyclesMax:
+                    lat_range_counter += 1
+                else:
+                    lat_exact_counter += 1
+    if uops_index is not None:
+        save_match_cache(uops_index, arch, newMatches)
+    print(f"{tp_range_counter=}")
+    print(f"{tp_exact_counter=}")
+    print(f"{lat_range_counter=}")
+    print(f"{lat_exact_counter=}")
+    print(f"proportion TP ranges: {tp_range_counter/(tp_range_counter+tp_exact_counter):.2f}")
+    print(f"proportion LAT ranges: {lat_range_counter/(lat_range_counter+lat_exact_counter):.2f}")
+
+
+def plotTP(values):
+    categories = [
+        "one match\nsame value",
+        "multiple matches\nall same value",
+        "multiple matches\ndifferent values",
+        "one match\ndifferent value",
+        "no match",
+    ]
+
+    def no_zero_autopct(pct):
+        return f"{pct:.1f}%" if pct > 0 else ""
+
+    if len(values) == 0:
+        vals = np.array([[3179.0, 1949.0], [39.0, 314.0], [258, 0]])
+    else:
+        vals = np.array([[values[0], values[1]], [values[2], values[3]], [values[4], 0]])
+
+    tab20c = plt.color_sequences["tab20c"]
+    outer_colors = [tab20c[i] for i in [8, 4, 17]]
+    inner_colors = [tab20c[i] for i in [9, 11, 7, 5, 17, 1]]
+    fig, ax = plt.subplots()  # figsize=(8, 6)
+    ax.set_position([0.25, 0.1, 0.6, 0.8])
+    size = 0.3
+    acc_wedges, _, _ = ax.pie(
+        vals.sum(axis=1),
+        radius=1 - size,
+        colors=outer_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.77,
+    )
+    wedges, _, _ = ax.pie(
+        vals.flatten(),
+        radius=1,
+        colors=inner_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.85,
+    )
+    ax.set(aspect="equal")  # keep the pie circular
+    ax.set(title="Comparison between WINIC and uops.info (Throughput)")
+    outer_legend = ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.5))
+    inner_legend = ax.legend(acc_wedges, ["total same value", "total different value"], bbox_to_anchor=(0.9, 0.4))
+    ax.add_artist(outer_legend)
+    ax.add_artist(inner_legend)
+    plt.tight_layout()
+    plt.savefig(os.path.join(script_dir, "TP_chart.png"))
+
+
+def plotLAT(values):
+    categories = [
+        "same value",
+        "different values",
+        "no match",
+    ]
+
+    def no_zero_autopct(pct):
+        return f"{pct:.1f}%" if pct > 0 else ""
+
+    if len(values) == 0:
+        values = [9331, 1526, 413]
+
+    tab20c = plt.color_sequences["tab20c"]
+    outer_colors = [tab20c[i] for i in [8, 4, 17]]
+    fig, ax = plt.subplots()
+    ax.set_position([0.25, 0.1, 0.6, 0.8])
+    wedges, _, _ = ax.pie(
+        values,
+        colors=outer_colors,
+        wedgeprops=dict(edgecolor="w"),
+        autopct=no_zero_autopct,
+    )
+    ax.set(aspect="equal")  # keep the pie circular
+    ax.set(title="Comparison between WINIC and uops.info (Latency)")
+    ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.9))  #
+    plt.tight_layout()
+    plt.savefig(os.path.join(script_dir, "LAT_chart.png"))
+
+
+def plotLAT2(values):
+    categories = [
+        "same value",
+        "different values",
+        "no match",
+    ]
+
+    def no_zero_autopct(pct):
+        return f"{pct:.1f}%" if pct > 0 else ""
+
+    if len(values) == 0:
+        values = [9331, 1526, 413]
+
+    tab20c = plt.color_sequences["tab20c"]
+    outer_colors = [tab20c[i] for i in [8, 4, 17]]
+    fig, ax = plt.subplots()
+    ax.set_position([0.25, 0.1, 0.6, 0.8])
+    wedges, _, _ = ax.pie(
+        values,
+        colors=outer_colors,
+        wedgeprops=dict(edgecolor="w"),
+        autopct=no_zero_autopct,
+    )
+    ax.set(aspect="equal")  # keep the pie circular
+    ax.set(title="Comparison between WINIC and uops.info (Latency)")
+    ax.legend(wedges, categories, bbox_to_anchor=(0.9, 0.9))  #
+    plt.tight_layout()
+    plt.savefig(os.path.join(script_dir, "LAT_chart.png"))
+
+
+def plot_combined(lat: Counters, tp: Counters):
+    categoriesTP = [
+        "one match\nsame value",
+        "multiple matches\nall same value",
+        "multiple matches\ndifferent values",
+        "one match\ndifferent value",
+        # "no match",
+    ]
+
+    colors = [
+        "#91cf60",  # medium green
+        "#d9ef8b",  # light green
+        "#fee08b",  # yellow
+        "#fc8d59",  # orange
+        "grey",
+        "grey",
+    ]
+
+    def no_zero_autopct(pct):
+        return f"{pct:.1f}%" if pct > 0 else ""
+
+    tab20c = plt.color_sequences["tab20c"]
+
+    # inner_colors = [tab20c[i] for i in [8, 4, 17]]
+    # outer_colors = [tab20c[i] for i in [9, 11, 7, 5, 17, 1]]
+    inner_colors = ["#008000", "#ff0000", "grey"]
+    outer_colors = [
+        "#6fbe59",
+        "#bfffa7",
+        "#ffd8b3",
+        "#ff914d",
+        "grey",
+        "grey",
+    ]
+    # outer_colors = colors
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(11, 5))
+    ax1.set(aspect="equal")  # keep the pie circular
+    ax2.set(aspect="equal")  # keep the pie circular
+    ax1.set(title="Latency")
+    ax2.set(title="Throughput")
+    size = 0.3
+
+    # reference values are Zen4
+    if lat is None:
+        lat = np.array([[5871, 4275], [240, 494], [1345, 0]])
+    else:
+        lat = np.array(
+            [
+                [lat.uniqueMatchSameValueC, lat.multiMatchSameValueC],
+                [lat.multiMatchDiffValueC, lat.uniqueMatchDiffValueC],
+                [lat.noMatchC + lat.noUopsDataC, 0],
+            ]
+        )
+    if tp is None:
+        tp = np.array([[3173, 1950], [102, 256], [626, 0]])
+    else:
+        tp = np.array(
+            [
+                [tp.uniqueMatchSameValueC, tp.multiMatchSameValueC],
+                [tp.multiMatchDiffValueC, tp.uniqueMatchDiffValueC],
+                [tp.noMatchC + tp.noUopsDataC, 0],
+            ]
+        )
+    # plot LAT
+    acc_wedges, _, _ = ax1.pie(
+        lat.sum(axis=1),
+        radius=1 - size,
+        colors=inner_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.77,
+    )
+    wedges, _, _ = ax1.pie(
+        lat.flatten(),
+        radius=1,
+        colors=outer_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.85,
+    )
+
+    # plot TP
+    acc_wedges, _, _ = ax2.pie(
+        tp.sum(axis=1),
+        radius=1 - size,
+        colors=inner_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.77,
+    )
+    wedges, _, _ = ax2.pie(
+        tp.flatten(),
+        radius=1,
+        colors=outer_colors,
+        wedgeprops=dict(width=size, edgecolor="w"),
+        autopct=no_zero_autopct,
+        pctdistance=0.85,
+    )
+    outer_legend = ax1.legend(wedges, categoriesTP, bbox_to_anchor=(0.93, 0.7))
+    inner_legend = ax1.legend(acc_wedges, ["same value", "different value    ", "no match"], bbox_to_anchor=(0.93, 0.9))
+    ax1.add_artist(outer_legend)
+    ax1.add_artist(inner_legend)
+    plt.suptitle("Comparison between WINIC and uops.info")
+    plt.tight_layout()
+    plt.savefig(os.path.join(script_dir, "combined_chart.png"))
+
+
+def checkUnique():
+    string_set = {}
+    for node in iter_uops_xml():
+        string = node.attrib["string"]
+        if string in string_set.keys():
+            print(f"alarm {string}")
+        print(string)
+        string_set[string] = True
+
+
+# some available uops arches:
+# CNL, CLX, ICL TGL RKL ADL-P ZEN4
+def main(database, arch: str, jobs: int = 1, cache: bool = False):
+    print("Processing Latency")
+    lat_res = compare(database, "lat", arch, jobs, cache=cache)
+    print("Processing Throughput")
+    tp_res = compare(database, "tp", arch, jobs, cache=cache)
+    print_memo_stats(jobs)
+    plot_combined(lat_res, tp_res)
+
+
+# compare several databases, each with the uops data of its own architecture. uops.xml is read at most
+# once for all of them, every run gets its own compareLAT_<arch>.log/compareTP_<arch>.log and the
+# counters of all runs are written to compareSummary.log
+def batch_compare(
+    runs: List[Tuple[str, str]], jobs: int = 1, cache: bool = False
+) -> Dict[Tuple[str, str], Tuple[Counters, Counters]]:
+    parse_uops_databases([arch for _, arch in runs])
+    results = {}
+    for database, arch in runs:
+        # keep the logs apart if the same arch is compared against several databases
+        suffix = f"_{arch}"
+        if sum(1 for _, other in runs if other == arch) > 1:
+            suffix += f"_{os.path.splitext(os.path.basename(database))[0]}"
+        print(f"Processing Latency of {database} ({arch})")
+        lat_res = compare(database, "lat", arch, jobs, suffix, cache=cache)
+        print(f"Processing Throughput of {database} ({arch})")
+        tp_res = compare(database, "tp", arch, jobs, suffix, cache=cache)
+        results[(database, arch)] = (lat_res, tp_res)
+
+    header = (
+        f"{'arch':<10} {'database':<30} {'type':<4} {'values':>7} {'1 same':>7} {'n same':>7} {'n diff':>7} "
+        f"{'1 diff':>7} {'noMatch':>7} {'noUops':>7} {'errors':>7} {'same %':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for (database, arch), counters in results.items():
+        for type, c in zip(("LAT", "TP"), counters):
+            total_matching = c.uniqueMatchSameValueC + c.multiMatchSameValueC
+            total_compared = total_matching + c.uniqueMatchDiffValueC + c.multiMatchDiffValueC
+            same = f"{total_matching * 100 / total_compared:.2f}" if total_compared > 0 else "-"
+            lines.append(
+                f"{arch:<10} {os.path.basename(database):<30} {type:<4} {c.dbProgressC - c.dbEmptyValueC:>7} "
+                f"{c.uniqueMatchSameValueC:>7} {c.multiMatchSameValueC:>7} {c.multiMatchDiffValueC:>7} "
+                f"{c.uniqueMatchDiffValueC:>7} {c.noMatchC:>7} {c.noUopsDataC:>7} {c.internalErrorC:>7} {same:>7}"
+            )
+    summary = "\n".join(lines) + "\n"
+    print(summary, end="")
+    with open(os.path.join(script_dir, "compareSummary.log"), "w") as out_file:
+        out_file.write(summary)
+    return results
+
+
+@dataclass
+class DiffRow:
+    llvmName: str
+    # missing (only in old data), added (only in new data), tpLower, tpUpper, cyclesMin, cyclesMax
+    kind: str
+    sourceOperand: str | None = None  # only set for latency rows
+    targetOperand: str | None = None
+    old: float | int | None = None
+    new: float | int | None = None
+
+    def __str__(self):
+        name = self.llvmName
+        if self.sourceOperand is not None:
+            name += f" ({self.sourceOperand} -> {self.targetOperand})"
+        if self.kind == "missing":
+            return f"{name} missing in new data"
+        if self.kind == "added":
+            return f"{name} only in new data"
+        if self.kind in ("tpLower", "tpUpper"):
+            return f"{name} {self.kind} {self.old} -> {self.new}"
+        return f"{name} {self.kind}: {self.old} -> {self.new}"
+
+
+def _latency_map(entry) -> dict:
+    return {(l["sourceOperand"], l["targetOperand"]): l for l in entry.get("operandLatencies", None) or []}
+
+
+# join both databases on llvmName and yield the differences in the order of database1, followed by
+# the entries only present in database2. Works on the raw entries so it is not limited to x86
+def iter_db_diff(db1: list, db2: list, tp: bool, lat: bool):
+    entries2 = {}
+    for entry2 in db2:
+        entries2.setdefault(entry2["llvmName"], entry2)
+    seen = set()
+    for entry1 in db1:
+        name = entry1["llvmName"]
+        if name in seen:
+            continue
+        seen.add(name)
+        entry2 = entries2.get(name, None)
+        if entry2 is None:
+            yield DiffRow(name, "missing")
+            continue
+        if tp:
+            for kind, key in (("tpLower", "throughputMin"), ("tpUpper", "throughputMax")):
+                if entry1.get(key, None) != entry2.get(key, None):
+                    yield DiffRow(name, kind, old=entry1.get(key, None), new=entry2.get(key, None))
+        if not lat:
+            continue
+        lat_map1 = _latency_map(entry1)
+        lat_map2 = _latency_map(entry2)
+        for key, lat1 in lat_map1.items():
+            if key not in lat_map2:
+                yield DiffRow(name, "missing", *key)
+                continue
+            for kind, field in (("cyclesMin", "latencyMin"), ("cyclesMax", "latencyMax")):
+                if lat1[field] != lat_map2[key][field]:
+                    yield DiffRow(name, kind, *key, lat1[field], lat_map2[key][field])
+        for key in lat_map2.keys() - lat_map1.keys():
+            yield DiffRow(name, "added", *key)
+    for name, entry2 in entries2.items():
+        if name not in seen:
+            yield DiffRow(name, "added")
+
+
+# write the differences between two databases to output. The format is chosen by the extension:
+# .csv and .jsonl write one row per difference, everything else the plain text format
+def db_diff(database1, database2, tp, lat, output="analysis/diff.txt", cache: bool = False):
+    db1 = load_database(database1, cache)
+    db2 = load_database(database2, cache)
+
+    fields = [field.name for field in dataclasses.fields(DiffRow)]
+    nRows = 0
+    with open(output, "w", newline="") as f:
+        if output.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            write = lambda row: writer.writerow(dataclasses.asdict(row))
+        elif output.endswith(".jsonl"):
+            write = lambda row: f.write(json.dumps(dataclasses.asdict(row)) + "\n")
+        else:
+            write = lambda row: f.write(f"{row}\n")
+        for row in iter_db_diff(db1, db2, tp, lat):
+            write(row)
+            nRows += 1
+    print(f"{nRows} differences written to {output}")
+    return nRows
+
+
+# time the indexed matching against a full scan of the uops database and check both agree
+def benchmark_matching(database, arch: str):
+    db = load_database(database)
+    uops_instructions = parse_uops_database(arch)
+    m_instrs = [m_instr for m_instr in map(parse_WINIC_instruction, db) if m_instr is not None]
+
+    start = time.perf_counter()
+    scan_matches = [[u_instr for u_instr in uops_instructions if is_same(u_instr, m)] for m in m_instrs]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = build_uops_index(uops_instructions)
+    index_matches = [find_uops_matches(index, m) for m in m_instrs]
+    index_time = time.perf_counter() - start
+
+    # compare identities, Operand.__eq__ is too lenient to tell matches apart
+    same = [list(map(id, a)) for a in scan_matches] == [list(map(id, b)) for b in index_matches]
+    print(f"{len(m_instrs)} instructions, {len(uops_instructions)} uops instructions")
+    print(f"full scan: {scan_time:.2f}s, index: {index_time:.2f}s ({scan_time/index_time:.1f}x faster)")
+    print(f"{len(index.buckets)} buckets, largest has {max(map(len, index.buckets.values()), default=0)} entries")
+    print("matches identical" if same else "MATCHES DIFFER")
+    return same
+
+
+def count_uops_tp_vals(arch):
+    uops_instructions = parse_uops_database(arch)
+    print(f"parsed a total of {len(uops_instructions)} uops instructions")
+
+# main("data/zen4/genoa.yaml", "ZEN4")
+# main("build-genoa20/genoa.yaml", "ZEN4")
+# db_diff("data/zen4/genoa.yaml","build-genoa20/genoa.yaml", False, True)
+# db_diff("data/zen4/genoa.yaml", "build-genoa20/genoa.yaml", False, True)
+# plot_combined(None, None)
+# count_ranges("data/zen4/genoa.yaml")
+# benchmark_matching("data/zen4/genoa.yaml", "ZEN4")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compare a WINIC database with the uops.info data")
+    parser.add_argument("database", nargs="?", help="WINIC result database, only counts the uops values if omitted")
+    parser.add_argument("arch", nargs="?", default="ZEN4", help="uops.info architecture name, e.g. ZEN4")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes, 0 for one per core")
+    parser.add_argument(
+        "--batch", nargs="+", metavar="DATABASE:ARCH", help="compare several databases, each with its own architecture"
+    )
+    parser.add_argument(
+        "--cache", action="store_true", help="keep a .npz copy next to each database to skip parsing it next time"
+    )
+    args = parser.parse_args()
+    if args.batch is not None:
+        runs = [tuple(run.rsplit(":", 1)) for run in args.batch]
+        for run, parsed in zip(args.batch, runs):
+            if len(parsed) != 2 or not all(parsed):
+                parser.error(f"--batch expects DATABASE:ARCH, e.g. genoa.yaml:ZEN4, got '{run}'")
+        batch_compare(runs, args.jobs, args.cache)
+    elif args.database is None:
+        count_uops_tp_vals(args.arch)
+    else:
+        main(args.database, args.arch, args.jobs, args.cache)
\ No newline at end of file
@@ -89,6 +89,15 @@ class AssemblyFile {
      */
     std::string getInitNameFor(std::string BenchName);
 
+    /**
+     * \brief Adds all functions of another assembly file with a suffix appended to their names.
+     * This way the benchmarks of several measurements can be assembled into a single object.
+     * \param Other Assembly file for the same architecture.
+     * \param Suffix Appended to the names of all functions of Other.
+     * \return SUCCESS or E_GENERIC if a function with the resulting name exists already.
+     */
+    ErrorCode append(const AssemblyFile &Other, const std::string &Suffix);
+
     std::string getName() const { return name; }
 
     void setName(std::string Name) { this->name = Name; }
@@ -38,6 +38,10 @@ enum ErrorCode {
     E_EXEC,
     E_UNROLL_ANOMALY,
     E_UNUSUAL_LATENCY,
+    E_TIMER,
+    E_COUNTERS,
+    E_PORT_USAGE,
+    E_REFERENCE_DEPENDENCY,
     E_GENERIC,
 };
 
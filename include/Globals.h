@@ -9,6 +9,7 @@
 #include "llvm/MC/MCRegisterInfo.h"
 #include <CustomDebug.h>
 #include <assert.h>
+#include <cmath>
 #include <fstream>
 #include <limits>
 #include <memory>
@@ -26,6 +27,8 @@ extern std::ostream *ios;
 extern bool includeX87FP;
 
 const unsigned MAX_UNSIGNED = std::numeric_limits<unsigned>::max();
+// maximum number of performance counters measured per benchmark
+const unsigned MAX_COUNTERS = 16;
 
 enum class LatOperandKind { RegisterClass, Register };
 
@@ -151,6 +154,22 @@ inline std::ostream &operator<<(std::ostream &OS, const DependencyType &Op) {
     return OS << Op.useOp << " -> " << Op.defOp;
 }
 
+/**
+ * \brief Statistics of the samples taken by an adaptive measurement and the performance counters
+ * of the measurement.
+ */
+struct SampleStats {
+    unsigned loopCount = 0;   ///< Loop count chosen for the samples
+    unsigned samples = 0;     ///< Maximum samples of a benchmark function, 0 if not adaptive
+    double spread = -1;       ///< Maximum relative difference between median and minimum sample
+    unsigned numCounters = 0; ///< Number of counters measured, 0 if disabled
+    double counters[MAX_COUNTERS] = {}; ///< Events per instruction, see getEnabledCounters()
+
+    std::string toString() const {
+        return str(samples, " samples, spread ", std::round(spread * 10000) / 100, "%");
+    }
+};
+
 /**
  * \brief Represents a latency measurement for an instruction and dependency type.
  */
@@ -162,6 +181,7 @@ struct LatMeasurement {
     double lowerBound;   ///< Lower bound of measured latency
     double upperBound;   ///< Upper bound of measured latency
     ErrorCode ec;        ///< Error code for measurement
+    SampleStats stats;   ///< Sample statistics of the measurement, only set in adaptive mode
 
     LatMeasurement() : lowerBound(-1), upperBound(-1), ec(NO_ERROR_CODE) {}
     LatMeasurement(unsigned Opcode, DependencyType Type, unsigned DefIndex, unsigned UseIndex,
@@ -190,9 +210,10 @@ struct LatMeasurement {
 
     std::string toStringWithBounds() const {
         std::string outputString = toString();
-        if (!isError(ec))
+        if (!isError(ec)) {
             outputString += str(" [", lowerBound, ";", upperBound, "]");
-        else if (ec != NO_ERROR_CODE)
+            if (stats.samples > 0) outputString += str(" (", stats.toString(), ")");
+        } else if (ec != NO_ERROR_CODE)
             outputString += str(" [", ecToString(ec), "]");
         return outputString;
     }
@@ -210,6 +231,7 @@ struct TPMeasurement {
     ErrorCode ec;
     double lowerTP;
     double upperTP;
+    SampleStats stats = {}; ///< Sample statistics of the measurement, only set in adaptive mode
 };
 
 /**
@@ -218,7 +240,11 @@ struct TPMeasurement {
 inline std::ostream &operator<<(std::ostream &OS, const TPMeasurement &Op) {
     std::string name = getEnv().MCII->getName(Op.opcode).str();
 
-    if (!isError(Op.ec)) return OS << str(name, " [", Op.lowerTP, ";", Op.upperTP, "]");
+    if (!isError(Op.ec)) {
+        OS << str(name, " [", Op.lowerTP, ";", Op.upperTP, "]");
+        if (Op.stats.samples > 0) OS << str(" (", Op.stats.toString(), ")");
+        return OS;
+    }
     return OS << str(name, " [", ecToString(Op.ec), "]");
 }
 
@@ -1,8 +1,10 @@
 #include "llvm/Support/YAMLTraits.h"
 #include <ErrorCode.h>
 #include <Globals.h>
+#include <PortMapping.h>
 #include <WINIC.h>
 #include <llvm/ADT/StringRef.h>
+#include <map>
 #include <optional>
 #include <string>
 
@@ -24,6 +26,10 @@ struct IOLatency {
     std::string targetOperand;
     std::optional<double> min;
     std::optional<double> max;
+    std::optional<unsigned> samples; ///< Number of samples, only in adaptive mode
+    std::optional<double> spread;    ///< Relative spread of the samples, only in adaptive mode
+    /// Performance counter events per instruction, only if counters are enabled
+    std::optional<std::map<std::string, double>> counters;
 };
 
 
@@ -31,20 +37,26 @@ struct IOLatency {
  * \brief Represents an instruction for YAML serialization.
  */
 struct IOInstruction {
-    std::string llvmName;                ///< LLVM instruction name
-    std::string name;                    ///< Assembly mnemonic
-    std::vector<IOOperand> operands;     ///< List of operands
-    std::optional<double> latency;       ///< Overall instruction latency
-    std::vector<IOLatency> latencies;    ///< Operand-level latencies
-    std::optional<double> throughput;    ///< Throughput value
-    std::optional<double> throughputMin; ///< Minimum throughput
-    std::optional<double> throughputMax; ///< Maximum throughput
+    std::string llvmName;                      ///< LLVM instruction name
+    std::string name;                          ///< Assembly mnemonic
+    std::vector<IOOperand> operands;           ///< List of operands
+    std::optional<double> latency;             ///< Overall instruction latency
+    std::vector<IOLatency> latencies;          ///< Operand-level latencies
+    std::optional<double> throughput;          ///< Throughput value
+    std::optional<double> throughputMin;       ///< Minimum throughput
+    std::optional<double> throughputMax;       ///< Maximum throughput
+    std::optional<unsigned> throughputSamples; ///< Number of samples, only in adaptive mode
+    std::optional<double> throughputSpread;    ///< Relative spread of the samples
+    /// Performance counter events per instruction, only if counters are enabled
+    std::optional<std::map<std::string, double>> throughputCounters;
+    std::optional<std::string> ports; ///< Port usage like uops.info e.g. 1*p0156+1*p23
 };
 
 LLVM_YAML_IS_SEQUENCE_VECTOR(IOOperand)
 LLVM_YAML_IS_SEQUENCE_VECTOR(IOInstruction)
 LLVM_YAML_IS_SEQUENCE_VECTOR(IOLatency)
 LLVM_YAML_IS_STRING_MAP(std::optional<double>)
+LLVM_YAML_IS_STRING_MAP(double)
 
 namespace llvm {
 namespace yaml {
@@ -64,6 +76,9 @@ template <> struct MappingTraits<IOLatency> {
         Io.mapRequired("targetOperand", Lat.targetOperand);
         Io.mapRequired("latencyMin", Lat.min);
         Io.mapRequired("latencyMax", Lat.max);
+        Io.mapOptional("samples", Lat.samples);
+        Io.mapOptional("spread", Lat.spread);
+        Io.mapOptional("counters", Lat.counters);
     }
 };
 
@@ -77,6 +92,10 @@ template <> struct MappingTraits<IOInstruction> {
         Io.mapRequired("throughput", Inst.throughput);
         Io.mapRequired("throughputMin", Inst.throughputMin);
         Io.mapRequired("throughputMax", Inst.throughputMax);
+        Io.mapOptional("throughputSamples", Inst.throughputSamples);
+        Io.mapOptional("throughputSpread", Inst.throughputSpread);
+        Io.mapOptional("throughputCounters", Inst.throughputCounters);
+        Io.mapOptional("ports", Inst.ports);
     }
 };
 
@@ -144,17 +163,41 @@ ErrorCode updateDatabaseEntryTP(TPMeasurement Measurement);
 ErrorCode updateDatabaseEntryLAT(LatMeasurement Measurement);
 
 /**
- * \brief Loads a database from a YAML file into outputDatabase.
- *
- * Note: Currently it is not supported to load the values back into the working databases!
- * Therefore existing values cannot be used as helpers and all required helpers have to be measured
- * in one run!
- *
+ * \brief Updates the output database entry with the port usage of an instruction.
+ * \param Opcode The instruction opcode.
+ * \param Usage The port usage.
+ * \return ErrorCode indicating success or failure.
+ */
+ErrorCode updateDatabaseEntryPorts(unsigned Opcode, const PortUsage &Usage);
+
+/**
+ * \brief Computes the names of the source and target operand of a latency measurement as they
+ * appear in the operandLatencies of the database.
+ * \param Measurement The latency measurement.
+ * \return Pair of source and target operand name.
+ */
+std::pair<std::string, std::string> getLatencyOperands(const LatMeasurement &Measurement);
+
+/**
+ * \brief Reads a database from a YAML file without changing outputDatabase.
+ * \param Path Path to the YAML file.
+ * \return Pair of ErrorCode and the entries of the database.
+ */
+std::pair<ErrorCode, std::vector<IOInstruction>> readYaml(std::string Path);
+
+/**
+ * \brief Loads a database from a YAML file into outputDatabase. Use getDatabaseEntries() to seed
+ * the working databases with the loaded values.
  * \param Path Path to the YAML file.
  * \return ErrorCode indicating success or failure.
  */
 ErrorCode loadYaml(std::string Path);
 
+/**
+ * \brief Returns a copy of the entries in outputDatabase.
+ */
+std::vector<IOInstruction> getDatabaseEntries();
+
 /**
  * \brief Saves the outputDatabase to a YAML file.
  * \param Path Path to the YAML file.
@@ -0,0 +1,70 @@
+#ifndef IN_PROCESS_ASSEMBLER_H
+#define IN_PROCESS_ASSEMBLER_H
+
+#include "ErrorCode.h"
+#include "llvm/ExecutionEngine/RuntimeDyld.h"
+#include "llvm/ExecutionEngine/SectionMemoryManager.h"
+#include "llvm/Object/ObjectFile.h"
+#include "llvm/Support/MemoryBuffer.h"
+#include "llvm/Support/raw_ostream.h"
+#include <memory>
+#include <string>
+
+using namespace llvm;
+
+/**
+ * \brief Assembles benchmark files with the LLVM MC layer of the current environment and maps the
+ * resulting object into executable memory of this process. This avoids spawning clang for every
+ * benchmark. The mapped code stays valid as long as the assembler object lives.
+ */
+class InProcessAssembler {
+  public:
+    /**
+     * \brief Checks if the current architecture is supported by the in-process assembler.
+     * \return True if assemble() can be used, false if clang has to be used instead.
+     */
+    static bool isSupported();
+
+    /**
+     * \brief Assembles the source and loads the object into executable memory.
+     * \param Source Assembly source as generated by AssemblyFile::generateAssembly(). Simple
+     * object-like #define macros are expanded, other preprocessor features are not supported.
+     * \param Diagnostics Stream to print assembler errors and warnings to.
+     * \return SUCCESS, E_ASSEMBLY if the source could not be assembled or E_MMAP if the object
+     * could not be loaded.
+     */
+    ErrorCode assemble(const std::string &Source, raw_ostream &Diagnostics);
+
+    /**
+     * \brief Assembles the source into a relocatable object without loading it.
+     * \param Source Assembly source, see assemble().
+     * \param Diagnostics Stream to print assembler errors and warnings to.
+     * \param Object Receives the object file.
+     * \return SUCCESS or E_ASSEMBLY if the source could not be assembled.
+     */
+    static ErrorCode emitObject(const std::string &Source, raw_ostream &Diagnostics,
+                                std::string &Object);
+
+    /**
+     * \brief Loads an object created by emitObject() into executable memory.
+     * \param Object The object file.
+     * \param Diagnostics Stream to print loader errors to.
+     * \return SUCCESS, E_ASSEMBLY if the object is invalid or E_MMAP if it could not be mapped.
+     */
+    ErrorCode load(StringRef Object, raw_ostream &Diagnostics);
+
+    /**
+     * \brief Gets the address of a symbol of the loaded object.
+     * \param Name Name of the symbol.
+     * \return Address of the symbol or nullptr if it does not exist.
+     */
+    void *getSymbol(const std::string &Name);
+
+  private:
+    std::unique_ptr<MemoryBuffer> objectBuffer;
+    std::unique_ptr<object::ObjectFile> objectFile;
+    std::unique_ptr<SectionMemoryManager> memoryManager;
+    std::unique_ptr<RuntimeDyld> dyld;
+};
+
+#endif // IN_PROCESS_ASSEMBLER_H
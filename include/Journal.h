@@ -0,0 +1,54 @@
+#ifndef JOURNAL_H
+#define JOURNAL_H
+
+#include "ErrorCode.h"
+#include <fstream>
+#include <string>
+#include <vector>
+
+/**
+ * \brief Append-only journal of completed measurements. Every record is flushed as soon as it is
+ * written so an interrupted run can be resumed from the records written up to that point.
+ * Records are lines of tab separated fields, a partially written last line is ignored.
+ */
+class Journal {
+  public:
+    /**
+     * \brief Opens the journal for appending.
+     * \param Path Path to the journal file.
+     * \param Header Identifies the run e.g. mode and CPU. A journal with a different header is not
+     * resumed.
+     * \param Resume If true the records of an existing journal are loaded and new records are
+     * appended, otherwise the journal is truncated.
+     * \return SUCCESS, or E_FILE if the file can't be opened or the header does not match.
+     */
+    ErrorCode open(const std::string &Path, const std::vector<std::string> &Header, bool Resume);
+
+    /**
+     * \brief Checks if open() was called successfully.
+     */
+    bool isOpen() { return file.is_open(); }
+
+    /**
+     * \brief Records loaded by open(), without the header.
+     */
+    const std::vector<std::vector<std::string>> &getRecords() { return records; }
+
+    /**
+     * \brief Appends a record and flushes it to the file. Does nothing if the journal is not open.
+     * \param Fields Fields of the record, may contain any characters.
+     */
+    void append(const std::vector<std::string> &Fields);
+
+    /**
+     * \brief Closes and deletes the journal, e.g. once the results are saved.
+     */
+    void remove();
+
+  private:
+    std::string path;
+    std::ofstream file;
+    std::vector<std::vector<std::string>> records;
+};
+
+#endif // JOURNAL_H
@@ -0,0 +1,81 @@
+#ifndef OBJECT_CACHE_H
+#define OBJECT_CACHE_H
+
+#include "ErrorCode.h"
+#include "llvm/ADT/StringRef.h"
+#include <atomic>
+#include <cstdint>
+#include <string>
+
+using namespace llvm;
+
+/**
+ * \brief On-disk cache of assembled benchmarks keyed by a hash of the assembly and the target.
+ * The total size is capped, least recently used entries are evicted first. Statistics are kept in
+ * shared memory so lookups in measurement subprocesses are counted as well.
+ */
+class ObjectCache {
+  public:
+    /**
+     * \brief Enables the cache. Has to be called before any measurement subprocess is forked.
+     * \param Dir Directory to store the cached objects in, created if it does not exist.
+     * \param MaxBytes Maximum total size of the cached objects.
+     * \return SUCCESS, E_FILE if the directory can't be created or E_MMAP.
+     */
+    ErrorCode init(const std::string &Dir, uint64_t MaxBytes);
+
+    /**
+     * \brief Checks if init() was called successfully.
+     */
+    bool isEnabled() { return stats != nullptr; }
+
+    /**
+     * \brief Computes the cache key for an assembly file.
+     * \param Source The assembly source.
+     * \param Backend Identifies the assembler and its options, objects produced by different
+     * backends are never mixed up.
+     * \return Hex encoded hash of the source, backend, target triple, CPU and features.
+     */
+    std::string getKey(const std::string &Source, const std::string &Backend);
+
+    /**
+     * \brief Looks up an object and marks it as recently used.
+     * \param Key Key as returned by getKey().
+     * \param Extension File extension of the object e.g. ".so".
+     * \return Path to the cached object or an empty string on a miss.
+     */
+    std::string lookup(const std::string &Key, const std::string &Extension);
+
+    /**
+     * \brief Adds an object to the cache and evicts old entries if the size cap is exceeded.
+     * \param Key Key as returned by getKey().
+     * \param Extension File extension of the object e.g. ".so".
+     * \param Object Contents of the object file.
+     */
+    void store(const std::string &Key, const std::string &Extension, StringRef Object);
+
+    /**
+     * \brief Summary of hits, misses and evictions for the report.
+     */
+    std::string getSummary();
+
+  private:
+    struct SharedStats {
+        std::atomic<uint64_t> hits;
+        std::atomic<uint64_t> misses;
+        std::atomic<uint64_t> evictions;
+        std::atomic<uint64_t> totalBytes; ///< approximate size of the cache directory
+        std::atomic<bool> evicting;
+    };
+
+    /**
+     * \brief Removes the least recently used objects until the cache is below 90% of the cap.
+     */
+    void evict();
+
+    std::string dir;
+    uint64_t maxBytes = 0;
+    SharedStats *stats = nullptr;
+};
+
+#endif // OBJECT_CACHE_H
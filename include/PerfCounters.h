@@ -0,0 +1,64 @@
+#ifndef PERF_COUNTERS_H
+#define PERF_COUNTERS_H
+
+#include "ErrorCode.h"
+#include "Globals.h"
+#include <cstdint>
+#include <string>
+#include <vector>
+
+/**
+ * \brief Names of the events predefined for the current architecture and CPU, accepted by
+ * setUpCounters(). Raw events can be given as name=0x<config> in addition.
+ */
+std::vector<std::string> getCounterNames();
+
+/**
+ * \brief Selects the events counted around each benchmark run. They are counted as one
+ * perf_event_open group, so all of them have to fit into the PMU at the same time. Has to be
+ * called after the environment is set up and before measurements are started.
+ * \param Names Entries of getCounterNames() or raw events as name=0x<config>. At most
+ * MAX_COUNTERS, an empty list disables the counters.
+ * \return SUCCESS or E_COUNTERS if an event is unknown or the group can't be counted.
+ */
+ErrorCode setUpCounters(const std::vector<std::string> &Names);
+
+/**
+ * \brief Names of the events selected by setUpCounters() in the order they are stored in
+ * SampleStats::counters.
+ */
+const std::vector<std::string> &getEnabledCounters();
+
+/**
+ * \brief Opens the counter group in the current process if counters are enabled. Has to be called
+ * in each (sub)process before startCounters(), like prepareTimer().
+ * \return SUCCESS or E_COUNTERS.
+ */
+ErrorCode prepareCounters();
+
+/**
+ * \brief Resets and starts the counters.
+ */
+void startCounters();
+
+/**
+ * \brief Stops the counters and reads them.
+ * \param Values Receives one value per enabled counter.
+ * \return False if the counters were not running e.g. because the PMU was used by another group.
+ */
+bool stopCounters(std::vector<uint64_t> &Values);
+
+/**
+ * \brief Key under which runBenchmark() returns the counts of an event for a benchmark function.
+ * \param Counter Name of the event.
+ * \param Function Name of the benchmark function.
+ */
+std::string counterKey(const std::string &Counter, const std::string &Function);
+
+/**
+ * \brief Formats the counters of a measurement for the report e.g. "uops-retired 1.02, port0 0.5".
+ * \return Empty string if no counters were measured.
+ */
+std::string countersToString(const SampleStats &Stats);
+
+#endif // PERF_COUNTERS_H
@@ -0,0 +1,46 @@
+#ifndef PORT_MAPPING_H
+#define PORT_MAPPING_H
+
+#include "ErrorCode.h"
+#include <map>
+#include <string>
+#include <utility>
+
+/**
+ * \brief Number of uops per port group of an instruction, e.g. {"0156": 1, "23": 1} for
+ * 1*p0156+1*p23 in the notation of uops.info. A port group lists the ports its uops can be executed
+ * on, one character per port.
+ */
+using PortUsage = std::map<std::string, unsigned>;
+
+/**
+ * \brief Formats a port usage like uops.info e.g. "1*p0156+1*p23".
+ */
+std::string portUsageToString(const PortUsage &Usage);
+
+/**
+ * \brief Parses a port usage in the notation of uops.info. The uop count may be omitted for a
+ * single uop, e.g. "p0156" is the same as "1*p0156".
+ * \return SUCCESS or E_PORT_USAGE if Usage can't be parsed.
+ */
+std::pair<ErrorCode, PortUsage> parsePortUsage(const std::string &Usage);
+
+/**
+ * \brief Checks if all ports of port group A are also in B.
+ */
+bool isPortSubset(const std::string &A, const std::string &B);
+
+/**
+ * \brief Checks if any uop of A can be executed on a port which a uop of B can be executed on.
+ */
+bool sharePorts(const PortUsage &A, const PortUsage &B);
+
+/**
+ * \brief Derives the port usage from the number of uops which have to be executed on each port
+ * group, like uops.info does. The groups are visited from the smallest to the largest, a group gets
+ * the uops which are not already assigned to one of its subsets.
+ * \param UopsPerGroup Measured number of uops bound to each port group, rounded to whole uops.
+ */
+PortUsage solvePortUsage(const std::map<std::string, double> &UopsPerGroup);
+
+#endif // PORT_MAPPING_H
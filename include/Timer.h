@@ -0,0 +1,73 @@
+#ifndef TIMER_H
+#define TIMER_H
+
+#include "ErrorCode.h"
+#include <cstdint>
+#include <string>
+#include <vector>
+
+// timer used to measure benchmark runtimes. All backends return ticks which are converted to
+// core cycles by ticksToCycles()
+enum TimerBackend {
+    TIMER_GETTIMEOFDAY, // microseconds, needs fixed frequency
+    TIMER_PERF,         // core cycles from perf_event_open
+    TIMER_RDTSC,        // x86 time stamp counter, constant rate, needs fixed frequency
+    TIMER_CNTVCT,       // AArch64 virtual counter, constant rate, needs fixed frequency
+    TIMER_RDCYCLE,      // RISC-V core cycles
+};
+
+/**
+ * \brief Names accepted by setUpTimer().
+ */
+std::vector<std::string> getTimerNames();
+
+/**
+ * \brief Selects and initializes the timer backend. Has to be called after the environment is set
+ * up and before measurements are started.
+ * \param Name One of getTimerNames(). "auto" uses perf if available and gettimeofday otherwise.
+ * \return SUCCESS, E_UNSUPPORTED_ARCH if the backend is not available on this architecture or
+ * E_TIMER if it can't be initialized.
+ */
+ErrorCode setUpTimer(const std::string &Name);
+
+/**
+ * \brief Name of the selected backend for the report.
+ */
+std::string getTimerName();
+
+/**
+ * \brief Checks if the selected backend counts core cycles. Otherwise the clock frequency has to be
+ * fixed and known to convert ticks to cycles.
+ */
+bool timerCountsCycles();
+
+/**
+ * \brief Prepares the timer for use in the current process e.g. opens the perf counter. Has to be
+ * called in each (sub)process before readTimer().
+ * \return SUCCESS or E_TIMER.
+ */
+ErrorCode prepareTimer();
+
+/**
+ * \brief Reads the current value of the timer.
+ * \return Timer value in ticks.
+ */
+uint64_t readTimer();
+
+/**
+ * \brief Converts a difference of timer values to core cycles.
+ * \param Ticks Difference of two readTimer() values.
+ * \param Frequency CPU frequency in GHz, ignored if the timer counts cycles.
+ * \return Number of core cycles.
+ */
+double ticksToCycles(double Ticks, double Frequency);
+
+/**
+ * \brief Scales a loop count chosen for the microsecond resolution of gettimeofday to the
+ * resolution of the selected timer.
+ * \param LoopCount Loop count needed with gettimeofday.
+ * \return Loop count to use with the selected timer.
+ */
+unsigned scaleLoopCount(unsigned LoopCount);
+
+#endif // TIMER_H
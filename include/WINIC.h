@@ -1,212 +1,384 @@
-#ifndef LLVM_INSTR_GEN_H
-#define LLVM_INSTR_GEN_H
-
-#include "AssemblyFile.h"
-#include "ErrorCode.h"
-#include "Globals.h"
-#include "llvm/MC/MCRegister.h"
-#include <cmath>
-#include <list>
-#include <map>
-#include <set>
-#include <string>
-#include <tuple>
-#include <unordered_map>
-#include <unordered_set>
-#include <utility>
-#include <vector>
-
-class LLVMEnvironment;
-
-#ifndef CLANG_PATH
-#define CLANG_PATH "usr/bin/clang"
-#endif
-
-using namespace llvm;
-
-static std::unordered_map<unsigned, TPMeasurement> throughputDatabase;
-// opcodes in this list will be used as helpers wherever possible even when they
-// define a superregister of the register we need a helper for
-static std::list<unsigned> priorityTPHelper;
-static std::list<std::tuple<unsigned, std::set<MCRegister>, std::set<MCRegister>>>
-    helperInstructions; // opcode, read/write register
-static std::map<unsigned, std::string> throughputOutputMessage;
-
-static std::vector<LatMeasurement> latencyDatabase;
-static std::map<DependencyType, LatMeasurement> helperInstructionsLat;
-// append messages to be printed to the report file
-static std::map<unsigned, std::string> latencyOutputMessage;
-
-static bool dbgToFile = true;
-static bool showProgress = true;
-extern LLVMEnvironment env;
-
-inline bool equalWithTolerance(double A, double B) { return std::abs(A - B) <= 0.1 * A; }
-inline bool smallerEqWithTolerance(double A, double B) { return A < B || equalWithTolerance(A, B); }
-inline bool greaterEqWithTolerance(double A, double B) { return A > B || equalWithTolerance(A, B); }
-// usual latencies are close to an integer >= 1
-inline bool isUnusualLat(double A) {
-    if (A < 0.5) return true;
-    if (A > 600) return true;
-    return !equalWithTolerance(std::round(A), A);
-}
-
-/**
- * \brief Runs a benchmark on the provided assembly file.
- *
- * \param Assembly The assembly file to benchmark.
- * \param N Number of loop iterations per run.
- * \param Runs Number of benchmark runs.
- * \return Pair of error code and a map from function names to lists of measured times.
- */
-std::pair<ErrorCode, std::unordered_map<std::string, std::list<double>>>
-runBenchmark(AssemblyFile Assembly, unsigned N, unsigned Runs);
-
-/**
- * \brief Manually runs a benchmark from an assembly file at a given path.
- *
- * \param SPath Path to the assembly file.
- * \param Runs Number of benchmark runs.
- * \param NumInst Number of instructions in the loop.
- * \param LoopCount Number of loop iterations.
- * \param Frequency CPU frequency in GHz.
- * \param FunctionName Name of the function to benchmark.
- * \param InitName (Optional) Name of the initialization function.
- * \return Pair of error code and a vector of measured times.
- */
-std::pair<ErrorCode, std::vector<double>> runManual(std::string SPath, unsigned Runs,
-                                                    unsigned NumInst, int LoopCount,
-                                                    double Frequency, std::string FunctionName,
-                                                    std::string InitName = "");
-
-/**
- * \brief Calculates the cycles per instruction based on measured runtimes.
- *
- * \param Runtime Time for the original loop.
- * \param UnrolledRuntime Time for the unrolled loop.
- * \param NumInst Number of instructions in loop.
- * \param LoopCount Number of loop iterations.
- * \param Frequency CPU frequency in GHz.
- * \param Throughput Whether this is a throughput measurement.
- * \return Pair of error code and cycles per instruction.
- */
-std::pair<ErrorCode, double> calculateCycles(double Runtime, double UnrolledRuntime,
-                                             unsigned NumInst, unsigned LoopCount, double Frequency,
-                                             bool Throughput);
-
-/**
- * \brief Finds a helper instruction for throughput measurement if needed.
- *
- * \param Opcode The opcode to analyze.
- * \return Tuple of error code, helper opcode (or MAX_UNSIGNED if not needed), and helper
- * constraints. Returns ERROR_NO_HELPER if a helper is needed but none can be found.
- */
-std::tuple<ErrorCode, unsigned, std::map<unsigned, MCRegister>>
-getTPHelperInstruction(unsigned Opcode);
-
-/**
- * \brief Measures the throughput of the instruction with the given opcode.
- *
- * Runs multiple benchmarks to correct overhead of loop instructions. This may segfault e.g.
- * on privileged instructions like CLGI. Returns a lower and an upper bound for the throughput.
- *
- * \param Opcode The opcode to measure.
- * \param Frequency CPU frequency in GHz.
- * \return Tuple of error code, lower bound, and upper bound for throughput.
- */
-std::tuple<ErrorCode, double, double> measureThroughput(unsigned Opcode, double Frequency);
-
-/**
- * \brief Measures the latency of the provided instruction chain.
- *
- * Runs two benchmarks to correct eventual interference with loop instructions.
- * This may segfault e.g. on privileged instructions like CLGI.
- *
- * \param Measurements List of latency measurements to perform.
- * \param LoopCount Number of loop iterations.
- * \param Frequency CPU frequency in GHz.
- * \return Pair of error code and measured latency.
- */
-std::pair<ErrorCode, double> measureLatency(const std::list<LatMeasurement> &Measurements,
-                                            unsigned LoopCount, double Frequency);
-
-/**
- * \brief Calls measureThroughput in a subprocess to recover from segfaults during benchmarking.
- *
- * \param Opcode The opcode to measure.
- * \param Frequency CPU frequency in GHz.
- * \return Tuple of error code, lower bound, and upper bound for throughput.
- */
-std::tuple<ErrorCode, double, double> measureInSubprocess(unsigned Opcode, double Frequency);
-
-/**
- * \brief Calls measureLatency in a subprocess to recover from segfaults during benchmarking.
- *
- * \param Measurements List of latency measurements to perform.
- * \param LoopCount Number of loop iterations.
- * \param Frequency CPU frequency in GHz.
- * \return Pair of error code and measured latency.
- */
-std::pair<ErrorCode, double> measureInSubprocess(const std::list<LatMeasurement> &Measurements,
-                                                 unsigned LoopCount, double Frequency);
-
-/**
- * \brief Calls runManual in a subprocess to recover from segfaults during benchmarking.
- *
- * \param SPath Path to the assembly file.
- * \param Runs Number of benchmark runs.
- * \param NumInst Number of instructions in the loop.
- * \param LoopCount Number of loop iterations.
- * \param Frequency CPU frequency in GHz.
- * \param FunctionName Name of the function to benchmark.
- * \param InitName (Optional) Name of the initialization function.
- * \return Pair of error code and a vector of measured times.
- */
-std::pair<ErrorCode, std::vector<double>>
-measureInSubprocess(std::string SPath, unsigned Runs, unsigned NumInst, unsigned LoopCount,
-                    double Frequency, std::string FunctionName, std::string InitName = "");
-
-/**
- * \brief Checks if two opcodes are variants of the same instruction with different operands.
- *
- * \param A First opcode.
- * \param B Second opcode.
- * \return True if A and B are variants, false otherwise.
- */
-bool isVariant(unsigned A, unsigned B);
-
-/**
- * \brief Runs a small test to check if execution results in ILLEGAL_INSTRUCTION or fails in any
- * other way.
- *
- * \param Measurement The latency measurement to test.
- * \param Frequency CPU frequency in GHz.
- * \return Error code indicating the result.
- */
-ErrorCode canMeasure(LatMeasurement Measurement, double Frequency);
-
-/**
- * \brief Measures the first MaxOpcode instructions or all if MaxOpcode is zero or not supplied.
- *
- * \param Opcodes List of opcodes to measure.
- * \param Frequency CPU frequency in GHz.
- */
-void buildTPDatabase(std::vector<unsigned> Opcodes, double Frequency);
-
-/**
- * \brief Builds the latency database by measuring all relevant instructions.
- *
- * \param Frequency CPU frequency in GHz.
- */
-void buildLatDatabase(double Frequency);
-
-/**
- * \brief Main entry point for the WINIC program.
- *
- * \param argc Argument count.
- * \param argv Argument vector.
- * \return Program exit code.
- */
-int main(int argc, char **argv);
-
-#endif // LLVM_INSTR_GEN_H
+#ifndef LLVM_INSTR_GEN_H
+#define LLVM_INSTR_GEN_H
+
+#include "AssemblyFile.h"
+#include "ErrorCode.h"
+#include "Globals.h"
+#include "Journal.h"
+#include "ObjectCache.h"
+#include "PortMapping.h"
+#include "llvm/MC/MCRegister.h"
+#include <cmath>
+#include <functional>
+#include <list>
+#include <map>
+#include <set>
+#include <string>
+#include <tuple>
+#include <unordered_map>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+class LLVMEnvironment;
+
+#ifndef CLANG_PATH
+#define CLANG_PATH "usr/bin/clang"
+#endif
+
+using namespace llvm;
+
+static std::unordered_map<unsigned, TPMeasurement> throughputDatabase;
+// opcodes in this list will be used as helpers wherever possible even when they
+// define a superregister of the register we need a helper for
+static std::list<unsigned> priorityTPHelper;
+static std::list<std::tuple<unsigned, std::set<MCRegister>, std::set<MCRegister>>>
+    helperInstructions; // opcode, read/write register
+static std::map<unsigned, std::string> throughputOutputMessage;
+// port usage of the instructions, from the database or measured in PORTS mode. Used to tell if an
+// instruction and its throughput helper compete for the same ports
+static std::unordered_map<unsigned, PortUsage> portDatabase;
+
+static std::vector<LatMeasurement> latencyDatabase;
+static std::map<DependencyType, LatMeasurement> helperInstructionsLat;
+// append messages to be printed to the report file
+static std::map<unsigned, std::string> latencyOutputMessage;
+
+static bool dbgToFile = true;
+static bool showProgress = true;
+// assemble benchmarks by calling clang instead of using the in-process MC assembler
+static bool useClang = false;
+// cache of assembled benchmarks, disabled unless init() is called
+static ObjectCache objectCache;
+// number of measurements whose benchmarks are assembled into one object, 1 disables batching
+static unsigned batchSize = 1;
+// completed measurements of the current run, disabled unless open() is called
+static Journal journal;
+// number of throughput measurements running concurrently and the cores they are pinned to. If
+// workerCores is empty the workers are not pinned
+static unsigned numWorkers = 1;
+static std::vector<unsigned> workerCores;
+// adaptive measurements choose the loop count so one sample takes adaptiveTargetTime seconds and
+// take samples until the median is within adaptiveConfidence of the minimum
+static bool adaptiveMode = false;
+static double adaptiveTargetTime = 0.001;
+static double adaptiveConfidence = 0.01;
+static unsigned adaptiveMinSamples = 3;
+static unsigned adaptiveMaxSamples = 50;
+// skip helper pair candidates in the LAT search which are not expected to beat the current pair
+// according to the scheduling model. This is a heuristic and may miss the best pair
+static bool prunePairSearch = false;
+extern LLVMEnvironment env;
+
+inline bool equalWithTolerance(double A, double B) { return std::abs(A - B) <= 0.1 * A; }
+inline bool smallerEqWithTolerance(double A, double B) { return A < B || equalWithTolerance(A, B); }
+inline bool greaterEqWithTolerance(double A, double B) { return A > B || equalWithTolerance(A, B); }
+// usual latencies are close to an integer >= 1
+inline bool isUnusualLat(double A) {
+    if (A < 0.5) return true;
+    if (A > 600) return true;
+    return !equalWithTolerance(std::round(A), A);
+}
+
+/**
+ * \brief Runs a benchmark on the provided assembly file.
+ *
+ * In adaptive mode N and Runs are only used as defaults, the loop count is chosen to reach the
+ * target time per sample and samples are taken until they converge. Loop counts below 100 are
+ * probes e.g. from canMeasure() and are used as they are.
+ *
+ * \param Assembly The assembly file to benchmark.
+ * \param N Number of loop iterations per run.
+ * \param Runs Number of benchmark runs.
+ * \param Stats (Optional) Receives the loop count actually used and the sample statistics.
+ * \return Pair of error code and a map from function names to lists of measured times in timer
+ * ticks.
+ */
+std::pair<ErrorCode, std::unordered_map<std::string, std::list<double>>>
+runBenchmark(AssemblyFile Assembly, unsigned N, unsigned Runs, SampleStats *Stats = nullptr);
+
+// receives the result of one benchmark of a batch: its index, the error code, the measured times
+// by function name and the sample statistics
+using BatchConsumer = std::function<void(
+    size_t, ErrorCode, std::unordered_map<std::string, std::list<double>>, const SampleStats &)>;
+
+/**
+ * \brief Runs several benchmarks from a single assembled object, so the assembler and the loader
+ * only run once for the whole batch.
+ *
+ * If the batch can't be assembled it is split in half until the benchmarks which break assembly
+ * are found. Each benchmark is timed in its own subprocess, a crash only affects the benchmark
+ * which caused it.
+ *
+ * \param Assemblies The benchmarks, function names only have to be unique within each of them.
+ * \param N Number of loop iterations per run.
+ * \param Runs Number of benchmark runs.
+ * \param Consume Called once per benchmark. The results of successful runs are passed on in the
+ * subprocess, so Consume has to store them in shared memory.
+ */
+void runBenchmarkBatch(std::vector<AssemblyFile> Assemblies, unsigned N, unsigned Runs,
+                       const BatchConsumer &Consume);
+
+/**
+ * \brief Manually runs a benchmark from an assembly file at a given path.
+ *
+ * \param SPath Path to the assembly file.
+ * \param Runs Number of benchmark runs.
+ * \param NumInst Number of instructions in the loop.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \param FunctionName Name of the function to benchmark.
+ * \param InitName (Optional) Name of the initialization function.
+ * \return Pair of error code and a vector of measured times in timer ticks.
+ */
+std::pair<ErrorCode, std::vector<double>> runManual(std::string SPath, unsigned Runs,
+                                                    unsigned NumInst, int LoopCount,
+                                                    double Frequency, std::string FunctionName,
+                                                    std::string InitName = "");
+
+/**
+ * \brief Calculates the cycles per instruction based on measured runtimes.
+ *
+ * \param Runtime Time for the original loop in timer ticks.
+ * \param UnrolledRuntime Time for the unrolled loop in timer ticks.
+ * \param NumInst Number of instructions in loop.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz, ignored if the timer counts cycles.
+ * \param Throughput Whether this is a throughput measurement.
+ * \return Pair of error code and cycles per instruction.
+ */
+std::pair<ErrorCode, double> calculateCycles(double Runtime, double UnrolledRuntime,
+                                             unsigned NumInst, unsigned LoopCount, double Frequency,
+                                             bool Throughput);
+
+/**
+ * \brief Finds the register an instruction needs a throughput helper for.
+ *
+ * \param Opcode The opcode to analyze.
+ * \return Pair of error code and the register read by the dependency of the instruction on itself,
+ * MCRegister() if no helper is needed. Returns ERROR_NO_HELPER if the instruction depends on
+ * itself more than once.
+ */
+std::pair<ErrorCode, MCRegister> getTPHelperRegister(unsigned Opcode);
+
+/**
+ * \brief Finds a helper instruction for throughput measurement if needed.
+ *
+ * \param Opcode The opcode to analyze.
+ * \return Tuple of error code, helper opcode (or MAX_UNSIGNED if not needed), and helper
+ * constraints. Returns ERROR_NO_HELPER if a helper is needed but none can be found.
+ */
+std::tuple<ErrorCode, unsigned, std::map<unsigned, MCRegister>>
+getTPHelperInstruction(unsigned Opcode);
+
+/**
+ * \brief Measures the throughput of the instruction with the given opcode.
+ *
+ * Runs multiple benchmarks to correct overhead of loop instructions. This may segfault e.g.
+ * on privileged instructions like CLGI. Returns a lower and an upper bound for the throughput.
+ *
+ * \param Opcode The opcode to measure.
+ * \param Frequency CPU frequency in GHz.
+ * \param Stats (Optional) Receives the sample statistics of the measurement.
+ * \return Tuple of error code, lower bound, and upper bound for throughput.
+ */
+std::tuple<ErrorCode, double, double> measureThroughput(unsigned Opcode, double Frequency,
+                                                        SampleStats *Stats = nullptr);
+
+// receives the result of one throughput measurement of a batch: its index, the error code, the
+// lower and upper bound and the sample statistics
+using TPBatchConsumer = std::function<void(size_t, ErrorCode, double, double, const SampleStats &)>;
+
+/**
+ * \brief Measures the throughput of several instructions, their benchmarks are assembled into a
+ * single object by runBenchmarkBatch().
+ *
+ * \param Opcodes The opcodes to measure.
+ * \param Frequency CPU frequency in GHz.
+ * \param Consume Called once per opcode with the result measureThroughput() would return. May be
+ * called in a subprocess, see runBenchmarkBatch().
+ */
+void measureThroughputBatch(const std::vector<unsigned> &Opcodes, double Frequency,
+                            const TPBatchConsumer &Consume);
+
+/**
+ * \brief Measures the throughput of an instruction interleaved with Count instances of a reference
+ * instruction. If the instruction needs a throughput helper it is interleaved as well.
+ *
+ * \param Opcode The opcode to measure.
+ * \param Reference The opcode of the reference instruction.
+ * \param Count Number of reference instructions per instruction.
+ * \param Frequency CPU frequency in GHz.
+ * \param Stats (Optional) Receives the sample statistics of the measurement.
+ * \return Pair of error code and cycles per sequence of the instruction, its helper and the
+ * reference instructions. E_REFERENCE_DEPENDENCY if the reference depends on the instruction or
+ * its helper.
+ */
+std::pair<ErrorCode, double> measureInterference(unsigned Opcode, unsigned Reference,
+                                                 unsigned Count, double Frequency,
+                                                 SampleStats *Stats = nullptr);
+
+/**
+ * \brief Measures the latency of the provided instruction chain.
+ *
+ * Runs two benchmarks to correct eventual interference with loop instructions.
+ * This may segfault e.g. on privileged instructions like CLGI.
+ *
+ * \param Measurements List of latency measurements to perform.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \param Stats (Optional) Receives the sample statistics of the measurement.
+ * \return Pair of error code and measured latency.
+ */
+std::pair<ErrorCode, double> measureLatency(const std::list<LatMeasurement> &Measurements,
+                                            unsigned LoopCount, double Frequency,
+                                            SampleStats *Stats = nullptr);
+
+// receives the result of one latency measurement of a batch: its index, the error code, the
+// latency and the sample statistics
+using LatBatchConsumer = std::function<void(size_t, ErrorCode, double, const SampleStats &)>;
+
+/**
+ * \brief Measures the latency of several instructions which form a chain on their own, their
+ * benchmarks are assembled into a single object by runBenchmarkBatch().
+ *
+ * \param Measurements The measurements, each one is measured as a chain of its own.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \param Consume Called once per measurement with the result measureLatency() would return. May
+ * be called in a subprocess, see runBenchmarkBatch().
+ */
+void measureLatencyBatch(const std::vector<LatMeasurement> &Measurements, unsigned LoopCount,
+                         double Frequency, const LatBatchConsumer &Consume);
+
+/**
+ * \brief Calls measureThroughput in a worker process to recover from segfaults during
+ * benchmarking. Uses the worker pool if one is running, otherwise a temporary worker is forked.
+ *
+ * \param Opcode The opcode to measure.
+ * \param Frequency CPU frequency in GHz.
+ * \param Stats (Optional) Receives the sample statistics of the measurement.
+ * \return Tuple of error code, lower bound, and upper bound for throughput.
+ */
+std::tuple<ErrorCode, double, double> measureInSubprocess(unsigned Opcode, double Frequency,
+                                                          SampleStats *Stats = nullptr);
+
+/**
+ * \brief Calls measureLatency in a worker process to recover from segfaults during benchmarking.
+ * Uses the worker pool if one is running, otherwise a temporary worker is forked.
+ *
+ * \param Measurements List of latency measurements to perform.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \param Stats (Optional) Receives the sample statistics of the measurement.
+ * \return Pair of error code and measured latency.
+ */
+std::pair<ErrorCode, double> measureInSubprocess(const std::list<LatMeasurement> &Measurements,
+                                                 unsigned LoopCount, double Frequency,
+                                                 SampleStats *Stats = nullptr);
+
+/**
+ * \brief Calls measureInterference in a worker process to recover from segfaults during
+ * benchmarking. Uses the worker pool if one is running, otherwise a temporary worker is forked.
+ *
+ * \param Opcode The opcode to measure.
+ * \param Reference The opcode of the reference instruction.
+ * \param Count Number of reference instructions per instruction.
+ * \param Frequency CPU frequency in GHz.
+ * \return Pair of error code and cycles per sequence.
+ */
+std::pair<ErrorCode, double> measureInSubprocess(unsigned Opcode, unsigned Reference,
+                                                 unsigned Count, double Frequency);
+
+/**
+ * \brief Calls runManual in a subprocess to recover from segfaults during benchmarking.
+ *
+ * \param SPath Path to the assembly file.
+ * \param Runs Number of benchmark runs.
+ * \param NumInst Number of instructions in the loop.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \param FunctionName Name of the function to benchmark.
+ * \param InitName (Optional) Name of the initialization function.
+ * \return Pair of error code and a vector of measured times in timer ticks.
+ */
+std::pair<ErrorCode, std::vector<double>>
+measureInSubprocess(std::string SPath, unsigned Runs, unsigned NumInst, unsigned LoopCount,
+                    double Frequency, std::string FunctionName, std::string InitName = "");
+
+/**
+ * \brief Checks if two opcodes are variants of the same instruction with different operands.
+ *
+ * \param A First opcode.
+ * \param B Second opcode.
+ * \return True if A and B are variants, false otherwise.
+ */
+bool isVariant(unsigned A, unsigned B);
+
+/**
+ * \brief Runs a small test to check if execution results in ILLEGAL_INSTRUCTION or fails in any
+ * other way.
+ *
+ * \param Measurement The latency measurement to test.
+ * \param Frequency CPU frequency in GHz.
+ * \return Error code indicating the result.
+ */
+ErrorCode canMeasure(LatMeasurement Measurement, double Frequency);
+
+/**
+ * \brief Measures the first MaxOpcode instructions or all if MaxOpcode is zero or not supplied.
+ *
+ * \param Opcodes List of opcodes to measure.
+ * \param Frequency CPU frequency in GHz.
+ */
+void buildTPDatabase(std::vector<unsigned> Opcodes, double Frequency);
+
+/**
+ * \brief Measures the latencies of a pair of reversed dependency types, e.g. GR16 -> EFLAGS and
+ * EFLAGS -> GR16. First the pair of instructions with the lowest combined latency is searched, then
+ * it is used as helper to measure all other instructions of both types. The candidates are tried
+ * in the order of their latency according to the scheduling model. Every instruction has a latency
+ * of at least one cycle, so the search stops at a combined latency of two cycles. Further
+ * candidates are only skipped with prunePairSearch.
+ *
+ * \param TypeA The first dependency type, the second one is TypeA.reversed().
+ * \param ClassifiedMeasurements Measurements by dependency type.
+ * \param OpcodeBlacklist Opcodes which cannot be measured, extended by this function.
+ * \param LoopCount Number of loop iterations.
+ * \param Frequency CPU frequency in GHz.
+ * \return Number of pair measurements the search skipped because the candidates were not expected
+ * to beat the current pair, always zero without prunePairSearch.
+ */
+unsigned
+measureTypePair(DependencyType TypeA,
+                std::map<DependencyType, std::vector<LatMeasurement *>> &ClassifiedMeasurements,
+                std::set<unsigned> &OpcodeBlacklist, unsigned LoopCount, double Frequency);
+
+/**
+ * \brief Builds the latency database by measuring all relevant instructions.
+ *
+ * \param Frequency CPU frequency in GHz.
+ */
+void buildLatDatabase(double Frequency);
+
+/**
+ * \brief Derives the port usage of instructions by measuring each of them together with reference
+ * instructions, the ones in portDatabase with a single uop. An instruction which uses n uops on the
+ * ports of a reference slows the combined sequence down by n reference instructions. The results
+ * are stored in portDatabase.
+ *
+ * \param Opcodes List of opcodes to measure.
+ * \param Frequency CPU frequency in GHz.
+ */
+void buildPortDatabase(std::vector<unsigned> Opcodes, double Frequency);
+
+/**
+ * \brief Main entry point for the WINIC program.
+ *
+ * \param argc Argument count.
+ * \param argv Argument vector.
+ * \return Program exit code.
+ */
+int main(int argc, char **argv);
+
+#endif // LLVM_INSTR_GEN_H
@@ -63,6 +63,19 @@ std::string AssemblyFile::getInitNameFor(std::string BenchName) {
     return "";
 }
 
+ErrorCode AssemblyFile::append(const AssemblyFile &Other, const std::string &Suffix) {
+    for (InitFunction function : Other.initFunctions) {
+        function.name += Suffix;
+        if (!initFunctions.insert(function).second) return E_GENERIC;
+    }
+    for (BenchFunction function : Other.benchFunctions) {
+        function.name += Suffix;
+        if (!function.initFunction.empty()) function.initFunction += Suffix;
+        if (!benchFunctions.insert(function).second) return E_GENERIC;
+    }
+    return SUCCESS;
+}
+
 /**
  * @brief Generates an assembly file containing all functions in the list.
  * @return std::string Assembly code as a string.
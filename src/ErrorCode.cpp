@@ -72,6 +72,14 @@ std::string ecToString(ErrorCode EC) {
         return "ERROR_UNROLL_ANOMALY";
     case E_UNUSUAL_LATENCY:
         return "ERROR_UNUSUAL_LATENCY";
+    case E_TIMER:
+        return "ERROR_TIMER";
+    case E_COUNTERS:
+        return "ERROR_COUNTERS";
+    case E_PORT_USAGE:
+        return "ERROR_PORT_USAGE";
+    case E_REFERENCE_DEPENDENCY:
+        return "ERROR_REFERENCE_DEPENDENCY";
     case E_GENERIC:
         return "ERROR_GENERIC";
     }
@@ -6,11 +6,25 @@
 #include <CustomDebug.h>
 #include <ErrorCode.h>
 #include <Globals.h>
+#include <PerfCounters.h>
+#include <PortMapping.h>
 #include <algorithm>
 #include <cmath>
 #include <iostream>
 #include <string>
 
+namespace {
+// the performance counters of a measurement by name, rounded like the spread
+std::optional<std::map<std::string, double>> getCounters(const SampleStats &Stats, ErrorCode EC) {
+    if (Stats.numCounters == 0 || isError(EC)) return std::nullopt;
+    const std::vector<std::string> &names = getEnabledCounters();
+    std::map<std::string, double> counters;
+    for (unsigned i = 0; i < Stats.numCounters && i < names.size(); i++)
+        counters[names[i]] = std::round(Stats.counters[i] * 10000) / 10000;
+    return counters;
+}
+} // namespace
+
 std::pair<ErrorCode, IOInstruction> createOpInstruction(unsigned Opcode) {
     // create yaml output
     std::vector<IOOperand> operands;
@@ -101,7 +115,32 @@ ErrorCode updateDatabaseEntryTP(TPMeasurement M) {
             opInst.throughputMax = upperTP;
         }
         outputDatabase.push_back(opInst);
+        it = outputDatabase.end() - 1;
+    }
+    if (M.stats.samples > 0 && !isError(M.ec)) {
+        it->throughputSamples = M.stats.samples;
+        it->throughputSpread = std::round(M.stats.spread * 10000) / 10000;
+    } else {
+        it->throughputSamples.reset();
+        it->throughputSpread.reset();
+    }
+    it->throughputCounters = getCounters(M.stats, M.ec);
+    return SUCCESS;
+}
+
+ErrorCode updateDatabaseEntryPorts(unsigned Opcode, const PortUsage &Usage) {
+    std::string name = getEnv().MCII->getName(Opcode).str();
+    auto it = std::find_if(outputDatabase.begin(), outputDatabase.end(),
+                           [&](const IOInstruction &Inst) { return Inst.llvmName == name; });
+    if (it == outputDatabase.end()) {
+        // Not found, insert
+        auto [EC, opInst] = createOpInstruction(Opcode);
+        if (EC != SUCCESS) return EC;
+        outputDatabase.push_back(opInst);
+        it = outputDatabase.end() - 1;
     }
+    dbg(__func__, "update ", name, " ports: ", portUsageToString(Usage));
+    it->ports = portUsageToString(Usage);
     return SUCCESS;
 }
 
@@ -122,8 +161,7 @@ unsigned llvmOpNumToNormalOpNum(unsigned OpNum, const MCInstrDesc &Desc) {
     return correctedOpNum;
 }
 
-ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
-    std::string name = getEnv().MCII->getName(M.opcode).str();
+std::pair<std::string, std::string> getLatencyOperands(const LatMeasurement &M) {
     const MCInstrDesc &desc = getEnv().MCII->get(M.opcode);
     unsigned correctedUseIndex = llvmOpNumToNormalOpNum(M.useIndex, desc);
 
@@ -133,6 +171,12 @@ ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
         useIndexString = getEnv().MRI->getName(M.type.useOp.getRegister());
     if (M.type.defOp.isRegister())
         defIndexString = getEnv().MRI->getName(M.type.defOp.getRegister());
+    return {useIndexString, defIndexString};
+}
+
+ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
+    std::string name = getEnv().MCII->getName(M.opcode).str();
+    auto [useIndexString, defIndexString] = getLatencyOperands(M);
     auto instruction =
         std::find_if(outputDatabase.begin(), outputDatabase.end(),
                      [&](const IOInstruction &Inst) { return Inst.llvmName == name; });
@@ -152,10 +196,18 @@ ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
         isError(M.ec) ? std::nullopt : std::optional<double>(std::round(M.lowerBound));
     std::optional<double> max =
         isError(M.ec) ? std::nullopt : std::optional<double>(std::round(M.upperBound));
+    bool hasStats = M.stats.samples > 0 && !isError(M.ec);
+    std::optional<unsigned> samples =
+        hasStats ? std::optional<unsigned>(M.stats.samples) : std::nullopt;
+    std::optional<double> spread =
+        hasStats ? std::optional<double>(std::round(M.stats.spread * 10000) / 10000) : std::nullopt;
     if (latencyEntry != instruction->latencies.end()) {
         // Found entry, update it:
         latencyEntry->min = min;
         latencyEntry->max = max;
+        latencyEntry->samples = samples;
+        latencyEntry->spread = spread;
+        latencyEntry->counters = getCounters(M.stats, M.ec);
     } else {
         // no entry with this src target combination, add it
         IOLatency lat;
@@ -163,6 +215,9 @@ ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
         lat.targetOperand = defIndexString;
         lat.min = min;
         lat.max = max;
+        lat.samples = samples;
+        lat.spread = spread;
+        lat.counters = getCounters(M.stats, M.ec);
         instruction->latencies.insert(instruction->latencies.end(), lat);
         // it->operandLatencies[useIndexString][defIndexString] = std::round(M.lowerBound);
         // take any latency value for now to ensure OSACA compatibility, remove once OSACA is
@@ -173,22 +228,36 @@ ErrorCode updateDatabaseEntryLAT(LatMeasurement M) {
     return SUCCESS;
 }
 
-ErrorCode loadYaml(std::string Path) {
+std::pair<ErrorCode, std::vector<IOInstruction>> readYaml(std::string Path) {
+    std::vector<IOInstruction> entries;
     auto buffer = llvm::MemoryBuffer::getFile(Path);
     if (!buffer) {
         std::cerr << "Failed to open file: " << Path << std::endl;
-        return E_FILE;
+        return {E_FILE, {}};
     }
     llvm::yaml::Input yin(buffer->get()->getBuffer());
     try {
-        yin >> outputDatabase;
+        yin >> entries;
     } catch (const std::exception &e) {
         std::cerr << "YAML serialization error: " << e.what() << "\n";
-        return E_FILE;
+        return {E_FILE, {}};
+    }
+    if (yin.error()) {
+        std::cerr << "Failed to parse database: " << Path << std::endl;
+        return {E_FILE, {}};
     }
+    return {SUCCESS, entries};
+}
+
+ErrorCode loadYaml(std::string Path) {
+    auto [EC, entries] = readYaml(Path);
+    if (EC != SUCCESS) return EC;
+    outputDatabase = std::move(entries);
     return SUCCESS;
 }
 
+std::vector<IOInstruction> getDatabaseEntries() { return outputDatabase; }
+
 ErrorCode saveYaml(std::string Path) {
     std::error_code ec;
     llvm::raw_fd_ostream fout(Path, ec);
@@ -0,0 +1,139 @@
+#include "InProcessAssembler.h"
+
+#include "CustomDebug.h"
+#include "Globals.h"
+#include "LLVMEnvironment.h"
+#include "llvm/ADT/SmallVector.h"
+#include "llvm/MC/MCAsmBackend.h"
+#include "llvm/MC/MCCodeEmitter.h"
+#include "llvm/MC/MCContext.h"
+#include "llvm/MC/MCObjectFileInfo.h"
+#include "llvm/MC/MCObjectWriter.h"
+#include "llvm/MC/MCParser/MCAsmParser.h"
+#include "llvm/MC/MCParser/MCTargetAsmParser.h"
+#include "llvm/MC/MCStreamer.h"
+#include "llvm/MC/MCSubtargetInfo.h"
+#include "llvm/MC/MCTargetOptions.h"
+#include "llvm/MC/TargetRegistry.h"
+#include "llvm/Support/SourceMgr.h"
+#include "llvm/Target/TargetMachine.h"
+#include <regex>
+#include <sstream>
+#include <utility>
+#include <vector>
+
+namespace {
+// the templates only use object-like macros e.g. "#define N edi". Expand them like the C
+// preprocessor would and drop all other lines starting with '#', which are comments. Lines are
+// kept so diagnostics point to the right line
+std::string preprocess(const std::string &Source) {
+    static const std::regex definePattern(R"(^\s*#\s*define\s+(\w+)\s*(.*?)\s*$)");
+    std::vector<std::pair<std::regex, std::string>> macros;
+    std::istringstream in(Source);
+    std::string result;
+    std::string line;
+    std::smatch match;
+    while (std::getline(in, line)) {
+        size_t first = line.find_first_not_of(" \t");
+        if (std::regex_match(line, match, definePattern)) {
+            // '$' has to be escaped in the replacement format
+            std::string replacement =
+                std::regex_replace(match[2].str(), std::regex(R"(\$)"), "$$$$");
+            macros.emplace_back(std::regex("\\b" + match[1].str() + "\\b"), replacement);
+            line.clear();
+        } else if (first != std::string::npos && line[first] == '#') {
+            line.clear();
+        } else {
+            for (auto &[pattern, replacement] : macros)
+                line = std::regex_replace(line, pattern, replacement);
+        }
+        result += line + "\n";
+    }
+    return result;
+}
+
+void printDiagnostic(const SMDiagnostic &Diag, void *Context) {
+    Diag.print("benchmark", *static_cast<raw_ostream *>(Context));
+}
+} // namespace
+
+bool InProcessAssembler::isSupported() {
+    // RuntimeDyld does not implement all relocations the RISC-V assembler emits for relaxation
+    return getEnv().Arch == Triple::ArchType::x86_64 || getEnv().Arch == Triple::ArchType::aarch64;
+}
+
+ErrorCode InProcessAssembler::assemble(const std::string &Source, raw_ostream &Diagnostics) {
+    std::string object;
+    ErrorCode ec = emitObject(Source, Diagnostics, object);
+    if (ec != SUCCESS) return ec;
+    return load(object, Diagnostics);
+}
+
+ErrorCode InProcessAssembler::emitObject(const std::string &Source, raw_ostream &Diagnostics,
+                                         std::string &Object) {
+    LLVMEnvironment &env = getEnv();
+    const Target &target = env.Machine->getTarget();
+    const Triple &triple = env.MSTI->getTargetTriple();
+
+    SourceMgr srcMgr;
+    srcMgr.setDiagHandler(printDiagnostic, &Diagnostics);
+    srcMgr.AddNewSourceBuffer(MemoryBuffer::getMemBufferCopy(preprocess(Source), "benchmark.s"),
+                              SMLoc());
+    MCTargetOptions mcOptions;
+    MCContext ctx(triple, env.MAI, env.MRI, env.MSTI, &srcMgr, &mcOptions);
+    std::unique_ptr<MCObjectFileInfo> objectFileInfo(
+        target.createMCObjectFileInfo(ctx, /*PIC=*/true));
+    ctx.setObjectFileInfo(objectFileInfo.get());
+
+    // emit the object into memory
+    SmallVector<char, 0> objectBytes;
+    raw_svector_ostream objectStream(objectBytes);
+    std::unique_ptr<MCAsmBackend> asmBackend(
+        target.createMCAsmBackend(*env.MSTI, *env.MRI, mcOptions));
+    std::unique_ptr<MCCodeEmitter> codeEmitter(target.createMCCodeEmitter(*env.MCII, ctx));
+    if (!asmBackend || !codeEmitter) return E_ASSEMBLY;
+    std::unique_ptr<MCObjectWriter> objectWriter = asmBackend->createObjectWriter(objectStream);
+    std::unique_ptr<MCStreamer> streamer(
+        target.createMCObjectStreamer(triple, ctx, std::move(asmBackend), std::move(objectWriter),
+                                      std::move(codeEmitter), *env.MSTI));
+    std::unique_ptr<MCAsmParser> parser(createMCAsmParser(srcMgr, ctx, *streamer, *env.MAI));
+    std::unique_ptr<MCTargetAsmParser> targetParser(
+        target.createMCAsmParser(*env.MSTI, *parser, *env.MCII, mcOptions));
+    if (!targetParser) return E_ASSEMBLY;
+    parser->setTargetParser(*targetParser);
+    if (parser->Run(false) || ctx.hadError()) return E_ASSEMBLY;
+    Object.assign(objectBytes.begin(), objectBytes.end());
+    return SUCCESS;
+}
+
+ErrorCode InProcessAssembler::load(StringRef Object, raw_ostream &Diagnostics) {
+    // RuntimeDyld does the job of the dynamic linker for dlopen
+    objectBuffer = MemoryBuffer::getMemBufferCopy(Object, "benchmark.o");
+    auto objectOrErr = object::ObjectFile::createObjectFile(objectBuffer->getMemBufferRef());
+    if (!objectOrErr) {
+        Diagnostics << toString(objectOrErr.takeError()) << "\n";
+        return E_ASSEMBLY;
+    }
+    objectFile = std::move(*objectOrErr);
+    memoryManager = std::make_unique<SectionMemoryManager>();
+    dyld = std::make_unique<RuntimeDyld>(*memoryManager, *memoryManager);
+    dyld->loadObject(*objectFile);
+    if (dyld->hasError()) {
+        Diagnostics << dyld->getErrorString() << "\n";
+        return E_ASSEMBLY;
+    }
+    dyld->resolveRelocations();
+    std::string error;
+    if (memoryManager->finalizeMemory(&error)) {
+        Diagnostics << error << "\n";
+        return E_MMAP;
+    }
+    return SUCCESS;
+}
+
+void *InProcessAssembler::getSymbol(const std::string &Name) {
+    if (!dyld) return nullptr;
+    JITEvaluatedSymbol symbol = dyld->getSymbol(Name);
+    if (!symbol) return nullptr;
+    return reinterpret_cast<void *>(symbol.getAddress());
+}
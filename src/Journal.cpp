@@ -0,0 +1,93 @@
+#include "Journal.h"
+
+#include <cstdio>
+#include <filesystem>
+#include <iostream>
+
+namespace {
+std::string escape(const std::string &Field) {
+    std::string escaped;
+    for (char c : Field) {
+        if (c == '\\')
+            escaped += "\\\\";
+        else if (c == '\t')
+            escaped += "\\t";
+        else if (c == '\n')
+            escaped += "\\n";
+        else
+            escaped += c;
+    }
+    return escaped;
+}
+
+std::vector<std::string> splitRecord(const std::string &Line) {
+    std::vector<std::string> fields(1);
+    for (size_t i = 0; i < Line.size(); i++) {
+        if (Line[i] == '\t') {
+            fields.emplace_back();
+        } else if (Line[i] == '\\' && i + 1 < Line.size()) {
+            char c = Line[++i];
+            fields.back() += c == 't' ? '\t' : c == 'n' ? '\n' : c;
+        } else {
+            fields.back() += Line[i];
+        }
+    }
+    return fields;
+}
+} // namespace
+
+ErrorCode Journal::open(const std::string &Path, const std::vector<std::string> &Header,
+                        bool Resume) {
+    path = Path;
+    records.clear();
+    if (Resume) {
+        std::ifstream in(Path, std::ios::binary);
+        if (!in) {
+            std::cerr << "cannot resume, journal " << Path << " does not exist" << std::endl;
+            return E_FILE;
+        }
+        std::string content((std::istreambuf_iterator<char>(in)), std::istreambuf_iterator<char>());
+        // the last line may have been cut off when the run was killed
+        size_t end = content.rfind('\n');
+        content = end == std::string::npos ? "" : content.substr(0, end + 1);
+        size_t start = 0;
+        while (start < content.size()) {
+            size_t lineEnd = content.find('\n', start);
+            records.emplace_back(splitRecord(content.substr(start, lineEnd - start)));
+            start = lineEnd + 1;
+        }
+        if (records.empty() || records.front() != Header) {
+            std::cerr << "journal " << Path << " was written by a different run or settings"
+                      << std::endl;
+            records.clear();
+            return E_FILE;
+        }
+        records.erase(records.begin());
+        // drop a cut off last line so new records start on their own line
+        std::filesystem::resize_file(Path, content.size());
+        file.open(Path, std::ios::binary | std::ios::app);
+    } else {
+        file.open(Path, std::ios::binary | std::ios::trunc);
+    }
+    if (!file) {
+        std::cerr << "failed to open journal " << Path << std::endl;
+        return E_FILE;
+    }
+    if (!Resume) append(Header);
+    return SUCCESS;
+}
+
+void Journal::append(const std::vector<std::string> &Fields) {
+    if (!isOpen()) return;
+    std::string line;
+    for (size_t i = 0; i < Fields.size(); i++)
+        line += (i == 0 ? "" : "\t") + escape(Fields[i]);
+    file << line << '\n';
+    file.flush();
+}
+
+void Journal::remove() {
+    if (!isOpen()) return;
+    file.close();
+    std::remove(path.data());
+}
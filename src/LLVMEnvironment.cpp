@@ -60,16 +60,19 @@ ErrorCode LLVMEnvironment::setUp(std::string March, std::string Cpu) {
         LLVMInitializeX86TargetInfo();
         LLVMInitializeX86TargetMC();
         LLVMInitializeX86AsmPrinter();
+        LLVMInitializeX86AsmParser();
     } else if (TargetTriple.getArch() == Triple::ArchType::aarch64) {
         LLVMInitializeAArch64Target();
         LLVMInitializeAArch64TargetInfo();
         LLVMInitializeAArch64TargetMC();
         LLVMInitializeAArch64AsmPrinter();
+        LLVMInitializeAArch64AsmParser();
     } else if (TargetTriple.getArch() == Triple::ArchType::riscv64) {
         LLVMInitializeRISCVTarget();
         LLVMInitializeRISCVTargetInfo();
         LLVMInitializeRISCVTargetMC();
         LLVMInitializeRISCVAsmPrinter();
+        LLVMInitializeRISCVAsmParser();
     } else {
         if (TargetTriple.getArch() != llvm::Triple::UnknownArch)
             errs() << "unsupported architecture: " << TargetTriple.getArchName() << "\n";
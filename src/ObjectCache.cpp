@@ -0,0 +1,124 @@
+#include "ObjectCache.h"
+
+#include "CustomDebug.h"
+#include "Globals.h"
+#include "LLVMEnvironment.h"
+#include "llvm/ADT/StringExtras.h"
+#include "llvm/MC/MCSubtargetInfo.h"
+#include "llvm/Support/SHA256.h"
+#include <algorithm>
+#include <filesystem>
+#include <fstream>
+#include <iostream>
+#include <new>
+#include <sys/mman.h>
+#include <system_error>
+#include <tuple>
+#include <unistd.h>
+#include <vector>
+
+namespace fs = std::filesystem;
+
+ErrorCode ObjectCache::init(const std::string &Dir, uint64_t MaxBytes) {
+    std::error_code ec;
+    fs::create_directories(Dir, ec);
+    if (ec) {
+        std::cerr << "failed to create object cache directory " << Dir << ": " << ec.message()
+                  << std::endl;
+        return E_FILE;
+    }
+    void *memory =
+        mmap(NULL, sizeof(SharedStats), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0);
+    if (memory == MAP_FAILED) {
+        perror("mmap");
+        return E_MMAP;
+    }
+    stats = new (memory) SharedStats{};
+    dir = Dir;
+    maxBytes = MaxBytes;
+    uint64_t total = 0;
+    for (const auto &entry : fs::directory_iterator(dir, ec))
+        if (entry.is_regular_file(ec)) total += entry.file_size(ec);
+    stats->totalBytes = total;
+    if (total > maxBytes) evict();
+    return SUCCESS;
+}
+
+std::string ObjectCache::getKey(const std::string &Source, const std::string &Backend) {
+    const MCSubtargetInfo *sti = getEnv().MSTI;
+    SHA256 hasher;
+    for (StringRef part : {StringRef(Backend), StringRef(sti->getTargetTriple().str()),
+                           sti->getCPU(), sti->getFeatureString(), StringRef(Source)}) {
+        hasher.update(part);
+        hasher.update(StringRef("\0", 1));
+    }
+    return toHex(hasher.final(), true);
+}
+
+std::string ObjectCache::lookup(const std::string &Key, const std::string &Extension) {
+    if (!isEnabled()) return "";
+    fs::path path = fs::path(dir) / (Key + Extension);
+    std::error_code ec;
+    if (!fs::exists(path, ec)) {
+        stats->misses++;
+        return "";
+    }
+    // the modification time is used to find the least recently used objects
+    fs::last_write_time(path, fs::file_time_type::clock::now(), ec);
+    stats->hits++;
+    return path.string();
+}
+
+void ObjectCache::store(const std::string &Key, const std::string &Extension, StringRef Object) {
+    if (!isEnabled()) return;
+    // write to a temporary file first so concurrent workers never see partial objects
+    fs::path path = fs::path(dir) / (Key + Extension);
+    fs::path tmpPath = fs::path(dir) / str(Key, Extension, ".tmp", getpid());
+    {
+        std::ofstream file(tmpPath, std::ios::binary);
+        if (!file) return;
+        file.write(Object.data(), Object.size());
+        if (!file) {
+            std::error_code ec;
+            fs::remove(tmpPath, ec);
+            return;
+        }
+    }
+    std::error_code ec;
+    fs::rename(tmpPath, path, ec);
+    if (ec) {
+        fs::remove(tmpPath, ec);
+        return;
+    }
+    stats->totalBytes += Object.size();
+    if (stats->totalBytes > maxBytes) evict();
+}
+
+void ObjectCache::evict() {
+    // one process evicting is enough, the others continue measuring
+    if (stats->evicting.exchange(true)) return;
+    std::vector<std::tuple<fs::file_time_type, uint64_t, fs::path>> entries;
+    uint64_t total = 0;
+    std::error_code ec;
+    for (const auto &entry : fs::directory_iterator(dir, ec)) {
+        if (!entry.is_regular_file(ec)) continue;
+        uint64_t size = entry.file_size(ec);
+        total += size;
+        entries.emplace_back(entry.last_write_time(ec), size, entry.path());
+    }
+    std::sort(entries.begin(), entries.end());
+    for (auto &[time, size, path] : entries) {
+        if (total <= maxBytes * 0.9) break;
+        if (!fs::remove(path, ec)) continue;
+        total -= size;
+        stats->evictions++;
+    }
+    stats->totalBytes = total;
+    stats->evicting = false;
+}
+
+std::string ObjectCache::getSummary() {
+    if (!isEnabled()) return "Object cache: disabled";
+    return str("Object cache: ", stats->hits.load(), " hits, ", stats->misses.load(), " misses, ",
+               stats->evictions.load(), " evictions");
+}
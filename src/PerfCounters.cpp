@@ -0,0 +1,205 @@
+#include "PerfCounters.h"
+
+#include "LLVMEnvironment.h"
+#include "llvm/MC/MCSubtargetInfo.h"
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+#include <iostream>
+#include <linux/perf_event.h>
+#include <sys/ioctl.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+
+namespace {
+struct CounterEvent {
+    std::string name;
+    uint32_t type;
+    uint64_t config;
+};
+
+std::vector<CounterEvent> events;      // selected events, the first one leads the group
+std::vector<std::string> enabledNames; // names of the selected events
+std::vector<int> counterFds;           // one per event, opened by counterPid
+pid_t counterPid = -1;                 // the group only counts the process which opened it
+
+// raw events of Intel cores use umask << 8 | event
+uint64_t intelEvent(uint64_t Event, uint64_t Umask) { return Umask << 8 | Event; }
+
+// events with a name for the current architecture. The raw events are model specific, the ones
+// listed are the common ones of the CPU families, other events can be passed as name=0x<config>
+std::vector<CounterEvent> getPredefinedEvents() {
+    std::vector<CounterEvent> predefined = {
+        {"instructions", PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS},
+        {"cycles", PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES},
+        {"stalled-cycles-frontend", PERF_TYPE_HARDWARE, PERF_COUNT_HW_STALLED_CYCLES_FRONTEND},
+        {"stalled-cycles-backend", PERF_TYPE_HARDWARE, PERF_COUNT_HW_STALLED_CYCLES_BACKEND},
+        {"cache-misses", PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES},
+        {"branch-misses", PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_MISSES},
+        {"l1d-read-misses", PERF_TYPE_HW_CACHE,
+         PERF_COUNT_HW_CACHE_L1D | PERF_COUNT_HW_CACHE_OP_READ << 8 |
+             PERF_COUNT_HW_CACHE_RESULT_MISS << 16},
+    };
+    switch (getEnv().Arch) {
+    case Triple::ArchType::x86_64:
+        if (getEnv().MSTI->getCPU().take_front(5) == "znver") {
+            predefined.push_back({"uops-retired", PERF_TYPE_RAW, 0xC1});
+            break;
+        }
+        predefined.push_back({"uops-issued", PERF_TYPE_RAW, intelEvent(0x0E, 0x01)});
+        predefined.push_back({"uops-retired", PERF_TYPE_RAW, intelEvent(0xC2, 0x02)});
+        predefined.push_back({"resource-stalls", PERF_TYPE_RAW, intelEvent(0xA2, 0x01)});
+        // UOPS_DISPATCHED_PORT, one umask bit per port
+        for (unsigned port = 0; port < 8; port++)
+            predefined.push_back(
+                {"port" + std::to_string(port), PERF_TYPE_RAW, intelEvent(0xA1, 1u << port)});
+        break;
+    case Triple::ArchType::aarch64:
+        // common events of the Armv8 PMU
+        predefined.push_back({"uops-retired", PERF_TYPE_RAW, 0x3A});
+        predefined.push_back({"uops-speculated", PERF_TYPE_RAW, 0x3B});
+        predefined.push_back({"stall-frontend", PERF_TYPE_RAW, 0x23});
+        predefined.push_back({"stall-backend", PERF_TYPE_RAW, 0x24});
+        predefined.push_back({"l1d-refills", PERF_TYPE_RAW, 0x03});
+        break;
+    default:
+        break;
+    }
+    return predefined;
+}
+
+int openCounter(const CounterEvent &Event, int GroupFd) {
+    struct perf_event_attr attr;
+    memset(&attr, 0, sizeof(attr));
+    attr.type = Event.type;
+    attr.size = sizeof(attr);
+    attr.config = Event.config;
+    // the members are started and stopped together with the leader
+    attr.disabled = GroupFd == -1;
+    attr.exclude_kernel = 1;
+    attr.exclude_hv = 1;
+    attr.read_format =
+        PERF_FORMAT_GROUP | PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING;
+    return syscall(__NR_perf_event_open, &attr, 0, -1, GroupFd, 0);
+}
+
+void closeCounters() {
+    for (int fd : counterFds)
+        close(fd);
+    counterFds.clear();
+    counterPid = -1;
+}
+
+ErrorCode openCounters() {
+    closeCounters();
+    for (const CounterEvent &event : events) {
+        int fd = openCounter(event, counterFds.empty() ? -1 : counterFds.front());
+        if (fd == -1) {
+            perror(("perf_event_open " + event.name).data());
+            closeCounters();
+            return E_COUNTERS;
+        }
+        counterFds.emplace_back(fd);
+    }
+    counterPid = getpid();
+    return SUCCESS;
+}
+} // namespace
+
+std::vector<std::string> getCounterNames() {
+    std::vector<std::string> names;
+    for (const CounterEvent &event : getPredefinedEvents())
+        names.emplace_back(event.name);
+    return names;
+}
+
+ErrorCode setUpCounters(const std::vector<std::string> &Names) {
+    closeCounters();
+    events.clear();
+    enabledNames.clear();
+    if (Names.size() > MAX_COUNTERS) {
+        std::cerr << "at most " << MAX_COUNTERS << " counters can be measured" << std::endl;
+        return E_COUNTERS;
+    }
+    std::vector<CounterEvent> predefined = getPredefinedEvents();
+    for (const std::string &name : Names) {
+        size_t separator = name.find('=');
+        if (separator != std::string::npos) {
+            try {
+                events.push_back({name.substr(0, separator), PERF_TYPE_RAW,
+                                  std::stoull(name.substr(separator + 1), nullptr, 0)});
+            } catch (const std::exception &e) {
+                std::cerr << "invalid raw event \"" << name << "\"" << std::endl;
+                return E_COUNTERS;
+            }
+            continue;
+        }
+        auto it = std::find_if(predefined.begin(), predefined.end(),
+                               [&](const CounterEvent &Event) { return Event.name == name; });
+        if (it == predefined.end()) {
+            std::cerr << "unknown counter \"" << name << "\"" << std::endl;
+            return E_COUNTERS;
+        }
+        events.emplace_back(*it);
+    }
+    if (events.empty()) return SUCCESS;
+    if (openCounters() != SUCCESS) {
+        events.clear();
+        return E_COUNTERS;
+    }
+    // the group is only scheduled if all events fit into the PMU at the same time
+    std::vector<uint64_t> values;
+    startCounters();
+    for (volatile unsigned i = 0; i < 100000; i = i + 1)
+        ;
+    if (!stopCounters(values)) {
+        std::cerr << "the counters can't be measured at the same time, select fewer of them"
+                  << std::endl;
+        closeCounters();
+        events.clear();
+        return E_COUNTERS;
+    }
+    for (const CounterEvent &event : events)
+        enabledNames.emplace_back(event.name);
+    return SUCCESS;
+}
+
+const std::vector<std::string> &getEnabledCounters() { return enabledNames; }
+
+ErrorCode prepareCounters() {
+    if (events.empty() || counterPid == getpid()) return SUCCESS;
+    // the group was opened by the parent and doesn't count this process
+    return openCounters();
+}
+
+void startCounters() {
+    if (counterFds.empty()) return;
+    ioctl(counterFds.front(), PERF_EVENT_IOC_RESET, PERF_IOC_FLAG_GROUP);
+    ioctl(counterFds.front(), PERF_EVENT_IOC_ENABLE, PERF_IOC_FLAG_GROUP);
+}
+
+bool stopCounters(std::vector<uint64_t> &Values) {
+    Values.clear();
+    if (counterFds.empty()) return false;
+    ioctl(counterFds.front(), PERF_EVENT_IOC_DISABLE, PERF_IOC_FLAG_GROUP);
+    // number of events, time enabled, time running, one value per event
+    std::vector<uint64_t> buffer(3 + counterFds.size());
+    ssize_t size = buffer.size() * sizeof(uint64_t);
+    if (read(counterFds.front(), buffer.data(), size) != size) return false;
+    // a group which was not running all the time was multiplexed with other events
+    if (buffer[0] != counterFds.size() || buffer[2] == 0 || buffer[1] != buffer[2]) return false;
+    Values.assign(buffer.begin() + 3, buffer.end());
+    return true;
+}
+
+std::string counterKey(const std::string &Counter, const std::string &Function) {
+    return Counter + "@" + Function;
+}
+
+std::string countersToString(const SampleStats &Stats) {
+    std::string result;
+    for (unsigned i = 0; i < Stats.numCounters && i < enabledNames.size(); i++)
+        result += str(result.empty() ? "" : ", ", enabledNames[i], " ",
+                      std::round(Stats.counters[i] * 100) / 100);
+    return result;
+}
@@ -0,0 +1,68 @@
+#include "PortMapping.h"
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+std::string portUsageToString(const PortUsage &Usage) {
+    std::string result;
+    for (auto &[group, uops] : Usage)
+        result += (result.empty() ? "" : "+") + std::to_string(uops) + "*p" + group;
+    return result;
+}
+
+std::pair<ErrorCode, PortUsage> parsePortUsage(const std::string &Usage) {
+    PortUsage usage;
+    size_t start = 0;
+    while (start <= Usage.size()) {
+        size_t end = Usage.find('+', start);
+        if (end == std::string::npos) end = Usage.size();
+        std::string term = Usage.substr(start, end - start);
+        start = end + 1;
+        unsigned uops = 1;
+        size_t separator = term.find('*');
+        if (separator != std::string::npos) {
+            try {
+                size_t parsed;
+                uops = std::stoul(term.substr(0, separator), &parsed);
+                if (parsed != separator) return {E_PORT_USAGE, {}};
+            } catch (const std::exception &e) {
+                return {E_PORT_USAGE, {}};
+            }
+            term = term.substr(separator + 1);
+        }
+        if (term.size() < 2 || term[0] != 'p' || uops == 0) return {E_PORT_USAGE, {}};
+        // the order of the ports doesn't matter, store them sorted so equal groups compare equal
+        std::string group = term.substr(1);
+        std::sort(group.begin(), group.end());
+        group.erase(std::unique(group.begin(), group.end()), group.end());
+        usage[group] += uops;
+    }
+    return {SUCCESS, usage};
+}
+
+bool isPortSubset(const std::string &A, const std::string &B) {
+    return std::all_of(A.begin(), A.end(),
+                       [&](char Port) { return B.find(Port) != std::string::npos; });
+}
+
+bool sharePorts(const PortUsage &A, const PortUsage &B) {
+    for (auto &[groupA, uopsA] : A)
+        for (auto &[groupB, uopsB] : B)
+            if (groupA.find_first_of(groupB) != std::string::npos) return true;
+    return false;
+}
+
+PortUsage solvePortUsage(const std::map<std::string, double> &UopsPerGroup) {
+    std::vector<std::pair<std::string, double>> groups(UopsPerGroup.begin(), UopsPerGroup.end());
+    std::stable_sort(groups.begin(), groups.end(),
+                     [](const auto &A, const auto &B) { return A.first.size() < B.first.size(); });
+    PortUsage usage;
+    for (auto &[group, uops] : groups) {
+        long remaining = std::lround(uops);
+        for (auto &[assigned, assignedUops] : usage)
+            if (isPortSubset(assigned, group)) remaining -= assignedUops;
+        if (remaining > 0) usage[group] = remaining;
+    }
+    return usage;
+}
@@ -38,14 +38,14 @@ Template X86Template = {
 .text
 )",
     R"(
-.globl init
-.type init, @function
+.globl functionName
+.type functionName, @function
 .align 32
-init:
+functionName:
 )",
     R"(
     ret
-.size init, .-init
+.size functionName, .-functionName
 )",
     R"(
 
@@ -0,0 +1,179 @@
+#include "Timer.h"
+
+#include "Globals.h"
+#include "LLVMEnvironment.h"
+#include <algorithm>
+#include <chrono>
+#include <cstring>
+#include <linux/perf_event.h>
+#include <sys/syscall.h>
+#include <sys/time.h>
+#include <thread>
+#include <unistd.h>
+#if defined(__x86_64__)
+#include <x86intrin.h>
+#endif
+
+namespace {
+TimerBackend backend = TIMER_GETTIMEOFDAY;
+double tickFrequency = 1e6; // ticks per second of constant rate timers
+int perfFd = -1;
+pid_t perfPid = -1; // the counter only counts the process which opened it
+
+int openPerfCounter() {
+    struct perf_event_attr attr;
+    memset(&attr, 0, sizeof(attr));
+    attr.type = PERF_TYPE_HARDWARE;
+    attr.size = sizeof(attr);
+    attr.config = PERF_COUNT_HW_CPU_CYCLES;
+    attr.exclude_kernel = 1;
+    attr.exclude_hv = 1;
+    return syscall(__NR_perf_event_open, &attr, 0, -1, -1, 0);
+}
+
+uint64_t readRawCounter() {
+#if defined(__x86_64__)
+    if (backend == TIMER_RDTSC) {
+        _mm_lfence(); // don't start counting before previous instructions finished
+        return __rdtsc();
+    }
+#elif defined(__aarch64__)
+    if (backend == TIMER_CNTVCT) {
+        uint64_t value;
+        asm volatile("isb; mrs %0, cntvct_el0" : "=r"(value));
+        return value;
+    }
+#elif defined(__riscv)
+    if (backend == TIMER_RDCYCLE) {
+        uint64_t value;
+        asm volatile("rdcycle %0" : "=r"(value));
+        return value;
+    }
+#endif
+    return 0;
+}
+
+// determine the rate of the time stamp counter by comparing it to the system clock
+double calibrateTickFrequency() {
+    auto start = std::chrono::steady_clock::now();
+    uint64_t startTicks = readRawCounter();
+    std::this_thread::sleep_for(std::chrono::milliseconds(100));
+    uint64_t endTicks = readRawCounter();
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+    return (endTicks - startTicks) / elapsed.count();
+}
+} // namespace
+
+std::vector<std::string> getTimerNames() {
+    return {"auto", "gettimeofday", "perf", "rdtsc", "cntvct", "rdcycle"};
+}
+
+ErrorCode setUpTimer(const std::string &Name) {
+    Triple::ArchType arch = getEnv().Arch;
+    if (Name == "auto") {
+        int fd = openPerfCounter();
+        if (fd != -1) {
+            close(fd);
+            return setUpTimer("perf");
+        }
+        return setUpTimer("gettimeofday");
+    }
+    if (Name == "gettimeofday") {
+        backend = TIMER_GETTIMEOFDAY;
+        tickFrequency = 1e6;
+    } else if (Name == "perf") {
+        int fd = openPerfCounter();
+        if (fd == -1) {
+            perror("perf_event_open");
+            return E_TIMER;
+        }
+        close(fd);
+        backend = TIMER_PERF;
+    } else if (Name == "rdtsc") {
+#if !defined(__x86_64__)
+        return E_UNSUPPORTED_ARCH;
+#else
+        if (arch != Triple::ArchType::x86_64) return E_UNSUPPORTED_ARCH;
+        backend = TIMER_RDTSC;
+        tickFrequency = calibrateTickFrequency();
+#endif
+    } else if (Name == "cntvct") {
+#if !defined(__aarch64__)
+        return E_UNSUPPORTED_ARCH;
+#else
+        if (arch != Triple::ArchType::aarch64) return E_UNSUPPORTED_ARCH;
+        backend = TIMER_CNTVCT;
+        uint64_t frequency;
+        asm volatile("mrs %0, cntfrq_el0" : "=r"(frequency));
+        tickFrequency = frequency;
+#endif
+    } else if (Name == "rdcycle") {
+#if !defined(__riscv)
+        return E_UNSUPPORTED_ARCH;
+#else
+        if (arch != Triple::ArchType::riscv64) return E_UNSUPPORTED_ARCH;
+        backend = TIMER_RDCYCLE;
+#endif
+    } else {
+        return E_TIMER;
+    }
+    return SUCCESS;
+}
+
+std::string getTimerName() {
+    switch (backend) {
+    case TIMER_GETTIMEOFDAY:
+        return "gettimeofday";
+    case TIMER_PERF:
+        return "perf";
+    case TIMER_RDTSC:
+        return "rdtsc";
+    case TIMER_CNTVCT:
+        return "cntvct";
+    case TIMER_RDCYCLE:
+        return "rdcycle";
+    }
+    return "unknown";
+}
+
+bool timerCountsCycles() { return backend == TIMER_PERF || backend == TIMER_RDCYCLE; }
+
+ErrorCode prepareTimer() {
+    if (backend != TIMER_PERF || perfPid == getpid()) return SUCCESS;
+    // the counter was opened by the parent and doesn't count this process
+    if (perfFd != -1) close(perfFd);
+    perfFd = openPerfCounter();
+    if (perfFd == -1) {
+        perror("perf_event_open");
+        return E_TIMER;
+    }
+    perfPid = getpid();
+    return SUCCESS;
+}
+
+uint64_t readTimer() {
+    if (backend == TIMER_GETTIMEOFDAY) {
+        struct timeval time;
+        gettimeofday(&time, NULL);
+        return time.tv_sec * 1000000 + time.tv_usec;
+    }
+    if (backend == TIMER_PERF) {
+        uint64_t value = 0;
+        if (read(perfFd, &value, sizeof(value)) != sizeof(value)) return 0;
+        return value;
+    }
+    return readRawCounter();
+}
+
+double ticksToCycles(double Ticks, double Frequency) {
+    if (timerCountsCycles()) return Ticks;
+    // ticks -> sec * Frequency[GHz -> Hz]
+    return (Ticks / tickFrequency) * (Frequency * 1e9);
+}
+
+unsigned scaleLoopCount(unsigned LoopCount) {
+    // the loop counts were chosen so the microsecond resolution of gettimeofday is sufficient. The
+    // other timers have (close to) cycle resolution
+    if (backend == TIMER_GETTIMEOFDAY) return LoopCount;
+    return std::max(LoopCount / 100, 100u);
+}
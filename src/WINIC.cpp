@@ -1,1224 +1,3335 @@
-#include "WINIC.h"
-
-#include "BenchmarkGenerator.h"
-#include "CLI11.hpp"
-#include "CustomDebug.h"
-#include "ErrorCode.h"
-#include "Globals.h"
-#include "IOSystem.h"
-#include "LLVMEnvironment.h"
-#include "llvm/ADT/StringRef.h"
-#include "llvm/CodeGen/TargetRegisterInfo.h"
-#include "llvm/MC/MCInst.h"
-#include "llvm/MC/MCInstPrinter.h"
-#include "llvm/MC/MCInstrInfo.h"
-#include "llvm/MC/MCRegister.h"
-#include "llvm/MC/MCSubtargetInfo.h"
-#include "llvm/TargetParser/Triple.h"
-#include <AssemblyFile.h>
-#include <algorithm>
-#include <chrono>
-#include <cmath>
-#include <csignal>
-#include <cstddef>
-#include <cstdio>
-#include <cstdlib>
-#include <ctime>
-#include <ctype.h>
-#include <dlfcn.h>
-#include <fcntl.h>
-#include <filesystem>
-#include <fstream>
-#include <iomanip>
-#include <iostream>
-#include <limits>
-#include <map>
-#include <memory>
-#include <sstream>
-#include <string>
-#include <sys/mman.h>
-#include <sys/time.h>
-#include <sys/types.h>
-#include <sys/wait.h>
-#include <tuple>
-#include <unistd.h>
-#include <unordered_map>
-#include <unordered_set>
-#include <vector>
-
-// #include "X86RegisterInfo.h"
-// #include "MCTargetDesc/X86MCTargetDesc.h"
-// #include "MCTargetDesc/X86BaseInfo.h"
-
-namespace llvm {
-class MCInstrDesc;
-}
-
-#ifndef CLANG_PATH
-#define CLANG_PATH "usr/bin/clang"
-#endif
-
-namespace {
-std::string generateTimestamp() {
-    // Get current time
-    auto now = std::chrono::system_clock::now();
-    std::time_t nowC = std::chrono::system_clock::to_time_t(now);
-
-    // Format time
-    std::ostringstream ss;
-    ss << std::put_time(std::localtime(&nowC), "%Y-%m-%d_%H-%M-%S");
-    return ss.str();
-}
-
-void setOutputToFile(const std::string &Filename) {
-    fileStream = std::make_unique<std::ofstream>(Filename);
-    if (fileStream->is_open()) {
-        ios = fileStream.get(); // Redirect global output
-    } else {
-        std::cerr << "Failed to open file: " << Filename << std::endl;
-        ios = &std::cout; // Fallback
-    }
-}
-
-void displayProgress(size_t Progress, size_t Total) {
-    if (!showProgress) return;
-    int barWidth = 50;
-    float ratio = (float)Progress / (float)Total;
-    int pos = barWidth * ratio;
-
-    std::cout << "\r[";
-    for (int i = 0; i < barWidth; ++i) {
-        if (i < pos)
-            std::cout << "#";
-        else if (i == pos)
-            std::cout << ">";
-        else
-            std::cout << " ";
-    }
-    std::cout << "] " << int(ratio * 100.0) << "% " << Progress << "/" << Total << std::flush;
-}
-
-// create ./asm and clear all existing files
-void prepAsmDir() {
-    namespace fs = std::filesystem;
-
-    std::string asmDir = (fs::current_path() / "asm").string();
-    if (!fs::exists(asmDir)) {
-        if (!fs::create_directories(asmDir)) {
-            std::cerr << "Failed to create directory: " << asmDir << std::endl;
-            return;
-        }
-    }
-    for (const auto &entry : fs::directory_iterator(asmDir)) {
-        fs::remove_all(entry.path());
-    }
-}
-} // namespace
-
-std::pair<ErrorCode, std::unordered_map<std::string, std::list<double>>>
-runBenchmark(AssemblyFile Assembly, unsigned N, unsigned Runs) {
-    dbg(__func__, "N: ", N, " Runs: ", Runs);
-    std::string clangPath = CLANG_PATH;
-    if (clangPath == "usr/bin/clang") {
-        std::cerr << "CLANG_PATH not set, using default" << std::endl;
-    }
-    std::string sPath = "/dev/shm/temp.s";
-    std::string oPath = "/dev/shm/temp.so";
-    std::ofstream asmFile(sPath);
-    if (!asmFile) {
-        std::cerr << "Failed to create file in /dev/shm/" << std::endl;
-        return {E_FILE, {}};
-    }
-    asmFile << Assembly.generateAssembly();
-    asmFile.close();
-    if (dbgToFile) {
-        std::string debugPath =
-            std::filesystem::current_path().string() + "/asm/" + Assembly.getName() + ".s";
-        std::ofstream debugFile(debugPath);
-        if (!debugFile) {
-            std::cerr << "Failed to create debug file at " << debugPath.data() << std::endl;
-        } else {
-            debugFile << Assembly.generateAssembly();
-            debugFile.close();
-        }
-    }
-    // gcc -x assembler-with-cpp -shared /dev/shm/temp.s -o /dev/shm/temp.so &> gcc_out"
-    // "gcc -x assembler-with-cpp -shared -mfp16-format=ieee " + sPath + " -o " + oPath + " 2>
-    // gcc_out";
-
-    // slightly worse performance than fork
-    //  std::string compiler = CLANG_PATH;
-    //  std::string command = compiler + " -x assembler-with-cpp -shared " + sPath + " -o " +
-    // oPath;
-    //  if (dbgToFile)
-    //      command += " 2> assembler_out.log";
-    //  else
-    //      command += " 2> /dev/null";
-    //  if (system(command.data()) != 0) return {ERROR_ASSEMBLY, {-1}};
-
-    // slightly better performance
-    pid_t pid = fork();
-    if (pid == 0) { // Child
-        int fd;
-        if (dbgToFile) {
-            fd = open("assembler_out.log", O_WRONLY | O_TRUNC | O_CREAT, 0644);
-            if (fd == -1) {
-                perror("open assembler_out.log failed");
-                _exit(127);
-            }
-        } else {
-            fd = open("/dev/null", O_WRONLY);
-            if (fd == -1) {
-                perror("open /dev/null failed");
-                _exit(127);
-            }
-        }
-        dup2(fd, STDOUT_FILENO);
-        dup2(fd, STDERR_FILENO);
-        std::string extraOptions = "";
-        if (getEnv().Arch == llvm::Triple::riscv64) extraOptions += "-march=rv64gcv";
-
-        execl(CLANG_PATH, "clang", extraOptions.data(), "-x", "assembler-with-cpp", "-shared",
-              sPath.data(), "-o", oPath.data(), nullptr);
-        _exit(127);       // execl failed
-    } else if (pid > 0) { // Parent
-        int status;
-        waitpid(pid, &status, 0);
-        if (WIFEXITED(status) && WEXITSTATUS(status) != 0) {
-            if (WEXITSTATUS(status) == 127) return {E_EXEC, {}};
-            return {E_ASSEMBLY, {}};
-        }
-    }
-
-    // from ibench
-    void *handle = nullptr;
-    if ((handle = dlopen(oPath.data(), RTLD_LAZY)) == NULL) {
-        std::cerr << "dlopen: failed to open .so file" << std::endl;
-        return {E_FILE, {}};
-    }
-    // get handles to function in the assembly file
-    std::unordered_map<std::string, double (*)(int)> benchFunctionMap;
-    std::unordered_map<std::string, double (*)()> initFunctionMap;
-    for (std::string functionName : Assembly.getInitFunctionNames()) {
-        auto functionPtr = (double (*)())dlsym(handle, functionName.data());
-        if (functionPtr == NULL) {
-            std::cerr << "dlsym: couldn't find function " << functionName.data() << std::endl;
-            return {E_GENERIC, {}};
-        }
-        initFunctionMap[functionName] = functionPtr;
-    }
-    for (std::string functionName : Assembly.getBenchFunctionNames()) {
-        auto functionPtr = (double (*)(int))dlsym(handle, functionName.data());
-        if (functionPtr == NULL) {
-            std::cerr << "dlsym: couldn't find function " << functionName.data() << std::endl;
-            return {E_GENERIC, {}};
-        }
-        benchFunctionMap[functionName] = functionPtr;
-    }
-    // may have results from prior runs
-    struct timeval start, end;
-    std::unordered_map<std::string, std::list<double>> benchtimes;
-
-    for (auto [benchFunctionName, benchFunctionPointer] : benchFunctionMap) {
-        auto benchFunction = benchFunctionPointer;
-        auto initFunction = initFunctionMap[Assembly.getInitNameFor(benchFunctionName)];
-        for (unsigned i = 0; i < Runs; i++) {
-            if (initFunction) (*initFunction)();
-
-            gettimeofday(&start, NULL);
-            (*benchFunction)(N);
-            gettimeofday(&end, NULL);
-
-            auto &list = benchtimes[benchFunctionName];
-            list.insert(list.end(),
-                        (end.tv_sec - start.tv_sec) * 1000000 + (end.tv_usec - start.tv_usec));
-        }
-    }
-
-    dlclose(handle);
-    return {SUCCESS, benchtimes};
-}
-
-std::pair<ErrorCode, std::vector<double>> runManual(std::string SPath, unsigned Runs,
-                                                    unsigned NumInst, int LoopCount,
-                                                    double Frequency, std::string FunctionName,
-                                                    std::string InitName) {
-    dbg(__func__, "SPath: ", SPath, " Runs: ", Runs, " NumInst: ", NumInst,
-        " LoopCount: ", LoopCount, " Frequency: ", Frequency, " FunctionName: ", FunctionName,
-        " InitName: ", InitName);
-    std::string clangPath = CLANG_PATH;
-    std::string oPath = "/dev/shm/temp.so";
-    std::string extraOptions = "";
-    if (getEnv().Arch == llvm::Triple::riscv64) extraOptions += "-march=rv64gcv";
-    std::string command = clangPath + " " + extraOptions.data() +
-                          " -x assembler-with-cpp -shared " + SPath + " -o " + oPath +
-                          " 2> assembler_out.log";
-    if (system(command.data()) != 0) return {E_ASSEMBLY, {}};
-
-    // from ibench
-    void *handle;
-    double (*function)(int);
-    double (*init)() = nullptr;
-    if ((handle = dlopen(oPath.data(), RTLD_LAZY)) == NULL) {
-        std::cerr << "dlopen: failed to open .so file" << std::endl;
-        return {E_ASSEMBLY, {}};
-    }
-    if (!InitName.empty()) {
-        if ((init = (double (*)())dlsym(handle, InitName.data())) == NULL) {
-            std::cerr << "dlsym: couldn't find function " << InitName << std::endl;
-            return {E_GENERIC, {}};
-        }
-    }
-    if ((function = (double (*)(int))dlsym(handle, FunctionName.data())) == NULL) {
-        std::cerr << "dlsym: couldn't find function " << FunctionName << std::endl;
-        return {E_GENERIC, {}};
-    }
-    struct timeval start, end;
-    std::vector<double> benchtimes;
-    for (unsigned i = 0; i < Runs; i++) {
-        if (init) (*init)();
-        gettimeofday(&start, NULL);
-        // actual call to benchmarked function
-        (*function)(LoopCount);
-        gettimeofday(&end, NULL);
-        benchtimes.insert(benchtimes.end(),
-                          (end.tv_sec - start.tv_sec) * 1000000 + (end.tv_usec - start.tv_usec));
-    }
-
-    dlclose(handle);
-    return {SUCCESS, benchtimes};
-}
-
-std::pair<ErrorCode, double> calculateCycles(double Runtime, double UnrolledRuntime,
-                                             unsigned NumInst, unsigned LoopCount, double Frequency,
-                                             bool Throughput) {
-    dbg(__func__, "Runtime: ", Runtime, " UnrolledRuntime: ", UnrolledRuntime,
-        " NumInst: ", NumInst, " LoopCount: ", LoopCount);
-    // correct the result using one measurement with NumInst and one with 2*NumInst. This
-    // removes overhead of e.g. the loop instructions themselves see README for explanation TODO
-    double instRuntime = UnrolledRuntime - Runtime;
-    // runtime[usec -> sec] * Frequency[GHz -> Hz] / number of instructions executed
-    double cyclesPerInstruction = (instRuntime / 1e6) * (Frequency * 1e9) / (NumInst * LoopCount);
-    if (instRuntime * 2 > UnrolledRuntime * 1.1) {
-        // Execution time increases overproportional when unrolling, which should not happen.
-        // This is unlikely to be a good measurement, report an error and let the user measure it
-        // manually.
-        return {E_UNROLL_ANOMALY, -1};
-    }
-    // Something strange is happening when measuring latencies. For some chains, e.g. Zen4
-    // adc	al, 7
-    // adc	cl, 7
-    // ...
-    // (chain on flags) the latency is smaller than expected (1.93 instead of 2) but increases with
-    // unrolling. The loop overhead correction then corrects upwards which is not what was intended
-    // but actually gives good results for now.
-    // On the other hand for some instructions unrolling slightly decreases throughput e.g. ADC16ri8
-    // with helper TEST64rr In those cases the unrolled time should not be used for correction.
-    // This is why the following check is only enabled for throughput
-    if (Throughput && instRuntime * 2 > UnrolledRuntime) {
-        cyclesPerInstruction = (Runtime / 1e6) * (Frequency * 1e9) / (NumInst * LoopCount);
-    }
-    return {SUCCESS, cyclesPerInstruction};
-}
-
-std::tuple<ErrorCode, unsigned, std::map<unsigned, MCRegister>>
-getTPHelperInstruction(unsigned Opcode) {
-    dbg(__func__, "Opcode: ", Opcode, " priorityTPHelper.size(): ", priorityTPHelper.size());
-    // first check if this instruction needs a helper
-    // generate two instructions and check for dependencys
-    std::set<MCRegister> usedRegs;
-    auto [ec1, inst1] = genInst(Opcode, {}, usedRegs);
-    auto [ec2, inst2] = genInst(Opcode, {}, usedRegs);
-    std::list<DependencyType> dependencies = getDependencies(inst1, inst2);
-    if (dependencies.empty()) return {SUCCESS, MAX_UNSIGNED, {}}; // no helper needed
-    if (dependencies.size() > 1) {
-        dbg(__func__, "multiple dependencies");
-        // this instruction has multiple dependencies on itself, this
-        // is currently not supported
-        return {E_NO_HELPER, MAX_UNSIGNED, {}};
-    }
-    // this instruction will always have one dependency on itself. We have to break this by
-    // interleaving another instruction. The other instruction has to:
-    // 1. be measured already
-    // 2. define the used register of the dependency
-    // 3. not be dependent on the current instruction
-    auto dep = dependencies.front();
-    auto useReg = dep.useOp.getRegister();
-
-    unsigned helperOpcode = MAX_UNSIGNED;
-    std::map<unsigned, MCRegister> helperConstraints;
-    // first we try opcodes in the priorityTPHelper list. Those are allowed to be used as helper
-    // even if they write not to the register itself but a superregister
-    // on Zen4 there is a partial write penalty when writing to just a part of a GPR
-    // priorityTPHelper can be used to prevent this from happening
-    for (unsigned possibleHelper : priorityTPHelper) {
-        TPMeasurement tpRes = throughputDatabase[possibleHelper];
-        if (tpRes.ec != SUCCESS) continue;                          // no value
-        if (!greaterEqWithTolerance(tpRes.lowerTP, 0.25)) continue; // we dont trust values this low
-        for (MCRegister possibleWriteReg : getEnv().getPossibleDefs(possibleHelper)) {
-            if (getEnv().TRI->isSuperRegisterEq(useReg, possibleWriteReg)) {
-                useReg = possibleWriteReg;
-                auto [EC, opIndex] = whichOperandCanUse(possibleHelper, "def", useReg);
-                // we checked the instruction is able to define the register
-                if (EC != SUCCESS) return {E_UNREACHABLE, MAX_UNSIGNED, {}};
-                if (opIndex != -1)
-                    helperConstraints.insert({(unsigned)opIndex, useReg});
-                else {
-                    // whichOperandCanUse returned -1 so the required register is defined
-                    // implicitly and we don't need to constrain the helper instruction
-                }
-                // check 3. generate a pair of instructions to check for unwanted dependencies
-                // this will catch implicit dependencies e.g. instruction writes to EFLAGS and
-                // helper reads EFLAGS
-                // explicit dependencies e.g. ADD16ri can define ax but if it does it also uses
-                // ax so it can't be used as helper
-                std::set<MCRegister> tmpUsedRegs;
-                auto [ec1, inst] = genInst(Opcode, {}, tmpUsedRegs);
-                auto [ec2, helperInst] = genInst(possibleHelper, helperConstraints, tmpUsedRegs);
-                if (ec1 != SUCCESS || ec2 != SUCCESS) continue;
-                if (!getDependencies(inst, helperInst).empty()) continue;
-                helperOpcode = possibleHelper;
-                break;
-            }
-        }
-    }
-    if (helperOpcode != MAX_UNSIGNED) return {SUCCESS, helperOpcode, helperConstraints};
-    dbg(__func__, "no prio helper");
-    // the no priorityHelper can be used, try all other instructions now
-    for (auto [possibleHelper, res] : throughputDatabase) {
-        if (res.ec != SUCCESS) continue;
-        if (greaterEqWithTolerance(res.lowerTP, 0.25)) continue;
-        std::set<MCRegister> possibleWrites = getEnv().getPossibleDefs(possibleHelper);
-        if (possibleWrites.find(useReg) != possibleWrites.end()) {
-            auto [EC, opIndex] = whichOperandCanUse(possibleHelper, "def", useReg);
-            if (EC != SUCCESS) return {E_UNREACHABLE, MAX_UNSIGNED, {}};
-            if (opIndex != -1) helperConstraints.insert({(unsigned)opIndex, useReg});
-            std::set<MCRegister> tmpUsedRegs;
-            auto [ec1, inst] = genInst(Opcode, {}, tmpUsedRegs);
-            auto [ec2, helperInst] = genInst(possibleHelper, helperConstraints, tmpUsedRegs);
-            if (ec1 != SUCCESS || ec2 != SUCCESS) continue;
-            if (!getDependencies(inst, helperInst).empty()) continue;
-            helperOpcode = possibleHelper;
-            break;
-        }
-    }
-    if (helperOpcode == MAX_UNSIGNED) return {E_NO_HELPER, MAX_UNSIGNED, {}};
-    return {SUCCESS, helperOpcode, helperConstraints};
-}
-
-std::tuple<ErrorCode, double, double> measureThroughput(unsigned Opcode, double Frequency) {
-    dbg(__func__, "Opcode: ", Opcode, " Frequency: ", Frequency);
-    // make the generator generate up to 12 instructions, this ensures reasonable runtimes on slow
-    // instructions like random value generation or CPUID
-    unsigned numInst = 12;
-    unsigned n = 1e6; // loop count, 1e5 seems to be unreliable for TP
-    AssemblyFile assembly;
-    ErrorCode ec;
-    std::set<MCRegister> usedRegs;
-    std::unordered_map<std::string, std::list<double>> benchResults;
-
-    auto [ec1, helperOpcode, helperConstraints] = getTPHelperInstruction(Opcode);
-    if (ec1 != SUCCESS) return {ec1, -1, -1};
-
-    // numInst gets updated to the actual number of instructions generated by genTPBenchmark
-    // if no helper is needed helperOpcode is -1 and genTPBenchmark will ignore it
-    std::tie(ec, assembly) =
-        genTPBenchmark(Opcode, &numInst, 1, usedRegs, helperConstraints, helperOpcode);
-    if (ec != SUCCESS) return {ec, -1, -1};
-    assembly.setName(getEnv().MCII->getName(Opcode).str());
-    std::tie(ec, benchResults) = runBenchmark(assembly, n, 3);
-    if (ec != SUCCESS) return {ec, -1, -1};
-
-    // take minimum of runs (naming convention of funcitons in genTPBenchmark)
-    double time1 = *std::min_element(benchResults["tp"].begin(), benchResults["tp"].end());
-    double time2 = *std::min_element(benchResults["tp2"].begin(), benchResults["tp2"].end());
-
-    auto [EC, correctedTP] = calculateCycles(time1, time2, numInst, n, Frequency, true);
-    if (EC != SUCCESS) {
-        std::string msg =
-            str("Anomaly detected when unrolling: time: ", time1, " timeUnrolled: ", time2);
-        dbg(__func__, msg);
-        throughputOutputMessage[Opcode] += str("\t", msg, "\n");
-        return {EC, -1, -1};
-    }
-    if (helperOpcode != MAX_UNSIGNED) {
-        // we did use a helper, this can change the TP
-        // TODO change once port distribution is implemented
-        throughputOutputMessage[Opcode] +=
-            str("\tHelper: ", throughputDatabase[helperOpcode], "\n");
-        throughputOutputMessage[Opcode] += str("\tCombined result: ", correctedTP, "\n");
-
-        double tpSamePorts = correctedTP - throughputDatabase[helperOpcode].lowerTP;
-        if (tpSamePorts < 1 / 4) {
-            throughputOutputMessage[Opcode] +=
-                str("\tAssuming instruction and helper use different ports, otherwise TP would be ",
-                    tpSamePorts, "\n");
-            return {SUCCESS, correctedTP, correctedTP};
-        }
-        throughputOutputMessage[Opcode] +=
-            str("\tNo hints if instruction and helper use same ports, TP can be in range ",
-                tpSamePorts, " - ", correctedTP, "\n");
-        return {SUCCESS, tpSamePorts, correctedTP};
-    }
-    return {SUCCESS, correctedTP, correctedTP};
-}
-
-std::pair<ErrorCode, double> measureLatency(const std::list<LatMeasurement> &Measurements,
-                                            unsigned LoopCount, double Frequency) {
-    dbg(__func__, "Measurements.size(): ", Measurements.size(), " LoopCount: ", LoopCount,
-        " Frequency: ", Frequency);
-
-    // make the generator generate up to 12 instructions, this ensures reasonable runtimes on slow
-    // instructions like random value generation or CPUID
-    unsigned numInst1 = 12;
-    unsigned n = LoopCount;
-    ErrorCode ec;
-    ErrorCode warning = NO_ERROR_CODE;
-    AssemblyFile assembly;
-    std::unordered_map<std::string, std::list<double>> benchResults;
-
-    // numInst gets updated to the actual number of instructions generated by genTPBenchmark
-    std::tie(ec, assembly) = genLatBenchmark(Measurements, &numInst1);
-    if (ec != SUCCESS && ec != W_MULTIPLE_DEPENDENCIES) return {ec, -1};
-    if (ec == W_MULTIPLE_DEPENDENCIES) warning = W_MULTIPLE_DEPENDENCIES;
-    assembly.setName(Measurements.front().toCompactString());
-    std::tie(ec, benchResults) = runBenchmark(assembly, n, 3);
-    if (ec != SUCCESS) return {ec, -1};
-
-    // take minimum of runs. "lat" and "lat2" is naming convention defined in
-    // runBenchmark()
-    double time1 = *std::min_element(benchResults["lat"].begin(), benchResults["lat"].end());
-    double time2 = *std::min_element(benchResults["lat2"].begin(), benchResults["lat2"].end());
-    double cycles;
-    std::tie(ec, cycles) = calculateCycles(time1, time2, numInst1, n, Frequency, false);
-    if (ec != SUCCESS) {
-        std::string chainString = "";
-        for (auto m : Measurements) {
-            chainString += getEnv().MCII->getName(m.opcode).data();
-            chainString += " -> ";
-        }
-        for (auto time : benchResults["lat2"]) {
-            chainString += std::to_string(time) + " ";
-        }
-        dbg(__func__, "anomaly detected during measurement: ", chainString.data());
-        return {E_GENERIC, -1};
-    }
-    if (warning != NO_ERROR_CODE) return {warning, cycles};
-    return {SUCCESS, cycles};
-}
-
-std::tuple<ErrorCode, double, double> measureInSubprocess(unsigned Opcode, double Frequency) {
-    // allocate memory to communicate result
-    double *sharedLowerBound = static_cast<double *>(
-        mmap(NULL, sizeof(double), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-    double *sharedUpperBound = static_cast<double *>(
-        mmap(NULL, sizeof(double), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-    ErrorCode *sharedEC = static_cast<ErrorCode *>(
-        mmap(NULL, sizeof(ErrorCode), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-    char *sharedMessage = static_cast<char *>(
-        mmap(NULL, 300, PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-
-    if (sharedUpperBound == MAP_FAILED || sharedLowerBound == MAP_FAILED ||
-        sharedEC == MAP_FAILED || sharedMessage == MAP_FAILED) {
-        perror("mmap");
-        return {E_MMAP, -1, -1};
-    }
-
-    pid_t pid = fork();
-    if (pid == -1) return {E_FORK, -1, -1};
-
-    if (pid == 0) { // Child process
-        ErrorCode ec;
-        double lower;
-        double upper;
-        std::tie(ec, lower, upper) = measureThroughput(Opcode, Frequency);
-
-        *sharedLowerBound = lower;
-        *sharedUpperBound = upper;
-        *sharedEC = ec;
-        strncpy(sharedMessage, throughputOutputMessage[Opcode].data(), 299);
-        sharedMessage[299] = '\0';
-        exit(EXIT_SUCCESS);
-    } else { // Parent process
-        int status;
-        waitpid(pid, &status, 0);
-
-        if (WIFSIGNALED(status)) {
-            munmap(sharedEC, sizeof(ErrorCode));
-            munmap(sharedLowerBound, sizeof(double));
-            munmap(sharedUpperBound, sizeof(double));
-            munmap(sharedMessage, 300);
-            if (WTERMSIG(status) == SIGSEGV) return {E_SIGSEGV, -1, -1};
-            if (WTERMSIG(status) == SIGILL) return {E_ILLEGAL_INSTRUCTION, -1, -1};
-            return {E_SIGNAL, -1, -1};
-        }
-        if (WIFEXITED(status) && WEXITSTATUS(status) != EXIT_SUCCESS)
-            return {E_UNREACHABLE, -1, -1};
-
-        ErrorCode ec = *sharedEC;
-        double lower = *sharedLowerBound;
-        double upper = *sharedUpperBound;
-        throughputOutputMessage[Opcode] = std::string(sharedMessage);
-        munmap(sharedEC, sizeof(ErrorCode));
-        munmap(sharedLowerBound, sizeof(double));
-        munmap(sharedUpperBound, sizeof(double));
-        munmap(sharedMessage, 300);
-        return {ec, lower, upper};
-    }
-}
-
-std::pair<ErrorCode, double> measureInSubprocess(const std::list<LatMeasurement> &Measurements,
-                                                 unsigned LoopCount, double Frequency) {
-    // allocate memory to communicate result
-    double *sharedResult = static_cast<double *>(
-        mmap(NULL, sizeof(double), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-    ErrorCode *sharedEC = static_cast<ErrorCode *>(
-        mmap(NULL, sizeof(ErrorCode), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-
-    if (sharedResult == MAP_FAILED || sharedEC == MAP_FAILED) {
-        perror("mmap");
-        return {E_MMAP, -1};
-    }
-
-    pid_t pid = fork();
-    if (pid == -1) return {E_FORK, -1};
-
-    if (pid == 0) { // Child process
-        ErrorCode ec;
-        double res;
-        std::tie(ec, res) = measureLatency(Measurements, LoopCount, Frequency);
-
-        *sharedResult = res;
-        *sharedEC = ec;
-        exit(EXIT_SUCCESS);
-    } else { // Parent process
-        int status;
-        waitpid(pid, &status, 0);
-
-        if (WIFSIGNALED(status)) {
-            munmap(sharedResult, sizeof(double));
-            munmap(sharedEC, sizeof(ErrorCode));
-            if (WTERMSIG(status) == SIGSEGV) return {E_SIGSEGV, {}};
-            if (WTERMSIG(status) == SIGILL) return {E_ILLEGAL_INSTRUCTION, {}};
-            return {E_SIGNAL, {}};
-        }
-        if (WIFEXITED(status) && WEXITSTATUS(status) != EXIT_SUCCESS) return {E_UNREACHABLE, {}};
-
-        ErrorCode ec = *sharedEC;
-        double res = *sharedResult;
-        munmap(sharedResult, sizeof(double));
-        munmap(sharedEC, sizeof(ErrorCode));
-        return {ec, res};
-    }
-}
-
-std::pair<ErrorCode, std::vector<double>>
-measureInSubprocess(std::string SPath, unsigned Runs, unsigned NumInst, unsigned LoopCount,
-                    double Frequency, std::string FunctionName, std::string InitName) {
-    // allocate memory to communicate result
-    double *sharedResults = static_cast<double *>(mmap(
-        NULL, Runs * sizeof(double), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-    ErrorCode *sharedEC = static_cast<ErrorCode *>(
-        mmap(NULL, sizeof(ErrorCode), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
-
-    if (sharedResults == MAP_FAILED || sharedEC == MAP_FAILED) {
-        perror("mmap");
-        return {E_MMAP, {}};
-    }
-
-    pid_t pid = fork();
-    if (pid == -1) return {E_FORK, {}};
-
-    if (pid == 0) { // Child process
-        ErrorCode EC;
-        std::vector<double> res;
-        std::tie(EC, res) =
-            runManual(SPath, Runs, NumInst, LoopCount, Frequency, FunctionName, InitName);
-        *sharedEC = EC;
-        for (unsigned i = 0; i < res.size() && i < Runs; i++)
-            sharedResults[i] = res[i];
-
-        exit(EXIT_SUCCESS);
-    } else { // Parent process
-        int status;
-        waitpid(pid, &status, 0);
-
-        if (WIFSIGNALED(status)) {
-            munmap(sharedResults, Runs * sizeof(double));
-            munmap(sharedEC, sizeof(ErrorCode));
-            if (WTERMSIG(status) == SIGSEGV) return {E_SIGSEGV, {}};
-            if (WTERMSIG(status) == SIGILL) return {E_ILLEGAL_INSTRUCTION, {}};
-            return {E_SIGNAL, {}};
-        }
-        if (WIFEXITED(status) && WEXITSTATUS(status) != EXIT_SUCCESS) return {E_UNREACHABLE, {}};
-
-        ErrorCode EC = *sharedEC;
-        std::vector<double> res;
-        for (unsigned i = 0; i < Runs; i++)
-            res.push_back(sharedResults[i]);
-
-        munmap(sharedResults, Runs * sizeof(double));
-        munmap(sharedEC, sizeof(ErrorCode));
-        return {EC, res};
-    }
-}
-
-bool isVariant(unsigned A, unsigned B) {
-    std::string nameA = getEnv().MCII->getName(A).data();
-    std::string nameB = getEnv().MCII->getName(B).data();
-    if (nameA == nameB) return true;
-    // llvm names for the same instruction normally match until the first occurrence of a number
-    // e.g. ADD8ri_EVEX ADD8ri_ND ADD8ri_NF ADD8ri_NF_ND
-    auto getPrefixWithFirstNumber = [](const std::string &Name) -> std::string {
-        size_t i = 0;
-        // Find the start of the first number
-        while (i < Name.size() && !isdigit(Name[i]))
-            ++i;
-
-        // include the whole number
-        size_t j = i;
-        while (j < Name.size() && isdigit(Name[j]))
-            ++j;
-
-        return Name.substr(0, j);
-    };
-
-    std::string namePrefixA = getPrefixWithFirstNumber(nameA);
-    std::string namePrefixB = getPrefixWithFirstNumber(nameB);
-    return namePrefixA == namePrefixB;
-}
-
-// run small test to check if execution results in ILLEGAL_INSTRUCTION or fails in any other way
-ErrorCode canMeasure(LatMeasurement Measurement, double Frequency) {
-    auto [EC, lat] = measureInSubprocess({Measurement}, 2, Frequency);
-    if (!isError(EC)) return SUCCESS;
-    return EC;
-}
-
-void buildTPDatabase(std::vector<unsigned> Opcodes, double Frequency) {
-    dbg(__func__, "Opcodes.size(): ", Opcodes.size(), " Frequency: ", Frequency);
-    // mark instructions to be measured
-    for (unsigned opcode : Opcodes)
-        throughputDatabase[opcode].ec = NO_ERROR_CODE;
-
-    bool gotNewMeasurement = true;
-    while (gotNewMeasurement) {
-        gotNewMeasurement = false;
-        size_t progress = 0;
-        for (unsigned opcode : Opcodes) {
-            displayProgress(progress++, Opcodes.size());
-            // check if this was already measured
-            if (throughputDatabase.find(opcode) != throughputDatabase.end())
-                if (throughputDatabase[opcode].ec != E_NO_HELPER &&
-                    throughputDatabase[opcode].ec != NO_ERROR_CODE)
-                    continue;
-            // check if this opcode can be measured
-            const MCInstrDesc &desc = getEnv().MCII->get(opcode);
-            ErrorCode ec = isValid(desc);
-            if (ec != SUCCESS) {
-                dbg(__func__, "Opcode ", opcode, " is not valid: ", ecToString(ec));
-                throughputDatabase[opcode] = {opcode, ec, -1, -1};
-                throughputOutputMessage[opcode] += str("\t", throughputDatabase[opcode], "\n");
-                continue;
-            }
-            auto [EC, lowerTP, upperTP] = measureInSubprocess(opcode, Frequency);
-            throughputDatabase[opcode] = {opcode, EC, lowerTP, upperTP};
-            throughputOutputMessage[opcode] += str("\t", throughputDatabase[opcode], "\n");
-
-            if (EC == SUCCESS) gotNewMeasurement = true;
-        }
-        std::cerr << std::endl;
-    }
-    for (auto entry : throughputOutputMessage) {
-        out(*ios, "-----", getEnv().MCII->getName(entry.first).data(), "-----");
-        out(*ios, entry.second);
-    }
-}
-
-void buildLatDatabase(double Frequency) {
-    dbg(__func__, "Frequency: ", Frequency);
-    out(*ios, "Number of measurements: ", latencyDatabase.size());
-    // opcodes which cannot be measured as (e.g. because they are not supported on the platform)
-    std::set<unsigned> opcodeBlacklist;
-    std::set<DependencyType> completedTypes;
-    unsigned loopCount = 1e5;
-
-    // classify measurements by operand combination, measure if trivial
-    if (showProgress) std::cout << "phase1: trivial measurements\n";
-    size_t progress = 0;
-    std::map<DependencyType, std::vector<LatMeasurement *>> classifiedMeasurements;
-    for (auto &measurement : latencyDatabase) {
-        displayProgress(progress++, latencyDatabase.size());
-        if (measurement.type.isSymmetric()) {
-            // symmetric means the operand read and written to are of the same type.
-            // e.g. GR16 -> GR16. Those can build a latency chain on their own
-            auto [EC, lat] = measureInSubprocess({measurement}, loopCount, Frequency);
-            measurement.ec = EC;
-            measurement.lowerBound = lat;
-            measurement.upperBound = lat;
-            classifiedMeasurements[measurement.type].emplace_back(&measurement);
-            completedTypes.insert(measurement.type); // blacklist symmetric for phase 2
-            if (EC == SUCCESS) {
-                latencyOutputMessage[measurement.opcode] +=
-                    str("\t", measurement.toStringWithBounds(), "\n\t\t Successful, latency: ", lat,
-                        "\n");
-            } else if (EC == W_MULTIPLE_DEPENDENCIES)
-                latencyOutputMessage[measurement.opcode] +=
-                    str("\t", measurement.toStringWithBounds(),
-                        "\n\t\tWARNING generated instructions have multiple dependencies. "
-                        "If they have different latencies the lower one will be shadowed\n");
-            else if (isError(EC)) {
-                latencyOutputMessage[measurement.opcode] +=
-                    str("\t", measurement.toStringWithBounds(), "\n\t\t", ecToString(EC),
-                        ", this instruction cannot be measured on this platform\n");
-                opcodeBlacklist.emplace(measurement.opcode);
-            }
-        } else {
-            // This is not symmetric, it can only be measured in pair with another instruction
-            // which has the same dependencyType but reversed. e.g. GR16 -> EFLAGS and EFLAGS ->
-            // GR16.
-            classifiedMeasurements[measurement.type].emplace_back(&measurement);
-        }
-    }
-
-    // now iterate over all pairs A, B of dependencyTypes where A.reversed() == B and do the
-    // measurements of those types
-    // e.g. if A is GR16 -> EFLAGS, B is EFLAGS -> GR16 and we can measure combinations of
-    // instructions in A and B
-    if (showProgress) std::cout << "\nphase2: measurements with helpers\n";
-    out(*ios, "\n\nReport on finding helpers for dependency types:");
-    progress = 0;
-    for (auto &[dTypeA, measurementsA] : classifiedMeasurements) {
-        displayProgress(progress++, classifiedMeasurements.size());
-        if (completedTypes.find(dTypeA) != completedTypes.end()) continue;
-
-        DependencyType dTypeB = dTypeA.reversed();
-        completedTypes.insert(dTypeA);
-        completedTypes.insert(dTypeB);
-        out(*ios, "-----", dTypeA, " and ", dTypeB, "-----");
-        out(*ios, "\t", measurementsA.size(), " measurements of first Type");
-        // Check if there are measurements for dTypeB
-        if (classifiedMeasurements.find(dTypeB) == classifiedMeasurements.end()) {
-            out(*ios, "\tno measurements of type ", dTypeB, " so ", dTypeA,
-                " can also not be measured");
-            for (auto &mA : measurementsA)
-                mA->ec = E_NO_HELPER;
-            continue;
-        }
-        auto &measurementsB = classifiedMeasurements[dTypeB];
-        out(*ios, "\t", measurementsB.size(), " measurements of reversed Type");
-        // From now on, if the errorCode doesn't get set by measuring the instructions, it is
-        // because there is no helper. Set all error codes to ERROR_NO_HELPER here to avoid
-        // duplicate code
-        for (auto &mA : measurementsA)
-            mA->ec = E_NO_HELPER;
-        for (auto &mB : measurementsB)
-            mB->ec = E_NO_HELPER;
-
-        // Find the pair of instructions of the current types that has the smallest combined
-        // latency. Then use those two instructions to measure all other. This way the resulting
-        // ranges are as small as posible
-        std::vector<LatMeasurement *>::iterator itA = measurementsA.begin();
-        std::vector<LatMeasurement *>::iterator itB = measurementsB.begin();
-        LatMeasurement *smallestA = nullptr;
-        LatMeasurement *smallestB = nullptr;
-        double minCombinedLat = 1000;
-        // first make sure we have a starting point for each type
-        while (itA != measurementsA.end()) {
-            LatMeasurement *m = *(itA++);
-            if (opcodeBlacklist.find(m->opcode) != opcodeBlacklist.end()) continue;
-            ErrorCode EC = canMeasure(*m, Frequency);
-            if (EC == SUCCESS) {
-                smallestA = m;
-                break;
-            }
-            latencyOutputMessage[m->opcode] +=
-                str("\t", m, "\n\t\t", ecToString(EC),
-                    ", this instruction cannot be measured on this platform\n");
-            opcodeBlacklist.emplace(m->opcode);
-        }
-        if (smallestA == nullptr) {
-            out(*ios, "\tno measurement of type ", dTypeA, " can be executed successfully");
-            continue;
-        }
-        while (itB != measurementsB.end()) {
-            LatMeasurement *m = *(itB++);
-            if (opcodeBlacklist.find(m->opcode) != opcodeBlacklist.end()) continue;
-            ErrorCode EC = canMeasure(*m, Frequency);
-            if (EC == SUCCESS) {
-                smallestB = m;
-                break;
-            }
-            latencyOutputMessage[m->opcode] +=
-                str("\t", m, "\n\t\t", ecToString(EC),
-                    ", this instruction cannot be measured on this platform\n");
-            opcodeBlacklist.emplace(m->opcode);
-        }
-        if (smallestB == nullptr) {
-            out(*ios, "\tno measurement of type ", dTypeB, " can be executed successfully");
-            continue;
-        }
-        // measure the combined latency of the two instructions as a baseline
-        auto [EC, lat] = measureInSubprocess({*smallestA, *smallestB}, loopCount, Frequency);
-        if (isError(EC)) {
-            out(*ios,
-                "\tcannot measure type. very unusual: both instructions can be executed "
-                "individually but fail when interleaved: \n",
-                smallestA, "\n", smallestB);
-            continue;
-        }
-        minCombinedLat = lat;
-        // now go through both types and find the combination with minimal latency.
-        // alternate between incrementing the iterators if the latency improved
-        std::string currentIterator = "A";
-        while (itA != measurementsA.end() || itB != measurementsB.end()) {
-            LatMeasurement *mA;
-            LatMeasurement *mB;
-            // store measurement to work with in mA/mB, the current smallest candidate in the other
-            // one and increment current iterator
-            if (currentIterator == "A") {
-                if (itA == measurementsA.end()) {
-                    currentIterator = "B";
-                    continue;
-                }
-                mA = *(itA++);
-                mB = smallestB;
-            } else {
-                if (itB == measurementsB.end()) {
-                    currentIterator = "A";
-                    continue;
-                }
-                mA = smallestA;
-                mB = *(itB++);
-            }
-            if (opcodeBlacklist.find(mA->opcode) != opcodeBlacklist.end() ||
-                opcodeBlacklist.find(mB->opcode) != opcodeBlacklist.end() ||
-                mA->opcode == mB->opcode)
-                continue;
-            auto [EC, lat] = measureInSubprocess({*mA, *mB}, loopCount, Frequency);
-            if (isError(EC)) {
-                out(*ios, "\tMeasuring ", *mA, " and ", *mB,
-                    " was unsuccessful, EC: ", ecToString(EC));
-                if (currentIterator == "A") {
-                    out(*ios, "\t assuming ", *mA, " was the problem and blacklisting it");
-                    opcodeBlacklist.emplace(mA->opcode);
-                    mA->ec = EC;
-                } else {
-                    out(*ios, "\t assuming ", *mB, " was the problem and blacklisting it");
-                    opcodeBlacklist.emplace(mB->opcode);
-                    mB->ec = EC;
-                }
-                continue;
-            }
-            // TODO this check technically should invalidate the combination of instructions not
-            // current one
-            if (EC == W_MULTIPLE_DEPENDENCIES) {
-                out(*ios, "\tDetected multiple dependencys between ", *mA, " and ", *mB,
-                    "so result of their combination will not be considered for finding "
-                    "helpers");
-                continue;
-            }
-            if (lat < minCombinedLat) {
-                if (isUnusualLat(lat) && !isUnusualLat(minCombinedLat)) {
-                    out(*ios, "\tUnusual ", lat, " from ", *mA, " and ", *mB,
-                        "latency would be lower but current candidate pair has clean latency, "
-                        "discarding this result");
-                    continue;
-                }
-                if (lat < 2 && !equalWithTolerance(lat, 2)) {
-                    out(*ios, "\tUnusual ", lat, " from ", *mA, " and ", *mB,
-                        "lower than 2, discarding this result");
-                    continue;
-                }
-                if (currentIterator == "A") {
-                    smallestA = mA;
-                    currentIterator = "B";
-                } else {
-                    smallestB = mB;
-                    currentIterator = "A";
-                }
-                minCombinedLat = lat;
-                out(*ios, "\tNew pair: ", *mA, " ", *mB, "with latency ", lat);
-                // Optimization: there is nothing better than two instructions with latency 1 cy
-                if (equalWithTolerance(minCombinedLat, 2)) break;
-            }
-        }
-
-        smallestA->lowerBound = 1;
-        smallestA->upperBound = minCombinedLat - 1;
-        smallestB->lowerBound = 1;
-        smallestB->upperBound = minCombinedLat - 1;
-        out(*ios, "\tFound helper instructions ", *smallestA, " and ", *smallestB,
-            " with combined latency ", minCombinedLat);
-        // smallestA and smallestB now are the measurements with the lowest combined latency
-        // Use them to measure everything else
-        for (LatMeasurement *mA : measurementsA) {
-            if (opcodeBlacklist.find(mA->opcode) != opcodeBlacklist.end()) continue;
-            auto [EC, lat] = measureInSubprocess({*mA, *smallestB}, loopCount, Frequency);
-            mA->ec = EC;
-            mA->lowerBound = lat - smallestB->upperBound;
-            mA->upperBound = lat - smallestB->lowerBound;
-            latencyOutputMessage[mA->opcode] += str("\t", mA->toStringWithBounds(), "\n");
-            if (!isError(EC)) {
-                latencyOutputMessage[mA->opcode] +=
-                    str("\t\tDependencies:\n\t\t\t", *smallestA, "\n\t\t\t", *smallestB, "\n");
-                latencyOutputMessage[mA->opcode] += str("\t\tCombined result: ", lat, " cycles\n");
-            }
-        }
-        for (LatMeasurement *mB : measurementsB) {
-            if (opcodeBlacklist.find(mB->opcode) != opcodeBlacklist.end()) continue;
-            auto [EC, lat] = measureInSubprocess({*smallestA, *mB}, loopCount, Frequency);
-            mB->ec = EC;
-            mB->lowerBound = lat - smallestA->upperBound;
-            mB->upperBound = lat - smallestA->lowerBound;
-            if (isUnusualLat(mB->lowerBound)) mB->ec = E_UNUSUAL_LATENCY;
-
-            latencyOutputMessage[mB->opcode] += str("\t", mB->toStringWithBounds(), "\n");
-            if (!isError(EC)) {
-                latencyOutputMessage[mB->opcode] +=
-                    str("\t\tDependencies:\n\t\t\t", *smallestA, "\n\t\t\t", *smallestB, "\n");
-                latencyOutputMessage[mB->opcode] += str("\t\tCombined result: ", lat, " cycles\n");
-            }
-        }
-    }
-
-    // Print report strings collected
-    out(*ios, "\n\nReport on individual measurements:");
-    for (auto entry : latencyOutputMessage) {
-        out(*ios, "-----", getEnv().MCII->getName(entry.first).data(), "-----");
-        out(*ios, entry.second);
-    }
-}
-
-int main(int argc, char **argv) {
-    double frequency;
-    std::string cpu = "";
-    std::string march = "";
-    CLI::App app{"winic"};
-    app.add_option("-f,--frequency", frequency, "Frequency in GHz")->required();
-    app.add_flag("-d,--debug", debug, "Enable debug output")->default_val(false);
-    // not tested, used in case llvm cant detect platform
-    app.add_option("-c,--cpu", cpu, "CPU model");
-    app.add_option("-m,--march", march, "Architecture");
-
-    std::vector<std::string> instrNames;
-    unsigned minOpcode = 0;
-    unsigned maxOpcode = 0;
-    bool noReport = false;
-    std::string databasePath = "";
-    auto *tp = app.add_subcommand("TP", "Throughput");
-    auto *tpInstOpt = tp->add_option("-i,--instruction", instrNames, "LLVM Instruction names");
-    tp->add_option("--minOpcode", minOpcode, "Minimum opcode to measure")->excludes(tpInstOpt);
-    tp->add_option("--maxOpcode", maxOpcode, "Maximum opcode to measure")->excludes(tpInstOpt);
-    tp->add_flag("--noReport", noReport, "Don't generate report file")->default_val(false);
-    tp->add_option("-o,--output", databasePath,
-                   "Path to the .yaml file to save the results to. If the file already exists new "
-                   "values will be overwritten. If emtpy a timestamped file will be generated. If "
-                   "/dev/null no file will be generated");
-    tp->add_flag("--X87FP", includeX87FP, "Include x87 floating point instructions")
-        ->default_val(false);
-
-    auto *lat = app.add_subcommand("LAT", "Latency");
-    auto *latInstOpt = lat->add_option("-i,--instruction", instrNames, "LLVM Instruction names");
-    lat->add_option("--minOpcode", minOpcode, "Minimum opcode to measure")->excludes(latInstOpt);
-    lat->add_option("--maxOpcode", maxOpcode, "Maximum opcode to measure")->excludes(latInstOpt);
-    lat->add_flag("--noReport", noReport, "Don't generate report file")->default_val(false);
-    lat->add_option("-o,--output", databasePath,
-                    "Path to the .yaml file to save the results to. If the file already exists new "
-                    "values will be overwritten. If emtpy a timestamped file will be generated. If "
-                    "/dev/null no file will be generated");
-    lat->add_flag("--X87FP", includeX87FP, "Include x87 floating point instructions")
-        ->default_val(false);
-
-    std::string sPath, funcName, initName = "";
-    unsigned numInst;
-    auto *man = app.add_subcommand("MAN", "Manual");
-    man->add_option("-p,--path", sPath, "Assembly file path")->required()->check(CLI::ExistingPath);
-    man->add_option("--funcName", funcName, "Function to benchmark")->required();
-    man->add_option("-n,--nInst", numInst, "Number of instructions in loop")->required();
-    man->add_option("--initName", initName, "Initialization function");
-
-    app.require_subcommand(1, 1);
-    CLI11_PARSE(app, argc, argv)
-
-    // configure output
-    std::cout.precision(3);
-    ios->precision(3);
-    std::string timestamp = generateTimestamp();
-
-    if (noReport || *man)
-        setOutputToFile("/dev/null");
-    else if (*tp)
-        setOutputToFile("report_TP_" + timestamp + ".txt");
-    else if (*lat)
-        setOutputToFile("report_LAT_" + timestamp + ".txt");
-
-    if (databasePath != "/dev/null") {
-        if (databasePath.empty()) databasePath = str("db_", timestamp, ".yaml");
-        if (std::filesystem::exists(databasePath)) {
-            out(*ios, "Using existing database: ", databasePath);
-            ErrorCode EC = loadYaml(databasePath);
-            if (EC != SUCCESS) return -1;
-        } else
-            out(*ios, "Creating new database: ", databasePath);
-    }
-
-    std::ostringstream ss;
-    for (int i = 0; i < argc; ++i)
-        ss << argv[i] << " ";
-
-    out(*ios, "Timestamp: ", timestamp);
-    out(*ios, "Command: ", ss.str());
-    out(*ios, "Frequency: ", frequency, " GHz");
-    dbgToFile = false;
-
-    struct timeval start, end;
-    gettimeofday(&start, NULL);
-    ErrorCode ec = getEnv().setUp(march, cpu);
-    if (ec != SUCCESS) {
-        std::cerr << "failed to set up environment: " << ecToString(ec) << std::endl;
-        return 1;
-    }
-    out(*ios, "Arch: ", getEnv().MSTI->getCPU().str());
-    if (maxOpcode == 0) maxOpcode = getEnv().MCII->getNumOpcodes();
-
-    std::vector<unsigned> opcodes;
-    for (auto instrName : instrNames) {
-        unsigned opcode = getEnv().getOpcode(instrName.data());
-        if (opcode == std::numeric_limits<unsigned>::max()) {
-            std::cerr << "No instruction with name \"" << instrName << "\"" << std::endl;
-            exit(1);
-        }
-        opcodes.emplace_back(opcode);
-    }
-
-    // skip instructions which take long and are irrelevant
-    std::set<std::string> skipInstructions;
-    std::unordered_set<unsigned> opcodeBlacklist;
-
-    if (getEnv().Arch == Triple::ArchType::x86_64) {
-        skipInstructions = {"SYSCALL",   "CPUID",     "MWAITXrrr", "RDRAND16r", "RDRAND32r",
-                            "RDRAND64r", "RDSEED16r", "RDSEED32r", "RDSEED64r", "RDTSC",
-                            "SLDT16r",   "SLDT32r",   "SLDT64r",   "SMSW16r",   "SMSW32r",
-                            "SMSW64r",   "STR16r",    "STR32r",    "STR64r",    "VERRr",
-                            "VERWr"};
-    }
-    for (auto name : skipInstructions)
-        opcodeBlacklist.insert(getEnv().getOpcode(name));
-
-    if (*tp) {
-        out(*ios, "Mode: Throughput");
-        if (getEnv().Arch == Triple::ArchType::x86_64) {
-            // measure TEST64rr and MOV64ri32 beforehand, because their tps are needed for
-            // interleaving with other instructions
-            unsigned opcodeTest = getEnv().getOpcode("TEST64rr");
-            auto [EC, lowerTP, upperTP] = measureInSubprocess(opcodeTest, frequency);
-            throughputDatabase[opcodeTest] = {opcodeTest, EC, lowerTP, upperTP};
-            priorityTPHelper.emplace_back(opcodeTest);
-
-            unsigned opcodeMov = getEnv().getOpcode("MOV64ri32");
-            auto [EC2, lowerTP1, upperTP1] = measureInSubprocess(opcodeMov, frequency);
-            throughputDatabase[opcodeMov] = {opcodeMov, EC2, lowerTP1, upperTP1};
-            priorityTPHelper.emplace_back(opcodeMov);
-        }
-        if (opcodes.empty()) {
-            out(*ios, "No instructions specified, measuring all instructions from opcode ",
-                minOpcode, " to ", maxOpcode);
-            for (unsigned opcode = minOpcode; opcode < maxOpcode; opcode++) {
-                // skip instructions which are not supported on this platform
-                if (opcodeBlacklist.find(opcode) != opcodeBlacklist.end()) {
-                    throughputDatabase[opcode].ec = S_MANUALLY;
-                    continue;
-                }
-                opcodes.emplace_back(opcode);
-            }
-
-            buildTPDatabase(opcodes, frequency);
-        } else {
-            showProgress = false;
-            dbgToFile = true;
-
-            prepAsmDir();
-            buildTPDatabase(opcodes, frequency);
-            for (auto opcode : opcodes) {
-                if (throughputDatabase.find(opcode) == throughputDatabase.end())
-                    continue; // should not happen
-                std::cout << str(throughputDatabase[opcode]) << std::endl;
-            }
-        }
-        // update output database with new values
-        for (auto &[opcode, result] : throughputDatabase)
-            if (result.ec == SUCCESS) updateDatabaseEntryTP(result);
-
-        // save database
-        if (databasePath != "/dev/null") {
-            ErrorCode EC = saveYaml(databasePath);
-            if (EC != SUCCESS) return 1;
-        }
-    } else if (*lat) {
-        out(*ios, "Mode: Latency");
-
-        // example chain ADC16ri8 CMP16ri8
-        // ADC32i32 PCMPESTRIrri CVTSI2SDrr TODO debug
-        if (opcodes.empty()) {
-            out(*ios, "No instructions specified, measuring all instructions from opcode ",
-                minOpcode, " to ", maxOpcode);
-            latencyDatabase = genLatMeasurements(minOpcode, maxOpcode, opcodeBlacklist);
-            buildLatDatabase(frequency);
-        } else {
-            showProgress = false;
-            dbgToFile = true;
-            prepAsmDir();
-            for (auto opcode : opcodes) {
-                auto measurements = genLatMeasurements(opcode, opcode + 1, {});
-                latencyDatabase.insert(latencyDatabase.begin(), measurements.begin(),
-                                       measurements.end());
-            }
-            buildLatDatabase(frequency);
-            for (auto m : latencyDatabase) {
-                if (std::find(opcodes.begin(), opcodes.end(), m.opcode) == opcodes.end())
-                    continue; // skip prio helpers
-                std::cout << m.toStringWithBounds() << std::endl;
-            }
-        }
-        // update database with new values
-        for (LatMeasurement result : latencyDatabase) {
-            ErrorCode EC = updateDatabaseEntryLAT(result);
-            if (EC != SUCCESS) {
-                std::string msg =
-                    str("failed to update database entry for ", result, ": ", ecToString(EC));
-                out(*ios, msg);
-                std::cerr << msg << std::endl;
-            }
-        }
-
-        // save database
-        if (databasePath != "/dev/null") {
-            ErrorCode EC = saveYaml(databasePath);
-            if (EC != SUCCESS) return 1;
-        }
-    } else if (*man) {
-        auto [EC, times] =
-            measureInSubprocess(sPath, 3, numInst, 1e6, frequency, funcName, initName);
-        if (EC != SUCCESS) {
-            std::cout << "failed for reason: " << ecToString(EC) << "\n";
-            return 1;
-        }
-        for (auto time : times) {
-            std::cout << time << " ";
-        }
-        double minTime = *std::min_element(times.begin(), times.end());
-        std::cout << " min: " << minTime << "\n";
-
-        // runtime[usec -> sec] * Frequency[GHz -> Hz] / number of instructions executed
-        double cyclesPerInstruction = (minTime / 1e6) * (frequency * 1e9) / (numInst * 1e6);
-        std::cout << cyclesPerInstruction << " (clock cycles)\n";
-    }
-
-    gettimeofday(&end, NULL);
-    auto totalRuntime = (end.tv_sec - start.tv_sec) + (end.tv_usec - start.tv_usec) / 1e6;
-    out(*ios, "total runtime: ", totalRuntime, " (s)");
-    std::cout << " done" << std::endl;
-
-    return 0;
-}
+#include "WINIC.h"
+
+#include "BenchmarkGenerator.h"
+#include "CLI11.hpp"
+#include "CustomDebug.h"
+#include "ErrorCode.h"
+#include "Globals.h"
+#include "IOSystem.h"
+#include "InProcessAssembler.h"
+#include "LLVMEnvironment.h"
+#include "PerfCounters.h"
+#include "PortMapping.h"
+#include "Timer.h"
+#include "llvm/ADT/StringRef.h"
+#include "llvm/CodeGen/TargetRegisterInfo.h"
+#include "llvm/MC/MCInst.h"
+#include "llvm/MC/MCInstPrinter.h"
+#include "llvm/MC/MCInstrInfo.h"
+#include "llvm/MC/MCRegister.h"
+#include "llvm/MC/MCSchedule.h"
+#include "llvm/MC/MCSubtargetInfo.h"
+#include "llvm/Support/MemoryBuffer.h"
+#include "llvm/TargetParser/Triple.h"
+#include <AssemblyFile.h>
+#include <algorithm>
+#include <cerrno>
+#include <chrono>
+#include <cmath>
+#include <csignal>
+#include <cstddef>
+#include <cstdio>
+#include <cstdlib>
+#include <ctime>
+#include <ctype.h>
+#include <deque>
+#include <dlfcn.h>
+#include <fcntl.h>
+#include <filesystem>
+#include <fstream>
+#include <functional>
+#include <iomanip>
+#include <iostream>
+#include <limits>
+#include <map>
+#include <memory>
+#include <poll.h>
+#include <sched.h>
+#include <sstream>
+#include <string>
+#include <sys/mman.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <tuple>
+#include <unistd.h>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+// #include "X86RegisterInfo.h"
+// #include "MCTargetDesc/X86MCTargetDesc.h"
+// #include "MCTargetDesc/X86BaseInfo.h"
+
+namespace llvm {
+class MCInstrDesc;
+}
+
+#ifndef CLANG_PATH
+#define CLANG_PATH "usr/bin/clang"
+#endif
+
+namespace {
+std::string generateTimestamp() {
+    // Get current time
+    auto now = std::chrono::system_clock::now();
+    std::time_t nowC = std::chrono::system_clock::to_time_t(now);
+
+    // Format time
+    std::ostringstream ss;
+    ss << std::put_time(std::localtime(&nowC), "%Y-%m-%d_%H-%M-%S");
+    return ss.str();
+}
+
+void setOutputToFile(const std::string &Filename) {
+    fileStream = std::make_unique<std::ofstream>(Filename);
+    if (fileStream->is_open()) {
+        ios = fileStream.get(); // Redirect global output
+    } else {
+        std::cerr << "Failed to open file: " << Filename << std::endl;
+        ios = &std::cout; // Fallback
+    }
+}
+
+void displayProgress(size_t Progress, size_t Total) {
+    if (!showProgress) return;
+    int barWidth = 50;
+    float ratio = (float)Progress / (float)Total;
+    int pos = barWidth * ratio;
+
+    std::cout << "\r[";
+    for (int i = 0; i < barWidth; ++i) {
+        if (i < pos)
+            std::cout << "#";
+        else if (i == pos)
+            std::cout << ">";
+        else
+            std::cout << " ";
+    }
+    std::cout << "] " << int(ratio * 100.0) << "% " << Progress << "/" << Total << std::flush;
+}
+
+// create ./asm and clear all existing files
+void prepAsmDir() {
+    namespace fs = std::filesystem;
+
+    std::string asmDir = (fs::current_path() / "asm").string();
+    if (!fs::exists(asmDir)) {
+        if (!fs::create_directories(asmDir)) {
+            std::cerr << "Failed to create directory: " << asmDir << std::endl;
+            return;
+        }
+    }
+    for (const auto &entry : fs::directory_iterator(asmDir)) {
+        fs::remove_all(entry.path());
+    }
+}
+
+// every benchmark is assembled and loaded in its own subprocess, use its pid so concurrent workers
+// don't overwrite each others files
+std::string scratchPath(pid_t Pid, const std::string &Extension) {
+    return str("/dev/shm/temp_", Pid, Extension);
+}
+
+void removeScratchFiles(pid_t Pid) {
+    std::error_code ec; // ignore errors, the files may not have been created
+    std::filesystem::remove(scratchPath(Pid, ".s"), ec);
+    std::filesystem::remove(scratchPath(Pid, ".so"), ec);
+}
+
+// parse a cpu list as used by sysfs and taskset e.g. "0-3,8,10-11"
+std::vector<unsigned> parseCpuList(const std::string &List) {
+    std::vector<unsigned> cpus;
+    std::stringstream ss(List);
+    std::string range;
+    while (std::getline(ss, range, ',')) {
+        if (range.empty()) continue;
+        size_t dash = range.find('-');
+        unsigned first = std::stoul(range.substr(0, dash));
+        unsigned last = dash == std::string::npos ? first : std::stoul(range.substr(dash + 1));
+        for (unsigned cpu = first; cpu <= last; cpu++)
+            cpus.emplace_back(cpu);
+    }
+    return cpus;
+}
+
+// returns one logical cpu per physical core this process is allowed to run on. SMT siblings are
+// skipped because two benchmarks on the same core would compete for its execution ports
+std::vector<unsigned> getPhysicalCores() {
+    cpu_set_t allowed;
+    CPU_ZERO(&allowed);
+    if (sched_getaffinity(0, sizeof(allowed), &allowed) != 0) return {};
+    std::vector<unsigned> cores;
+    std::set<unsigned> coveredCpus;
+    for (unsigned cpu = 0; cpu < CPU_SETSIZE; cpu++) {
+        if (!CPU_ISSET(cpu, &allowed) || coveredCpus.count(cpu) != 0) continue;
+        cores.emplace_back(cpu);
+        std::ifstream siblingsFile(
+            str("/sys/devices/system/cpu/cpu", cpu, "/topology/thread_siblings_list"));
+        std::string siblings;
+        if (siblingsFile && std::getline(siblingsFile, siblings))
+            for (unsigned sibling : parseCpuList(siblings))
+                coveredCpus.insert(sibling);
+    }
+    return cores;
+}
+
+void pinToCore(int Core) {
+    if (Core < 0) return;
+    cpu_set_t set;
+    CPU_ZERO(&set);
+    CPU_SET(Core, &set);
+    if (sched_setaffinity(0, sizeof(set), &set) != 0) perror("sched_setaffinity");
+}
+
+// relative difference between the median and the minimum of the samples
+double sampleSpread(std::vector<double> Samples) {
+    std::sort(Samples.begin(), Samples.end());
+    double min = Samples.front();
+    double median = Samples[Samples.size() / 2];
+    return (median - min) / std::max(min, 1.0);
+}
+
+// look up the init and benchmark functions of Assembly and time Runs calls of each benchmark
+std::pair<ErrorCode, std::unordered_map<std::string, std::list<double>>>
+timeBenchmarkFunctions(AssemblyFile &Assembly,
+                       const std::function<void *(const std::string &)> &Lookup, unsigned N,
+                       unsigned Runs, SampleStats *Stats) {
+    // get handles to function in the assembly file
+    std::unordered_map<std::string, double (*)(int)> benchFunctionMap;
+    std::unordered_map<std::string, double (*)()> initFunctionMap;
+    for (std::string functionName : Assembly.getInitFunctionNames()) {
+        auto functionPtr = (double (*)())Lookup(functionName);
+        if (functionPtr == NULL) {
+            std::cerr << "couldn't find function " << functionName.data() << std::endl;
+            return {E_GENERIC, {}};
+        }
+        initFunctionMap[functionName] = functionPtr;
+    }
+    for (std::string functionName : Assembly.getBenchFunctionNames()) {
+        auto functionPtr = (double (*)(int))Lookup(functionName);
+        if (functionPtr == NULL) {
+            std::cerr << "couldn't find function " << functionName.data() << std::endl;
+            return {E_GENERIC, {}};
+        }
+        benchFunctionMap[functionName] = functionPtr;
+    }
+    // may have results from prior runs
+    if (prepareTimer() != SUCCESS) return {E_TIMER, {}};
+    if (prepareCounters() != SUCCESS) return {E_COUNTERS, {}};
+    const std::vector<std::string> &counters = getEnabledCounters();
+    // Counts receives the values of the performance counters if they are enabled
+    auto runOnce = [&](const std::string &BenchFunctionName, unsigned LoopCount,
+                       std::vector<uint64_t> *Counts = nullptr) {
+        auto initFunction = initFunctionMap[Assembly.getInitNameFor(BenchFunctionName)];
+        if (initFunction) (*initFunction)();
+
+        if (Counts) startCounters();
+        uint64_t start = readTimer();
+        (*benchFunctionMap[BenchFunctionName])(LoopCount);
+        uint64_t end = readTimer();
+        if (Counts && !stopCounters(*Counts)) Counts->clear();
+        return (double)(end - start);
+    };
+
+    // loop counts below the ones of real measurements come from probes like canMeasure(), which
+    // only check that the benchmark runs. They are kept as they are
+    bool adaptive = adaptiveMode && N >= 100;
+    if (adaptive) {
+        // increase the loop count until the slowest function takes a noticeable fraction of the
+        // target time, then scale it to the target time
+        const unsigned maxLoopCount = 1u << 30;
+        N = 100;
+        double seconds;
+        while (true) {
+            seconds = 0;
+            for (auto &entry : benchFunctionMap) {
+                auto start = std::chrono::steady_clock::now();
+                runOnce(entry.first, N);
+                std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+                seconds = std::max(seconds, elapsed.count());
+            }
+            if (seconds >= adaptiveTargetTime / 10 || N >= maxLoopCount / 10) break;
+            N *= 10;
+        }
+        double scaled = N * adaptiveTargetTime / std::max(seconds, 1e-9);
+        N = (unsigned)std::clamp(scaled, 1.0, (double)maxLoopCount);
+        dbg(__func__, "adaptive loop count: ", N);
+    }
+    unsigned minSamples = adaptive ? adaptiveMinSamples : Runs;
+    unsigned maxSamples = adaptive ? std::max(adaptiveMaxSamples, minSamples) : Runs;
+
+    std::unordered_map<std::string, std::list<double>> benchtimes;
+    for (auto &entry : benchFunctionMap) {
+        // sample until the median converges to the minimum, without adaptive mode this is always
+        // Runs samples
+        std::vector<double> samples;
+        std::vector<std::list<double>> counterSamples(counters.size());
+        std::vector<uint64_t> counts;
+        while (samples.size() < maxSamples) {
+            samples.emplace_back(runOnce(entry.first, N, counters.empty() ? nullptr : &counts));
+            // runs in which the group didn't count, e.g. because another process used the PMU,
+            // are left out
+            for (size_t i = 0; i < counts.size(); i++)
+                counterSamples[i].emplace_back(counts[i]);
+            if (samples.size() >= minSamples &&
+                (!adaptive || sampleSpread(samples) <= adaptiveConfidence))
+                break;
+        }
+        benchtimes[entry.first] = std::list<double>(samples.begin(), samples.end());
+        for (size_t i = 0; i < counters.size(); i++)
+            if (!counterSamples[i].empty())
+                benchtimes[counterKey(counters[i], entry.first)] = counterSamples[i];
+        if (Stats && adaptive && !samples.empty()) {
+            Stats->samples = std::max(Stats->samples, (unsigned)samples.size());
+            Stats->spread = std::max(Stats->spread, sampleSpread(samples));
+        }
+    }
+    if (Stats) Stats->loopCount = N;
+
+    return {SUCCESS, benchtimes};
+}
+
+// measured instructions which can be used as throughput helper, indexed by the registers they can
+// define and sorted by throughput. Entries are only added, getTPHelperInstruction() skips entries
+// which don't match throughputDatabase anymore
+std::unordered_map<unsigned, std::set<std::pair<double, unsigned>>> tpHelperIndex;
+
+// store a throughput result and add it to tpHelperIndex if it can be used as helper
+void setTPResult(const TPMeasurement &Measurement) {
+    throughputDatabase[Measurement.opcode] = Measurement;
+    if (Measurement.ec != SUCCESS || greaterEqWithTolerance(Measurement.lowerTP, 0.25)) return;
+    for (MCRegister reg : getEnv().getPossibleDefs(Measurement.opcode))
+        tpHelperIndex[reg.id()].insert({Measurement.lowerTP, Measurement.opcode});
+}
+
+// instructions with a lower rank are measured first. Simple moves and arithmetic instructions are
+// likely helpers for the others
+unsigned tpSchedulingRank(unsigned Opcode) {
+    const MCInstrDesc &desc = getEnv().MCII->get(Opcode);
+    if (desc.isMoveImmediate() || desc.isMoveReg()) return 0;
+    if (desc.getNumDefs() > 0 && !desc.mayLoad() && !desc.mayStore() && !desc.isBranch() &&
+        !desc.isCall() && !desc.isReturn() && !desc.hasUnmodeledSideEffects())
+        return 1;
+    return 2;
+}
+
+// result of a measurement, written by a worker into the shared ring buffer
+struct JobResult {
+    ErrorCode ec;
+    double lowerBound;
+    double upperBound;
+    SampleStats stats;
+    char message[300];
+};
+
+enum JobType { JOB_TP, JOB_LAT, JOB_TP_UPDATE, JOB_TP_BATCH, JOB_LAT_BATCH, JOB_PORTS };
+
+// sent to a worker over its job pipe. LAT jobs are followed by NumMeasurements LatMeasurements,
+// TP_UPDATE jobs by one TPMeasurement, PORTS jobs by the reference opcode and the number of
+// reference instructions. Batch jobs are followed by NumMeasurements opcodes or
+// LatMeasurements which are measured independently
+struct JobHeader {
+    JobType type;
+    size_t slot; // the result is written to this ring slot, results of batch jobs to the
+                 // following slots
+    unsigned opcode;
+    unsigned loopCount;
+    double frequency;
+    unsigned numMeasurements;
+};
+
+bool readAll(int Fd, void *Buffer, size_t Size) {
+    char *data = static_cast<char *>(Buffer);
+    while (Size > 0) {
+        ssize_t n = read(Fd, data, Size);
+        if (n == -1 && errno == EINTR) continue;
+        if (n <= 0) return false;
+        data += n;
+        Size -= n;
+    }
+    return true;
+}
+
+bool writeAll(int Fd, const void *Buffer, size_t Size) {
+    const char *data = static_cast<const char *>(Buffer);
+    while (Size > 0) {
+        ssize_t n = write(Fd, data, Size);
+        if (n == -1 && errno == EINTR) continue;
+        if (n <= 0) return false;
+        data += n;
+        Size -= n;
+    }
+    return true;
+}
+
+// main loop of a worker, runs jobs until the job pipe is closed
+[[noreturn]] void runWorker(int JobFd, int ResultFd, JobResult *Ring) {
+    JobHeader job;
+    while (readAll(JobFd, &job, sizeof(job))) {
+        if (job.type == JOB_TP_UPDATE) {
+            TPMeasurement measurement;
+            if (!readAll(JobFd, &measurement, sizeof(measurement))) break;
+            setTPResult(measurement);
+            continue;
+        }
+        // store a result and the lines it added to the report, the parent has the rest
+        auto setResult = [&](size_t Index, ErrorCode EC, double LowerBound, double UpperBound,
+                             const SampleStats &Stats, const std::string &Message) {
+            JobResult &result = Ring[job.slot + Index];
+            result.ec = EC;
+            result.lowerBound = LowerBound;
+            result.upperBound = UpperBound;
+            result.stats = Stats;
+            strncpy(result.message, Message.data(), sizeof(result.message) - 1);
+            result.message[sizeof(result.message) - 1] = '\0';
+        };
+        if (job.type == JOB_TP_BATCH) {
+            std::vector<unsigned> opcodes(job.numMeasurements);
+            if (!readAll(JobFd, opcodes.data(), job.numMeasurements * sizeof(unsigned))) break;
+            for (unsigned opcode : opcodes)
+                throughputOutputMessage[opcode].clear();
+            measureThroughputBatch(opcodes, job.frequency,
+                                   [&](size_t Index, ErrorCode EC, double LowerTP, double UpperTP,
+                                       const SampleStats &Stats) {
+                                       setResult(Index, EC, LowerTP, UpperTP, Stats,
+                                                 throughputOutputMessage[opcodes[Index]]);
+                                   });
+            if (!writeAll(ResultFd, &job.slot, sizeof(job.slot))) break;
+            continue;
+        }
+        if (job.type == JOB_LAT_BATCH) {
+            std::vector<LatMeasurement> measurements(job.numMeasurements);
+            if (!readAll(JobFd, measurements.data(), job.numMeasurements * sizeof(LatMeasurement)))
+                break;
+            measureLatencyBatch(
+                measurements, job.loopCount, job.frequency,
+                [&](size_t Index, ErrorCode EC, double Lat, const SampleStats &Stats) {
+                    setResult(Index, EC, Lat, Lat, Stats, "");
+                });
+            if (!writeAll(ResultFd, &job.slot, sizeof(job.slot))) break;
+            continue;
+        }
+        JobResult &result = Ring[job.slot];
+        result.stats = SampleStats();
+        std::string message;
+        if (job.type == JOB_TP) {
+            throughputOutputMessage[job.opcode].clear();
+            std::tie(result.ec, result.lowerBound, result.upperBound) =
+                measureThroughput(job.opcode, job.frequency, &result.stats);
+            message = throughputOutputMessage[job.opcode];
+        } else if (job.type == JOB_PORTS) {
+            unsigned reference[2];
+            if (!readAll(JobFd, reference, sizeof(reference))) break;
+            std::tie(result.ec, result.lowerBound) = measureInterference(
+                job.opcode, reference[0], reference[1], job.frequency, &result.stats);
+            result.upperBound = result.lowerBound;
+        } else {
+            std::vector<LatMeasurement> measurements(job.numMeasurements);
+            if (!readAll(JobFd, measurements.data(), job.numMeasurements * sizeof(LatMeasurement)))
+                break;
+            std::tie(result.ec, result.lowerBound) =
+                measureLatency({measurements.begin(), measurements.end()}, job.loopCount,
+                               job.frequency, &result.stats);
+            result.upperBound = result.lowerBound;
+        }
+        setResult(0, result.ec, result.lowerBound, result.upperBound, result.stats, message);
+        if (!writeAll(ResultFd, &job.slot, sizeof(job.slot))) break;
+    }
+    exit(EXIT_SUCCESS);
+}
+
+/**
+ * \brief Pool of long-lived worker processes running the measurements. Forking the whole process
+ * for every measurement is expensive, instead each worker receives jobs over a pipe and writes the
+ * results to its own slots of a preallocated shared ring buffer. A worker has one job at a time, so
+ * its slots are collected before they are written again. A worker is only replaced if it dies e.g.
+ * because a benchmark raised SIGSEGV or SIGILL.
+ */
+class WorkerPool {
+  public:
+    /**
+     * \brief Allocates the ring buffer, the workers are forked when they receive their first job
+     * so they start with the current state of this process.
+     * \param Cores One entry per worker, the core to pin it to or -1.
+     * \return SUCCESS or E_MMAP.
+     */
+    ErrorCode start(const std::vector<int> &Cores) {
+        stop();
+        // each worker gets batchSize slots, a batch job uses one slot per measurement
+        slotsPerWorker = std::max(batchSize, 1u);
+        ringSize = std::max<size_t>(Cores.size(), 1) * slotsPerWorker;
+        void *memory = mmap(NULL, ringSize * sizeof(JobResult), PROT_READ | PROT_WRITE,
+                            MAP_SHARED | MAP_ANONYMOUS, -1, 0);
+        if (memory == MAP_FAILED) {
+            perror("mmap");
+            return E_MMAP;
+        }
+        ring = static_cast<JobResult *>(memory);
+        // a dead worker is detected when reading its pipe, don't get killed when writing to it
+        signal(SIGPIPE, SIG_IGN);
+        for (int core : Cores) {
+            Worker worker;
+            worker.core = core;
+            workers.emplace_back(worker);
+        }
+        return SUCCESS;
+    }
+
+    /**
+     * \brief Lets all workers exit and frees the ring buffer.
+     */
+    void stop() {
+        for (Worker &worker : workers)
+            if (worker.pid != -1) reap(worker);
+        workers.clear();
+        updates.clear();
+        if (ring != nullptr) munmap(ring, ringSize * sizeof(JobResult));
+        ring = nullptr;
+    }
+
+    bool isRunning() { return ring != nullptr; }
+    size_t size() { return workers.size(); }
+
+    /**
+     * \brief Index of a worker without a job or -1 if all are busy.
+     */
+    int getIdleWorker() {
+        for (size_t i = 0; i < workers.size(); i++)
+            if (!workers[i].busy) return i;
+        return -1;
+    }
+
+    /**
+     * \brief Passes a throughput result on to the workers, they need it to find helpers.
+     */
+    void publish(const TPMeasurement &Measurement) {
+        if (isRunning()) updates.emplace_back(Measurement);
+    }
+
+    ErrorCode submitTP(unsigned Index, unsigned Opcode, double Frequency) {
+        JobHeader job = {JOB_TP, 0, Opcode, 0, Frequency, 0};
+        return submit(Index, job, nullptr, 0);
+    }
+
+    ErrorCode submitLat(unsigned Index, const std::list<LatMeasurement> &Measurements,
+                        unsigned LoopCount, double Frequency) {
+        std::vector<LatMeasurement> payload(Measurements.begin(), Measurements.end());
+        JobHeader job = {JOB_LAT, 0, 0, LoopCount, Frequency, (unsigned)payload.size()};
+        return submit(Index, job, payload.data(), payload.size() * sizeof(LatMeasurement));
+    }
+
+    ErrorCode submitPorts(unsigned Index, unsigned Opcode, unsigned Reference, unsigned Count,
+                          double Frequency) {
+        unsigned payload[2] = {Reference, Count};
+        JobHeader job = {JOB_PORTS, 0, Opcode, 0, Frequency, 0};
+        return submit(Index, job, payload, sizeof(payload));
+    }
+
+    /**
+     * \brief Measures the throughput of several opcodes with one assembled object, see
+     * measureThroughputBatch(). Has to be collected with collectAll().
+     */
+    ErrorCode submitTPBatch(unsigned Index, const std::vector<unsigned> &Opcodes,
+                            double Frequency) {
+        JobHeader job = {JOB_TP_BATCH, 0, 0, 0, Frequency, (unsigned)Opcodes.size()};
+        return submit(Index, job, Opcodes.data(), Opcodes.size() * sizeof(unsigned));
+    }
+
+    /**
+     * \brief Measures the latency of several measurements with one assembled object, see
+     * measureLatencyBatch(). Has to be collected with collectAll().
+     */
+    ErrorCode submitLatBatch(unsigned Index, const std::vector<LatMeasurement> &Measurements,
+                             unsigned LoopCount, double Frequency) {
+        JobHeader job = {JOB_LAT_BATCH, 0, 0, LoopCount, Frequency, (unsigned)Measurements.size()};
+        return submit(Index, job, Measurements.data(),
+                      Measurements.size() * sizeof(LatMeasurement));
+    }
+
+    /**
+     * \brief Waits until any busy worker finished its job.
+     * \param Index Receives the index of the worker.
+     * \return The result of the job. If the worker died the error code tells why.
+     */
+    JobResult collect(unsigned &Index) { return collectAll(Index).front(); }
+
+    /**
+     * \brief Waits until any busy worker finished its job.
+     * \param Index Receives the index of the worker.
+     * \return The results of the job, one per measurement of a batch job. If the worker died
+     * during a single measurement the error code tells why. If it died during a batch job the
+     * result is empty, the measurements have to be repeated one at a time to find the culprit.
+     */
+    std::vector<JobResult> collectAll(unsigned &Index) {
+        std::vector<pollfd> fds;
+        std::vector<unsigned> indices;
+        for (size_t i = 0; i < workers.size(); i++) {
+            if (!workers[i].busy) continue;
+            fds.push_back({workers[i].resultFd, POLLIN, 0});
+            indices.emplace_back(i);
+        }
+        while (poll(fds.data(), fds.size(), -1) == -1) {
+            if (errno == EINTR) continue;
+            perror("poll");
+            exit(1);
+        }
+        size_t ready = 0;
+        while (fds[ready].revents == 0)
+            ready++;
+        Index = indices[ready];
+        Worker &worker = workers[Index];
+        worker.busy = false;
+        size_t slot;
+        if (readAll(worker.resultFd, &slot, sizeof(slot))) {
+            std::vector<JobResult> results;
+            for (unsigned i = 0; i < worker.numResults; i++)
+                results.emplace_back(ring[slot + i]);
+            return results;
+        }
+        // the worker died during the job, the next job forks a new one
+        JobResult result = {};
+        result.ec = reap(worker);
+        result.lowerBound = -1;
+        result.upperBound = -1;
+        if (worker.numResults > 1) return {};
+        return {result};
+    }
+
+  private:
+    struct Worker {
+        pid_t pid = -1;
+        int jobFd = -1;
+        int resultFd = -1;
+        int core = -1;
+        bool busy = false;
+        size_t synced = 0;       // number of updates the worker has received
+        unsigned numResults = 0; // number of results of the current job
+    };
+
+    ErrorCode spawn(Worker &W) {
+        int jobPipe[2];
+        int resultPipe[2];
+        if (pipe2(jobPipe, O_CLOEXEC) == -1) return E_FORK;
+        if (pipe2(resultPipe, O_CLOEXEC) == -1) {
+            close(jobPipe[0]);
+            close(jobPipe[1]);
+            return E_FORK;
+        }
+        // buffered output would otherwise be written again when the worker exits
+        std::cout.flush();
+        ios->flush();
+        pid_t pid = fork();
+        if (pid == 0) {
+            // other workers only see the end of their job pipe if nobody else holds it open
+            for (Worker &other : workers) {
+                if (other.jobFd != -1) close(other.jobFd);
+                if (other.resultFd != -1) close(other.resultFd);
+            }
+            close(jobPipe[1]);
+            close(resultPipe[0]);
+            pinToCore(W.core);
+            runWorker(jobPipe[0], resultPipe[1], ring);
+        }
+        close(jobPipe[0]);
+        close(resultPipe[1]);
+        if (pid == -1) {
+            close(jobPipe[1]);
+            close(resultPipe[0]);
+            return E_FORK;
+        }
+        W.pid = pid;
+        W.jobFd = jobPipe[1];
+        W.resultFd = resultPipe[0];
+        // the new worker was forked with all updates applied
+        W.synced = updates.size();
+        return SUCCESS;
+    }
+
+    // close the pipes of a worker and wait for it to exit. Returns why it exited
+    ErrorCode reap(Worker &W) {
+        close(W.jobFd);
+        close(W.resultFd);
+        int status;
+        waitpid(W.pid, &status, 0);
+        removeScratchFiles(W.pid);
+        W = Worker{-1, -1, -1, W.core, false, 0, W.numResults};
+        if (WIFSIGNALED(status)) {
+            if (WTERMSIG(status) == SIGSEGV) return E_SIGSEGV;
+            if (WTERMSIG(status) == SIGILL) return E_ILLEGAL_INSTRUCTION;
+            return E_SIGNAL;
+        }
+        return E_UNREACHABLE;
+    }
+
+    // send pending updates and the job to an idle worker, a worker which died in the meantime is
+    // replaced once
+    ErrorCode submit(unsigned Index, JobHeader Job, const void *Payload, size_t Size) {
+        Worker &worker = workers[Index];
+        bool isBatch = Job.type == JOB_TP_BATCH || Job.type == JOB_LAT_BATCH;
+        worker.numResults = isBatch ? Job.numMeasurements : 1;
+        if (worker.numResults > slotsPerWorker) return E_UNREACHABLE;
+        Job.slot = Index * slotsPerWorker;
+        for (unsigned attempt = 0; attempt < 2; attempt++) {
+            if (worker.pid == -1 && spawn(worker) != SUCCESS) return E_FORK;
+            bool sent = true;
+            for (; sent && worker.synced < updates.size(); worker.synced++) {
+                JobHeader update = {JOB_TP_UPDATE, 0, updates[worker.synced].opcode, 0, 0, 0};
+                sent = writeAll(worker.jobFd, &update, sizeof(update)) &&
+                       writeAll(worker.jobFd, &updates[worker.synced], sizeof(TPMeasurement));
+            }
+            sent = sent && writeAll(worker.jobFd, &Job, sizeof(Job)) &&
+                   (Size == 0 || writeAll(worker.jobFd, Payload, Size));
+            if (sent) {
+                worker.busy = true;
+                return SUCCESS;
+            }
+            reap(worker);
+        }
+        return E_FORK;
+    }
+
+    JobResult *ring = nullptr;
+    size_t ringSize = 0;
+    unsigned slotsPerWorker = 1;
+    std::vector<Worker> workers;
+    std::vector<TPMeasurement> updates; // throughput results in the order they were published
+};
+
+WorkerPool workerPool;
+
+// run a single job and wait for its result. If no pool is running a temporary one with a single
+// worker is used
+JobResult runJob(const std::function<ErrorCode(unsigned)> &Submit) {
+    bool temporary = !workerPool.isRunning();
+    JobResult result = {};
+    result.lowerBound = -1;
+    result.upperBound = -1;
+    if (temporary) {
+        result.ec = workerPool.start({workerCores.empty() ? -1 : (int)workerCores.front()});
+        if (result.ec != SUCCESS) return result;
+    }
+    int index = workerPool.getIdleWorker();
+    result.ec = index == -1 ? E_UNREACHABLE : Submit(index);
+    if (result.ec == SUCCESS) {
+        unsigned collected;
+        result = workerPool.collect(collected);
+    }
+    if (temporary) workerPool.stop();
+    return result;
+}
+
+// latency of an instruction according to the scheduling model of LLVM, at least 1 cycle
+double estimateLatency(unsigned Opcode) {
+    const MCSchedModel &model = getEnv().MSTI->getSchedModel();
+    if (!model.hasInstrSchedModel()) return 1;
+    const MCSchedClassDesc *desc =
+        model.getSchedClassDesc(getEnv().MCII->get(Opcode).getSchedClass());
+    // variant classes depend on the operands, they can't be resolved without an instruction
+    if (desc == nullptr || !desc->isValid() || desc->isVariant()) return 1;
+    return std::max(1, MCSchedModel::computeInstrLatency(*getEnv().MSTI, *desc));
+}
+
+// order helper candidates by their expected latency, instructions with a known low throughput are
+// preferred if the scheduling model can't tell them apart
+std::vector<LatMeasurement *> rankHelperCandidates(std::vector<LatMeasurement *> Candidates) {
+    auto rank = [](const LatMeasurement *M) {
+        auto tp = throughputDatabase.find(M->opcode);
+        double lowerTP = tp != throughputDatabase.end() && tp->second.ec == SUCCESS
+                             ? tp->second.lowerTP
+                             : std::numeric_limits<double>::max();
+        return std::make_pair(estimateLatency(M->opcode), lowerTP);
+    };
+    std::stable_sort(
+        Candidates.begin(), Candidates.end(),
+        [&](const LatMeasurement *A, const LatMeasurement *B) { return rank(A) < rank(B); });
+    return Candidates;
+}
+
+// one entry per worker, the core to pin it to or -1 if the workers are not pinned
+std::vector<int> getWorkerCores() {
+    std::vector<int> cores;
+    for (unsigned i = 0; i < std::max(1u, numWorkers); i++)
+        cores.emplace_back(i < workerCores.size() ? (int)workerCores[i] : -1);
+    return cores;
+}
+
+// binary encoding of the results a task process passes back to the parent
+template <typename T> void appendValue(std::string &Buffer, const T &Value) {
+    Buffer.append(reinterpret_cast<const char *>(&Value), sizeof(T));
+}
+
+void appendString(std::string &Buffer, const std::string &Value) {
+    appendValue(Buffer, Value.size());
+    Buffer += Value;
+}
+
+template <typename T> T readValue(const std::string &Buffer, size_t &Offset) {
+    T value;
+    memcpy(&value, Buffer.data() + Offset, sizeof(T));
+    Offset += sizeof(T);
+    return value;
+}
+
+std::string readString(const std::string &Buffer, size_t &Offset) {
+    size_t size = readValue<size_t>(Buffer, Offset);
+    std::string value = Buffer.substr(Offset, size);
+    Offset += size;
+    return value;
+}
+
+/**
+ * \brief Runs tasks in processes pinned to separate cores. Unlike the jobs of a WorkerPool a task
+ * can run any number of measurements, it measures through its own WorkerPool. The result of a task
+ * is a string passed back through a pipe.
+ */
+class TaskPool {
+  public:
+    /**
+     * \param Cores One entry per task process, the core to pin it to or -1.
+     */
+    explicit TaskPool(const std::vector<int> &Cores) {
+        for (int core : Cores) {
+            Slot slot;
+            slot.core = core;
+            slots.emplace_back(slot);
+        }
+    }
+
+    /**
+     * \brief Index of a slot without a running task or -1 if all are busy.
+     */
+    int getIdleSlot() {
+        for (size_t i = 0; i < slots.size(); i++)
+            if (slots[i].pid == -1) return i;
+        return -1;
+    }
+
+    /**
+     * \brief Checks if any task is running.
+     */
+    bool isRunning() {
+        return std::any_of(slots.begin(), slots.end(), [](const Slot &S) { return S.pid != -1; });
+    }
+
+    /**
+     * \brief Forks a process running Task.
+     * \param Index Index of an idle slot.
+     * \param Id Identifies the task when it is collected.
+     * \param Task Runs in the new process, the returned string is the result of the task.
+     * \return SUCCESS or E_FORK.
+     */
+    ErrorCode submit(unsigned Index, unsigned Id, const std::function<std::string()> &Task) {
+        int resultPipe[2];
+        if (pipe2(resultPipe, O_CLOEXEC) == -1) return E_FORK;
+        // buffered output would otherwise be written again when the task exits
+        std::cout.flush();
+        ios->flush();
+        pid_t pid = fork();
+        if (pid == 0) {
+            for (Slot &other : slots)
+                if (other.resultFd != -1) close(other.resultFd);
+            close(resultPipe[0]);
+            pinToCore(slots[Index].core);
+            std::string result = Task();
+            size_t size = result.size();
+            bool sent = writeAll(resultPipe[1], &size, sizeof(size)) &&
+                        writeAll(resultPipe[1], result.data(), size);
+            _exit(sent ? EXIT_SUCCESS : EXIT_FAILURE);
+        }
+        close(resultPipe[1]);
+        if (pid == -1) {
+            close(resultPipe[0]);
+            return E_FORK;
+        }
+        slots[Index].pid = pid;
+        slots[Index].resultFd = resultPipe[0];
+        slots[Index].id = Id;
+        return SUCCESS;
+    }
+
+    /**
+     * \brief Waits until any running task finished.
+     * \return Error code, id and result of the task. If the process died the error code tells why.
+     */
+    std::tuple<ErrorCode, unsigned, std::string> collect() {
+        std::vector<pollfd> fds;
+        std::vector<unsigned> indices;
+        for (size_t i = 0; i < slots.size(); i++) {
+            if (slots[i].pid == -1) continue;
+            fds.push_back({slots[i].resultFd, POLLIN, 0});
+            indices.emplace_back(i);
+        }
+        while (poll(fds.data(), fds.size(), -1) == -1) {
+            if (errno == EINTR) continue;
+            perror("poll");
+            exit(1);
+        }
+        size_t ready = 0;
+        while (fds[ready].revents == 0)
+            ready++;
+        Slot &slot = slots[indices[ready]];
+        size_t size;
+        std::string result;
+        bool received = readAll(slot.resultFd, &size, sizeof(size));
+        if (received) {
+            result.resize(size);
+            received = readAll(slot.resultFd, result.data(), size);
+        }
+        close(slot.resultFd);
+        int status;
+        waitpid(slot.pid, &status, 0);
+        unsigned id = slot.id;
+        slot = Slot{-1, -1, slot.core, 0};
+        if (received) return {SUCCESS, id, result};
+        if (WIFSIGNALED(status)) {
+            if (WTERMSIG(status) == SIGSEGV) return {E_SIGSEGV, id, ""};
+            if (WTERMSIG(status) == SIGILL) return {E_ILLEGAL_INSTRUCTION, id, ""};
+            return {E_SIGNAL, id, ""};
+        }
+        return {E_UNREACHABLE, id, ""};
+    }
+
+  private:
+    struct Slot {
+        pid_t pid = -1;
+        int resultFd = -1;
+        int core = -1;
+        unsigned id = 0;
+    };
+
+    std::vector<Slot> slots;
+};
+
+// bump whenever the records of the journal change, journals of other versions are not resumed
+const unsigned JOURNAL_VERSION = 2;
+
+// a double as a journal field with all significant digits, so resumed values are the same as the
+// measured ones
+std::string encodeDouble(double Value) {
+    std::ostringstream stream;
+    stream << std::setprecision(std::numeric_limits<double>::max_digits10) << Value;
+    return stream.str();
+}
+
+// the performance counters of a measurement as a journal field
+std::string encodeCounters(const SampleStats &Stats) {
+    std::string field;
+    for (unsigned i = 0; i < Stats.numCounters; i++)
+        field += (i == 0 ? "" : " ") + encodeDouble(Stats.counters[i]);
+    return field;
+}
+
+void decodeCounters(const std::string &Field, SampleStats &Stats) {
+    std::istringstream stream(Field);
+    double value;
+    Stats.numCounters = 0;
+    while (Stats.numCounters < MAX_COUNTERS && stream >> value)
+        Stats.counters[Stats.numCounters++] = value;
+}
+
+// store a throughput result in the journal so it is not measured again when resuming
+void journalTP(const TPMeasurement &Measurement) {
+    journal.append(
+        {"TP", getEnv().MCII->getName(Measurement.opcode).str(), std::to_string(Measurement.ec),
+         encodeDouble(Measurement.lowerTP), encodeDouble(Measurement.upperTP),
+         std::to_string(Measurement.stats.samples), encodeDouble(Measurement.stats.spread),
+         throughputOutputMessage[Measurement.opcode], encodeCounters(Measurement.stats)});
+}
+
+// restore the throughput results from the journal. Returns the opcodes which don't have to be
+// measured again
+std::set<unsigned> resumeTP() {
+    std::set<unsigned> finished;
+    for (const auto &record : journal.getRecords()) {
+        if (record.size() != 9 || record[0] != "TP") continue;
+        unsigned opcode = getEnv().getOpcode(record[1]);
+        if (opcode == MAX_UNSIGNED) continue;
+        TPMeasurement measurement = {opcode, (ErrorCode)std::stoi(record[2]), std::stod(record[3]),
+                                     std::stod(record[4])};
+        measurement.stats.samples = std::stoul(record[5]);
+        measurement.stats.spread = std::stod(record[6]);
+        decodeCounters(record[8], measurement.stats);
+        setTPResult(measurement);
+        throughputOutputMessage[opcode] = record[7];
+        // instructions without helper are retried, same as in buildTPDatabase
+        if (measurement.ec == E_NO_HELPER || measurement.ec == NO_ERROR_CODE)
+            finished.erase(opcode);
+        else
+            finished.insert(opcode);
+    }
+    return finished;
+}
+
+// store a latency result and the report messages of its opcode in the journal
+void journalLat(const LatMeasurement &Measurement) {
+    journal.append({"LAT", Measurement.toCompactString(), std::to_string(Measurement.ec),
+                    encodeDouble(Measurement.lowerBound), encodeDouble(Measurement.upperBound),
+                    std::to_string(Measurement.stats.samples),
+                    encodeDouble(Measurement.stats.spread),
+                    getEnv().MCII->getName(Measurement.opcode).str(),
+                    latencyOutputMessage[Measurement.opcode], encodeCounters(Measurement.stats)});
+}
+
+void journalBlacklist(unsigned Opcode) {
+    journal.append({"BLACKLIST", getEnv().MCII->getName(Opcode).str()});
+}
+
+// restore the latency results from the journal. Returns the keys of the restored measurements,
+// Blacklist and TypeReports receive the blacklisted opcodes and the reports of the completed
+// pairs of dependency types
+std::set<std::string> resumeLat(std::set<unsigned> &Blacklist,
+                                std::map<std::string, std::string> &TypeReports) {
+    std::set<std::string> restored;
+    if (journal.getRecords().empty()) return restored;
+    std::map<std::string, LatMeasurement *> measurements;
+    for (LatMeasurement &measurement : latencyDatabase)
+        measurements[measurement.toCompactString()] = &measurement;
+    // the messages of a pair of types are only restored once the LATTYPE record shows the pair was
+    // completed, otherwise the pair is measured again and would add them a second time
+    std::map<unsigned, std::string> pendingMessages;
+    for (const auto &record : journal.getRecords()) {
+        if (record.size() == 10 && record[0] == "LAT") {
+            auto it = measurements.find(record[1]);
+            if (it == measurements.end()) continue;
+            LatMeasurement &measurement = *it->second;
+            measurement.ec = (ErrorCode)std::stoi(record[2]);
+            measurement.lowerBound = std::stod(record[3]);
+            measurement.upperBound = std::stod(record[4]);
+            measurement.stats.samples = std::stoul(record[5]);
+            measurement.stats.spread = std::stod(record[6]);
+            decodeCounters(record[9], measurement.stats);
+            restored.insert(record[1]);
+            unsigned opcode = getEnv().getOpcode(record[7]);
+            if (opcode == MAX_UNSIGNED) continue;
+            // trivial measurements don't belong to a pair of types
+            if (measurement.type.isSymmetric())
+                latencyOutputMessage[opcode] = record[8];
+            else
+                pendingMessages[opcode] = record[8];
+        } else if (record.size() == 2 && record[0] == "BLACKLIST") {
+            unsigned opcode = getEnv().getOpcode(record[1]);
+            if (opcode != MAX_UNSIGNED) Blacklist.insert(opcode);
+        } else if (record.size() == 3 && record[0] == "LATTYPE") {
+            TypeReports[record[1]] = record[2];
+            for (auto &[opcode, message] : pendingMessages)
+                latencyOutputMessage[opcode] = message;
+            pendingMessages.clear();
+        }
+    }
+    return restored;
+}
+
+// use the throughput values of a previous run as helpers. Later entries of Seed overwrite earlier
+// ones. Returns the seeded opcodes
+std::set<unsigned> seedTP(const std::vector<IOInstruction> &Seed) {
+    std::unordered_map<std::string, unsigned> opcodes;
+    for (unsigned opcode = 0; opcode < getEnv().MCII->getNumOpcodes(); opcode++)
+        opcodes[getEnv().MCII->getName(opcode).str()] = opcode;
+    std::set<unsigned> seeded;
+    for (const IOInstruction &entry : Seed) {
+        auto opcode = opcodes.find(entry.llvmName);
+        if (opcode == opcodes.end()) continue;
+        // errors are stored as throughput 0
+        if (!entry.throughputMin || !entry.throughputMax || *entry.throughputMin <= 0) continue;
+        setTPResult({opcode->second, SUCCESS, *entry.throughputMin, *entry.throughputMax});
+        seeded.insert(opcode->second);
+    }
+    return seeded;
+}
+
+// use the port usage of a previous run or of entries written by hand. Returns the number of seeded
+// instructions
+unsigned seedPorts(const std::vector<IOInstruction> &Seed) {
+    unsigned seeded = 0;
+    for (const IOInstruction &entry : Seed) {
+        if (!entry.ports) continue;
+        unsigned opcode = getEnv().getOpcode(entry.llvmName);
+        if (opcode == std::numeric_limits<unsigned>::max()) continue;
+        auto [EC, usage] = parsePortUsage(*entry.ports);
+        if (EC != SUCCESS) {
+            dbg(__func__, "invalid port usage of ", entry.llvmName, ": ", *entry.ports);
+            continue;
+        }
+        portDatabase[opcode] = usage;
+        seeded++;
+    }
+    return seeded;
+}
+
+// measure TEST64rr and MOV64ri32 beforehand, because their tps are needed for interleaving with
+// other instructions. Seeded values are used as they are
+void addPriorityHelpers(const std::set<unsigned> &SeededOpcodes, double Frequency) {
+    if (getEnv().Arch != Triple::ArchType::x86_64) return;
+    for (std::string name : {"TEST64rr", "MOV64ri32"}) {
+        unsigned opcode = getEnv().getOpcode(name);
+        if (SeededOpcodes.find(opcode) == SeededOpcodes.end()) {
+            auto [EC, lowerTP, upperTP] = measureInSubprocess(opcode, Frequency);
+            setTPResult({opcode, EC, lowerTP, upperTP});
+        }
+        priorityTPHelper.emplace_back(opcode);
+    }
+}
+
+// choose a helper with known latency for each dependency type from the values of a previous run.
+// Returns the number of seeded dependency types
+unsigned seedLat(const std::vector<IOInstruction> &Seed,
+                 const std::vector<LatMeasurement> &Candidates) {
+    std::unordered_map<std::string, const IOInstruction *> entries;
+    for (const IOInstruction &entry : Seed)
+        entries[entry.llvmName] = &entry;
+    for (LatMeasurement candidate : Candidates) {
+        auto entry = entries.find(getEnv().MCII->getName(candidate.opcode).str());
+        if (entry == entries.end()) continue;
+        auto [source, target] = getLatencyOperands(candidate);
+        for (const IOLatency &lat : entry->second->latencies) {
+            if (lat.sourceOperand != source || lat.targetOperand != target) continue;
+            // helpers need a latency of at least one cycle, same as in the helper search
+            if (!lat.min || !lat.max || *lat.min < 1) break;
+            candidate.ec = SUCCESS;
+            candidate.lowerBound = *lat.min;
+            candidate.upperBound = *lat.max;
+            // prefer helpers with low and exactly known latencies
+            auto current = helperInstructionsLat.find(candidate.type);
+            if (current == helperInstructionsLat.end() ||
+                std::make_pair(candidate.upperBound, candidate.upperBound - candidate.lowerBound) <
+                    std::make_pair(current->second.upperBound,
+                                   current->second.upperBound - current->second.lowerBound))
+                helperInstructionsLat.insert_or_assign(candidate.type, candidate);
+            break;
+        }
+    }
+    return helperInstructionsLat.size();
+}
+
+// measure all Measurements with a helper of the reversed dependency type whose latency is known
+// from a previous run
+void measureWithSeededHelper(std::vector<LatMeasurement *> &Measurements,
+                             const LatMeasurement &Helper, bool HelperFirst,
+                             const std::set<unsigned> &OpcodeBlacklist, unsigned LoopCount,
+                             double Frequency) {
+    for (LatMeasurement *m : Measurements) {
+        if (OpcodeBlacklist.find(m->opcode) != OpcodeBlacklist.end()) continue;
+        std::list<LatMeasurement> chain = {*m, Helper};
+        if (HelperFirst) chain = {Helper, *m};
+        auto [EC, lat] = measureInSubprocess(chain, LoopCount, Frequency, &m->stats);
+        m->ec = EC;
+        m->lowerBound = lat - Helper.upperBound;
+        m->upperBound = lat - Helper.lowerBound;
+        if (!isError(EC) && isUnusualLat(m->lowerBound)) m->ec = E_UNUSUAL_LATENCY;
+
+        latencyOutputMessage[m->opcode] += str("\t", m->toStringWithBounds(), "\n");
+        if (!isError(EC)) {
+            latencyOutputMessage[m->opcode] +=
+                str("\t\tSeeded helper:\n\t\t\t", Helper.toStringWithBounds(), "\n");
+            latencyOutputMessage[m->opcode] += str("\t\tCombined result: ", lat, " cycles\n");
+        }
+    }
+}
+
+// assemble Source into the shared object OPath by running clang
+ErrorCode assembleWithClang(const std::string &Source, const std::string &SPath,
+                            const std::string &OPath, const std::string &ExtraOptions) {
+    std::string clangPath = CLANG_PATH;
+    if (clangPath == "usr/bin/clang") {
+        std::cerr << "CLANG_PATH not set, using default" << std::endl;
+    }
+    std::ofstream asmFile(SPath);
+    if (!asmFile) {
+        std::cerr << "Failed to create file in /dev/shm/" << std::endl;
+        return E_FILE;
+    }
+    asmFile << Source;
+    asmFile.close();
+    // gcc -x assembler-with-cpp -shared /dev/shm/temp_<pid>.s -o /dev/shm/temp_<pid>.so &> gcc_out"
+    // "gcc -x assembler-with-cpp -shared -mfp16-format=ieee " + sPath + " -o " + oPath + " 2>
+    // gcc_out";
+
+    // slightly worse performance than fork
+    //  std::string compiler = CLANG_PATH;
+    //  std::string command = compiler + " -x assembler-with-cpp -shared " + sPath + " -o " +
+    // oPath;
+    //  if (dbgToFile)
+    //      command += " 2> assembler_out.log";
+    //  else
+    //      command += " 2> /dev/null";
+    //  if (system(command.data()) != 0) return {ERROR_ASSEMBLY, {-1}};
+
+    // slightly better performance
+    pid_t pid = fork();
+    if (pid == 0) { // Child
+        int fd;
+        if (dbgToFile) {
+            fd = open("assembler_out.log", O_WRONLY | O_TRUNC | O_CREAT, 0644);
+            if (fd == -1) {
+                perror("open assembler_out.log failed");
+                _exit(127);
+            }
+        } else {
+            fd = open("/dev/null", O_WRONLY);
+            if (fd == -1) {
+                perror("open /dev/null failed");
+                _exit(127);
+            }
+        }
+        dup2(fd, STDOUT_FILENO);
+        dup2(fd, STDERR_FILENO);
+        execl(CLANG_PATH, "clang", ExtraOptions.data(), "-x", "assembler-with-cpp", "-shared",
+              SPath.data(), "-o", OPath.data(), nullptr);
+        _exit(127);       // execl failed
+    } else if (pid > 0) { // Parent
+        int status;
+        waitpid(pid, &status, 0);
+        if (WIFEXITED(status) && WEXITSTATUS(status) != 0) {
+            if (WEXITSTATUS(status) == 127) return E_EXEC;
+            return E_ASSEMBLY;
+        }
+    }
+
+    return SUCCESS;
+}
+
+// an assembled benchmark loaded into this process, either by the in-process assembler or as shared
+// object built by clang. The functions stay valid as long as this object lives
+class LoadedBenchmark {
+  public:
+    LoadedBenchmark() = default;
+    LoadedBenchmark(const LoadedBenchmark &) = delete;
+    LoadedBenchmark &operator=(const LoadedBenchmark &) = delete;
+    ~LoadedBenchmark() {
+        if (handle != nullptr) dlclose(handle);
+    }
+
+    ErrorCode load(AssemblyFile &Assembly) {
+        std::string source = Assembly.generateAssembly();
+        if (dbgToFile) {
+            std::string debugPath =
+                std::filesystem::current_path().string() + "/asm/" + Assembly.getName() + ".s";
+            std::ofstream debugFile(debugPath);
+            if (!debugFile) {
+                std::cerr << "Failed to create debug file at " << debugPath.data() << std::endl;
+            } else {
+                debugFile << source;
+                debugFile.close();
+            }
+        }
+
+        if (!useClang && InProcessAssembler::isSupported()) {
+            std::error_code fileEC;
+            raw_fd_ostream diagnostics(dbgToFile ? "assembler_out.log" : "/dev/null", fileEC);
+            assembler = std::make_unique<InProcessAssembler>();
+            std::string key = objectCache.isEnabled() ? objectCache.getKey(source, "mc") : "";
+            std::string cachedPath = objectCache.lookup(key, ".o");
+            ErrorCode ec = E_ASSEMBLY;
+            if (!cachedPath.empty()) {
+                auto buffer = MemoryBuffer::getFile(cachedPath);
+                if (buffer) ec = assembler->load((*buffer)->getBuffer(), diagnostics);
+            }
+            if (ec != SUCCESS) {
+                std::string object;
+                ec = InProcessAssembler::emitObject(source, diagnostics, object);
+                if (ec == SUCCESS) {
+                    if (!key.empty()) objectCache.store(key, ".o", object);
+                    ec = assembler->load(object, diagnostics);
+                }
+            }
+            if (ec == SUCCESS) return SUCCESS;
+            // the builtin assembler may not support everything clang does, try again with clang
+            dbg(__func__, "in-process assembly failed with ", ecToString(ec), ", using clang");
+        }
+
+        assembler.reset();
+        std::string sPath = scratchPath(getpid(), ".s");
+        std::string oPath = scratchPath(getpid(), ".so");
+        std::string extraOptions = "";
+        if (getEnv().Arch == llvm::Triple::riscv64) extraOptions += "-march=rv64gcv";
+        std::string key =
+            objectCache.isEnabled()
+                ? objectCache.getKey(source, str("clang ", CLANG_PATH, " ", extraOptions))
+                : "";
+        // from ibench
+        std::string cachedPath = objectCache.lookup(key, ".so");
+        // the cached object may have been evicted in the meantime, assemble it again in that case
+        if (!cachedPath.empty()) handle = dlopen(cachedPath.data(), RTLD_LAZY);
+        if (handle == nullptr) {
+            ErrorCode ec = assembleWithClang(source, sPath, oPath, extraOptions);
+            if (ec != SUCCESS) return ec;
+            if ((handle = dlopen(oPath.data(), RTLD_LAZY)) == NULL) {
+                std::cerr << "dlopen: failed to open .so file" << std::endl;
+                return E_FILE;
+            }
+            if (!key.empty()) {
+                auto buffer = MemoryBuffer::getFile(oPath);
+                if (buffer) objectCache.store(key, ".so", (*buffer)->getBuffer());
+            }
+        }
+        return SUCCESS;
+    }
+
+    void *getSymbol(const std::string &Name) {
+        if (assembler) return assembler->getSymbol(Name);
+        if (handle != nullptr) return dlsym(handle, Name.data());
+        return nullptr;
+    }
+
+  private:
+    std::unique_ptr<InProcessAssembler> assembler;
+    void *handle = nullptr;
+};
+} // namespace
+
+std::pair<ErrorCode, std::unordered_map<std::string, std::list<double>>>
+runBenchmark(AssemblyFile Assembly, unsigned N, unsigned Runs, SampleStats *Stats) {
+    dbg(__func__, "N: ", N, " Runs: ", Runs);
+    LoadedBenchmark benchmark;
+    ErrorCode ec = benchmark.load(Assembly);
+    if (ec != SUCCESS) return {ec, {}};
+    return timeBenchmarkFunctions(
+        Assembly, [&](const std::string &Name) { return benchmark.getSymbol(Name); }, N, Runs,
+        Stats);
+}
+
+void runBenchmarkBatch(std::vector<AssemblyFile> Assemblies, unsigned N, unsigned Runs,
+                       const BatchConsumer &Consume) {
+    dbg(__func__, "Assemblies.size(): ", Assemblies.size(), " N: ", N, " Runs: ", Runs);
+    // the functions of each benchmark get the index of the benchmark as suffix
+    auto withSuffix = [&](size_t Index) {
+        AssemblyFile assembly(getEnv().Arch);
+        assembly.setName(Assemblies[Index].getName());
+        assembly.append(Assemblies[Index], str("_", Index));
+        return assembly;
+    };
+    // parts of the batch which still have to be run. A part which can't be assembled is split in
+    // half until the benchmarks which break assembly are found
+    std::vector<std::vector<size_t>> parts(1);
+    for (size_t i = 0; i < Assemblies.size(); i++)
+        parts.front().emplace_back(i);
+    while (!parts.empty()) {
+        std::vector<size_t> part = parts.back();
+        parts.pop_back();
+        if (part.empty()) continue;
+        AssemblyFile batch(getEnv().Arch);
+        batch.setName(str(Assemblies[part.front()].getName(), "_batch", part.size()));
+        for (size_t index : part)
+            batch.append(withSuffix(index), "");
+        LoadedBenchmark benchmark;
+        ErrorCode ec = benchmark.load(batch);
+        if (ec == E_ASSEMBLY && part.size() > 1) {
+            dbg(__func__, "assembling ", part.size(), " benchmarks failed, bisecting");
+            size_t half = part.size() / 2;
+            parts.emplace_back(part.begin() + half, part.end());
+            parts.emplace_back(part.begin(), part.begin() + half);
+            continue;
+        }
+        if (ec != SUCCESS) {
+            for (size_t index : part)
+                Consume(index, ec, {}, {});
+            continue;
+        }
+        // time each benchmark in its own subprocess so a crash only affects this benchmark. The
+        // subprocess shares the loaded object, forking is much cheaper than assembling
+        for (size_t index : part) {
+            std::cout.flush();
+            ios->flush();
+            pid_t pid = fork();
+            if (pid == -1) {
+                Consume(index, E_FORK, {}, {});
+                continue;
+            }
+            if (pid == 0) {
+                AssemblyFile assembly = withSuffix(index);
+                SampleStats stats;
+                auto [ec, benchResults] = timeBenchmarkFunctions(
+                    assembly, [&](const std::string &Name) { return benchmark.getSymbol(Name); }, N,
+                    Runs, &stats);
+                // pass the times on by the names used in the original benchmark
+                std::string suffix = str("_", index);
+                std::unordered_map<std::string, std::list<double>> times;
+                for (auto &[name, samples] : benchResults)
+                    times[name.substr(0, name.size() - suffix.size())] = samples;
+                Consume(index, ec, times, stats);
+                std::cout.flush();
+                _exit(EXIT_SUCCESS);
+            }
+            int status;
+            waitpid(pid, &status, 0);
+            if (WIFSIGNALED(status)) {
+                if (WTERMSIG(status) == SIGSEGV)
+                    Consume(index, E_SIGSEGV, {}, {});
+                else if (WTERMSIG(status) == SIGILL)
+                    Consume(index, E_ILLEGAL_INSTRUCTION, {}, {});
+                else
+                    Consume(index, E_SIGNAL, {}, {});
+            } else if (!WIFEXITED(status) || WEXITSTATUS(status) != EXIT_SUCCESS) {
+                Consume(index, E_UNREACHABLE, {}, {});
+            }
+        }
+    }
+}
+
+std::pair<ErrorCode, std::vector<double>> runManual(std::string SPath, unsigned Runs,
+                                                    unsigned NumInst, int LoopCount,
+                                                    double Frequency, std::string FunctionName,
+                                                    std::string InitName) {
+    dbg(__func__, "SPath: ", SPath, " Runs: ", Runs, " NumInst: ", NumInst,
+        " LoopCount: ", LoopCount, " Frequency: ", Frequency, " FunctionName: ", FunctionName,
+        " InitName: ", InitName);
+    std::string clangPath = CLANG_PATH;
+    std::string oPath = scratchPath(getpid(), ".so");
+    std::string extraOptions = "";
+    if (getEnv().Arch == llvm::Triple::riscv64) extraOptions += "-march=rv64gcv";
+    std::string command = clangPath + " " + extraOptions.data() +
+                          " -x assembler-with-cpp -shared " + SPath + " -o " + oPath +
+                          " 2> assembler_out.log";
+    if (system(command.data()) != 0) return {E_ASSEMBLY, {}};
+
+    // from ibench
+    void *handle;
+    double (*function)(int);
+    double (*init)() = nullptr;
+    if ((handle = dlopen(oPath.data(), RTLD_LAZY)) == NULL) {
+        std::cerr << "dlopen: failed to open .so file" << std::endl;
+        return {E_ASSEMBLY, {}};
+    }
+    if (!InitName.empty()) {
+        if ((init = (double (*)())dlsym(handle, InitName.data())) == NULL) {
+            std::cerr << "dlsym: couldn't find function " << InitName << std::endl;
+            return {E_GENERIC, {}};
+        }
+    }
+    if ((function = (double (*)(int))dlsym(handle, FunctionName.data())) == NULL) {
+        std::cerr << "dlsym: couldn't find function " << FunctionName << std::endl;
+        return {E_GENERIC, {}};
+    }
+    if (prepareTimer() != SUCCESS) return {E_TIMER, {}};
+    uint64_t start, end;
+    std::vector<double> benchtimes;
+    for (unsigned i = 0; i < Runs; i++) {
+        if (init) (*init)();
+        start = readTimer();
+        // actual call to benchmarked function
+        (*function)(LoopCount);
+        end = readTimer();
+        benchtimes.insert(benchtimes.end(), end - start);
+    }
+
+    dlclose(handle);
+    return {SUCCESS, benchtimes};
+}
+
+std::pair<ErrorCode, double> calculateCycles(double Runtime, double UnrolledRuntime,
+                                             unsigned NumInst, unsigned LoopCount, double Frequency,
+                                             bool Throughput) {
+    dbg(__func__, "Runtime: ", Runtime, " UnrolledRuntime: ", UnrolledRuntime,
+        " NumInst: ", NumInst, " LoopCount: ", LoopCount);
+    // correct the result using one measurement with NumInst and one with 2*NumInst. This
+    // removes overhead of e.g. the loop instructions themselves see README for explanation TODO
+    double instRuntime = UnrolledRuntime - Runtime;
+    // runtime[ticks -> cycles] / number of instructions executed
+    double cyclesPerInstruction = ticksToCycles(instRuntime, Frequency) / (NumInst * LoopCount);
+    if (instRuntime * 2 > UnrolledRuntime * 1.1) {
+        // Execution time increases overproportional when unrolling, which should not happen.
+        // This is unlikely to be a good measurement, report an error and let the user measure it
+        // manually.
+        return {E_UNROLL_ANOMALY, -1};
+    }
+    // Something strange is happening when measuring latencies. For some chains, e.g. Zen4
+    // adc	al, 7
+    // adc	cl, 7
+    // ...
+    // (chain on flags) the latency is smaller than expected (1.93 instead of 2) but increases with
+    // unrolling. The loop overhead correction then corrects upwards which is not what was intended
+    // but actually gives good results for now.
+    // On the other hand for some instructions unrolling slightly decreases throughput e.g. ADC16ri8
+    // with helper TEST64rr In those cases the unrolled time should not be used for correction.
+    // This is why the following check is only enabled for throughput
+    if (Throughput && instRuntime * 2 > UnrolledRuntime) {
+        cyclesPerInstruction = ticksToCycles(Runtime, Frequency) / (NumInst * LoopCount);
+    }
+    return {SUCCESS, cyclesPerInstruction};
+}
+
+std::pair<ErrorCode, MCRegister> getTPHelperRegister(unsigned Opcode) {
+    // generate two instructions and check for dependencys
+    std::set<MCRegister> usedRegs;
+    auto [ec1, inst1] = genInst(Opcode, {}, usedRegs);
+    auto [ec2, inst2] = genInst(Opcode, {}, usedRegs);
+    std::list<DependencyType> dependencies = getDependencies(inst1, inst2);
+    if (dependencies.empty()) return {SUCCESS, MCRegister()}; // no helper needed
+    if (dependencies.size() > 1) {
+        dbg(__func__, "multiple dependencies");
+        // this instruction has multiple dependencies on itself, this
+        // is currently not supported
+        return {E_NO_HELPER, MCRegister()};
+    }
+    return {SUCCESS, dependencies.front().useOp.getRegister()};
+}
+
+std::tuple<ErrorCode, unsigned, std::map<unsigned, MCRegister>>
+getTPHelperInstruction(unsigned Opcode) {
+    dbg(__func__, "Opcode: ", Opcode, " priorityTPHelper.size(): ", priorityTPHelper.size());
+    // first check if this instruction needs a helper
+    auto [ec, useReg] = getTPHelperRegister(Opcode);
+    if (ec != SUCCESS) return {ec, MAX_UNSIGNED, {}};
+    if (!useReg.isValid()) return {SUCCESS, MAX_UNSIGNED, {}}; // no helper needed
+    // this instruction will always have one dependency on itself. We have to break this by
+    // interleaving another instruction. The other instruction has to:
+    // 1. be measured already
+    // 2. define the used register of the dependency
+    // 3. not be dependent on the current instruction
+
+    unsigned helperOpcode = MAX_UNSIGNED;
+    std::map<unsigned, MCRegister> helperConstraints;
+    // first we try opcodes in the priorityTPHelper list. Those are allowed to be used as helper
+    // even if they write not to the register itself but a superregister
+    // on Zen4 there is a partial write penalty when writing to just a part of a GPR
+    // priorityTPHelper can be used to prevent this from happening
+    for (unsigned possibleHelper : priorityTPHelper) {
+        TPMeasurement tpRes = throughputDatabase[possibleHelper];
+        if (tpRes.ec != SUCCESS) continue;                          // no value
+        if (!greaterEqWithTolerance(tpRes.lowerTP, 0.25)) continue; // we dont trust values this low
+        for (MCRegister possibleWriteReg : getEnv().getPossibleDefs(possibleHelper)) {
+            if (getEnv().TRI->isSuperRegisterEq(useReg, possibleWriteReg)) {
+                useReg = possibleWriteReg;
+                auto [EC, opIndex] = whichOperandCanUse(possibleHelper, "def", useReg);
+                // we checked the instruction is able to define the register
+                if (EC != SUCCESS) return {E_UNREACHABLE, MAX_UNSIGNED, {}};
+                if (opIndex != -1)
+                    helperConstraints.insert({(unsigned)opIndex, useReg});
+                else {
+                    // whichOperandCanUse returned -1 so the required register is defined
+                    // implicitly and we don't need to constrain the helper instruction
+                }
+                // check 3. generate a pair of instructions to check for unwanted dependencies
+                // this will catch implicit dependencies e.g. instruction writes to EFLAGS and
+                // helper reads EFLAGS
+                // explicit dependencies e.g. ADD16ri can define ax but if it does it also uses
+                // ax so it can't be used as helper
+                std::set<MCRegister> tmpUsedRegs;
+                auto [ec1, inst] = genInst(Opcode, {}, tmpUsedRegs);
+                auto [ec2, helperInst] = genInst(possibleHelper, helperConstraints, tmpUsedRegs);
+                if (ec1 != SUCCESS || ec2 != SUCCESS) continue;
+                if (!getDependencies(inst, helperInst).empty()) continue;
+                helperOpcode = possibleHelper;
+                break;
+            }
+        }
+    }
+    if (helperOpcode != MAX_UNSIGNED) return {SUCCESS, helperOpcode, helperConstraints};
+    dbg(__func__, "no prio helper");
+    // the no priorityHelper can be used, try the other instructions which can define the register
+    // starting with the one with the lowest throughput
+    auto candidates = tpHelperIndex.find(useReg.id());
+    if (candidates == tpHelperIndex.end()) return {E_NO_HELPER, MAX_UNSIGNED, {}};
+    for (auto [lowerTP, possibleHelper] : candidates->second) {
+        auto res = throughputDatabase.find(possibleHelper);
+        if (res == throughputDatabase.end() || res->second.ec != SUCCESS ||
+            res->second.lowerTP != lowerTP)
+            continue; // measured again since it was indexed
+        auto [EC, opIndex] = whichOperandCanUse(possibleHelper, "def", useReg);
+        if (EC != SUCCESS) return {E_UNREACHABLE, MAX_UNSIGNED, {}};
+        helperConstraints.clear();
+        if (opIndex != -1) helperConstraints.insert({(unsigned)opIndex, useReg});
+        std::set<MCRegister> tmpUsedRegs;
+        auto [ec1, inst] = genInst(Opcode, {}, tmpUsedRegs);
+        auto [ec2, helperInst] = genInst(possibleHelper, helperConstraints, tmpUsedRegs);
+        if (ec1 != SUCCESS || ec2 != SUCCESS) continue;
+        if (!getDependencies(inst, helperInst).empty()) continue;
+        helperOpcode = possibleHelper;
+        break;
+    }
+    if (helperOpcode == MAX_UNSIGNED) return {E_NO_HELPER, MAX_UNSIGNED, {}};
+    return {SUCCESS, helperOpcode, helperConstraints};
+}
+
+namespace {
+// stores the performance counters per instruction in Stats. Like for the cycles, the counts of the
+// benchmark with NumInst instructions are subtracted from the one with 2 * NumInst instructions to
+// remove the loop overhead
+void setCounters(std::unordered_map<std::string, std::list<double>> &BenchResults,
+                 const std::string &Function, const std::string &UnrolledFunction, unsigned NumInst,
+                 unsigned N, SampleStats &Stats) {
+    const std::vector<std::string> &counters = getEnabledCounters();
+    Stats.numCounters = 0;
+    if (NumInst == 0 || N == 0) return;
+    for (size_t i = 0; i < counters.size(); i++) {
+        std::list<double> &counts = BenchResults[counterKey(counters[i], Function)];
+        std::list<double> &unrolledCounts = BenchResults[counterKey(counters[i], UnrolledFunction)];
+        if (counts.empty() || unrolledCounts.empty()) return;
+        double difference = *std::min_element(unrolledCounts.begin(), unrolledCounts.end()) -
+                            *std::min_element(counts.begin(), counts.end());
+        Stats.counters[i] = std::max(difference, 0.0) / ((double)NumInst * N);
+    }
+    Stats.numCounters = counters.size();
+}
+
+// generates the throughput benchmark of an opcode. Returns the number of instructions in the loop
+// and the helper used, MAX_UNSIGNED if no helper is needed
+std::tuple<ErrorCode, AssemblyFile, unsigned, unsigned> genThroughputBenchmark(unsigned Opcode) {
+    // make the generator generate up to 12 instructions, this ensures reasonable runtimes on slow
+    // instructions like random value generation or CPUID
+    unsigned numInst = 12;
+    AssemblyFile assembly;
+    ErrorCode ec;
+    std::set<MCRegister> usedRegs;
+
+    auto [ec1, helperOpcode, helperConstraints] = getTPHelperInstruction(Opcode);
+    if (ec1 != SUCCESS) return {ec1, assembly, 0, MAX_UNSIGNED};
+
+    // numInst gets updated to the actual number of instructions generated by genTPBenchmark
+    // if no helper is needed helperOpcode is -1 and genTPBenchmark will ignore it
+    std::tie(ec, assembly) =
+        genTPBenchmark(Opcode, &numInst, 1, usedRegs, helperConstraints, helperOpcode);
+    if (ec != SUCCESS) return {ec, assembly, 0, MAX_UNSIGNED};
+    assembly.setName(getEnv().MCII->getName(Opcode).str());
+    return {SUCCESS, assembly, numInst, helperOpcode};
+}
+
+// computes the throughput from the times of a benchmark generated by genThroughputBenchmark()
+std::tuple<ErrorCode, double, double>
+evaluateThroughput(unsigned Opcode, std::unordered_map<std::string, std::list<double>> BenchResults,
+                   unsigned NumInst, unsigned HelperOpcode, unsigned N, double Frequency) {
+    // take minimum of runs (naming convention of funcitons in genTPBenchmark)
+    double time1 = *std::min_element(BenchResults["tp"].begin(), BenchResults["tp"].end());
+    double time2 = *std::min_element(BenchResults["tp2"].begin(), BenchResults["tp2"].end());
+
+    auto [EC, correctedTP] = calculateCycles(time1, time2, NumInst, N, Frequency, true);
+    if (EC != SUCCESS) {
+        std::string msg =
+            str("Anomaly detected when unrolling: time: ", time1, " timeUnrolled: ", time2);
+        dbg(__func__, msg);
+        throughputOutputMessage[Opcode] += str("\t", msg, "\n");
+        return {EC, -1, -1};
+    }
+    if (HelperOpcode != MAX_UNSIGNED) {
+        // we did use a helper, this can change the TP
+        throughputOutputMessage[Opcode] +=
+            str("\tHelper: ", throughputDatabase[HelperOpcode], "\n");
+        throughputOutputMessage[Opcode] += str("\tCombined result: ", correctedTP, "\n");
+
+        // with known port usage the helper only slows the instruction down if they share ports
+        auto ports = portDatabase.find(Opcode);
+        auto helperPorts = portDatabase.find(HelperOpcode);
+        if (ports != portDatabase.end() && helperPorts != portDatabase.end() &&
+            !sharePorts(ports->second, helperPorts->second)) {
+            throughputOutputMessage[Opcode] += str(
+                "\tInstruction and helper use different ports: ", portUsageToString(ports->second),
+                " and ", portUsageToString(helperPorts->second), "\n");
+            return {SUCCESS, correctedTP, correctedTP};
+        }
+        double tpSamePorts = correctedTP - throughputDatabase[HelperOpcode].lowerTP;
+        if (tpSamePorts < 1 / 4) {
+            throughputOutputMessage[Opcode] +=
+                str("\tAssuming instruction and helper use different ports, otherwise TP would be ",
+                    tpSamePorts, "\n");
+            return {SUCCESS, correctedTP, correctedTP};
+        }
+        throughputOutputMessage[Opcode] +=
+            str("\tNo hints if instruction and helper use same ports, TP can be in range ",
+                tpSamePorts, " - ", correctedTP, "\n");
+        return {SUCCESS, tpSamePorts, correctedTP};
+    }
+    return {SUCCESS, correctedTP, correctedTP};
+}
+
+// generates the benchmark of an instruction interleaved with its helper if it needs one and Count
+// reference instructions. Returns the number of sequences in the loop, E_REFERENCE_DEPENDENCY if
+// the generated references depend on the instruction or its helper
+std::tuple<ErrorCode, AssemblyFile, unsigned>
+genInterferenceBenchmark(unsigned Opcode, unsigned Reference, unsigned Count) {
+    auto [ec, helperOpcode, helperConstraints] = getTPHelperInstruction(Opcode);
+    if (ec != SUCCESS) return {ec, AssemblyFile(), 0};
+    std::vector<unsigned> opcodes = {Opcode};
+    std::vector<std::map<unsigned, MCRegister>> constraints = {{}};
+    if (helperOpcode != MAX_UNSIGNED) {
+        opcodes.emplace_back(helperOpcode);
+        constraints.emplace_back(helperConstraints);
+    }
+    size_t numOwn = opcodes.size();
+    opcodes.insert(opcodes.end(), Count, Reference);
+    constraints.insert(constraints.end(), Count, std::map<unsigned, MCRegister>());
+    // numSequences gets updated to the actual number of sequences generated
+    unsigned numSequences = 12;
+    std::list<MCInst> instructions;
+    auto [ec1, assembly] =
+        genTPSequenceBenchmark(opcodes, constraints, &numSequences, 1, {}, &instructions);
+    if (ec1 != SUCCESS) return {ec1, assembly, 0};
+    // the reference instructions have to be independent of the others, otherwise they don't only
+    // compete for ports. E.g. a reference writing the flags can't be used for instructions
+    // reading them. The loop repeats, so every pair of the generated instructions is checked
+    std::vector<MCInst> own;
+    std::vector<MCInst> references;
+    size_t index = 0;
+    for (const MCInst &inst : instructions)
+        (index++ % opcodes.size() < numOwn ? own : references).emplace_back(inst);
+    for (const MCInst &inst : own)
+        for (const MCInst &referenceInst : references)
+            if (!getDependencies(inst, referenceInst).empty() ||
+                !getDependencies(referenceInst, inst).empty())
+                return {E_REFERENCE_DEPENDENCY, AssemblyFile(), 0};
+    assembly.setName(
+        str(getEnv().MCII->getName(Opcode).str(), "_", getEnv().MCII->getName(Reference).str()));
+    return {SUCCESS, assembly, numSequences};
+}
+
+// generates the benchmark of a latency chain. Returns the number of instructions in the loop, the
+// error code may be W_MULTIPLE_DEPENDENCIES
+std::tuple<ErrorCode, AssemblyFile, unsigned>
+genLatencyBenchmark(const std::list<LatMeasurement> &Measurements) {
+    // make the generator generate up to 12 instructions, this ensures reasonable runtimes on slow
+    // instructions like random value generation or CPUID
+    unsigned numInst = 12;
+    ErrorCode ec;
+    AssemblyFile assembly;
+
+    // numInst gets updated to the actual number of instructions generated by genTPBenchmark
+    std::tie(ec, assembly) = genLatBenchmark(Measurements, &numInst);
+    if (ec != SUCCESS && ec != W_MULTIPLE_DEPENDENCIES) return {ec, assembly, 0};
+    assembly.setName(Measurements.front().toCompactString());
+    return {ec, assembly, numInst};
+}
+
+// computes the latency from the times of a benchmark generated by genLatencyBenchmark()
+std::pair<ErrorCode, double>
+evaluateLatency(const std::list<LatMeasurement> &Measurements,
+                std::unordered_map<std::string, std::list<double>> BenchResults, unsigned NumInst,
+                unsigned N, double Frequency, ErrorCode Warning) {
+    // take minimum of runs. "lat" and "lat2" is naming convention defined in
+    // runBenchmark()
+    double time1 = *std::min_element(BenchResults["lat"].begin(), BenchResults["lat"].end());
+    double time2 = *std::min_element(BenchResults["lat2"].begin(), BenchResults["lat2"].end());
+    ErrorCode ec;
+    double cycles;
+    std::tie(ec, cycles) = calculateCycles(time1, time2, NumInst, N, Frequency, false);
+    if (ec != SUCCESS) {
+        std::string chainString = "";
+        for (auto m : Measurements) {
+            chainString += getEnv().MCII->getName(m.opcode).data();
+            chainString += " -> ";
+        }
+        for (auto time : BenchResults["lat2"]) {
+            chainString += std::to_string(time) + " ";
+        }
+        dbg(__func__, "anomaly detected during measurement: ", chainString.data());
+        return {E_GENERIC, -1};
+    }
+    if (Warning == W_MULTIPLE_DEPENDENCIES) return {Warning, cycles};
+    return {SUCCESS, cycles};
+}
+} // namespace
+
+std::tuple<ErrorCode, double, double> measureThroughput(unsigned Opcode, double Frequency,
+                                                        SampleStats *Stats) {
+    dbg(__func__, "Opcode: ", Opcode, " Frequency: ", Frequency);
+    // loop count, with gettimeofday 1e5 seems to be unreliable for TP
+    unsigned n = scaleLoopCount(1e6);
+    std::unordered_map<std::string, std::list<double>> benchResults;
+
+    auto [ec, assembly, numInst, helperOpcode] = genThroughputBenchmark(Opcode);
+    if (ec != SUCCESS) return {ec, -1, -1};
+    SampleStats stats;
+    std::tie(ec, benchResults) = runBenchmark(assembly, n, 3, &stats);
+    if (ec != SUCCESS) return {ec, -1, -1};
+    setCounters(benchResults, "tp", "tp2", numInst, stats.loopCount, stats);
+    if (Stats) *Stats = stats;
+    // the loop count may have been changed in adaptive mode
+    return evaluateThroughput(Opcode, benchResults, numInst, helperOpcode, stats.loopCount,
+                              Frequency);
+}
+
+void measureThroughputBatch(const std::vector<unsigned> &Opcodes, double Frequency,
+                            const TPBatchConsumer &Consume) {
+    dbg(__func__, "Opcodes.size(): ", Opcodes.size(), " Frequency: ", Frequency);
+    unsigned n = scaleLoopCount(1e6);
+    std::vector<AssemblyFile> assemblies;
+    std::vector<std::tuple<size_t, unsigned, unsigned>> benchmarks; // index, numInst, helper
+    for (size_t i = 0; i < Opcodes.size(); i++) {
+        auto [ec, assembly, numInst, helperOpcode] = genThroughputBenchmark(Opcodes[i]);
+        if (ec != SUCCESS) {
+            Consume(i, ec, -1, -1, {});
+            continue;
+        }
+        assemblies.emplace_back(assembly);
+        benchmarks.emplace_back(i, numInst, helperOpcode);
+    }
+    runBenchmarkBatch(assemblies, n, 3,
+                      [&](size_t Index, ErrorCode EC,
+                          std::unordered_map<std::string, std::list<double>> BenchResults,
+                          const SampleStats &Stats) {
+                          auto [i, numInst, helperOpcode] = benchmarks[Index];
+                          if (EC != SUCCESS) {
+                              Consume(i, EC, -1, -1, Stats);
+                              return;
+                          }
+                          SampleStats stats = Stats;
+                          setCounters(BenchResults, "tp", "tp2", numInst, stats.loopCount, stats);
+                          auto [ec, lowerTP, upperTP] =
+                              evaluateThroughput(Opcodes[i], BenchResults, numInst, helperOpcode,
+                                                 stats.loopCount, Frequency);
+                          Consume(i, ec, lowerTP, upperTP, stats);
+                      });
+}
+
+std::pair<ErrorCode, double> measureInterference(unsigned Opcode, unsigned Reference,
+                                                 unsigned Count, double Frequency,
+                                                 SampleStats *Stats) {
+    dbg(__func__, "Opcode: ", Opcode, " Reference: ", Reference, " Count: ", Count,
+        " Frequency: ", Frequency);
+    // same loop count as for the throughput
+    unsigned n = scaleLoopCount(1e6);
+    std::unordered_map<std::string, std::list<double>> benchResults;
+
+    auto [ec, assembly, numSequences] = genInterferenceBenchmark(Opcode, Reference, Count);
+    if (ec != SUCCESS) return {ec, -1};
+    SampleStats stats;
+    std::tie(ec, benchResults) = runBenchmark(assembly, n, 3, &stats);
+    if (ec != SUCCESS) return {ec, -1};
+    if (Stats) *Stats = stats;
+    // function names of genTPSequenceBenchmark
+    double time1 = *std::min_element(benchResults["tp"].begin(), benchResults["tp"].end());
+    double time2 = *std::min_element(benchResults["tp2"].begin(), benchResults["tp2"].end());
+    return calculateCycles(time1, time2, numSequences, stats.loopCount, Frequency, true);
+}
+
+std::pair<ErrorCode, double> measureLatency(const std::list<LatMeasurement> &Measurements,
+                                            unsigned LoopCount, double Frequency,
+                                            SampleStats *Stats) {
+    dbg(__func__, "Measurements.size(): ", Measurements.size(), " LoopCount: ", LoopCount,
+        " Frequency: ", Frequency);
+    std::unordered_map<std::string, std::list<double>> benchResults;
+
+    auto [ec, assembly, numInst] = genLatencyBenchmark(Measurements);
+    if (ec != SUCCESS && ec != W_MULTIPLE_DEPENDENCIES) return {ec, -1};
+    ErrorCode warning = ec;
+    SampleStats stats;
+    std::tie(ec, benchResults) = runBenchmark(assembly, LoopCount, 3, &stats);
+    if (ec != SUCCESS) return {ec, -1};
+    // the counts of a chain of several instructions can't be attributed to one of them
+    if (Measurements.size() == 1)
+        setCounters(benchResults, "lat", "lat2", numInst, stats.loopCount, stats);
+    if (Stats) *Stats = stats;
+    // the loop count may have been changed in adaptive mode
+    return evaluateLatency(Measurements, benchResults, numInst, stats.loopCount, Frequency,
+                           warning);
+}
+
+void measureLatencyBatch(const std::vector<LatMeasurement> &Measurements, unsigned LoopCount,
+                         double Frequency, const LatBatchConsumer &Consume) {
+    dbg(__func__, "Measurements.size(): ", Measurements.size(), " LoopCount: ", LoopCount,
+        " Frequency: ", Frequency);
+    std::vector<AssemblyFile> assemblies;
+    std::vector<std::tuple<size_t, unsigned, ErrorCode>> benchmarks; // index, numInst, warning
+    for (size_t i = 0; i < Measurements.size(); i++) {
+        auto [ec, assembly, numInst] = genLatencyBenchmark({Measurements[i]});
+        if (ec != SUCCESS && ec != W_MULTIPLE_DEPENDENCIES) {
+            Consume(i, ec, -1, {});
+            continue;
+        }
+        assemblies.emplace_back(assembly);
+        benchmarks.emplace_back(i, numInst, ec);
+    }
+    runBenchmarkBatch(assemblies, LoopCount, 3,
+                      [&](size_t Index, ErrorCode EC,
+                          std::unordered_map<std::string, std::list<double>> BenchResults,
+                          const SampleStats &Stats) {
+                          auto [i, numInst, warning] = benchmarks[Index];
+                          if (EC != SUCCESS) {
+                              Consume(i, EC, -1, Stats);
+                              return;
+                          }
+                          SampleStats stats = Stats;
+                          setCounters(BenchResults, "lat", "lat2", numInst, stats.loopCount, stats);
+                          auto [ec, lat] = evaluateLatency({Measurements[i]}, BenchResults, numInst,
+                                                           stats.loopCount, Frequency, warning);
+                          Consume(i, ec, lat, stats);
+                      });
+}
+
+std::tuple<ErrorCode, double, double> measureInSubprocess(unsigned Opcode, double Frequency,
+                                                          SampleStats *Stats) {
+    JobResult result =
+        runJob([&](unsigned Index) { return workerPool.submitTP(Index, Opcode, Frequency); });
+    throughputOutputMessage[Opcode] += result.message;
+    if (Stats) *Stats = result.stats;
+    return {result.ec, result.lowerBound, result.upperBound};
+}
+
+std::pair<ErrorCode, double> measureInSubprocess(const std::list<LatMeasurement> &Measurements,
+                                                 unsigned LoopCount, double Frequency,
+                                                 SampleStats *Stats) {
+    JobResult result = runJob([&](unsigned Index) {
+        return workerPool.submitLat(Index, Measurements, LoopCount, Frequency);
+    });
+    if (Stats) *Stats = result.stats;
+    return {result.ec, result.lowerBound};
+}
+
+std::pair<ErrorCode, double> measureInSubprocess(unsigned Opcode, unsigned Reference,
+                                                 unsigned Count, double Frequency) {
+    JobResult result = runJob([&](unsigned Index) {
+        return workerPool.submitPorts(Index, Opcode, Reference, Count, Frequency);
+    });
+    return {result.ec, result.lowerBound};
+}
+
+std::pair<ErrorCode, std::vector<double>>
+measureInSubprocess(std::string SPath, unsigned Runs, unsigned NumInst, unsigned LoopCount,
+                    double Frequency, std::string FunctionName, std::string InitName) {
+    // allocate memory to communicate result
+    double *sharedResults = static_cast<double *>(mmap(
+        NULL, Runs * sizeof(double), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
+    ErrorCode *sharedEC = static_cast<ErrorCode *>(
+        mmap(NULL, sizeof(ErrorCode), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0));
+
+    if (sharedResults == MAP_FAILED || sharedEC == MAP_FAILED) {
+        perror("mmap");
+        return {E_MMAP, {}};
+    }
+
+    pid_t pid = fork();
+    if (pid == -1) return {E_FORK, {}};
+
+    if (pid == 0) { // Child process
+        ErrorCode EC;
+        std::vector<double> res;
+        std::tie(EC, res) =
+            runManual(SPath, Runs, NumInst, LoopCount, Frequency, FunctionName, InitName);
+        *sharedEC = EC;
+        for (unsigned i = 0; i < res.size() && i < Runs; i++)
+            sharedResults[i] = res[i];
+
+        exit(EXIT_SUCCESS);
+    } else { // Parent process
+        int status;
+        waitpid(pid, &status, 0);
+        removeScratchFiles(pid);
+
+        if (WIFSIGNALED(status)) {
+            munmap(sharedResults, Runs * sizeof(double));
+            munmap(sharedEC, sizeof(ErrorCode));
+            if (WTERMSIG(status) == SIGSEGV) return {E_SIGSEGV, {}};
+            if (WTERMSIG(status) == SIGILL) return {E_ILLEGAL_INSTRUCTION, {}};
+            return {E_SIGNAL, {}};
+        }
+        if (WIFEXITED(status) && WEXITSTATUS(status) != EXIT_SUCCESS) return {E_UNREACHABLE, {}};
+
+        ErrorCode EC = *sharedEC;
+        std::vector<double> res;
+        for (unsigned i = 0; i < Runs; i++)
+            res.push_back(sharedResults[i]);
+
+        munmap(sharedResults, Runs * sizeof(double));
+        munmap(sharedEC, sizeof(ErrorCode));
+        return {EC, res};
+    }
+}
+
+bool isVariant(unsigned A, unsigned B) {
+    std::string nameA = getEnv().MCII->getName(A).data();
+    std::string nameB = getEnv().MCII->getName(B).data();
+    if (nameA == nameB) return true;
+    // llvm names for the same instruction normally match until the first occurrence of a number
+    // e.g. ADD8ri_EVEX ADD8ri_ND ADD8ri_NF ADD8ri_NF_ND
+    auto getPrefixWithFirstNumber = [](const std::string &Name) -> std::string {
+        size_t i = 0;
+        // Find the start of the first number
+        while (i < Name.size() && !isdigit(Name[i]))
+            ++i;
+
+        // include the whole number
+        size_t j = i;
+        while (j < Name.size() && isdigit(Name[j]))
+            ++j;
+
+        return Name.substr(0, j);
+    };
+
+    std::string namePrefixA = getPrefixWithFirstNumber(nameA);
+    std::string namePrefixB = getPrefixWithFirstNumber(nameB);
+    return namePrefixA == namePrefixB;
+}
+
+// run small test to check if execution results in ILLEGAL_INSTRUCTION or fails in any other way
+ErrorCode canMeasure(LatMeasurement Measurement, double Frequency) {
+    auto [EC, lat] = measureInSubprocess({Measurement}, 2, Frequency);
+    if (!isError(EC)) return SUCCESS;
+    return EC;
+}
+
+void buildTPDatabase(std::vector<unsigned> Opcodes, double Frequency) {
+    dbg(__func__, "Opcodes.size(): ", Opcodes.size(), " Frequency: ", Frequency);
+    // mark instructions to be measured, results restored from the journal are kept
+    std::set<unsigned> resumed = resumeTP();
+    for (unsigned opcode : Opcodes)
+        if (resumed.find(opcode) == resumed.end()) throughputDatabase[opcode].ec = NO_ERROR_CODE;
+
+    // one worker per core, each runs one measurement at a time. With a single worker every
+    // measurement is collected before the next one starts, same as measureInSubprocess
+    if (workerPool.start(getWorkerCores()) != SUCCESS) return;
+    std::map<unsigned, std::vector<unsigned>> running; // worker -> opcodes
+    // opcodes of batches which killed their worker, they are measured one at a time
+    std::set<unsigned> isolated;
+
+    // opcodes are measured from a worklist. An opcode without helper waits for an instruction which
+    // can define the register it needs a helper for and is queued again once one gets measured
+    std::vector<unsigned> order;
+    std::set<unsigned> queued;
+    for (unsigned opcode : Opcodes)
+        if (resumed.find(opcode) == resumed.end() && queued.insert(opcode).second)
+            order.emplace_back(opcode);
+    std::stable_sort(order.begin(), order.end(), [](unsigned A, unsigned B) {
+        return tpSchedulingRank(A) < tpSchedulingRank(B);
+    });
+    std::deque<unsigned> worklist(order.begin(), order.end());
+    std::map<unsigned, std::vector<unsigned>> waiting; // register -> opcodes
+    std::vector<unsigned> newHelpers;                  // helpers measured in this run, in order
+    std::map<unsigned, size_t> submittedAt; // opcode -> newHelpers.size() when it was submitted
+    size_t finished = Opcodes.size() - order.size();
+
+    // check if getTPHelperInstruction() can use Helper for Reg. Only priority helpers may define a
+    // super-register, the others are looked up by the exact register
+    auto canDefine = [](unsigned Helper, MCRegister Reg) {
+        bool isPriority = std::find(priorityTPHelper.begin(), priorityTPHelper.end(), Helper) !=
+                          priorityTPHelper.end();
+        for (MCRegister def : getEnv().getPossibleDefs(Helper))
+            if (def == Reg || (isPriority && getEnv().TRI->isSuperRegisterEq(Reg, def)))
+                return true;
+        return false;
+    };
+    // store a result and pass it on to the workers which may need it as helper
+    auto setResult = [&](TPMeasurement Measurement) {
+        setTPResult(Measurement);
+        throughputOutputMessage[Measurement.opcode] += str("\t", Measurement, "\n");
+        if (Measurement.stats.numCounters > 0 && !isError(Measurement.ec))
+            throughputOutputMessage[Measurement.opcode] +=
+                str("\tCounters per instruction: ", countersToString(Measurement.stats), "\n");
+        workerPool.publish(Measurement);
+        journalTP(Measurement);
+        displayProgress(finished++, Opcodes.size());
+        if (Measurement.ec != SUCCESS) return;
+        bool isPriority = std::find(priorityTPHelper.begin(), priorityTPHelper.end(),
+                                    Measurement.opcode) != priorityTPHelper.end();
+        if (greaterEqWithTolerance(Measurement.lowerTP, 0.25) && !isPriority) return;
+        // this can be used as helper, queue the opcodes waiting for it again
+        newHelpers.emplace_back(Measurement.opcode);
+        for (auto it = waiting.begin(); it != waiting.end();) {
+            if (!canDefine(Measurement.opcode, it->first)) {
+                ++it;
+                continue;
+            }
+            for (unsigned opcode : it->second) {
+                worklist.emplace_back(opcode);
+                finished--;
+            }
+            it = waiting.erase(it);
+        }
+    };
+    // an opcode without helper waits for a helper of the register it needs. If a suitable helper
+    // was measured while it was running it is queued again right away
+    auto waitForHelper = [&](unsigned Opcode) {
+        auto [ec, reg] = getTPHelperRegister(Opcode);
+        if (ec != SUCCESS || !reg.isValid()) return; // will never find a helper
+        for (size_t i = submittedAt[Opcode]; i < newHelpers.size(); i++) {
+            if (canDefine(newHelpers[i], reg)) {
+                worklist.emplace_back(Opcode);
+                finished--;
+                return;
+            }
+        }
+        waiting[reg.id()].emplace_back(Opcode);
+    };
+    // wait for any running job and store its results
+    auto collectOne = [&]() {
+        unsigned worker;
+        std::vector<JobResult> results = workerPool.collectAll(worker);
+        std::vector<unsigned> opcodes = running[worker];
+        running.erase(worker);
+        if (results.empty()) {
+            for (auto it = opcodes.rbegin(); it != opcodes.rend(); ++it) {
+                isolated.insert(*it);
+                worklist.emplace_front(*it);
+            }
+            return;
+        }
+        for (size_t i = 0; i < opcodes.size(); i++) {
+            unsigned opcode = opcodes[i];
+            JobResult &result = results[i];
+            throughputOutputMessage[opcode] += result.message;
+            setResult({opcode, result.ec, result.lowerBound, result.upperBound, result.stats});
+            if (result.ec == E_NO_HELPER) waitForHelper(opcode);
+        }
+    };
+
+    // the helper of an opcode depends on the helpers measured before it was submitted, with several
+    // workers on their timing. Once everything is measured, opcodes whose helper is not the one
+    // chosen from all results are measured again until the helpers don't change anymore, so the
+    // database doesn't depend on the number of workers
+    std::map<unsigned, unsigned> usedHelper; // opcode -> helper when submitted or MAX_UNSIGNED
+    unsigned rounds = 0;
+    auto requeueChangedHelpers = [&]() {
+        if (rounds++ == 3) return false;
+        for (auto [opcode, helper] : usedHelper) {
+            if (throughputDatabase[opcode].ec != SUCCESS) continue;
+            auto [ec, bestHelper, constraints] = getTPHelperInstruction(opcode);
+            if (ec != SUCCESS || bestHelper == helper) continue;
+            throughputOutputMessage[opcode].clear();
+            worklist.emplace_back(opcode);
+            finished--;
+        }
+        if (worklist.empty()) return false;
+        out(*ios, "Measuring ", worklist.size(),
+            " instructions again with the helpers chosen from all results");
+        return true;
+    };
+
+    while (!worklist.empty() || !running.empty() || requeueChangedHelpers()) {
+        if (worklist.empty()) {
+            collectOne();
+            continue;
+        }
+        // up to batchSize opcodes are measured by one job, isolated opcodes are measured alone
+        std::vector<unsigned> job;
+        while (!worklist.empty() && job.size() < std::max(batchSize, 1u)) {
+            unsigned opcode = worklist.front();
+            if (!job.empty() && isolated.find(opcode) != isolated.end()) break;
+            worklist.pop_front();
+            // check if this opcode can be measured
+            const MCInstrDesc &desc = getEnv().MCII->get(opcode);
+            ErrorCode ec = isValid(desc);
+            if (ec != SUCCESS) {
+                dbg(__func__, "Opcode ", opcode, " is not valid: ", ecToString(ec));
+                setResult({opcode, ec, -1, -1});
+                continue;
+            }
+            job.emplace_back(opcode);
+            if (isolated.find(opcode) != isolated.end()) break;
+        }
+        if (job.empty()) continue;
+        if (workerPool.getIdleWorker() == -1) collectOne();
+        unsigned worker = workerPool.getIdleWorker();
+        // opcodes still running are not used as helpers by this one, if it needs them it fails
+        // with E_NO_HELPER and is queued again once they are measured
+        for (unsigned opcode : job) {
+            submittedAt[opcode] = newHelpers.size();
+            usedHelper[opcode] = std::get<1>(getTPHelperInstruction(opcode));
+        }
+        ErrorCode ec = job.size() == 1 ? workerPool.submitTP(worker, job.front(), Frequency)
+                                       : workerPool.submitTPBatch(worker, job, Frequency);
+        if (ec != SUCCESS) {
+            for (unsigned opcode : job)
+                setResult({opcode, E_FORK, -1, -1});
+            continue;
+        }
+        running[worker] = job;
+        if (workerPool.size() == 1) collectOne();
+    }
+    std::cerr << std::endl;
+    workerPool.stop();
+    for (auto entry : throughputOutputMessage) {
+        out(*ios, "-----", getEnv().MCII->getName(entry.first).data(), "-----");
+        out(*ios, entry.second);
+    }
+}
+
+void buildPortDatabase(std::vector<unsigned> Opcodes, double Frequency) {
+    dbg(__func__, "Opcodes.size(): ", Opcodes.size(), " Frequency: ", Frequency);
+    if (workerPool.start(getWorkerCores()) != SUCCESS) return;
+    // look up the throughput or measure it if it is unknown
+    auto getThroughput = [&](unsigned Opcode) {
+        auto tp = throughputDatabase.find(Opcode);
+        if (tp != throughputDatabase.end() && tp->second.ec == SUCCESS) return tp->second;
+        auto [EC, lowerTP, upperTP] = measureInSubprocess(Opcode, Frequency);
+        setTPResult({Opcode, EC, lowerTP, upperTP});
+        workerPool.publish(throughputDatabase[Opcode]);
+        return throughputDatabase[Opcode];
+    };
+
+    // the reference of a port group is an instruction with a single uop which can be executed on
+    // all ports of the group. It needs no helper and has to keep all of them busy
+    std::map<std::string, unsigned> references; // port group -> opcode
+    std::map<unsigned, PortUsage> known(portDatabase.begin(), portDatabase.end());
+    for (auto &[opcode, usage] : known) {
+        if (usage.size() != 1 || usage.begin()->second != 1) continue;
+        const std::string &group = usage.begin()->first;
+        if (references.find(group) != references.end()) continue;
+        std::string name = getEnv().MCII->getName(opcode).str();
+        auto [ec, reg] = getTPHelperRegister(opcode);
+        if (ec != SUCCESS || reg.isValid()) {
+            out(*ios, "Reference ", name, " needs a throughput helper, not using it");
+            continue;
+        }
+        TPMeasurement tp = getThroughput(opcode);
+        if (tp.ec != SUCCESS) {
+            out(*ios, "Reference ", tp, " can't be measured, not using it");
+            continue;
+        }
+        if (!smallerEqWithTolerance(tp.lowerTP, 1.0 / group.size())) {
+            out(*ios, "Reference ", tp, " doesn't use all ports of p", group, ", not using it");
+            continue;
+        }
+        references[group] = opcode;
+        out(*ios, "Reference for p", group, ": ", tp);
+    }
+    if (references.empty()) {
+        std::cerr << "no reference instructions, add them with --reference" << std::endl;
+        workerPool.stop();
+        return;
+    }
+
+    std::map<unsigned, std::string> messages;
+    size_t progress = 0;
+    for (unsigned opcode : Opcodes) {
+        displayProgress(progress++, Opcodes.size());
+        std::string &message = messages[opcode];
+        ErrorCode ec = isValid(getEnv().MCII->get(opcode));
+        if (ec != SUCCESS) {
+            message += str("\t", ecToString(ec), "\n");
+            continue;
+        }
+        if (std::any_of(references.begin(), references.end(),
+                        [&](const auto &Reference) { return Reference.second == opcode; })) {
+            message += str("\tReference: ", portUsageToString(portDatabase[opcode]), "\n");
+            continue;
+        }
+        TPMeasurement tp = getThroughput(opcode);
+        message += str("\tThroughput: ", tp, "\n");
+        if (tp.ec != SUCCESS) continue;
+        // the helper is interleaved as well, its uops have to be subtracted
+        auto [helperEC, helperOpcode, helperConstraints] = getTPHelperInstruction(opcode);
+        if (helperEC != SUCCESS) {
+            message += str("\t", ecToString(helperEC), "\n");
+            continue;
+        }
+        PortUsage helperUsage;
+        if (helperOpcode != MAX_UNSIGNED) {
+            std::string helperName = getEnv().MCII->getName(helperOpcode).str();
+            auto helperPorts = portDatabase.find(helperOpcode);
+            if (helperPorts == portDatabase.end()) {
+                message += str("\tPort usage of helper ", helperName, " is unknown\n");
+                continue;
+            }
+            helperUsage = helperPorts->second;
+            message += str("\tHelper: ", helperName, " ", portUsageToString(helperUsage), "\n");
+        }
+
+        std::map<std::string, double> uopsPerGroup;
+        for (auto &[group, reference] : references) {
+            std::string referenceName = getEnv().MCII->getName(reference).str();
+            double referenceTP = throughputDatabase[reference].lowerTP;
+            // the reference instructions have to keep their ports busy for longer than the
+            // instruction needs on its own. Fewer of them are used if the registers run out
+            unsigned count = std::clamp((unsigned)std::ceil(2 * tp.upperTP / referenceTP), 4u, 32u);
+            auto [EC, cycles] = measureInSubprocess(opcode, reference, count, Frequency);
+            while (EC == E_NO_REGISTERS && count > 1) {
+                count /= 2;
+                std::tie(EC, cycles) = measureInSubprocess(opcode, reference, count, Frequency);
+            }
+            if (EC == E_REFERENCE_DEPENDENCY) {
+                message += str("\t", referenceName, ": ", ecToString(EC),
+                               ", the reference depends on the instruction or its helper and "
+                               "can't be used for it\n");
+                continue;
+            }
+            if (EC != SUCCESS) {
+                message += str("\t", referenceName, ": ", ecToString(EC), "\n");
+                continue;
+            }
+            std::string result = str("\t", referenceName, " x", count, ": ", cycles, " cycles");
+            if (count * referenceTP < 1.5 * tp.upperTP) {
+                message +=
+                    str(result, ", too few reference instructions to keep p", group, " busy\n");
+                continue;
+            }
+            // every uop bound to the group delays the reference instructions by one of theirs
+            double uops = cycles / referenceTP - count;
+            for (auto &[helperGroup, helperUops] : helperUsage)
+                if (isPortSubset(helperGroup, group)) uops -= helperUops;
+            uopsPerGroup[group] = std::max(uops, 0.0);
+            message += str(result, ", ", uops, " uops on p", group, "\n");
+        }
+        PortUsage usage = solvePortUsage(uopsPerGroup);
+        if (usage.empty()) {
+            // uops on other ports than the references use can't be told apart from no uops
+            message += "\tNo uops on the ports of the references\n";
+            continue;
+        }
+        portDatabase[opcode] = usage;
+        message += str("\tPorts: ", portUsageToString(usage), "\n");
+    }
+    std::cerr << std::endl;
+    workerPool.stop();
+    for (auto &[opcode, message] : messages) {
+        out(*ios, "-----", getEnv().MCII->getName(opcode).data(), "-----");
+        out(*ios, message);
+    }
+}
+
+unsigned
+measureTypePair(DependencyType TypeA,
+                std::map<DependencyType, std::vector<LatMeasurement *>> &ClassifiedMeasurements,
+                std::set<unsigned> &OpcodeBlacklist, unsigned LoopCount, double Frequency) {
+    DependencyType dTypeB = TypeA.reversed();
+    auto &measurementsA = ClassifiedMeasurements[TypeA];
+    out(*ios, "-----", TypeA, " and ", dTypeB, "-----");
+    out(*ios, "\t", measurementsA.size(), " measurements of first Type");
+    // helpers with a known latency from a previous run replace the search for a helper pair
+    bool hasTypeB = ClassifiedMeasurements.find(dTypeB) != ClassifiedMeasurements.end();
+    auto seededA = helperInstructionsLat.find(TypeA);
+    auto seededB = helperInstructionsLat.find(dTypeB);
+    if (seededB != helperInstructionsLat.end() &&
+        (!hasTypeB || seededA != helperInstructionsLat.end())) {
+        out(*ios, "\tusing seeded helper ", seededB->second.toStringWithBounds());
+        for (auto &mA : measurementsA)
+            mA->ec = E_NO_HELPER;
+        measureWithSeededHelper(measurementsA, seededB->second, false, OpcodeBlacklist, LoopCount,
+                                Frequency);
+        if (!hasTypeB) return 0;
+        auto &measurementsB = ClassifiedMeasurements[dTypeB];
+        out(*ios, "\tusing seeded helper ", seededA->second.toStringWithBounds());
+        for (auto &mB : measurementsB)
+            mB->ec = E_NO_HELPER;
+        measureWithSeededHelper(measurementsB, seededA->second, true, OpcodeBlacklist, LoopCount,
+                                Frequency);
+        return 0;
+    }
+    // Check if there are measurements for dTypeB
+    if (!hasTypeB) {
+        out(*ios, "\tno measurements of type ", dTypeB, " so ", TypeA, " can also not be measured");
+        for (auto &mA : measurementsA)
+            mA->ec = E_NO_HELPER;
+        return 0;
+    }
+    auto &measurementsB = ClassifiedMeasurements[dTypeB];
+    out(*ios, "\t", measurementsB.size(), " measurements of reversed Type");
+    // From now on, if the errorCode doesn't get set by measuring the instructions, it is
+    // because there is no helper. Set all error codes to ERROR_NO_HELPER here to avoid
+    // duplicate code
+    for (auto &mA : measurementsA)
+        mA->ec = E_NO_HELPER;
+    for (auto &mB : measurementsB)
+        mB->ec = E_NO_HELPER;
+
+    // Find the pair of instructions of the current types that has the smallest combined
+    // latency. Then use those two instructions to measure all other. This way the resulting
+    // ranges are as small as posible
+    // candidates likely to have a low latency are tried first, so the search reaches a good pair
+    // early and can stop as soon as it can't be beaten
+    std::vector<LatMeasurement *> candidatesA = rankHelperCandidates(measurementsA);
+    std::vector<LatMeasurement *> candidatesB = rankHelperCandidates(measurementsB);
+    std::vector<LatMeasurement *>::iterator itA = candidatesA.begin();
+    std::vector<LatMeasurement *>::iterator itB = candidatesB.begin();
+    // candidates measured in the search, with prunePairSearch variants of them are skipped
+    std::vector<unsigned> triedA;
+    std::vector<unsigned> triedB;
+    unsigned saved = 0;
+    LatMeasurement *smallestA = nullptr;
+    LatMeasurement *smallestB = nullptr;
+    double minCombinedLat = 1000;
+    // first make sure we have a starting point for each type
+    while (itA != candidatesA.end()) {
+        LatMeasurement *m = *(itA++);
+        if (OpcodeBlacklist.find(m->opcode) != OpcodeBlacklist.end()) continue;
+        ErrorCode EC = canMeasure(*m, Frequency);
+        if (EC == SUCCESS) {
+            smallestA = m;
+            break;
+        }
+        latencyOutputMessage[m->opcode] +=
+            str("\t", m, "\n\t\t", ecToString(EC),
+                ", this instruction cannot be measured on this platform\n");
+        OpcodeBlacklist.emplace(m->opcode);
+    }
+    if (smallestA == nullptr) {
+        out(*ios, "\tno measurement of type ", TypeA, " can be executed successfully");
+        return 0;
+    }
+    while (itB != candidatesB.end()) {
+        LatMeasurement *m = *(itB++);
+        if (OpcodeBlacklist.find(m->opcode) != OpcodeBlacklist.end()) continue;
+        ErrorCode EC = canMeasure(*m, Frequency);
+        if (EC == SUCCESS) {
+            smallestB = m;
+            break;
+        }
+        latencyOutputMessage[m->opcode] +=
+            str("\t", m, "\n\t\t", ecToString(EC),
+                ", this instruction cannot be measured on this platform\n");
+        OpcodeBlacklist.emplace(m->opcode);
+    }
+    if (smallestB == nullptr) {
+        out(*ios, "\tno measurement of type ", dTypeB, " can be executed successfully");
+        return 0;
+    }
+    // measure the combined latency of the two instructions as a baseline
+    auto [EC, lat] = measureInSubprocess({*smallestA, *smallestB}, LoopCount, Frequency);
+    if (isError(EC)) {
+        out(*ios,
+            "\tcannot measure type. very unusual: both instructions can be executed "
+            "individually but fail when interleaved: \n",
+            smallestA, "\n", smallestB);
+        return 0;
+    }
+    minCombinedLat = lat;
+    triedA.emplace_back(smallestA->opcode);
+    triedB.emplace_back(smallestB->opcode);
+    // now go through both types and find the combination with minimal latency.
+    // alternate between incrementing the iterators if the latency improved
+    std::string currentIterator = "A";
+    while (itA != candidatesA.end() || itB != candidatesB.end()) {
+        LatMeasurement *mA;
+        LatMeasurement *mB;
+        // store measurement to work with in mA/mB, the current smallest candidate in the other
+        // one and increment current iterator
+        if (currentIterator == "A") {
+            if (itA == candidatesA.end()) {
+                currentIterator = "B";
+                continue;
+            }
+            mA = *(itA++);
+            mB = smallestB;
+        } else {
+            if (itB == candidatesB.end()) {
+                currentIterator = "A";
+                continue;
+            }
+            mA = smallestA;
+            mB = *(itB++);
+        }
+        if (OpcodeBlacklist.find(mA->opcode) != OpcodeBlacklist.end() ||
+            OpcodeBlacklist.find(mB->opcode) != OpcodeBlacklist.end() || mA->opcode == mB->opcode)
+            continue;
+        // the scheduling model and the variants only order the candidates, skipping them is a
+        // heuristic: the model latency may be wrong and variants can have different latencies
+        // e.g. SHL64ri and SHL64rCL. With prunePairSearch skip candidates which can't beat the
+        // current pair according to the model even if the other instruction has a latency of 1
+        // cycle, and variants of candidates which were tried already
+        unsigned candidate = currentIterator == "A" ? mA->opcode : mB->opcode;
+        std::vector<unsigned> &tried = currentIterator == "A" ? triedA : triedB;
+        if (prunePairSearch && (estimateLatency(candidate) + 1 >= minCombinedLat ||
+                                std::any_of(tried.begin(), tried.end(), [&](unsigned Opcode) {
+                                    return isVariant(Opcode, candidate);
+                                }))) {
+            saved++;
+            continue;
+        }
+        tried.emplace_back(candidate);
+        auto [EC, lat] = measureInSubprocess({*mA, *mB}, LoopCount, Frequency);
+        if (isError(EC)) {
+            out(*ios, "\tMeasuring ", *mA, " and ", *mB, " was unsuccessful, EC: ", ecToString(EC));
+            if (currentIterator == "A") {
+                out(*ios, "\t assuming ", *mA, " was the problem and blacklisting it");
+                OpcodeBlacklist.emplace(mA->opcode);
+                mA->ec = EC;
+            } else {
+                out(*ios, "\t assuming ", *mB, " was the problem and blacklisting it");
+                OpcodeBlacklist.emplace(mB->opcode);
+                mB->ec = EC;
+            }
+            continue;
+        }
+        // TODO this check technically should invalidate the combination of instructions not
+        // current one
+        if (EC == W_MULTIPLE_DEPENDENCIES) {
+            out(*ios, "\tDetected multiple dependencys between ", *mA, " and ", *mB,
+                "so result of their combination will not be considered for finding "
+                "helpers");
+            continue;
+        }
+        if (lat < minCombinedLat) {
+            if (isUnusualLat(lat) && !isUnusualLat(minCombinedLat)) {
+                out(*ios, "\tUnusual ", lat, " from ", *mA, " and ", *mB,
+                    "latency would be lower but current candidate pair has clean latency, "
+                    "discarding this result");
+                continue;
+            }
+            if (lat < 2 && !equalWithTolerance(lat, 2)) {
+                out(*ios, "\tUnusual ", lat, " from ", *mA, " and ", *mB,
+                    "lower than 2, discarding this result");
+                continue;
+            }
+            if (currentIterator == "A") {
+                smallestA = mA;
+                currentIterator = "B";
+            } else {
+                smallestB = mB;
+                currentIterator = "A";
+            }
+            minCombinedLat = lat;
+            out(*ios, "\tNew pair: ", *mA, " ", *mB, "with latency ", lat);
+            // Optimization: there is nothing better than two instructions with latency 1 cy
+            if (equalWithTolerance(minCombinedLat, 2)) break;
+        }
+    }
+
+    smallestA->lowerBound = 1;
+    smallestA->upperBound = minCombinedLat - 1;
+    smallestB->lowerBound = 1;
+    smallestB->upperBound = minCombinedLat - 1;
+    out(*ios, "\tFound helper instructions ", *smallestA, " and ", *smallestB,
+        " with combined latency ", minCombinedLat, ", ", saved, " pair measurements saved");
+    // smallestA and smallestB now are the measurements with the lowest combined latency
+    // Use them to measure everything else
+    for (LatMeasurement *mA : measurementsA) {
+        if (OpcodeBlacklist.find(mA->opcode) != OpcodeBlacklist.end()) continue;
+        auto [EC, lat] = measureInSubprocess({*mA, *smallestB}, LoopCount, Frequency, &mA->stats);
+        mA->ec = EC;
+        mA->lowerBound = lat - smallestB->upperBound;
+        mA->upperBound = lat - smallestB->lowerBound;
+        latencyOutputMessage[mA->opcode] += str("\t", mA->toStringWithBounds(), "\n");
+        if (!isError(EC)) {
+            latencyOutputMessage[mA->opcode] +=
+                str("\t\tDependencies:\n\t\t\t", *smallestA, "\n\t\t\t", *smallestB, "\n");
+            latencyOutputMessage[mA->opcode] += str("\t\tCombined result: ", lat, " cycles\n");
+        }
+    }
+    for (LatMeasurement *mB : measurementsB) {
+        if (OpcodeBlacklist.find(mB->opcode) != OpcodeBlacklist.end()) continue;
+        auto [EC, lat] = measureInSubprocess({*smallestA, *mB}, LoopCount, Frequency, &mB->stats);
+        mB->ec = EC;
+        mB->lowerBound = lat - smallestA->upperBound;
+        mB->upperBound = lat - smallestA->lowerBound;
+        if (isUnusualLat(mB->lowerBound)) mB->ec = E_UNUSUAL_LATENCY;
+
+        latencyOutputMessage[mB->opcode] += str("\t", mB->toStringWithBounds(), "\n");
+        if (!isError(EC)) {
+            latencyOutputMessage[mB->opcode] +=
+                str("\t\tDependencies:\n\t\t\t", *smallestA, "\n\t\t\t", *smallestB, "\n");
+            latencyOutputMessage[mB->opcode] += str("\t\tCombined result: ", lat, " cycles\n");
+        }
+    }
+    return saved;
+}
+
+void buildLatDatabase(double Frequency) {
+    dbg(__func__, "Frequency: ", Frequency);
+    out(*ios, "Number of measurements: ", latencyDatabase.size());
+    // opcodes which cannot be measured as (e.g. because they are not supported on the platform)
+    std::set<unsigned> opcodeBlacklist;
+    std::set<DependencyType> completedTypes;
+    unsigned loopCount = scaleLoopCount(1e5);
+    // one worker per core, a new one is only forked if a benchmark crashes. Without the pool every
+    // measurement forks a temporary worker
+    std::vector<int> cores = getWorkerCores();
+    if (workerPool.start(cores) != SUCCESS) return;
+    std::map<std::string, std::string> resumedTypes;
+    std::set<std::string> resumedMeasurements = resumeLat(opcodeBlacklist, resumedTypes);
+
+    // classify measurements by operand combination, measure if trivial
+    if (showProgress) std::cout << "phase1: trivial measurements\n";
+    std::map<DependencyType, std::vector<LatMeasurement *>> classifiedMeasurements;
+    std::vector<LatMeasurement *> trivialMeasurements;
+    for (auto &measurement : latencyDatabase) {
+        classifiedMeasurements[measurement.type].emplace_back(&measurement);
+        // if not symmetric, it can only be measured in pair with another instruction which has
+        // the same dependencyType but reversed. e.g. GR16 -> EFLAGS and EFLAGS -> GR16.
+        if (!measurement.type.isSymmetric()) continue;
+        // symmetric means the operand read and written to are of the same type.
+        // e.g. GR16 -> GR16. Those can build a latency chain on their own
+        completedTypes.insert(measurement.type); // blacklist symmetric for phase 2
+        if (resumedMeasurements.empty() ||
+            resumedMeasurements.find(measurement.toCompactString()) == resumedMeasurements.end())
+            trivialMeasurements.emplace_back(&measurement);
+    }
+    // store the result of a trivial measurement
+    auto setTrivialResult = [&](LatMeasurement &Measurement, const JobResult &Result) {
+        ErrorCode EC = Result.ec;
+        double lat = Result.lowerBound;
+        Measurement.ec = EC;
+        Measurement.lowerBound = lat;
+        Measurement.upperBound = lat;
+        Measurement.stats = Result.stats;
+        if (EC == SUCCESS) {
+            latencyOutputMessage[Measurement.opcode] += str(
+                "\t", Measurement.toStringWithBounds(), "\n\t\t Successful, latency: ", lat, "\n");
+            if (Measurement.stats.numCounters > 0)
+                latencyOutputMessage[Measurement.opcode] += str(
+                    "\t\tCounters per instruction: ", countersToString(Measurement.stats), "\n");
+        } else if (EC == W_MULTIPLE_DEPENDENCIES)
+            latencyOutputMessage[Measurement.opcode] +=
+                str("\t", Measurement.toStringWithBounds(),
+                    "\n\t\tWARNING generated instructions have multiple dependencies. "
+                    "If they have different latencies the lower one will be shadowed\n");
+        else if (isError(EC)) {
+            latencyOutputMessage[Measurement.opcode] +=
+                str("\t", Measurement.toStringWithBounds(), "\n\t\t", ecToString(EC),
+                    ", this instruction cannot be measured on this platform\n");
+            opcodeBlacklist.emplace(Measurement.opcode);
+            journalBlacklist(Measurement.opcode);
+        }
+        journalLat(Measurement);
+    };
+    // the trivial measurements run in parallel, their results are stored in order so the report
+    // is the same as with a single worker
+    std::map<size_t, JobResult> trivialResults;
+    std::map<unsigned, std::vector<size_t>> running; // worker -> indices in trivialMeasurements
+    std::deque<size_t> pending;
+    for (size_t i = 0; i < trivialMeasurements.size(); i++)
+        pending.emplace_back(i);
+    // measurements of batches which killed their worker, they are measured one at a time
+    std::set<size_t> isolated;
+    for (size_t stored = 0; stored < trivialMeasurements.size();) {
+        int worker = workerPool.getIdleWorker();
+        if (!pending.empty() && worker != -1) {
+            // isolated measurements are queued first and submitted alone
+            std::vector<size_t> job = {pending.front()};
+            pending.pop_front();
+            while (isolated.find(job.front()) == isolated.end() &&
+                   job.size() < std::max(batchSize, 1u) && !pending.empty()) {
+                job.emplace_back(pending.front());
+                pending.pop_front();
+            }
+            ErrorCode EC;
+            if (job.size() == 1) {
+                EC = workerPool.submitLat(worker, {*trivialMeasurements[job.front()]}, loopCount,
+                                          Frequency);
+            } else {
+                std::vector<LatMeasurement> measurements;
+                for (size_t index : job)
+                    measurements.emplace_back(*trivialMeasurements[index]);
+                EC = workerPool.submitLatBatch(worker, measurements, loopCount, Frequency);
+            }
+            if (EC == SUCCESS)
+                running[worker] = job;
+            else
+                for (size_t index : job)
+                    trivialResults[index] = {EC, -1, -1, {}, ""};
+            continue;
+        }
+        auto result = trivialResults.find(stored);
+        if (result != trivialResults.end()) {
+            displayProgress(stored, trivialMeasurements.size());
+            setTrivialResult(*trivialMeasurements[stored], result->second);
+            trivialResults.erase(result);
+            stored++;
+            continue;
+        }
+        unsigned index;
+        std::vector<JobResult> collected = workerPool.collectAll(index);
+        std::vector<size_t> job = running[index];
+        running.erase(index);
+        if (collected.empty()) {
+            for (auto it = job.rbegin(); it != job.rend(); ++it) {
+                isolated.insert(*it);
+                pending.emplace_front(*it);
+            }
+            continue;
+        }
+        for (size_t i = 0; i < job.size(); i++)
+            trivialResults[job[i]] = collected[i];
+    }
+
+    // now iterate over all pairs A, B of dependencyTypes where A.reversed() == B and do the
+    // measurements of those types
+    // e.g. if A is GR16 -> EFLAGS, B is EFLAGS -> GR16 and we can measure combinations of
+    // instructions in A and B
+    if (showProgress) std::cout << "\nphase2: measurements with helpers\n";
+    out(*ios, "\n\nReport on finding helpers for dependency types:");
+    std::vector<DependencyType> typePairs; // first type of each pair
+    for (auto &[dTypeA, measurementsA] : classifiedMeasurements) {
+        if (completedTypes.find(dTypeA) != completedTypes.end()) continue;
+        completedTypes.insert(dTypeA);
+        completedTypes.insert(dTypeA.reversed());
+        typePairs.emplace_back(dTypeA);
+    }
+    // measurements of both types of a pair
+    auto pairMeasurements = [&](DependencyType TypeA) {
+        std::vector<LatMeasurement *> measurements = classifiedMeasurements[TypeA];
+        auto measurementsB = classifiedMeasurements.find(TypeA.reversed());
+        if (measurementsB != classifiedMeasurements.end())
+            measurements.insert(measurements.end(), measurementsB->second.begin(),
+                                measurementsB->second.end());
+        return measurements;
+    };
+    // measure a pair of types and return the report
+    unsigned savedMeasurements = 0;
+    auto measurePair = [&](DependencyType TypeA) {
+        std::ostringstream typeReport;
+        typeReport.precision(ios->precision());
+        std::ostream *reportStream = ios;
+        ios = &typeReport;
+        savedMeasurements +=
+            measureTypePair(TypeA, classifiedMeasurements, opcodeBlacklist, loopCount, Frequency);
+        ios = reportStream;
+        return typeReport.str();
+    };
+    // print the report of a pair of types and store the results in the journal
+    auto finishPair = [&](DependencyType TypeA, const std::string &Report,
+                          const std::set<unsigned> &OldBlacklist) {
+        *ios << Report;
+        for (unsigned opcode : opcodeBlacklist)
+            if (OldBlacklist.find(opcode) == OldBlacklist.end()) journalBlacklist(opcode);
+        for (LatMeasurement *m : pairMeasurements(TypeA))
+            journalLat(*m);
+        journal.append({"LATTYPE", str(TypeA), Report});
+    };
+
+    if (cores.size() == 1) {
+        for (size_t i = 0; i < typePairs.size(); i++) {
+            displayProgress(i, typePairs.size());
+            auto resumed = resumedTypes.find(str(typePairs[i]));
+            if (resumed != resumedTypes.end()) {
+                *ios << resumed->second;
+                continue;
+            }
+            std::set<unsigned> oldBlacklist = opcodeBlacklist;
+            std::string report = measurePair(typePairs[i]);
+            finishPair(typePairs[i], report, oldBlacklist);
+        }
+    } else {
+        // every pair of types is measured in a task process with its own worker. The results are
+        // applied in order, a pair which was measured before an earlier pair blacklisted one of
+        // its opcodes is measured again. This way the report is the same as with a single worker
+        workerPool.stop();
+        TaskPool tasks(cores);
+        // runs in the task process, encodes everything needed to apply the results
+        auto runPair = [&](DependencyType TypeA) {
+            std::set<unsigned> oldBlacklist = opcodeBlacklist;
+            latencyOutputMessage.clear();
+            savedMeasurements = 0;
+            // the worker inherits the core of the task process
+            workerPool.start({-1});
+            std::string report = measurePair(TypeA);
+            workerPool.stop();
+            std::string result;
+            appendString(result, report);
+            appendValue(result, savedMeasurements);
+            std::vector<unsigned> blacklisted;
+            for (unsigned opcode : opcodeBlacklist)
+                if (oldBlacklist.find(opcode) == oldBlacklist.end())
+                    blacklisted.emplace_back(opcode);
+            appendValue(result, blacklisted.size());
+            for (unsigned opcode : blacklisted)
+                appendValue(result, opcode);
+            appendValue(result, latencyOutputMessage.size());
+            for (auto &[opcode, message] : latencyOutputMessage) {
+                appendValue(result, opcode);
+                appendString(result, message);
+            }
+            auto measurements = pairMeasurements(TypeA);
+            appendValue(result, measurements.size());
+            for (LatMeasurement *m : measurements) {
+                appendValue(result, (size_t)(m - latencyDatabase.data()));
+                appendValue(result, m->ec);
+                appendValue(result, m->lowerBound);
+                appendValue(result, m->upperBound);
+                appendValue(result, m->stats);
+            }
+            return result;
+        };
+        // apply the results of runPair(), returns the report
+        auto applyPair = [&](const std::string &Result) {
+            size_t offset = 0;
+            std::string report = readString(Result, offset);
+            savedMeasurements += readValue<unsigned>(Result, offset);
+            for (size_t n = readValue<size_t>(Result, offset); n > 0; n--)
+                opcodeBlacklist.insert(readValue<unsigned>(Result, offset));
+            for (size_t n = readValue<size_t>(Result, offset); n > 0; n--) {
+                unsigned opcode = readValue<unsigned>(Result, offset);
+                latencyOutputMessage[opcode] += readString(Result, offset);
+            }
+            for (size_t n = readValue<size_t>(Result, offset); n > 0; n--) {
+                LatMeasurement &m = latencyDatabase[readValue<size_t>(Result, offset)];
+                m.ec = readValue<ErrorCode>(Result, offset);
+                m.lowerBound = readValue<double>(Result, offset);
+                m.upperBound = readValue<double>(Result, offset);
+                m.stats = readValue<SampleStats>(Result, offset);
+            }
+            return report;
+        };
+
+        std::deque<size_t> pending;
+        for (size_t i = 0; i < typePairs.size(); i++)
+            if (resumedTypes.find(str(typePairs[i])) == resumedTypes.end()) pending.push_back(i);
+        std::map<size_t, std::pair<ErrorCode, std::string>> results;
+        std::map<size_t, std::set<unsigned>> startBlacklists;
+        for (size_t applied = 0; applied < typePairs.size();) {
+            int slot = tasks.getIdleSlot();
+            if (!pending.empty() && slot != -1) {
+                size_t index = pending.front();
+                pending.pop_front();
+                startBlacklists[index] = opcodeBlacklist;
+                ErrorCode EC =
+                    tasks.submit(slot, index, [&, index]() { return runPair(typePairs[index]); });
+                if (EC != SUCCESS) results[index] = {EC, ""};
+                continue;
+            }
+            DependencyType typeA = typePairs[applied];
+            auto resumed = resumedTypes.find(str(typeA));
+            if (resumed != resumedTypes.end()) {
+                *ios << resumed->second;
+                applied++;
+                continue;
+            }
+            auto result = results.find(applied);
+            if (result == results.end()) {
+                auto [EC, index, encoded] = tasks.collect();
+                results[index] = {EC, encoded};
+                continue;
+            }
+            auto measurements = pairMeasurements(typeA);
+            bool outdated = std::any_of(measurements.begin(), measurements.end(), [&](auto *M) {
+                return opcodeBlacklist.find(M->opcode) != opcodeBlacklist.end() &&
+                       startBlacklists[applied].find(M->opcode) == startBlacklists[applied].end();
+            });
+            if (outdated && result->second.first == SUCCESS) {
+                results.erase(result);
+                pending.push_front(applied);
+                continue;
+            }
+            displayProgress(applied, typePairs.size());
+            std::set<unsigned> oldBlacklist = opcodeBlacklist;
+            std::string report;
+            if (result->second.first == SUCCESS)
+                report = applyPair(result->second.second);
+            else {
+                // the task process died, the measurements of this pair are lost
+                report = str("-----", typeA, " and ", typeA.reversed(),
+                             "-----\n\tmeasuring failed: ", ecToString(result->second.first), "\n");
+                for (LatMeasurement *m : measurements) {
+                    m->ec = result->second.first;
+                    m->lowerBound = -1;
+                    m->upperBound = -1;
+                }
+            }
+            finishPair(typeA, report, oldBlacklist);
+            results.erase(result);
+            startBlacklists.erase(applied);
+            applied++;
+        }
+    }
+
+    workerPool.stop();
+    out(*ios, "\nSearching helper pairs: ", savedMeasurements,
+        " pair measurements saved by pruning candidates");
+
+    // Print report strings collected
+    out(*ios, "\n\nReport on individual measurements:");
+    for (auto entry : latencyOutputMessage) {
+        out(*ios, "-----", getEnv().MCII->getName(entry.first).data(), "-----");
+        out(*ios, entry.second);
+    }
+}
+
+int main(int argc, char **argv) {
+    double frequency = 0;
+    std::string timerName = "auto";
+    std::string cpu = "";
+    std::string march = "";
+    CLI::App app{"winic"};
+    app.add_option("-f,--frequency", frequency,
+                   "Frequency in GHz, required unless the timer counts core cycles");
+    app.add_option("-t,--timer", timerName,
+                   "Timer used for measurements. auto uses perf if available and gettimeofday "
+                   "otherwise. rdtsc, cntvct and gettimeofday need a fixed frequency")
+        ->check(CLI::IsMember(getTimerNames()))
+        ->capture_default_str();
+    std::vector<std::string> counterNames;
+    app.add_option("--counters", counterNames,
+                   "Comma separated performance counters to measure per instruction e.g. "
+                   "uops-retired,port0,port1. Raw events can be given as name=0x<config>, an "
+                   "invalid name lists the events available on this CPU")
+        ->delimiter(',');
+    app.add_flag("-d,--debug", debug, "Enable debug output")->default_val(false);
+    // not tested, used in case llvm cant detect platform
+    app.add_option("-c,--cpu", cpu, "CPU model");
+    app.add_option("-m,--march", march, "Architecture");
+    app.add_flag("--clang", useClang,
+                 "Assemble benchmarks with clang instead of the builtin LLVM MC assembler")
+        ->default_val(false);
+    std::string cacheDir = "";
+    if (const char *xdgCache = getenv("XDG_CACHE_HOME"))
+        cacheDir = str(xdgCache, "/winic");
+    else if (const char *home = getenv("HOME"))
+        cacheDir = str(home, "/.cache/winic");
+    unsigned cacheSize = 512;
+    app.add_option("--cacheDir", cacheDir, "Directory to cache assembled benchmarks in")
+        ->capture_default_str();
+    app.add_option("--cacheSize", cacheSize,
+                   "Maximum size of the benchmark cache in MiB, 0 disables the cache")
+        ->capture_default_str();
+    double targetTime = adaptiveTargetTime * 1000;
+    app.add_flag("--adaptive", adaptiveMode,
+                 "Choose loop counts to reach the target time per sample and sample until the "
+                 "results converge")
+        ->default_val(false);
+    app.add_option("--targetTime", targetTime, "Target time per sample in ms in adaptive mode")
+        ->capture_default_str();
+    app.add_option("--confidence", adaptiveConfidence,
+                   "Maximum relative difference between median and minimum sample in adaptive mode")
+        ->capture_default_str();
+    app.add_option("--maxSamples", adaptiveMaxSamples,
+                   "Maximum number of samples per benchmark in adaptive mode")
+        ->capture_default_str();
+
+    std::vector<std::string> instrNames;
+    unsigned minOpcode = 0;
+    unsigned maxOpcode = 0;
+    bool noReport = false;
+    std::string databasePath = "";
+    bool resume = false;
+    std::string journalPath = "";
+    std::string seedPath = "";
+    unsigned jobs = 1;
+    std::string coreList = "";
+    auto *tp = app.add_subcommand("TP", "Throughput");
+    auto *tpInstOpt = tp->add_option("-i,--instruction", instrNames, "LLVM Instruction names");
+    tp->add_option("--minOpcode", minOpcode, "Minimum opcode to measure")->excludes(tpInstOpt);
+    tp->add_option("--maxOpcode", maxOpcode, "Maximum opcode to measure")->excludes(tpInstOpt);
+    tp->add_flag("--noReport", noReport, "Don't generate report file")->default_val(false);
+    tp->add_option("-o,--output", databasePath,
+                   "Path to the .yaml file to save the results to. If the file already exists new "
+                   "values will be overwritten. If emtpy a timestamped file will be generated. If "
+                   "/dev/null no file will be generated");
+    tp->add_flag("--X87FP", includeX87FP, "Include x87 floating point instructions")
+        ->default_val(false);
+    tp->add_option("-j,--jobs", jobs,
+                   "Number of instructions to measure in parallel, each pinned to its own "
+                   "physical core. 0 uses all available physical cores");
+    tp->add_flag("--resume", resume,
+                 "Continue an interrupted run, measurements found in the journal are skipped")
+        ->default_val(false);
+    tp->add_option("--journal", journalPath,
+                   "Journal of completed measurements used by --resume. Defaults to the output "
+                   "path with .journal appended");
+    tp->add_option("--seed", seedPath,
+                   "Database of a previous run. Its values are used as helpers instead of "
+                   "measuring them again, the values of the output database are used as well")
+        ->check(CLI::ExistingFile);
+    tp->add_option("--cores", coreList,
+                   "Cores to pin the measurements to e.g. \"0-3,8\". Defaults to one logical cpu "
+                   "per physical core");
+    tp->add_option("--batch", batchSize,
+                   "Number of instructions whose benchmarks are assembled into one object. Each "
+                   "benchmark still runs in its own subprocess")
+        ->check(CLI::PositiveNumber);
+
+    auto *lat = app.add_subcommand("LAT", "Latency");
+    auto *latInstOpt = lat->add_option("-i,--instruction", instrNames, "LLVM Instruction names");
+    lat->add_option("--minOpcode", minOpcode, "Minimum opcode to measure")->excludes(latInstOpt);
+    lat->add_option("--maxOpcode", maxOpcode, "Maximum opcode to measure")->excludes(latInstOpt);
+    lat->add_flag("--noReport", noReport, "Don't generate report file")->default_val(false);
+    lat->add_option("-o,--output", databasePath,
+                    "Path to the .yaml file to save the results to. If the file already exists new "
+                    "values will be overwritten. If emtpy a timestamped file will be generated. If "
+                    "/dev/null no file will be generated");
+    lat->add_flag("--X87FP", includeX87FP, "Include x87 floating point instructions")
+        ->default_val(false);
+    lat->add_flag("--resume", resume,
+                  "Continue an interrupted run, measurements found in the journal are skipped")
+        ->default_val(false);
+    lat->add_option("--journal", journalPath,
+                    "Journal of completed measurements used by --resume. Defaults to the output "
+                    "path with .journal appended");
+    lat->add_option("--seed", seedPath,
+                    "Database of a previous run. Its values are used as helpers instead of "
+                    "measuring them again, the values of the output database are used as well")
+        ->check(CLI::ExistingFile);
+    lat->add_flag("--prunePairs", prunePairSearch,
+                  "Skip helper pair candidates which are not expected to beat the current pair "
+                  "according to the LLVM scheduling model. Faster but may miss the best pair")
+        ->default_val(false);
+    lat->add_option("-j,--jobs", jobs,
+                    "Number of measurements to run in parallel, each pinned to its own physical "
+                    "core. 0 uses all available physical cores");
+    lat->add_option("--cores", coreList,
+                    "Cores to pin the measurements to e.g. \"0-3,8\". Defaults to one logical cpu "
+                    "per physical core");
+    lat->add_option("--batch", batchSize,
+                    "Number of trivial measurements whose benchmarks are assembled into one "
+                    "object. Each benchmark still runs in its own subprocess")
+        ->check(CLI::PositiveNumber);
+
+    std::vector<std::string> referenceNames;
+    auto *ports = app.add_subcommand("PORTS", "Port usage");
+    auto *portsInstOpt =
+        ports->add_option("-i,--instruction", instrNames, "LLVM Instruction names");
+    ports->add_option("--minOpcode", minOpcode, "Minimum opcode to measure")
+        ->excludes(portsInstOpt);
+    ports->add_option("--maxOpcode", maxOpcode, "Maximum opcode to measure")
+        ->excludes(portsInstOpt);
+    ports->add_flag("--noReport", noReport, "Don't generate report file")->default_val(false);
+    ports->add_option("-o,--output", databasePath,
+                      "Path to the .yaml file to save the results to. If the file already exists "
+                      "new values will be overwritten. If emtpy a timestamped file will be "
+                      "generated. If /dev/null no file will be generated");
+    ports->add_flag("--X87FP", includeX87FP, "Include x87 floating point instructions")
+        ->default_val(false);
+    ports
+        ->add_option("--seed", seedPath,
+                     "Database of a previous run. Its throughput values and port usage are used "
+                     "instead of measuring them again")
+        ->check(CLI::ExistingFile);
+    ports
+        ->add_option("-r,--reference", referenceNames,
+                     "Comma separated reference instructions with their port usage e.g. "
+                     "ADD64rr=p0156,SHL64ri=p06. Database entries with a single uop are used as "
+                     "references as well")
+        ->delimiter(',');
+
+    std::string sPath, funcName, initName = "";
+    unsigned numInst;
+    auto *man = app.add_subcommand("MAN", "Manual");
+    man->add_option("-p,--path", sPath, "Assembly file path")->required()->check(CLI::ExistingPath);
+    man->add_option("--funcName", funcName, "Function to benchmark")->required();
+    man->add_option("-n,--nInst", numInst, "Number of instructions in loop")->required();
+    man->add_option("--initName", initName, "Initialization function");
+
+    app.require_subcommand(1, 1);
+    CLI11_PARSE(app, argc, argv)
+    adaptiveTargetTime = targetTime / 1000;
+
+    // configure output
+    std::cout.precision(3);
+    ios->precision(3);
+    std::string timestamp = generateTimestamp();
+
+    if (noReport || *man)
+        setOutputToFile("/dev/null");
+    else if (*tp)
+        setOutputToFile("report_TP_" + timestamp + ".txt");
+    else if (*lat)
+        setOutputToFile("report_LAT_" + timestamp + ".txt");
+    else if (*ports)
+        setOutputToFile("report_PORTS_" + timestamp + ".txt");
+
+    if (databasePath != "/dev/null") {
+        if (databasePath.empty()) databasePath = str("db_", timestamp, ".yaml");
+        if (std::filesystem::exists(databasePath)) {
+            out(*ios, "Using existing database: ", databasePath);
+            ErrorCode EC = loadYaml(databasePath);
+            if (EC != SUCCESS) return -1;
+        } else
+            out(*ios, "Creating new database: ", databasePath);
+    }
+
+    std::ostringstream ss;
+    for (int i = 0; i < argc; ++i)
+        ss << argv[i] << " ";
+
+    out(*ios, "Timestamp: ", timestamp);
+    out(*ios, "Command: ", ss.str());
+    dbgToFile = false;
+
+    struct timeval start, end;
+    gettimeofday(&start, NULL);
+    ErrorCode ec = getEnv().setUp(march, cpu);
+    if (ec != SUCCESS) {
+        std::cerr << "failed to set up environment: " << ecToString(ec) << std::endl;
+        return 1;
+    }
+    out(*ios, "Arch: ", getEnv().MSTI->getCPU().str());
+    ec = setUpTimer(timerName);
+    if (ec != SUCCESS) {
+        std::cerr << "failed to set up timer " << timerName << ": " << ecToString(ec) << std::endl;
+        return 1;
+    }
+    out(*ios, "Timer: ", getTimerName());
+    ec = setUpCounters(counterNames);
+    if (ec != SUCCESS) {
+        std::string available;
+        for (const std::string &name : getCounterNames())
+            available += str(available.empty() ? "" : ", ", name);
+        std::cerr << "failed to set up counters: " << ecToString(ec) << ". Available: " << available
+                  << std::endl;
+        return 1;
+    }
+    if (!getEnabledCounters().empty()) {
+        std::string enabled;
+        for (const std::string &name : getEnabledCounters())
+            enabled += str(enabled.empty() ? "" : ", ", name);
+        out(*ios, "Counters: ", enabled);
+    }
+    if (frequency > 0)
+        out(*ios, "Frequency: ", frequency, " GHz");
+    else if (!timerCountsCycles()) {
+        std::cerr << "timer " << getTimerName() << " needs --frequency" << std::endl;
+        return 1;
+    }
+    if (adaptiveMode)
+        out(*ios, "Adaptive: target time ", targetTime, " ms, confidence ", adaptiveConfidence,
+            ", max samples ", adaptiveMaxSamples);
+    // the cache has to be set up before the first measurement subprocess is forked
+    if (cacheSize != 0 && !cacheDir.empty() && !*man) {
+        if (objectCache.init(cacheDir, (uint64_t)cacheSize << 20) != SUCCESS)
+            std::cerr << "continuing without object cache" << std::endl;
+        else
+            out(*ios, "Object cache: ", cacheDir);
+    }
+    if (journalPath.empty() && databasePath != "/dev/null") journalPath = databasePath + ".journal";
+    if (!journalPath.empty() && (*tp || *lat)) {
+        // the results depend on these settings, a journal written with other ones is not resumed
+        std::string counters;
+        for (const std::string &name : getEnabledCounters())
+            counters += str(counters.empty() ? "" : ",", name);
+        std::vector<std::string> header = {
+            "WINIC",
+            std::to_string(JOURNAL_VERSION),
+            *tp ? "TP" : "LAT",
+            getEnv().MSTI->getCPU().str(),
+            str(frequency),
+            getTimerName(),
+            adaptiveMode ? str(targetTime, " ", adaptiveConfidence, " ", adaptiveMaxSamples) : "",
+            counters};
+        if (journal.open(journalPath, header, resume) != SUCCESS) return 1;
+        out(*ios, resume ? "Resuming from journal: " : "Journal: ", journalPath);
+    } else if (resume) {
+        std::cerr << "--resume needs a journal, use -o or --journal" << std::endl;
+        return 1;
+    }
+    // values of previous runs are used as helpers, the ones from --seed take precedence over the
+    // ones from the output database
+    std::vector<IOInstruction> seed;
+    if (!*man) seed = getDatabaseEntries();
+    if (!seedPath.empty()) {
+        auto [EC, entries] = readYaml(seedPath);
+        if (EC != SUCCESS) return 1;
+        out(*ios, "Seed database: ", seedPath);
+        seed.insert(seed.end(), entries.begin(), entries.end());
+    }
+    if (maxOpcode == 0) maxOpcode = getEnv().MCII->getNumOpcodes();
+
+    std::vector<unsigned> opcodes;
+    for (auto instrName : instrNames) {
+        unsigned opcode = getEnv().getOpcode(instrName.data());
+        if (opcode == std::numeric_limits<unsigned>::max()) {
+            std::cerr << "No instruction with name \"" << instrName << "\"" << std::endl;
+            exit(1);
+        }
+        opcodes.emplace_back(opcode);
+    }
+
+    // skip instructions which take long and are irrelevant
+    std::set<std::string> skipInstructions;
+    std::unordered_set<unsigned> opcodeBlacklist;
+
+    if (getEnv().Arch == Triple::ArchType::x86_64) {
+        skipInstructions = {"SYSCALL",   "CPUID",     "MWAITXrrr", "RDRAND16r", "RDRAND32r",
+                            "RDRAND64r", "RDSEED16r", "RDSEED32r", "RDSEED64r", "RDTSC",
+                            "SLDT16r",   "SLDT32r",   "SLDT64r",   "SMSW16r",   "SMSW32r",
+                            "SMSW64r",   "STR16r",    "STR32r",    "STR64r",    "VERRr",
+                            "VERWr"};
+    }
+    for (auto name : skipInstructions)
+        opcodeBlacklist.insert(getEnv().getOpcode(name));
+
+    if (*tp || *lat) {
+        out(*ios, "Mode: ", *tp ? "Throughput" : "Latency");
+        // choose the cores to run measurements on. A single job without --cores is not pinned
+        if (jobs != 1 || !coreList.empty()) {
+            std::vector<unsigned> cores;
+            try {
+                cores = coreList.empty() ? getPhysicalCores() : parseCpuList(coreList);
+            } catch (const std::exception &e) {
+                std::cerr << "invalid core list \"" << coreList << "\"" << std::endl;
+                return 1;
+            }
+            if (cores.empty()) {
+                std::cerr << "no cores available to run measurements on" << std::endl;
+                return 1;
+            }
+            if (jobs == 0 || jobs > cores.size()) jobs = cores.size();
+            workerCores.assign(cores.begin(), cores.begin() + jobs);
+        }
+        numWorkers = jobs;
+        std::string coreString = workerCores.empty() ? "not pinned" : "";
+        for (unsigned core : workerCores)
+            coreString += str(coreString.empty() ? "" : ",", core);
+        out(*ios, "Workers: ", numWorkers, " cores: ", coreString);
+        if (batchSize > 1) out(*ios, "Benchmarks per assembled object: ", batchSize);
+    }
+
+    if (*tp) {
+        std::set<unsigned> seededOpcodes = seedTP(seed);
+        if (!seededOpcodes.empty()) out(*ios, "Seeded throughput values: ", seededOpcodes.size());
+        // helpers using other ports than the instruction don't widen its throughput range
+        unsigned seededPorts = seedPorts(seed);
+        if (seededPorts > 0) out(*ios, "Seeded port usage: ", seededPorts);
+        addPriorityHelpers(seededOpcodes, frequency);
+        if (opcodes.empty()) {
+            out(*ios, "No instructions specified, measuring all instructions from opcode ",
+                minOpcode, " to ", maxOpcode);
+            for (unsigned opcode = minOpcode; opcode < maxOpcode; opcode++) {
+                // skip instructions which are not supported on this platform
+                if (opcodeBlacklist.find(opcode) != opcodeBlacklist.end()) {
+                    throughputDatabase[opcode].ec = S_MANUALLY;
+                    continue;
+                }
+                opcodes.emplace_back(opcode);
+            }
+
+            buildTPDatabase(opcodes, frequency);
+        } else {
+            showProgress = false;
+            dbgToFile = true;
+
+            prepAsmDir();
+            buildTPDatabase(opcodes, frequency);
+            for (auto opcode : opcodes) {
+                if (throughputDatabase.find(opcode) == throughputDatabase.end())
+                    continue; // should not happen
+                std::cout << str(throughputDatabase[opcode]) << std::endl;
+            }
+        }
+        // update output database with new values, seeded values are only written if they were
+        // measured again
+        std::set<unsigned> measuredOpcodes(opcodes.begin(), opcodes.end());
+        for (auto &[opcode, result] : throughputDatabase) {
+            if (result.ec != SUCCESS) continue;
+            if (seededOpcodes.find(opcode) != seededOpcodes.end() &&
+                measuredOpcodes.find(opcode) == measuredOpcodes.end())
+                continue;
+            updateDatabaseEntryTP(result);
+        }
+
+        // save database
+        if (databasePath != "/dev/null") {
+            ErrorCode EC = saveYaml(databasePath);
+            if (EC != SUCCESS) return 1;
+        }
+        // the results are saved, the journal is not needed anymore
+        journal.remove();
+    } else if (*lat) {
+        if (!seed.empty()) {
+            // instructions measured in this run are not used as seeded helpers, their values are
+            // outdated
+            std::unordered_set<unsigned> skip = opcodeBlacklist;
+            if (opcodes.empty())
+                for (unsigned opcode = minOpcode; opcode < maxOpcode; opcode++)
+                    skip.insert(opcode);
+            else
+                skip.insert(opcodes.begin(), opcodes.end());
+            unsigned seededTypes =
+                seedLat(seed, genLatMeasurements(0, getEnv().MCII->getNumOpcodes(), skip));
+            if (seededTypes > 0) out(*ios, "Seeded helpers for ", seededTypes, " dependency types");
+            // throughput values are used to rank the candidates when searching helpers
+            seedTP(seed);
+        }
+        // example chain ADC16ri8 CMP16ri8
+        // ADC32i32 PCMPESTRIrri CVTSI2SDrr TODO debug
+        if (opcodes.empty()) {
+            out(*ios, "No instructions specified, measuring all instructions from opcode ",
+                minOpcode, " to ", maxOpcode);
+            latencyDatabase = genLatMeasurements(minOpcode, maxOpcode, opcodeBlacklist);
+            buildLatDatabase(frequency);
+        } else {
+            showProgress = false;
+            dbgToFile = true;
+            prepAsmDir();
+            for (auto opcode : opcodes) {
+                auto measurements = genLatMeasurements(opcode, opcode + 1, {});
+                latencyDatabase.insert(latencyDatabase.begin(), measurements.begin(),
+                                       measurements.end());
+            }
+            buildLatDatabase(frequency);
+            for (auto m : latencyDatabase) {
+                if (std::find(opcodes.begin(), opcodes.end(), m.opcode) == opcodes.end())
+                    continue; // skip prio helpers
+                std::cout << m.toStringWithBounds() << std::endl;
+            }
+        }
+        // update database with new values
+        for (LatMeasurement result : latencyDatabase) {
+            ErrorCode EC = updateDatabaseEntryLAT(result);
+            if (EC != SUCCESS) {
+                std::string msg =
+                    str("failed to update database entry for ", result, ": ", ecToString(EC));
+                out(*ios, msg);
+                std::cerr << msg << std::endl;
+            }
+        }
+
+        // save database
+        if (databasePath != "/dev/null") {
+            ErrorCode EC = saveYaml(databasePath);
+            if (EC != SUCCESS) return 1;
+        }
+        // the results are saved, the journal is not needed anymore
+        journal.remove();
+    } else if (*ports) {
+        out(*ios, "Mode: Ports");
+        std::set<unsigned> seededOpcodes = seedTP(seed);
+        if (!seededOpcodes.empty()) out(*ios, "Seeded throughput values: ", seededOpcodes.size());
+        unsigned seededPorts = seedPorts(seed);
+        if (seededPorts > 0) out(*ios, "Seeded port usage: ", seededPorts);
+        std::set<unsigned> updatedOpcodes;
+        for (const std::string &reference : referenceNames) {
+            size_t separator = reference.find('=');
+            unsigned opcode = std::numeric_limits<unsigned>::max();
+            PortUsage usage;
+            ErrorCode EC = E_PORT_USAGE;
+            if (separator != std::string::npos) {
+                opcode = getEnv().getOpcode(reference.substr(0, separator));
+                std::tie(EC, usage) = parsePortUsage(reference.substr(separator + 1));
+            }
+            if (opcode == std::numeric_limits<unsigned>::max() || EC != SUCCESS) {
+                std::cerr << "invalid reference \"" << reference
+                          << "\", expected LLVM name and port usage e.g. ADD64rr=p0156"
+                          << std::endl;
+                return 1;
+            }
+            portDatabase[opcode] = usage;
+            updatedOpcodes.insert(opcode);
+        }
+        addPriorityHelpers(seededOpcodes, frequency);
+        if (opcodes.empty()) {
+            out(*ios, "No instructions specified, measuring all instructions from opcode ",
+                minOpcode, " to ", maxOpcode);
+            for (unsigned opcode = minOpcode; opcode < maxOpcode; opcode++)
+                if (opcodeBlacklist.find(opcode) == opcodeBlacklist.end())
+                    opcodes.emplace_back(opcode);
+            buildPortDatabase(opcodes, frequency);
+        } else {
+            showProgress = false;
+            dbgToFile = true;
+            prepAsmDir();
+            buildPortDatabase(opcodes, frequency);
+            for (auto opcode : opcodes) {
+                auto usage = portDatabase.find(opcode);
+                std::cout << getEnv().MCII->getName(opcode).str() << " "
+                          << (usage == portDatabase.end() ? "unknown"
+                                                          : portUsageToString(usage->second))
+                          << std::endl;
+            }
+        }
+        // update output database with the references and the new values
+        updatedOpcodes.insert(opcodes.begin(), opcodes.end());
+        for (unsigned opcode : updatedOpcodes) {
+            auto usage = portDatabase.find(opcode);
+            if (usage == portDatabase.end()) continue;
+            ErrorCode EC = updateDatabaseEntryPorts(opcode, usage->second);
+            if (EC != SUCCESS)
+                out(*ios, "failed to update database entry for ",
+                    getEnv().MCII->getName(opcode).str(), ": ", ecToString(EC));
+        }
+
+        // save database
+        if (databasePath != "/dev/null") {
+            ErrorCode EC = saveYaml(databasePath);
+            if (EC != SUCCESS) return 1;
+        }
+    } else if (*man) {
+        auto [EC, times] =
+            measureInSubprocess(sPath, 3, numInst, 1e6, frequency, funcName, initName);
+        if (EC != SUCCESS) {
+            std::cout << "failed for reason: " << ecToString(EC) << "\n";
+            return 1;
+        }
+        for (auto time : times) {
+            std::cout << time << " ";
+        }
+        double minTime = *std::min_element(times.begin(), times.end());
+        std::cout << " min: " << minTime << "\n";
+
+        // runtime[ticks -> cycles] / number of instructions executed
+        double cyclesPerInstruction = ticksToCycles(minTime, frequency) / (numInst * 1e6);
+        std::cout << cyclesPerInstruction << " (clock cycles)\n";
+    }
+
+    if (!*man) out(*ios, objectCache.getSummary());
+    gettimeofday(&end, NULL);
+    auto totalRuntime = (end.tv_sec - start.tv_sec) + (end.tv_usec - start.tv_usec) / 1e6;
+    out(*ios, "total runtime: ", totalRuntime, " (s)");
+    std::cout << " done" << std::endl;
+
+    return 0;
+}